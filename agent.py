@@ -2,6 +2,7 @@
 
 # Standard library imports
 import asyncio
+import time
 import uuid
 from collections import OrderedDict
 from collections.abc import Awaitable, Callable, Coroutine
@@ -19,12 +20,14 @@ from langchain_core.prompts import ChatPromptTemplate
 # Local application imports
 import models
 from framework.helpers import (
+    class_registry,
     dirty_json,
     errors,
     extract_tools,
     files,
     history,
     log,
+    prompt_cache,
     tokens,
 )
 from framework.helpers.defer import DeferredTask
@@ -155,7 +158,7 @@ class AgentContext:
             ),
             "no": self.no,
             "log_guid": self.log.guid,
-            "log_version": len(self.log.updates),
+            "log_version": self.log.version,
             "log_length": len(self.log.logs),
             "paused": self.paused,
             "last_message": (
@@ -357,6 +360,7 @@ class HandledError(Exception):
 class Agent:
     DATA_NAME_SUPERIOR = "_superior"
     DATA_NAME_SUBORDINATE = "_subordinate"
+    DATA_NAME_SUBORDINATES = "_subordinates"  # fan-out subordinates, see Delegation
     DATA_NAME_CTX_WINDOW = "ctx_window"
 
     def __init__(
@@ -412,13 +416,20 @@ class Agent:
                             type="agent", heading=f"{self.agent_name}: Generating"
                         )
 
+                        # parser state persists across chunks of this response
+                        stream_parser = dirty_json.DirtyJsonStream()
+
                         async def stream_callback(
-                            chunk: str, full: str, printer=printer, log=log
+                            chunk: str,
+                            full: str,
+                            printer=printer,
+                            log=log,
+                            stream_parser=stream_parser,
                         ):
                             # output the agent response stream
                             if chunk:
                                 printer.stream(chunk)
-                                self.log_from_stream(full, log)
+                                self.log_from_stream(chunk, full, log, stream_parser)
 
                         agent_response = await self.call_chat_model(
                             prompt, callback=stream_callback
@@ -570,19 +581,12 @@ class Agent:
         return system_prompt
 
     def parse_prompt(self, file: str, **kwargs):
-        prompt_dir = files.get_abs_path("prompts/default")
-        backup_dir = []
-        if (
-            self.config.prompts_subdir
-        ):  # if agent has custom folder, use it and use default as backup
-            prompt_dir = files.get_abs_path("prompts", self.config.prompts_subdir)
-            backup_dir.append(files.get_abs_path("prompts/default"))
-        prompt = files.parse_file(
-            files.get_abs_path(prompt_dir, file), _backup_dirs=backup_dir, **kwargs
-        )
-        return prompt
+        return self._get_compiled_prompt(file).parse(**kwargs)
 
     def read_prompt(self, file: str, **kwargs) -> str:
+        return self._get_compiled_prompt(file).render(**kwargs)
+
+    def _get_compiled_prompt(self, file: str) -> prompt_cache.CompiledPrompt:
         prompt_dir = files.get_abs_path("prompts/default")
         backup_dir = []
         if (
@@ -590,11 +594,7 @@ class Agent:
         ):  # if agent has custom folder, use it and use default as backup
             prompt_dir = files.get_abs_path("prompts", self.config.prompts_subdir)
             backup_dir.append(files.get_abs_path("prompts/default"))
-        prompt = files.read_file(
-            files.get_abs_path(prompt_dir, file), _backup_dirs=backup_dir, **kwargs
-        )
-        prompt = files.remove_code_fences(prompt)
-        return prompt
+        return prompt_cache.get_prompt(file, prompt_dir, backup_dir)
 
     def get_data(self, field: str, default: Any | None = None):
         """Retrieve a value from the agent's internal data store.
@@ -1222,14 +1222,23 @@ class Agent:
                 content=f"{self.agent_name}: Message misformat, no valid tool request found.",
             )
 
-    def log_from_stream(self, stream: str, log_item: log.LogItem):
+    def log_from_stream(
+        self,
+        chunk: str,
+        stream: str,
+        log_item: log.LogItem,
+        parser: dirty_json.DirtyJsonStream,
+    ):
         try:
+            if len(stream) == len(chunk):
+                parser.reset()  # response restarted (e.g. after a retry)
+            changed = parser.feed(chunk)
             if len(stream) < 25:
-                return  # no reason to try
-            response = dirty_json.parse_string(stream)
-            if isinstance(response, dict):
-                # log if result is a dictionary already
-                log_item.update(content=stream, kvps=response)
+                return  # no reason to log yet
+            if changed and isinstance(parser.result, dict):
+                # log if result is a dictionary already, values are shared with
+                # the parser so this only copies the top-level keys
+                log_item.update(content=stream, kvps=parser.result)
         except Exception:
             pass
 
@@ -1255,9 +1264,7 @@ class Agent:
             print(f"Failed to load plugin tool {name}: {e}")
 
         # Fallback to static tools
-        classes = extract_tools.load_classes_from_folder(
-            "framework/tools", name + ".py", Tool
-        )
+        classes = class_registry.get_classes("framework/tools", name + ".py", Tool)
         tool_class = classes[0] if classes else Unknown
         return tool_class(
             agent=self, name=name, method=method, args=args, message=message, **kwargs
@@ -1280,11 +1287,23 @@ class Agent:
     async def call_extensions(self, folder: str, **kwargs) -> Any:
         from framework.helpers.extension import Extension
 
-        classes = extract_tools.load_classes_from_folder(
+        classes = class_registry.get_classes(
             "framework/extensions/" + folder, "*", Extension
         )
         for cls in classes:
-            await cls(agent=self).execute(**kwargs)
+            start = time.perf_counter()
+            error = False
+            try:
+                await cls(agent=self).execute(**kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                class_registry.record_timing(
+                    f"{folder}/{cls.__module__.rsplit('.', 1)[-1]}",
+                    time.perf_counter() - start,
+                    error,
+                )
 
     async def message_loop(self, msg: str) -> dict[str, Any]:
         pass
@@ -229,7 +229,7 @@ def get_agent_card() -> AgentCard:
 
 def update_agent_card_config(config: dict[str, Any]) -> None:
     """Update A2A configuration in settings"""
-    current_settings = settings.get_settings()
+    current_settings = settings.get_settings().copy()
     current_settings["a2a_config"] = {
         **current_settings.get("a2a_config", {}),
         **config,
@@ -0,0 +1,13 @@
+from framework.helpers import class_registry
+from framework.helpers.api import ApiHandler, Input, Output, Request
+
+
+class ExtensionsStatus(ApiHandler):
+    async def process(self, input: Input, request: Request) -> Output:
+        # optional hot reload of cached extension/tool classes (dev)
+        if input.get("reload"):
+            class_registry.reload(input.get("folder") or None)
+        if input.get("reset_timings"):
+            class_registry.reset_timings()
+
+        return {"timings": class_registry.get_timings()}
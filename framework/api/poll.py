@@ -2,7 +2,7 @@ from agent import AgentContext
 from framework.helpers.api import ApiHandler, Input, Output, Request
 from framework.helpers.dotenv import get_dotenv_value
 from framework.helpers.localization import Localization
-from framework.helpers.task_scheduler import TaskScheduler
+from framework.helpers.task_scheduler import TaskScheduler, serialize_task
 
 
 class Poll(ApiHandler):
@@ -19,80 +19,10 @@ class Poll(ApiHandler):
         # context instance - get or create
         context = self.get_context(ctxid)
 
-        logs = context.log.output(start=from_no)
+        log_version = context.log.version
+        logs = context.log.output(since_version=from_no)
 
-        # loop AgentContext._contexts
-
-        # Get a task scheduler instance
-        scheduler = TaskScheduler.get()
-
-        # Always reload the scheduler on each poll to ensure we have the latest task state
-        # await scheduler.reload() # does not seem to be needed
-
-        # loop AgentContext._contexts and divide into contexts and tasks
-
-        ctxs = []
-        tasks = []
-        processed_contexts = set()  # Track processed context IDs
-
-        all_ctxs = list(AgentContext._contexts.values())
-        # First, identify all tasks
-        for ctx in all_ctxs:
-            # Skip if already processed
-            if ctx.id in processed_contexts:
-                continue
-
-            # Create the base context data that will be returned
-            context_data = ctx.serialize()
-
-            context_task = scheduler.get_task_by_uuid(ctx.id)
-            # Determine if this is a task-dedicated context by checking
-            # if a task with this UUID exists
-            is_task_context = (
-                context_task is not None and context_task.context_id == ctx.id
-            )
-
-            if not is_task_context:
-                ctxs.append(context_data)
-            else:
-                # If this is a task, get task details from the scheduler
-                task_details = scheduler.serialize_task(ctx.id)
-                if task_details:
-                    # Add task details to context_data with the same field names
-                    # as used in scheduler endpoints to maintain UI compatibility
-                    context_data.update(
-                        {
-                            "task_name": task_details.get(
-                                "name"
-                            ),  # name is for context, task_name for the task name
-                            "uuid": task_details.get("uuid"),
-                            "state": task_details.get("state"),
-                            "type": task_details.get("type"),
-                            "system_prompt": task_details.get("system_prompt"),
-                            "prompt": task_details.get("prompt"),
-                            "last_run": task_details.get("last_run"),
-                            "last_result": task_details.get("last_result"),
-                            "attachments": task_details.get("attachments", []),
-                            "context_id": task_details.get("context_id"),
-                        }
-                    )
-
-                    # Add type-specific fields
-                    if task_details.get("type") == "scheduled":
-                        context_data["schedule"] = task_details.get("schedule")
-                    elif task_details.get("type") == "planned":
-                        context_data["plan"] = task_details.get("plan")
-                    else:
-                        context_data["token"] = task_details.get("token")
-
-                tasks.append(context_data)
-
-            # Mark as processed
-            processed_contexts.add(ctx.id)
-
-        # Sort tasks and chats by their creation date, descending
-        ctxs.sort(key=lambda x: x["created_at"], reverse=True)
-        tasks.sort(key=lambda x: x["created_at"], reverse=True)
+        ctxs, tasks = list_contexts()
 
         # data from this server
         return {
@@ -101,8 +31,106 @@ class Poll(ApiHandler):
             "tasks": tasks,
             "logs": logs,
             "log_guid": context.log.guid,
-            "log_version": len(context.log.updates),
+            "log_version": log_version,
             "log_progress": context.log.progress,
             "log_progress_active": context.log.progress_active,
             "paused": context.paused,
         }
+
+
+def list_contexts() -> tuple[list[dict], list[dict]]:
+    """Serialized chat contexts and task contexts, newest first."""
+    # Get a task scheduler instance
+    scheduler = TaskScheduler.get()
+
+    # Always reload the scheduler on each poll to ensure we have the latest task state
+    # await scheduler.reload() # does not seem to be needed
+
+    # index tasks once instead of scanning the task list for every context
+    tasks_by_uuid = {task.uuid: task for task in scheduler.get_tasks()}
+
+    # loop AgentContext._contexts and divide into contexts and tasks
+
+    ctxs = []
+    tasks = []
+    processed_contexts = set()  # Track processed context IDs
+
+    all_ctxs = list(AgentContext._contexts.values())
+    # First, identify all tasks
+    for ctx in all_ctxs:
+        # Skip if already processed
+        if ctx.id in processed_contexts:
+            continue
+
+        # Create the base context data that will be returned
+        context_data = ctx.serialize()
+
+        context_task = tasks_by_uuid.get(ctx.id)
+        # Determine if this is a task-dedicated context by checking
+        # if a task with this UUID exists
+        is_task_context = context_task is not None and context_task.context_id == ctx.id
+
+        if not is_task_context:
+            ctxs.append(context_data)
+        else:
+            # If this is a task, get task details from the scheduler
+            task_details = serialize_task(context_task)
+            if task_details:
+                # Add task details to context_data with the same field names
+                # as used in scheduler endpoints to maintain UI compatibility
+                context_data.update(
+                    {
+                        "task_name": task_details.get(
+                            "name"
+                        ),  # name is for context, task_name for the task name
+                        "uuid": task_details.get("uuid"),
+                        "state": task_details.get("state"),
+                        "type": task_details.get("type"),
+                        "system_prompt": task_details.get("system_prompt"),
+                        "prompt": task_details.get("prompt"),
+                        "last_run": task_details.get("last_run"),
+                        "last_result": task_details.get("last_result"),
+                        "attachments": task_details.get("attachments", []),
+                        "context_id": task_details.get("context_id"),
+                    }
+                )
+
+                # Add type-specific fields
+                if task_details.get("type") == "scheduled":
+                    context_data["schedule"] = task_details.get("schedule")
+                elif task_details.get("type") == "planned":
+                    context_data["plan"] = task_details.get("plan")
+                else:
+                    context_data["token"] = task_details.get("token")
+
+            tasks.append(context_data)
+
+        # Mark as processed
+        processed_contexts.add(ctx.id)
+
+    # Sort tasks and chats by their creation date, descending
+    ctxs.sort(key=lambda x: x["created_at"], reverse=True)
+    tasks.sort(key=lambda x: x["created_at"], reverse=True)
+    return ctxs, tasks
+
+
+def contexts_fingerprint() -> tuple:
+    """Cheap summary of the context list, changes whenever list_contexts would
+    return something a client cares about (log versions excluded)."""
+    return (
+        tuple(
+            (
+                ctx.id,
+                ctx.name,
+                ctx.paused,
+                ctx.log.guid,
+                len(ctx.log.logs),
+                ctx.last_message,
+            )
+            for ctx in AgentContext._contexts.values()
+        ),
+        tuple(
+            (task.uuid, task.state, task.updated_at)
+            for task in TaskScheduler.get().get_tasks()
+        ),
+    )
@@ -0,0 +1,155 @@
+"""Server-sent events alternative to /poll.
+
+Instead of the client asking for a full snapshot every few hundred
+milliseconds, one long-lived response pushes only what changed:
+
+- ``log`` events carry the log items updated since the client's version,
+  with ``id: <log_guid>:<log_version>`` so a reconnecting EventSource resumes
+  from where it stopped (Last-Event-ID). ``reset`` is set when the log was
+  replaced and the client has to clear its view.
+- ``contexts`` events carry the chat and task lists, sent on connect and
+  then only when the lists actually change.
+
+Parameters are read from the JSON body or the query string (EventSource can
+only send GET requests): context, log_guid, log_version, timezone, contexts.
+"""
+
+import json
+import time
+
+from flask import Response
+
+from agent import AgentContext
+from framework.api.poll import contexts_fingerprint, list_contexts
+from framework.helpers.api import ApiHandler, Input, Output, Request
+from framework.helpers.custom_json_encoder import CustomJSONEncoder
+from framework.helpers.dotenv import get_dotenv_value
+from framework.helpers.localization import Localization
+
+ACTIVE_INTERVAL = 0.1  # seconds between checks while the log is changing
+IDLE_INTERVAL = 0.5  # seconds between checks while nothing happens
+ACTIVE_PERIOD = 5.0  # seconds to keep the short interval after a change
+HEARTBEAT_INTERVAL = 15.0  # seconds, keeps proxies open and detects gone clients
+
+
+class PollStream(ApiHandler):
+    async def process(self, input: Input, request: Request) -> Output:
+        params = {**request.args.to_dict(), **input}
+        timezone = params.get(
+            "timezone", get_dotenv_value("DEFAULT_USER_TIMEZONE", "UTC")
+        )
+        Localization.get().set_timezone(timezone)
+
+        context = self.get_context(params.get("context"))
+
+        log_guid, log_version = resume_position(
+            params, request.headers.get("Last-Event-ID", "")
+        )
+        include_contexts = str(params.get("contexts", "true")).lower() != "false"
+
+        return Response(
+            stream_events(context, log_guid, log_version, include_contexts),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+def resume_position(params: dict, last_event_id: str = "") -> tuple[str, int]:
+    """(log_guid, log_version) the client has already seen.
+
+    EventSource sends the id of the last received event on reconnect, it wins
+    over the parameters. A malformed position resyncs the client from scratch.
+    """
+    log_guid, version = params.get("log_guid", ""), params.get("log_version")
+    if ":" in last_event_id:
+        log_guid, _, version = last_event_id.rpartition(":")
+    try:
+        log_version = int(version or 0)
+    except (TypeError, ValueError):
+        log_version = -1
+    if log_version < 0:
+        return "", 0  # an unknown guid makes stream_events send a reset
+    return log_guid, log_version
+
+
+def stream_events(
+    context: AgentContext,
+    log_guid: str = "",
+    log_version: int = 0,
+    include_contexts: bool = True,
+):
+    """Generator of SSE messages for one client, runs until the client disconnects."""
+    yield "retry: 1000\n\n"
+
+    contexts_version = 0
+    contexts_state = None
+    state = None
+    last_change = last_sent = time.monotonic()
+
+    while True:
+        changed = False
+        log = context.log
+
+        if (
+            log.guid != log_guid
+            or log.version != log_version
+            or ((log.progress, log.progress_active, context.paused) != state)
+        ):
+            reset = log.guid != log_guid
+            if reset or log.version < log_version:
+                log_version = 0
+            # read the version first, a concurrent change is then sent twice, never lost
+            log_guid, version = log.guid, log.version
+            logs = log.output(since_version=log_version)
+            log_version = version
+            state = (log.progress, log.progress_active, context.paused)
+            yield format_event(
+                "log",
+                {
+                    "context": context.id,
+                    "reset": reset,
+                    "logs": logs,
+                    "log_guid": log_guid,
+                    "log_version": log_version,
+                    "log_progress": log.progress,
+                    "log_progress_active": log.progress_active,
+                    "paused": context.paused,
+                },
+                id=f"{log_guid}:{log_version}",
+            )
+            changed = True
+
+        if include_contexts:
+            fingerprint = contexts_fingerprint()
+            if fingerprint != contexts_state:
+                contexts_state = fingerprint
+                contexts_version += 1
+                ctxs, tasks = list_contexts()
+                yield format_event(
+                    "contexts",
+                    {"version": contexts_version, "contexts": ctxs, "tasks": tasks},
+                )
+                changed = True
+
+        now = time.monotonic()
+        if changed:
+            last_change = last_sent = now
+        elif now - last_sent > HEARTBEAT_INTERVAL:
+            last_sent = now
+            yield ": heartbeat\n\n"
+
+        # context may have been removed or replaced in the meantime
+        current = AgentContext.get(context.id)
+        if current is not None and current is not context:
+            context = current
+
+        active = now - last_change < ACTIVE_PERIOD
+        time.sleep(ACTIVE_INTERVAL if active else IDLE_INTERVAL)
+
+
+def format_event(event: str, data: dict, id: str | None = None) -> str:
+    lines = [f"event: {event}"]
+    if id is not None:
+        lines.append(f"id: {id}")
+    lines.append("data: " + json.dumps(data, cls=CustomJSONEncoder))
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,11 @@
+from framework.helpers import prompt_cache
+from framework.helpers.api import ApiHandler, Input, Output, Request
+
+
+class PromptCacheStatus(ApiHandler):
+    async def process(self, input: Input, request: Request) -> Output:
+        # optional reset of compiled prompts and counters (dev)
+        if input.get("clear"):
+            prompt_cache.clear()
+
+        return {"stats": prompt_cache.get_stats()}
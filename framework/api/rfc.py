@@ -1,8 +1,32 @@
-from framework.helpers import runtime
+import json
+
+from flask import Response
+
+from framework.helpers import rfc, runtime
 from framework.helpers.api import ApiHandler, Input, Output, Request
+from framework.helpers.custom_json_encoder import CustomJSONEncoder
+
+# lets clients send concurrent calls as one batch
+HEADERS = {rfc.BATCH_HEADER: "1"}
 
 
 class RFC(ApiHandler):
     async def process(self, input: Input, request: Request) -> Output:
+        if request.mimetype == rfc.MSGPACK_MIME:
+            if rfc.msgpack is None:
+                # client falls back to JSON
+                return Response("msgpack is not installed", status=415)
+            input = rfc.msgpack.unpackb(request.get_data())
+            result = await runtime.handle_rfc(input)  # type: ignore
+            return Response(
+                rfc.msgpack.packb(result, default=str),
+                mimetype=rfc.MSGPACK_MIME,
+                headers=HEADERS,
+            )
+
         result = await runtime.handle_rfc(input)  # type: ignore
-        return result
+        return Response(
+            json.dumps(result, cls=CustomJSONEncoder),
+            mimetype="application/json",
+            headers=HEADERS,
+        )
@@ -5,11 +5,13 @@ Secure code execution framework for Gary Zero agent.
 from .base_executor import BaseCodeExecutor
 from .docker_executor import DockerCodeExecutor
 from .e2b_executor import E2BCodeExecutor
+from .kernel_executor import KernelCodeExecutor
 from .secure_manager import SecureCodeExecutionManager
 
 __all__ = [
     "BaseCodeExecutor",
     "E2BCodeExecutor",
     "DockerCodeExecutor",
+    "KernelCodeExecutor",
     "SecureCodeExecutionManager",
 ]
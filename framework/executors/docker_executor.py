@@ -10,6 +10,9 @@ import docker
 
 from .base_executor import BaseCodeExecutor
 
+# larger snippets go through a file, command lines have a size limit
+MAX_INLINE_CODE = 64 * 1024
+
 
 class DockerCodeExecutor(BaseCodeExecutor):
     """Secure code execution using Docker containers."""
@@ -157,6 +160,14 @@ class DockerCodeExecutor(BaseCodeExecutor):
 
     def _execute_python(self, container, code: str) -> dict[str, Any]:
         """Execute Python code in container."""
+        if len(code.encode()) <= MAX_INLINE_CODE:
+            # one round-trip instead of mkdir, write, run and rm
+            start_time = time.time()
+            exec_result = container.exec_run(
+                ["python", "-c", code], user="root", workdir="/workspace"
+            )
+            return self._python_result(exec_result, time.time() - start_time)
+
         # Write code to temporary file
         code_file = f"/workspace/temp/code_{uuid.uuid4().hex}.py"
 
@@ -192,6 +203,9 @@ class DockerCodeExecutor(BaseCodeExecutor):
         # Clean up code file
         container.exec_run(["rm", "-f", code_file], user="root")
 
+        return self._python_result(exec_result, execution_time)
+
+    def _python_result(self, exec_result, execution_time: float) -> dict[str, Any]:
         output = exec_result.output.decode() if exec_result.output else ""
 
         return {
@@ -0,0 +1,419 @@
+"""
+Persistent local Python kernels for Gary Zero agent.
+
+Each session gets a long-lived interpreter (kernel_worker.py) that keeps
+its variables and imports between snippets, instead of paying for a new
+``ipython -c`` per snippet. Snippets and their results travel as framed
+messages over a pair of pipes, stdout and stderr are streamed while the
+snippet runs, and a running snippet can be interrupted with SIGINT. A few
+started kernels are kept as spares, so a new session does not wait for
+interpreter start-up. Kernels run on the host without isolation.
+"""
+
+import atexit
+import codecs
+import contextlib
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+from .base_executor import BaseCodeExecutor
+from .kernel_worker import LENGTH
+
+WORKER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "kernel_worker.py"
+)
+START_TIMEOUT = 30.0  # seconds for a kernel to report ready
+INTERRUPT_GRACE = 5.0  # seconds after SIGINT before the kernel is killed
+MARKER_TIMEOUT = 2.0  # seconds to wait for the rest of the output after a reply
+
+OutputCallback = Callable[[str], None]
+
+
+class KernelDiedError(RuntimeError):
+    pass
+
+
+class PythonKernel:
+    """One interpreter process, executes one snippet at a time."""
+
+    def __init__(self, python: str = sys.executable, cwd: str | None = None):
+        self.python = python
+        self.cwd = cwd
+        self.process: subprocess.Popen | None = None
+        self._marker = f"\x1e{uuid.uuid4().hex}\x1e".encode()
+        self._requests = -1
+        self._replies = -1
+        self._lock = threading.Lock()  # one execution at a time
+        self._sink_lock = threading.Lock()
+        self._sink: OutputCallback | None = None
+        self._pending_streams: set[str] = set()
+        self._streams_done = threading.Condition(self._sink_lock)
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        request_r, request_w = os.pipe()
+        reply_r, reply_w = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [
+                    self.python,
+                    "-u",
+                    WORKER_PATH,
+                    str(request_r),
+                    str(reply_w),
+                    self._marker.decode(),
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                pass_fds=(request_r, reply_w),
+                cwd=self.cwd,
+                start_new_session=True,  # Ctrl+C of the app does not reach it
+            )
+        finally:
+            os.close(request_r)
+            os.close(reply_w)
+        self._requests, self._replies = request_w, reply_r
+        for name, stream in (
+            ("stdout", self.process.stdout),
+            ("stderr", self.process.stderr),
+        ):
+            threading.Thread(
+                target=self._read_stream,
+                args=(name, stream),
+                name=f"kernel-{self.process.pid}-{name}",
+                daemon=True,
+            ).start()
+        reply = self._read_reply(START_TIMEOUT)
+        if reply is None or reply.get("type") != "ready":
+            self.kill()
+            raise KernelDiedError("Python kernel did not start")
+
+    def execute(
+        self,
+        code: str,
+        on_output: OutputCallback | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Run code, calling on_output with output chunks as they arrive.
+
+        After timeout seconds the snippet is interrupted. A kernel that does
+        not stop within INTERRUPT_GRACE seconds, or that dies, is killed and
+        KernelDiedError is raised; its state is lost.
+        """
+        with self._lock:
+            if not self.alive:
+                raise KernelDiedError("Python kernel is not running")
+            chunks: list[str] = []
+
+            def sink(text: str):
+                chunks.append(text)
+                if on_output:
+                    on_output(text)
+
+            self._next_id += 1
+            with self._sink_lock:
+                self._sink = sink
+                self._pending_streams = {"stdout", "stderr"}
+            start_time = time.time()
+            try:
+                self._write_frame(
+                    {"type": "execute", "id": self._next_id, "code": code}
+                )
+                reply = self._read_reply(timeout)
+                if reply is None and self.alive:
+                    self.interrupt()
+                    reply = self._read_reply(INTERRUPT_GRACE)
+                if reply is None:
+                    self.kill()
+                    raise KernelDiedError("Python kernel stopped responding")
+                with self._sink_lock:
+                    self._streams_done.wait_for(
+                        lambda: not self._pending_streams, MARKER_TIMEOUT
+                    )
+            finally:
+                with self._sink_lock:
+                    self._sink = None
+            return {
+                "success": reply["ok"],
+                "output": "".join(chunks),
+                "error": reply.get("error"),
+                "execution_time": time.time() - start_time,
+            }
+
+    def interrupt(self):
+        """Raise KeyboardInterrupt in the running snippet."""
+        if self.alive:
+            os.kill(self.process.pid, signal.SIGINT)  # type: ignore
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        for fd in (self._requests, self._replies):
+            if fd >= 0:
+                with contextlib.suppress(OSError):
+                    os.close(fd)
+        self._requests = self._replies = -1
+
+    def _write_frame(self, message: dict):
+        data = json.dumps(message).encode()
+        data = LENGTH.pack(len(data)) + data
+        try:
+            while data:
+                data = data[os.write(self._requests, data) :]
+        except OSError as e:
+            self.kill()
+            raise KernelDiedError("Python kernel is not running") from e
+
+    def _read_reply(self, timeout: float | None) -> dict | None:
+        """Next reply frame, None on timeout, KernelDiedError on EOF."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        header = self._read_exact(LENGTH.size, deadline)
+        if header is None:
+            return None
+        (length,) = LENGTH.unpack(header)
+        return json.loads(self._read_exact(length, None))  # type: ignore
+
+    def _read_exact(self, size: int, deadline: float | None) -> bytes | None:
+        data = b""
+        while len(data) < size:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._replies], [], [], wait)
+            if not ready:
+                return None
+            chunk = os.read(self._replies, size - len(data))
+            if not chunk:
+                self.kill()
+                raise KernelDiedError("Python kernel exited, its state was lost")
+            data += chunk
+        return data
+
+    def _read_stream(self, name: str, stream: Any):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        fd = stream.fileno()
+        buffer = b""
+        while chunk := os.read(fd, 65536):
+            buffer += chunk
+            while True:
+                index = buffer.find(self._marker)
+                if index < 0:
+                    # keep only a tail that could be the start of a marker
+                    split = buffer.rfind(self._marker[:1])
+                    if split < 0 or not self._marker.startswith(buffer[split:]):
+                        split = len(buffer)
+                    out, buffer = buffer[:split], buffer[split:]
+                    self._deliver(name, decoder.decode(out), done=False)
+                    break
+                out, buffer = buffer[:index], buffer[index + len(self._marker) :]
+                self._deliver(name, decoder.decode(out), done=True)
+        stream.close()
+        with self._sink_lock:
+            self._pending_streams.discard(name)
+            self._streams_done.notify_all()
+
+    def _deliver(self, name: str, text: str, done: bool):
+        with self._sink_lock:
+            sink = self._sink if name in self._pending_streams else None
+            if done:
+                self._pending_streams.discard(name)
+                self._streams_done.notify_all()
+        # output between snippets (background threads) has nobody to go to
+        if sink and text:
+            sink(text)
+
+
+class KernelPool:
+    """Started kernels waiting to be handed to new sessions."""
+
+    def __init__(self, spares: int):
+        self.spares = spares
+        self._idle: list[PythonKernel] = []
+        self._lock = threading.Lock()
+        self._warming = False
+
+    def acquire(self) -> PythonKernel:
+        with self._lock:
+            while self._idle:
+                kernel = self._idle.pop()
+                if kernel.alive:
+                    break
+            else:
+                kernel = None
+        if kernel is None:
+            kernel = PythonKernel()
+            kernel.start()
+        self.warm()
+        return kernel
+
+    def warm(self):
+        """Start spare kernels in the background."""
+        with self._lock:
+            if self._warming or len(self._idle) >= self.spares:
+                return
+            self._warming = True
+        threading.Thread(target=self._fill, name="kernel-pool", daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for kernel in idle:
+            kernel.kill()
+
+    def _fill(self):
+        try:
+            while True:
+                with self._lock:
+                    if len(self._idle) >= self.spares:
+                        return
+                kernel = PythonKernel()
+                kernel.start()
+                with self._lock:
+                    self._idle.append(kernel)
+        except Exception as e:
+            print(f"⚠️  Warning: Could not start spare Python kernel: {e}")
+        finally:
+            with self._lock:
+                self._warming = False
+
+
+_pool: KernelPool | None = None
+_executors: "weakref.WeakSet[KernelCodeExecutor]" = weakref.WeakSet()
+
+
+def get_pool() -> KernelPool:
+    global _pool
+    if _pool is None:
+        _pool = KernelPool(int(os.getenv("CODE_EXEC_KERNEL_SPARES", "1")))
+    return _pool
+
+
+class KernelCodeExecutor(BaseCodeExecutor):
+    """Local execution in persistent Python kernels, without isolation.
+
+    Every instance owns its sessions, cleanup_all() only kills the kernels
+    of this instance. Kernels still running at exit are killed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        if os.name != "posix":
+            raise RuntimeError("Python kernels need a POSIX system")
+        _executors.add(self)
+        get_pool().warm()
+
+    def create_session(self, session_id: str | None = None) -> str:
+        """Create a new session with its own kernel."""
+        if session_id is None:
+            session_id = self._generate_session_id()
+
+        if session_id in self.sessions:
+            return session_id
+
+        self.sessions[session_id] = get_pool().acquire()
+        self.session_metadata[session_id] = self._create_session_metadata(session_id)
+        return session_id
+
+    def execute_code(
+        self,
+        session_id: str,
+        code: str,
+        language: str = "python",
+        on_output: OutputCallback | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Execute code in the session's kernel, streaming output to on_output."""
+        if session_id not in self.sessions:
+            raise ValueError(f"Session {session_id} not found")
+
+        if language.lower() in ["bash", "shell", "sh"]:
+            return self._execute_shell(code, timeout)
+        if language.lower() != "python":
+            raise ValueError(f"Unsupported language: {language}")
+
+        kernel = self.sessions[session_id]
+        try:
+            if not kernel.alive:
+                # died during an earlier snippet, continue with a fresh one
+                kernel = self.sessions[session_id] = get_pool().acquire()
+            result = kernel.execute(code, on_output, timeout)
+        except KernelDiedError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "stdout": "",
+                "stderr": "",
+                "execution_time": 0,
+            }
+
+        self.session_metadata[session_id]["execution_count"] += 1
+        return {
+            "success": result["success"],
+            "stdout": result["output"],
+            "stderr": "" if result["success"] else result["output"],
+            "error": result["error"],
+            "execution_time": result["execution_time"],
+        }
+
+    def interrupt(self, session_id: str):
+        """Interrupt the snippet running in the session."""
+        kernel = self.sessions.get(session_id)
+        if kernel is not None:
+            kernel.interrupt()
+
+    def close_session(self, session_id: str):
+        """Close and cleanup session."""
+        kernel = self.sessions.pop(session_id, None)
+        self.session_metadata.pop(session_id, None)
+        if kernel is not None:
+            kernel.kill()
+
+    def _execute_shell(self, command: str, timeout: float | None) -> dict[str, Any]:
+        start_time = time.time()
+        try:
+            result = subprocess.run(
+                ["bash", "-c", command],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired as e:
+            return {
+                "success": False,
+                "error": f"Command timed out after {timeout}s",
+                "stdout": e.stdout or "",
+                "stderr": e.stderr or "",
+                "execution_time": time.time() - start_time,
+            }
+        return {
+            "success": result.returncode == 0,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "execution_time": time.time() - start_time,
+            "exit_code": result.returncode,
+        }
+
+
+def _shutdown():
+    if _pool is not None:
+        _pool.shutdown()
+    for executor in list(_executors):
+        for kernel in list(executor.sessions.values()):
+            kernel.kill()
+
+
+atexit.register(_shutdown)
@@ -0,0 +1,94 @@
+"""
+Interpreter side of the persistent Python kernel, see kernel_executor.
+
+Started as ``python -u kernel_worker.py <request fd> <reply fd> <marker>``.
+Requests and replies are frames on the two pipes: a 4-byte big-endian
+length followed by a JSON object. stdout and stderr stay the process' own,
+so the output of a snippet and of the processes it starts reaches the
+parent in order; after each snippet the marker is written to both streams
+to delimit its output. Only the standard library is used here.
+"""
+
+import ast
+import json
+import linecache
+import os
+import signal
+import struct
+import sys
+import traceback
+
+LENGTH = struct.Struct(">I")
+
+_running = False  # SIGINT only interrupts while a snippet runs
+
+
+def read_frame(stream) -> dict | None:
+    header = stream.read(LENGTH.size)
+    if len(header) < LENGTH.size:
+        return None  # parent closed the pipe
+    (length,) = LENGTH.unpack(header)
+    return json.loads(stream.read(length))
+
+
+def write_frame(stream, message: dict):
+    data = json.dumps(message).encode()
+    stream.write(LENGTH.pack(len(data)) + data)
+    stream.flush()
+
+
+def run(code: str, filename: str, namespace: dict):
+    """Execute code, printing the repr of a final expression like IPython."""
+    linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+    tree = ast.parse(code, filename, "exec")
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = ast.Expression(tree.body.pop().value)
+    exec(compile(tree, filename, "exec"), namespace)
+    if last is not None:
+        value = eval(compile(last, filename, "eval"), namespace)
+        if value is not None:
+            namespace["_"] = value
+            print(repr(value))
+
+
+def on_sigint(signum, frame):
+    if _running:
+        raise KeyboardInterrupt
+
+
+def main():
+    global _running
+    requests = os.fdopen(int(sys.argv[1]), "rb")
+    replies = os.fdopen(int(sys.argv[2]), "wb")
+    marker = sys.argv[3].encode()
+    signal.signal(signal.SIGINT, on_sigint)
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    write_frame(replies, {"type": "ready", "pid": os.getpid()})
+
+    while (request := read_frame(requests)) is not None:
+        ok, error = True, None
+        try:
+            _running = True
+            run(request["code"], f"<kernel-{request['id']}>", namespace)
+        except BaseException as e:  # SystemExit too, the kernel lives on
+            _running = False
+            ok = False
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            tb = None if isinstance(e, SyntaxError) else e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename == __file__:
+                tb = tb.tb_next  # hide the kernel's own frames
+            traceback.print_exception(type(e), e, tb)
+        finally:
+            _running = False
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.write(1, marker)
+            os.write(2, marker)
+        write_frame(
+            replies, {"type": "done", "id": request["id"], "ok": ok, "error": error}
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 """
 Secure Code Execution Manager for Gary Zero agent.
-Intelligently chooses between E2B, Docker, and fallback execution.
+Intelligently chooses between E2B, Docker, local kernels and fallback execution.
 """
 
 import os
+from collections.abc import Callable
 from typing import Any
 
 
@@ -31,6 +32,9 @@ class SecureCodeExecutionManager:
         )
         self.executor_type = "fallback"
 
+        # Python still runs in persistent local kernels when possible
+        self._try_kernel()
+
     def _try_e2b(self) -> bool:
         """Try to initialize E2B executor."""
         try:
@@ -61,6 +65,25 @@ class SecureCodeExecutionManager:
             print(f"⚠️  Docker executor failed to initialize: {e}")
             return False
 
+    def _try_kernel(self) -> bool:
+        """Try to initialize the local Python kernel executor."""
+        if os.getenv("CODE_EXEC_KERNEL", "true").lower() in ("0", "false", "no"):
+            return False
+        try:
+            from .kernel_executor import KernelCodeExecutor
+
+            self.executor = KernelCodeExecutor()
+            self.executor_type = "kernel"
+            print("✅ Using persistent local Python kernels")
+            return True
+        except Exception as e:
+            print(f"⚠️  Kernel executor failed to initialize: {e}")
+            return False
+
+    def is_kernel_available(self) -> bool:
+        """Check if Python runs in persistent local kernels (not isolated)."""
+        return self.executor_type == "kernel"
+
     def is_secure_execution_available(self) -> bool:
         """Check if secure execution is available."""
         return self.executor_type in ["e2b", "docker"]
@@ -73,6 +96,7 @@ class SecureCodeExecutionManager:
             "description": {
                 "e2b": "E2B Cloud Sandbox - Enterprise-grade isolation",
                 "docker": "Docker Container - Local secure execution",
+                "kernel": "Local Python kernel - No isolation (security risk)",
                 "fallback": "Local execution - No isolation (security risk)",
             }.get(self.executor_type, "Unknown"),
         }
@@ -88,11 +112,27 @@ class SecureCodeExecutionManager:
             return str(uuid.uuid4()) if session_id is None else session_id
 
     def execute_code(
-        self, session_id: str, code: str, language: str = "python"
+        self,
+        session_id: str,
+        code: str,
+        language: str = "python",
+        on_output: Callable[[str], None] | None = None,
+        timeout: float | None = None,
     ) -> dict[str, Any]:
-        """Execute code in the specified session."""
+        """Execute code in the specified session.
+
+        on_output receives output while it is produced, by executors that
+        stream it (kernel); the others only return it in the result. The
+        kernel interrupts code running longer than timeout seconds, and is
+        killed if it does not stop.
+        """
         if self.executor:
-            result = self.executor.execute_code(session_id, code, language)
+            if self.executor_type == "kernel":
+                result = self.executor.execute_code(
+                    session_id, code, language, on_output=on_output, timeout=timeout
+                )
+            else:
+                result = self.executor.execute_code(session_id, code, language)
             # Add executor type to result for debugging
             result["executor_type"] = self.executor_type
             return result
@@ -127,6 +167,11 @@ class SecureCodeExecutionManager:
         else:
             return {"error": "Session not available", "executor_type": "fallback"}
 
+    def interrupt(self, session_id: str):
+        """Interrupt code running in the session (kernel only)."""
+        if hasattr(self.executor, "interrupt"):
+            self.executor.interrupt(session_id)
+
     def close_session(self, session_id: str):
         """Close and cleanup session."""
         if self.executor:
@@ -7,6 +7,7 @@ from typing import Any, TypedDict, Union
 from flask import Flask, Request, Response
 
 from agent import AgentContext
+from framework.helpers import http_client
 from framework.helpers.custom_json_encoder import CustomJSONEncoder
 from framework.helpers.errors import format_error
 from framework.helpers.print_style import PrintStyle
@@ -38,6 +39,13 @@ class ApiHandler:
         pass
 
     async def handle_request(self, request: Request) -> Response:
+        try:
+            return await self._handle_request(request)
+        finally:
+            # every request runs in a loop of its own
+            await http_client.close_session()
+
+    async def _handle_request(self, request: Request) -> Response:
         try:
             # input data from request based on type
             input_data: Input = {}
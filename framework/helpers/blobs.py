@@ -0,0 +1,127 @@
+"""Content-addressed store for large binary and text payloads.
+
+History records keep a small reference instead of the payload itself::
+
+    {"_blob": "<sha256>"}                            # text
+    {"_blob": "<sha256>", "mime_type": "image/jpeg"}  # binary, used as data URL
+
+Blobs are stored once under tmp/blobs no matter how many messages or chats
+refer to them, and are turned back into their value by materialize() only
+where the full payload is needed, e.g. when building LLM messages. Blobs that
+no saved chat refers to anymore are deleted by sweep() when chats are loaded.
+"""
+
+import base64
+import hashlib
+import os
+import time
+from functools import lru_cache
+from typing import Any
+
+from framework.helpers import files
+
+BLOBS_FOLDER = "tmp/blobs"
+REF_KEY = "_blob"
+CACHE_SIZE = 32  # materialized blobs kept in memory
+SWEEP_MIN_AGE = 24 * 3600.0  # seconds, younger blobs may not be saved yet
+
+
+def put(data: bytes | str, mime_type: str | None = None) -> dict:
+    """Store data and return a reference to it, identical data is stored once."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = _get_blob_path(digest)
+    try:
+        os.utime(path)  # in use again, see sweep
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    ref = {REF_KEY: digest}
+    if mime_type:
+        ref["mime_type"] = mime_type
+    return ref
+
+
+def get(ref: dict) -> bytes:
+    with open(_get_blob_path(ref[REF_KEY]), "rb") as f:
+        return f.read()
+
+
+def is_ref(obj: Any) -> bool:
+    return isinstance(obj, dict) and REF_KEY in obj
+
+
+def materialize(obj: Any) -> Any:
+    """Copy of obj with every blob reference replaced by its value.
+
+    Binary blobs become data URLs, text blobs become strings. Objects without
+    references are returned as they are.
+    """
+    if is_ref(obj):
+        return _load(obj[REF_KEY], obj.get("mime_type"))
+    if isinstance(obj, dict):
+        values = {k: materialize(v) for k, v in obj.items()}
+        if all(values[k] is v for k, v in obj.items()):
+            return obj
+        return values
+    if isinstance(obj, list):
+        items = [materialize(v) for v in obj]
+        if all(a is b for a, b in zip(items, obj, strict=True)):
+            return obj
+        return items
+    return obj
+
+
+def find_refs(obj: Any) -> set[str]:
+    """Digests of all blob references in obj."""
+    if is_ref(obj):
+        return {obj[REF_KEY]}
+    if isinstance(obj, dict):
+        values = obj.values()
+    elif isinstance(obj, list):
+        values = obj
+    else:
+        return set()
+    return set().union(*(find_refs(v) for v in values))
+
+
+def sweep(keep: set[str], min_age: float = SWEEP_MIN_AGE) -> int:
+    """Delete blobs not in keep that are older than min_age, return their number."""
+    root = files.get_abs_path(BLOBS_FOLDER)
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - min_age
+    removed = 0
+    for folder in os.scandir(root):
+        if not folder.is_dir():
+            continue
+        for blob in os.scandir(folder.path):
+            # .tmp files are writes that never finished
+            digest = blob.name.split(".", 1)[0]
+            if digest in keep and not blob.name.endswith(".tmp"):
+                continue
+            try:
+                if blob.stat().st_mtime < cutoff:
+                    os.remove(blob.path)
+                    removed += 1
+            except OSError:
+                pass  # removed or replaced meanwhile
+    _load.cache_clear()
+    return removed
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _load(digest: str, mime_type: str | None) -> str:
+    data = get({REF_KEY: digest})
+    if mime_type:
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+    return data.decode("utf-8")
+
+
+def _get_blob_path(digest: str) -> str:
+    return files.get_abs_path(BLOBS_FOLDER, digest[:2], digest)
@@ -0,0 +1,150 @@
+"""Import-once registry of extension and tool classes.
+
+load_classes_from_folder lists the folder, imports every matching module and
+inspects its members. Agents resolve extensions on every message loop hook
+and tools on every tool call, so the result is cached here per
+(folder, pattern, base class) and only rebuilt when a file in the folder
+changes (checked at most every CHECK_INTERVAL seconds) or reload() is called.
+Changed modules are re-imported so edits are picked up without a restart.
+
+The registry also keeps execution timings per class so slow hooks are visible.
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from framework.helpers.extract_tools import load_classes_from_folder
+from framework.helpers.files import get_abs_path
+
+CHECK_INTERVAL = 1.0  # seconds between file change checks of a folder
+SLOW_THRESHOLD = 1.0  # seconds, executions above are counted as slow
+
+
+@dataclass
+class _Entry:
+    classes: list[type]
+    signature: tuple
+    checked_at: float
+
+
+@dataclass
+class Timing:
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+    slow: int = 0
+    errors: int = 0
+    started: float = field(default_factory=time.time)
+
+    def output(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total / self.calls * 1000, 3) if self.calls else 0,
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+            "slow": self.slow,
+            "errors": self.errors,
+        }
+
+
+_lock = threading.RLock()
+_entries: dict[tuple, _Entry] = {}
+_module_mtimes: dict[str, int] = {}
+_timings: dict[str, Timing] = {}
+
+
+def get_classes(
+    folder: str, name_pattern: str, base_class: type, one_per_file: bool = True
+) -> list[type]:
+    """Cached equivalent of extract_tools.load_classes_from_folder."""
+    key = (folder, name_pattern, base_class, one_per_file)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and now - entry.checked_at < CHECK_INTERVAL:
+            return list(entry.classes)
+
+        signature = _folder_signature(folder)
+        if entry is not None and entry.signature == signature:
+            entry.checked_at = now
+            return list(entry.classes)
+
+        _reload_changed_modules(folder, signature)
+        classes = load_classes_from_folder(
+            folder, name_pattern, base_class, one_per_file
+        )
+        _entries[key] = _Entry(classes=classes, signature=signature, checked_at=now)
+        return list(classes)
+
+
+def reload(folder: str | None = None):
+    """Drop cached classes (of one folder or all) and re-import their modules."""
+    with _lock:
+        for key in list(_entries):
+            if folder is None or key[0] == folder:
+                del _entries[key]
+        for module_name in list(_module_mtimes):
+            if folder is None or module_name.startswith(_module_prefix(folder)):
+                del _module_mtimes[module_name]
+                module = sys.modules.get(module_name)
+                if module is not None:
+                    importlib.reload(module)
+
+
+def record_timing(name: str, duration: float, error: bool = False):
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            timing = _timings[name] = Timing()
+        timing.calls += 1
+        timing.total += duration
+        timing.last = duration
+        timing.max = max(timing.max, duration)
+        if duration > SLOW_THRESHOLD:
+            timing.slow += 1
+        if error:
+            timing.errors += 1
+
+
+def get_timings(sort_by: str = "total_ms") -> dict[str, dict[str, Any]]:
+    """Execution statistics per class, slowest first."""
+    with _lock:
+        output = {name: timing.output() for name, timing in _timings.items()}
+    return dict(sorted(output.items(), key=lambda i: i[1][sort_by], reverse=True))
+
+
+def reset_timings():
+    with _lock:
+        _timings.clear()
+
+
+def _module_prefix(folder: str) -> str:
+    return folder.replace("/", ".") + "."
+
+
+def _folder_signature(folder: str) -> tuple:
+    abs_folder = get_abs_path(folder)
+    files = []
+    with os.scandir(abs_folder) as it:
+        for entry in it:
+            if entry.name.endswith(".py"):
+                files.append((entry.name, entry.stat().st_mtime_ns))
+    return tuple(sorted(files))
+
+
+def _reload_changed_modules(folder: str, signature: tuple):
+    # modules already imported stay in sys.modules, re-import the edited ones
+    prefix = _module_prefix(folder)
+    for file_name, mtime in signature:
+        module_name = prefix + file_name[:-3]
+        known = _module_mtimes.get(module_name)
+        _module_mtimes[module_name] = mtime
+        if known is not None and known != mtime and module_name in sys.modules:
+            importlib.reload(sys.modules[module_name])
@@ -1,4 +1,5 @@
 import json
+import re
 
 
 def try_parse(json_string: str):
@@ -26,6 +27,7 @@ class DirtyJson:
         self.current_char = None
         self.result = None
         self.stack = []
+        self._stream: DirtyJsonStream | None = None
 
     @staticmethod
     def parse_string(json_string):
@@ -53,10 +55,12 @@ class DirtyJson:
         return self.result
 
     def feed(self, chunk):
+        # incremental input is handled by a resumable parser keeping its state
+        if self._stream is None:
+            self._stream = DirtyJsonStream()
         self.json_string += chunk
-        if not self.current_char and self.json_string:
-            self.current_char = self.json_string[0]
-        self._parse()
+        self._stream.feed(chunk)
+        self.result = self._stream.result
         return self.result
 
     def _advance(self, count=1):
@@ -335,3 +339,377 @@ class DirtyJson:
         chars = ["{", "[", '"']
         indices = [input_str.find(char) for char in chars if input_str.find(char) != -1]
         return min(indices) if indices else 0
+
+
+class DirtyJsonStream:
+    """Resumable dirty JSON parser for streamed text.
+
+    Every character is consumed once. Open containers, the current key and
+    partially read strings, numbers and comments are kept between feed()
+    calls, so feeding a chunk costs time proportional to the chunk, not to
+    everything received so far. feed() returns the top-level keys whose
+    values changed with the chunk, partial strings included.
+    """
+
+    _QUOTES = ('"', "'", "`")
+    _LITERALS = {"true": True, "false": False, "null": None, "undefined": None}
+    _ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+    _STRING_STOPS = {q: re.compile("[\\\\" + q + "]") for q in _QUOTES}
+    _TOKEN_ENDS = {
+        "key": re.compile(r"[\s:,}\]]"),
+        "number": re.compile(r"[^0-9eE+\-.]"),
+        "unquoted": re.compile(r"[:,}\]]"),
+    }
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.result = None
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._started = False
+        self._stack: list[dict] = []  # open containers
+        self._scalar: dict | None = None  # token currently being read
+        self._touched: set = set()
+
+    def feed(self, chunk: str) -> dict:
+        """Consume a chunk, return {top-level key: value} for keys it changed"""
+        if self.done or not chunk:
+            return {}
+        # only the few characters held back for lookahead are carried over
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        self._consume(final=False)
+        return self._flush()
+
+    def close(self):
+        """Finish the input, resolving tokens that were waiting for lookahead"""
+        if not self.done:
+            self._consume(final=True)
+            if self._scalar is not None and self._scalar["kind"] != "comment":
+                self._end_scalar()
+            self._flush()
+            self.done = True
+        return self.result
+
+    def _consume(self, final: bool):
+        while self._pos < len(self._buf) and not self.done:
+            before = self._marker()
+            if self._scalar is not None:
+                self._read_scalar(final)
+            elif not self._stack:
+                self._read_root()
+            elif self._stack[-1]["type"] == "object":
+                self._read_object(final)
+            else:
+                self._read_array(final)
+            if self._marker() == before:
+                break  # waiting for more input
+
+    def _marker(self):
+        state = self._stack[-1]["state"] if self._stack else None
+        return (self._pos, id(self._scalar), len(self._stack), state, self.done)
+
+    def _flush(self) -> dict:
+        scalar = self._scalar
+        if scalar is not None and scalar["kind"] in ("string", "multiline", "unquoted"):
+            if len(scalar["parts"]) > 1:
+                scalar["parts"] = ["".join(scalar["parts"])]
+            if not scalar.get("key"):
+                value = scalar["parts"][0] if scalar["parts"] else ""
+                if scalar["kind"] != "string":
+                    value = value.lstrip()
+                self._assign(value)
+        touched, self._touched = self._touched, set()
+        if not isinstance(self.result, dict):
+            return {}
+        return {k: self.result[k] for k in touched if k in self.result}
+
+    # structure
+
+    def _read_root(self):
+        if not self._started:
+            # skip text preceding the json itself
+            starts = [
+                i for i in (self._buf.find(c, self._pos) for c in '{["') if i != -1
+            ]
+            if not starts:
+                self._pos = len(self._buf)
+                return
+            self._pos = min(starts)
+            self._started = True
+        if self.result is None:
+            self._begin_value(final=False)
+        else:
+            self.done = True  # ignore anything after the first value
+
+    def _read_object(self, final: bool):
+        frame = self._stack[-1]
+        if not self._skip_whitespace(final):
+            return
+        c = self._buf[self._pos]
+        state = frame["state"]
+        if c == "}":
+            self._close_object(frame, final)
+        elif state == "key":
+            if c in ",]":
+                self._pos += 1
+            elif c in ('"', "'"):
+                self._pos += 1
+                self._scalar = {"kind": "string", "quote": c, "parts": [], "key": True}
+            else:
+                self._scalar = {"kind": "key", "parts": []}
+        elif state == "colon":
+            if c == ":":
+                self._pos += 1
+            frame["state"] = "value"
+        elif state == "value":
+            self._begin_value(final)
+        else:
+            if c == ",":
+                self._pos += 1
+            frame["state"] = "key"
+
+    def _close_object(self, frame: dict, final: bool):
+        if frame["double"]:
+            # objects opened with {{ close with }}
+            if self._pos + 1 >= len(self._buf) and not final:
+                return
+            if self._buf[self._pos + 1 : self._pos + 2] == "}":
+                self._pos += 1
+        if frame["state"] in ("colon", "value"):
+            self._assign(None)  # key without a value
+        self._pos += 1
+        self._pop()
+
+    def _read_array(self, final: bool):
+        frame = self._stack[-1]
+        if not self._skip_whitespace(final):
+            return
+        c = self._buf[self._pos]
+        if c == "]":
+            self._pos += 1
+            self._pop()
+        elif frame["state"] == "value":
+            self._begin_value(final)
+        elif c == ",":
+            self._pos += 1
+            frame["state"] = "value"
+        else:
+            self._pop()  # anything else after an item ends the array
+
+    def _pop(self):
+        self._touch()
+        self._stack.pop()
+        self._after_value()
+
+    def _after_value(self):
+        if not self._stack:
+            self.done = True
+        else:
+            self._stack[-1]["state"] = "after"
+
+    def _begin_value(self, final: bool):
+        buf, pos = self._buf, self._pos
+        c = buf[pos]
+        if c == "{":
+            if pos + 1 >= len(buf) and not final:
+                return
+            double = buf[pos + 1 : pos + 2] == "{"
+            self._pos += 2 if double else 1
+            obj: dict = {}
+            self._assign(obj)
+            self._stack.append(
+                {"type": "object", "value": obj, "state": "key", "double": double}
+            )
+        elif c == "[":
+            self._pos += 1
+            arr: list = []
+            self._assign(arr)
+            self._stack.append({"type": "array", "value": arr, "state": "value"})
+        elif c in self._QUOTES:
+            if pos + 2 >= len(buf) and not final:
+                return
+            kind = "multiline" if buf[pos + 1 : pos + 3] == c * 2 else "string"
+            self._pos += 3 if kind == "multiline" else 1
+            self._scalar = {"kind": kind, "quote": c, "parts": []}
+            self._assign("", partial=True)
+        elif c.isdigit() or c in "-+":
+            self._scalar = {"kind": "number", "parts": []}
+        elif c in ",:]}":
+            self._assign(None)  # missing value
+            self._after_value()
+        else:
+            for word, value in self._LITERALS.items():
+                candidate = buf[pos : pos + len(word)].lower()
+                if candidate == word:
+                    self._pos += len(word)
+                    self._assign(value)
+                    self._after_value()
+                    return
+                if (
+                    not final
+                    and len(candidate) < len(word)
+                    and word.startswith(candidate)
+                ):
+                    return  # may still turn out to be a literal
+            self._scalar = {"kind": "unquoted", "parts": []}
+            self._assign("", partial=True)
+
+    def _assign(self, value, partial: bool = False):
+        """Store a value in the innermost open container, or as the result"""
+        if not self._stack:
+            self.result = value
+            return
+        frame = self._stack[-1]
+        container = frame["value"]
+        scalar = self._scalar
+        if frame["type"] == "object":
+            container[frame.get("key", "")] = value
+        elif scalar is not None and scalar.get("slot") is not None:
+            container[scalar["slot"]] = value
+        else:
+            container.append(value)
+            if partial and scalar is not None:
+                # keep the slot so later chunks update the same item
+                scalar["slot"] = len(container) - 1
+        self._touch()
+
+    def _touch(self):
+        root = self._stack[0] if self._stack else None
+        if root is not None and root["type"] == "object" and "key" in root:
+            self._touched.add(root["key"])
+
+    # tokens
+
+    def _skip_whitespace(self, final: bool) -> bool:
+        """Move to the next significant character, False if there is none yet"""
+        buf = self._buf
+        while self._pos < len(buf):
+            c = buf[self._pos]
+            if c.isspace():
+                self._pos += 1
+                continue
+            if c == "/":
+                nxt = buf[self._pos + 1 : self._pos + 2]
+                if not nxt and not final:
+                    return False
+                if nxt in ("/", "*"):
+                    self._pos += 2
+                    self._scalar = {
+                        "kind": "comment",
+                        "end": "\n" if nxt == "/" else "*/",
+                    }
+                    return False
+            return True
+        return False
+
+    def _read_scalar(self, final: bool):
+        scalar = self._scalar
+        kind = scalar["kind"]  # type: ignore
+        if kind == "comment":
+            self._read_comment(scalar, final)  # type: ignore
+        elif kind == "string":
+            self._read_string(scalar, final)  # type: ignore
+        elif kind == "multiline":
+            self._read_multiline(scalar, final)  # type: ignore
+        else:
+            buf, pos = self._buf, self._pos
+            match = self._TOKEN_ENDS[kind].search(buf, pos)
+            end = match.start() if match else len(buf)
+            scalar["parts"].append(buf[pos:end])  # type: ignore
+            self._pos = end
+            if match:
+                self._end_scalar()
+
+    def _read_comment(self, scalar: dict, final: bool):
+        end = scalar["end"]
+        idx = self._buf.find(end, self._pos)
+        if idx != -1:
+            self._pos = idx + len(end)
+            self._scalar = None
+        elif final:
+            self._pos = len(self._buf)
+        else:
+            # keep a trailing "*" in case "/" arrives with the next chunk
+            self._pos = max(self._pos, len(self._buf) - len(end) + 1)
+
+    def _read_string(self, scalar: dict, final: bool):
+        buf = self._buf
+        parts = scalar["parts"]
+        while self._pos < len(buf):
+            pos = self._pos
+            match = self._STRING_STOPS[scalar["quote"]].search(buf, pos)
+            if not match:
+                parts.append(buf[pos:])
+                self._pos = len(buf)
+                return
+            parts.append(buf[pos : match.start()])
+            pos = self._pos = match.start()
+            if buf[pos] == scalar["quote"]:
+                self._pos += 1
+                self._end_scalar()
+                return
+            # escape sequence, may be split between chunks
+            split = pos + 1 >= len(buf) or (buf[pos + 1] == "u" and pos + 6 > len(buf))
+            if split and not final:
+                return
+            esc = buf[pos + 1 : pos + 2]
+            if esc == "u":
+                digits = ""
+                for ch in buf[pos + 2 : pos + 6]:
+                    if not ch.isalnum():
+                        break
+                    digits += ch
+                try:
+                    if len(digits) < 4:
+                        raise ValueError(digits)
+                    parts.append(chr(int(digits, 16)))
+                except ValueError:
+                    # not a valid code point, keep it literally
+                    parts.append("\\u" + digits)
+                self._pos = pos + 2 + len(digits)
+            else:
+                parts.append(self._ESCAPES.get(esc, esc))
+                self._pos = pos + 2
+
+    def _read_multiline(self, scalar: dict, final: bool):
+        buf, pos = self._buf, self._pos
+        idx = buf.find(scalar["quote"] * 3, pos)
+        if idx != -1:
+            scalar["parts"].append(buf[pos:idx])
+            self._pos = idx + 3
+            self._end_scalar()
+            return
+        # hold back two characters, they may start the closing quotes
+        end = len(buf) if final else max(pos, len(buf) - 2)
+        scalar["parts"].append(buf[pos:end])
+        self._pos = end
+
+    def _end_scalar(self):
+        scalar = self._scalar
+        kind = scalar["kind"]  # type: ignore
+        text = "".join(scalar["parts"])  # type: ignore
+        if kind == "key" or scalar.get("key"):  # type: ignore
+            frame = self._stack[-1]
+            frame["key"] = text
+            frame["state"] = "colon"
+            self._scalar = None
+            return
+        if kind == "number":
+            value = text
+            for cast in (int, float):
+                try:
+                    value = cast(text)
+                    break
+                except ValueError:
+                    pass
+        elif kind == "string":
+            value = text
+        else:
+            value = text.strip()
+        self._assign(value)
+        self._scalar = None
+        self._after_value()
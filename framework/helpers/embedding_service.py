@@ -0,0 +1,371 @@
+"""Shared embedding service with request batching and a vector cache.
+
+All memory databases using the same embedding model share one service.
+Texts requested at about the same time, from any thread or event loop, are
+collected for up to BATCH_WINDOW seconds and sent to the provider as one
+batch. Embeddings are cached in two files per model: ``<model>.f32`` holds
+float32 rows behind a small header and is memory-mapped for reads,
+``<model>.keys`` holds the SHA-256 of the text of each row in the same
+order. Both files are only appended to. An LRU of recently used vectors
+sits in front of the files, services without a cache directory only have
+the LRU.
+"""
+
+import asyncio
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from framework.helpers.print_style import PrintStyle
+
+BATCH_WINDOW = 0.005  # seconds a request waits for others to share its batch
+MAX_BATCH = 256  # texts per provider request
+MAX_INFLIGHT_BATCHES = 4  # provider requests running at the same time
+LRU_SIZE = 10_000  # vectors kept in memory
+HEADER = struct.Struct("<4sI")  # magic, dimensions
+MAGIC = b"GZE1"
+KEY_SIZE = 32
+
+
+class VectorStore:
+    """Append-only, memory-mapped key -> vector store at path.*"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._rows: dict[bytes, int] = {}
+        self._dim = 0
+        self._map: np.ndarray | None = None
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if self._map is None or row >= len(self._map):
+            with self._lock:
+                self._remap()
+        return np.array(self._map[row])  # type: ignore
+
+    def put(self, keys: list[bytes], vectors: np.ndarray):
+        """Append vectors (one row per key) for keys not stored yet."""
+        with self._lock:
+            if not self._dim:
+                self._dim = vectors.shape[1]
+                with open(self._vectors_path, "wb") as f:
+                    f.write(HEADER.pack(MAGIC, self._dim))
+            if vectors.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding has {vectors.shape[1]} dimensions, "
+                    f"cache has {self._dim}"
+                )
+            new, seen = [], set()
+            for i, key in enumerate(keys):
+                if key not in self._rows and key not in seen:
+                    new.append(i)
+                    seen.add(key)
+            if not new:
+                return
+            rows = np.ascontiguousarray(vectors[new], dtype=np.float32)
+            # vectors first, a key is only ever written after its vector
+            with open(self._vectors_path, "ab") as f:
+                f.write(rows.tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(keys[i] for i in new))
+            start = len(self._rows)
+            for offset, i in enumerate(new):
+                self._rows[keys[i]] = start + offset
+
+    @property
+    def _vectors_path(self) -> str:
+        return self.path + ".f32"
+
+    @property
+    def _keys_path(self) -> str:
+        return self.path + ".keys"
+
+    def _open(self):
+        if not os.path.exists(self._vectors_path):
+            return
+        with open(self._vectors_path, "rb") as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size or header[:4] != MAGIC:
+            PrintStyle.error(f"Discarding invalid embedding cache {self.path}")
+            self._reset()
+            return
+        _, self._dim = HEADER.unpack(header)
+        keys = b""
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, "rb") as f:
+                keys = f.read()
+        row_bytes = 4 * self._dim
+        count = min(
+            len(keys) // KEY_SIZE,
+            (os.path.getsize(self._vectors_path) - HEADER.size) // row_bytes,
+        )
+        # drop the tails of an interrupted append
+        if keys:
+            os.truncate(self._keys_path, count * KEY_SIZE)
+        os.truncate(self._vectors_path, HEADER.size + count * row_bytes)
+        self._rows = {keys[i * KEY_SIZE : (i + 1) * KEY_SIZE]: i for i in range(count)}
+        self._remap()
+
+    def _remap(self):
+        if self._rows:
+            self._map = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r",
+                offset=HEADER.size,
+                shape=(len(self._rows), self._dim),
+            )
+
+    def _reset(self):
+        for path in (self._vectors_path, self._keys_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class _Batcher:
+    """Collects texts from concurrent callers into provider batches."""
+
+    def __init__(
+        self,
+        embed: Any,
+        executor: ThreadPoolExecutor,
+        stats: dict,
+        stats_lock: threading.Lock,
+    ):
+        self.embed = embed  # list[str] -> list[list[float]]
+        self._executor = executor
+        self._stats = stats
+        self._stats_lock = stats_lock
+        self._cond = threading.Condition()
+        self._queue: list[tuple[str, Future]] = []
+        self._first_at = 0.0
+        self._thread: threading.Thread | None = None
+
+    def submit(self, texts: list[str]) -> list[Future]:
+        futures = [Future() for _ in texts]
+        with self._cond:
+            if not self._queue:
+                self._first_at = time.monotonic()
+            self._queue.extend(zip(texts, futures, strict=True))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return futures
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                while len(self._queue) < MAX_BATCH:
+                    remaining = self._first_at + BATCH_WINDOW - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:MAX_BATCH]
+                del self._queue[:MAX_BATCH]
+                self._first_at = time.monotonic()
+            self._executor.submit(self._embed_batch, batch)
+
+    def _embed_batch(self, batch: list[tuple[str, Future]]):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["batched_texts"] += len(texts)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(texts))
+        try:
+            vectors = dict(zip(texts, self.embed(texts), strict=True))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+
+class EmbeddingService(Embeddings):
+    """Batched, cached embeddings of one model."""
+
+    def __init__(self, model: Embeddings, namespace: str, cache_dir: str | None):
+        self.model = model
+        self.namespace = namespace
+        self.store = (
+            VectorStore(os.path.join(cache_dir, namespace)) if cache_dir else None
+        )
+        self._lru: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "batches": 0,
+            "batched_texts": 0,
+            "max_batch": 0,
+        }
+        executor = ThreadPoolExecutor(
+            max_workers=MAX_INFLIGHT_BATCHES, thread_name_prefix="embedding"
+        )
+        self._documents = _Batcher(
+            self._embed_documents, executor, self._stats, self._lock
+        )
+        self._queries = _Batcher(self._embed_queries, executor, self._stats, self._lock)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [f.result() for f in self._request("doc", texts)]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._request("query", [text])[0].result()
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        futures = [asyncio.wrap_future(f) for f in self._request("doc", texts)]
+        return list(await asyncio.gather(*futures))
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await asyncio.wrap_future(self._request("query", [text])[0])
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["avg_batch"] = (
+            stats["batched_texts"] / stats["batches"] if stats["batches"] else 0.0
+        )
+        stats["stored"] = len(self.store) if self.store is not None else 0
+        return stats
+
+    def _request(self, kind: str, texts: list[str]) -> list[Future]:
+        keys = [_key(kind, text) for text in texts]
+        futures: list[Future | None] = [None] * len(texts)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                else:
+                    vector = self.store.get(key) if self.store is not None else None
+                    if vector is not None:
+                        self._remember(key, vector)
+                if vector is None:
+                    missing.append(i)
+                    continue
+                futures[i] = _done(vector.tolist())
+            self._stats["hits"] += len(texts) - len(missing)
+            self._stats["misses"] += len(missing)
+
+        if missing:
+            batcher = self._documents if kind == "doc" else self._queries
+            for i, future in zip(
+                missing, batcher.submit([texts[i] for i in missing]), strict=True
+            ):
+                futures[i] = future
+        return futures  # type: ignore
+
+    def _cache(self, kind: str, texts: list[str], vectors: list[list[float]]):
+        # runs before the callers get their results, so they find them cached
+        keys = [_key(kind, text) for text in texts]
+        array = np.asarray(vectors, dtype=np.float32)
+        if self.store is not None:
+            try:
+                self.store.put(keys, array)
+            except (OSError, ValueError) as e:
+                PrintStyle.error(f"Embedding cache {self.namespace}: {e}")
+        with self._lock:
+            for key, vector in zip(keys, array, strict=True):
+                self._remember(key, vector)
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._lru[key] = vector
+        if len(self._lru) > LRU_SIZE:
+            self._lru.popitem(last=False)
+
+    def _embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.model.embed_documents(texts)
+        self._cache("doc", texts, vectors)
+        return vectors
+
+    def _embed_queries(self, texts: list[str]) -> list[list[float]]:
+        # models may embed queries differently from documents (instructions,
+        # prefixes), so queries are only sent as one request where that is
+        # known to be the same
+        if _queries_are_documents(self.model):
+            vectors = self.model.embed_documents(texts)
+        elif len(texts) == 1:
+            vectors = [self.model.embed_query(texts[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(texts), 8)) as pool:
+                vectors = list(pool.map(self.model.embed_query, texts))
+        self._cache("query", texts, vectors)
+        return vectors
+
+
+_services: dict[tuple[str, str | None], EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_service(
+    model: Embeddings, namespace: str, cache_dir: str | None
+) -> EmbeddingService:
+    """Service shared by all users of namespace, cache_dir None = memory only.
+
+    The latest model object is used for new requests, so changed provider
+    settings take effect without losing the cache.
+    """
+    with _services_lock:
+        service = _services.get((namespace, cache_dir))
+        if service is None:
+            service = EmbeddingService(model, namespace, cache_dir)
+            _services[(namespace, cache_dir)] = service
+        else:
+            service.model = model
+        return service
+
+
+def get_stats() -> dict[str, dict[str, Any]]:
+    """Cache and batching statistics of every service by namespace."""
+    with _services_lock:
+        services = list(_services.values())
+    return {
+        service.namespace
+        + ("" if service.store is not None else " (memory)"): service.get_stats()
+        for service in services
+    }
+
+
+def _key(kind: str, text: str) -> bytes:
+    return hashlib.sha256(f"{kind}\0{text}".encode()).digest()
+
+
+def _done(result: Any) -> Future:
+    future: Future = Future()
+    future.set_result(result)
+    return future
+
+
+def _queries_are_documents(model: Embeddings) -> bool:
+    try:
+        from langchain_openai import OpenAIEmbeddings
+    except ImportError:
+        return False
+    # OpenAIEmbeddings.embed_query is embed_documents([text])[0]
+    return isinstance(model, OpenAIEmbeddings) and (
+        type(model).embed_query is OpenAIEmbeddings.embed_query
+    )
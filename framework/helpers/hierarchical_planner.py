@@ -10,7 +10,7 @@ from datetime import UTC, datetime
 from enum import Enum
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from framework.helpers.print_style import PrintStyle
 from framework.helpers.task_models import PlannedTask, TaskPlan
@@ -27,6 +27,8 @@ except ImportError:
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+MAX_DEPENDENCY_RESULT = 2000  # characters of each dependency result in a prompt
+
 
 class PlanStatus(str, Enum):
     """Status of a planning operation."""
@@ -106,31 +108,44 @@ class HierarchicalPlan(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
+    _index: dict[str, Subtask] = PrivateAttr(default_factory=dict)
+    _indexed: tuple[int, int] = PrivateAttr(default=(0, 0))
+
     def get_next_subtask(self) -> Subtask | None:
         """Get the next subtask that can be executed (all dependencies met)."""
+        ready = self.get_ready_subtasks()
+        return ready[0] if ready else None
+
+    def get_ready_subtasks(self) -> list[Subtask]:
+        """Get all pending subtasks whose dependencies are completed."""
+        index = self._subtask_index()
+        ready = []
         for subtask in self.subtasks:
             if subtask.status != SubtaskStatus.PENDING:
                 continue
-
-            # Check if all dependencies are completed
-            dependencies_met = True
-            for dep_id in subtask.dependencies:
-                dep_subtask = self.get_subtask_by_id(dep_id)
-                if not dep_subtask or dep_subtask.status != SubtaskStatus.COMPLETED:
-                    dependencies_met = False
-                    break
-
-            if dependencies_met:
-                return subtask
-
-        return None
+            if all(
+                dep_id in index and index[dep_id].status == SubtaskStatus.COMPLETED
+                for dep_id in subtask.dependencies
+            ):
+                ready.append(subtask)
+        return ready
 
     def get_subtask_by_id(self, subtask_id: str) -> Subtask | None:
         """Get a subtask by its ID."""
-        for subtask in self.subtasks:
-            if subtask.id == subtask_id:
-                return subtask
-        return None
+        subtask = self._subtask_index().get(subtask_id)
+        if subtask is not None and subtask.id == subtask_id:
+            return subtask
+        # an id changed in place, or an unknown id
+        return self._subtask_index(rebuild=True).get(subtask_id)
+
+    def _subtask_index(self, rebuild: bool = False) -> dict[str, Subtask]:
+        # subtasks are inserted into the list directly (plan adjustments) or
+        # the list is replaced, both are noticed here
+        key = (id(self.subtasks), len(self.subtasks))
+        if rebuild or key != self._indexed:
+            self._index = {subtask.id: subtask for subtask in self.subtasks}
+            self._indexed = key
+        return self._index
 
     def is_complete(self) -> bool:
         """Check if all subtasks are completed."""
@@ -169,6 +184,9 @@ class PlanningConfig(BaseModel):
     retry_failed_subtasks: bool = Field(
         default=True, description="Retry failed subtasks with alternative approaches"
     )
+    max_parallel_subtasks: int = Field(
+        default=4, description="Maximum number of subtasks executing at the same time"
+    )
 
     @classmethod
     def get_default(cls) -> "PlanningConfig":
@@ -187,6 +205,7 @@ class HierarchicalPlanner:
         """
         self.config = config or PlanningConfig.get_default()
         self.active_plans: dict[str, HierarchicalPlan] = {}
+        self._executions: dict[str, Any] = {}  # plan_id -> DeferredTask
         self.printer = PrintStyle(italic=True, font_color="blue", padding=False)
 
     def create_plan(
@@ -653,7 +672,12 @@ class HierarchicalPlanner:
         return self.active_plans.get(plan_id)
 
     def execute_plan(self, plan_id: str) -> bool:
-        """Execute a hierarchical plan by converting it to TaskScheduler tasks.
+        """Start executing a hierarchical plan in the background.
+
+        Each subtask runs as a TaskScheduler task as soon as all of its
+        dependencies have completed, up to config.max_parallel_subtasks at a
+        time. Outputs are evaluated and failed subtasks retried, see
+        PlanExecutor.
 
         Args:
             plan_id: The plan to execute
@@ -661,6 +685,9 @@ class HierarchicalPlanner:
         Returns:
             True if plan execution was started successfully
         """
+        from framework.helpers.defer import DeferredTask
+        from framework.helpers.plan_executor import PlanExecutor
+
         plan = self.get_plan(plan_id)
         if not plan:
             logger.error(f"Plan not found: {plan_id}")
@@ -669,38 +696,69 @@ class HierarchicalPlanner:
         plan.status = PlanStatus.IN_PROGRESS
         plan.updated_at = datetime.now(UTC)
 
-        # Create planned tasks for each subtask
         if not _TASK_SCHEDULER_AVAILABLE:
             logger.warning("TaskScheduler not available - plan execution disabled")
             return False
 
-        scheduler = TaskScheduler.get()
-        execution_times = []
-        base_time = datetime.now(UTC)
-
-        for i, subtask in enumerate(plan.subtasks):
-            # Schedule subtasks with small delays to handle dependencies
-            execution_time = base_time.replace(second=base_time.second + (i * 10))
-            execution_times.append(execution_time)
-
-            # Create a planned task for this subtask
-            task_plan = TaskPlan.create(todo=[execution_time])
-
-            planned_task = PlannedTask.create(
-                name=f"Subtask: {subtask.name}",
-                system_prompt="You are an autonomous agent executing a subtask as part of a larger plan.",
-                prompt=f"Execute this subtask: {subtask.description}\n\nRecommended tool: {subtask.tool_name or 'auto-select'}",
-                plan=task_plan,
-                context_id=plan.context_id,
-            )
-
-            scheduler.add_task(planned_task)
+        executor = PlanExecutor(self.config)
+        self._executions = {
+            pid: task for pid, task in self._executions.items() if not task.is_ready()
+        }
+        # keep a reference, a collected DeferredTask kills its coroutine
+        self._executions[plan_id] = DeferredTask("PlanExecutor").start_task(
+            executor.execute, plan, self._run_subtask
+        )
 
         self.printer.print(
             f"Started execution of plan '{plan_id}' with {len(plan.subtasks)} subtasks"
         )
         return True
 
+    async def _run_subtask(self, plan: HierarchicalPlan, subtask: Subtask) -> str:
+        """Run a subtask as a one-off TaskScheduler task and return its result.
+
+        Raises RuntimeError when the run failed. Every subtask runs in a
+        context of its own, subtasks running at the same time must not share
+        an agent. The task and its context are removed when it finishes.
+        """
+        from agent import AgentContext
+        from framework.helpers import persist_chat
+
+        prompt = (
+            f"Execute this subtask: {subtask.description}\n\n"
+            f"Recommended tool: {subtask.tool_name or 'auto-select'}"
+        )
+        results = [
+            f"{dep.name}:\n{dep.result[:MAX_DEPENDENCY_RESULT]}"
+            for dep_id in subtask.dependencies
+            if (dep := plan.get_subtask_by_id(dep_id)) and dep.result
+        ]
+        if results:
+            prompt += "\n\nResults of earlier subtasks:\n\n" + "\n\n".join(results)
+
+        scheduler = TaskScheduler.get()
+        planned_task = PlannedTask.create(
+            name=f"Subtask: {subtask.name}",
+            system_prompt=(
+                "You are an autonomous agent executing a subtask "
+                "as part of a larger plan."
+            ),
+            prompt=prompt,
+            plan=TaskPlan.create(),  # run by the plan executor, not on a schedule
+        )
+        scheduler.add_task(planned_task)
+        try:
+            run = await scheduler.run_task_async(planned_task.uuid)
+        finally:
+            scheduler.remove_task_by_uuid(planned_task.uuid)
+            AgentContext.remove(planned_task.context_id)
+            persist_chat.remove_chat(planned_task.context_id)
+        if run is None:
+            raise RuntimeError(f"Task of subtask '{subtask.name}' disappeared")
+        if run.error is not None:
+            raise RuntimeError(run.error)
+        return run.result
+
     def get_plan_progress(self, plan_id: str) -> dict[str, Any] | None:
         """Get progress information for a plan.
 
@@ -7,7 +7,7 @@ from typing import TypedDict, Union, cast
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 
-from framework.helpers import messages, settings, tokens
+from framework.helpers import blobs, messages, settings, tokens
 
 BULK_MERGE_COUNT = 3
 TOPICS_KEEP_COUNT = 3
@@ -17,6 +17,7 @@ HISTORY_BULK_RATIO = 0.2
 TOPIC_COMPRESS_RATIO = 0.65
 LARGE_MESSAGE_TO_TOPIC_RATIO = 0.25
 RAW_MESSAGE_OUTPUT_TEXT_TRIM = 100
+BLOB_MIN_CHARS = 16_000  # longer text contents are serialized as blob references
 
 
 class RawMessage(TypedDict):
@@ -41,7 +42,19 @@ class OutputMessage(TypedDict):
 
 class Record:
     def __init__(self):
-        pass
+        # record lists this record is part of, they keep running token totals
+        self._containers: list["RecordList"] = []
+
+    def _propagate_tokens(self, delta: int):
+        # pass a change of this record's token count up to its containers
+        if delta:
+            for container in getattr(self, "_containers", ()):
+                container._child_tokens_changed(delta)
+
+    def _list_tokens_changed(self, records: "RecordList", delta: int):
+        # records without a summary count as the sum of their children
+        if not getattr(self, "summary", ""):
+            self._propagate_tokens(delta)
 
     @abstractmethod
     def get_tokens(self) -> int:
@@ -77,10 +90,42 @@ class Record:
 
 class Message(Record):
     def __init__(self, ai: bool, content: MessageContent, tokens: int = 0):
+        super().__init__()
         self.ai = ai
-        self.content = content
-        self.summary: str = ""
-        self.tokens: int = tokens or self.calculate_tokens()
+        self._content = content
+        self._content_ref: dict | None = None  # blob holding a long text content
+        self._summary: str = ""
+        self._tokens: int = 0
+        self.tokens = tokens or self.calculate_tokens()
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens
+
+    @tokens.setter
+    def tokens(self, value: int):
+        delta = value - self._tokens
+        self._tokens = value
+        self._propagate_tokens(delta)
+
+    @property
+    def content(self) -> MessageContent:
+        return self._content
+
+    @content.setter
+    def content(self, content: MessageContent):
+        self._content = content
+        self._content_ref = None
+        self.tokens = self.calculate_tokens()
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, summary: str):
+        self._summary = summary
+        self.tokens = self.calculate_tokens()
 
     def get_tokens(self) -> int:
         if not self.tokens:
@@ -93,7 +138,6 @@ class Message(Record):
 
     def set_summary(self, summary: str):
         self.summary = summary
-        self.tokens = self.calculate_tokens()
 
     async def compress(self):
         return False
@@ -111,31 +155,67 @@ class Message(Record):
         return {
             "_cls": "Message",
             "ai": self.ai,
-            "content": self.content,
+            "content": self._serialize_content(),
             "summary": self.summary,
             "tokens": self.tokens,
         }
 
+    def _serialize_content(self) -> MessageContent:
+        # long tool outputs are written to the blob store once, not on every save
+        if isinstance(self._content, str) and len(self._content) > BLOB_MIN_CHARS:
+            if self._content_ref is None:
+                self._content_ref = blobs.put(self._content)
+            return self._content_ref  # type: ignore
+        return self._content
+
     @staticmethod
     def from_dict(data: dict, history: "History"):
         content = data.get("content", "Content lost")
-        msg = Message(ai=data["ai"], content=content)
-        msg.summary = data.get("summary", "")
-        msg.tokens = data.get("tokens", 0)
+        ref = None
+        if blobs.is_ref(content) and not content.get("mime_type"):
+            try:
+                ref, content = content, blobs.materialize(content)
+            except OSError:
+                content = "Content lost"
+        stored_tokens = data.get("tokens", 0)
+        msg = Message(ai=data["ai"], content=content, tokens=stored_tokens)
+        msg._content_ref = ref
+        # the stored token count already covers the summary
+        msg._summary = data.get("summary", "")
+        if msg._summary and not stored_tokens:
+            msg.tokens = msg.calculate_tokens()
         return msg
 
 
 class Topic(Record):
     def __init__(self, history: "History"):
+        super().__init__()
         self.history = history
-        self.summary: str = ""
-        self.messages: list[Message] = []
+        self._summary: str = ""
+        self._summary_tokens: int = 0
+        self.messages = []
+
+    @property
+    def messages(self) -> "RecordList":
+        return self._messages
+
+    @messages.setter
+    def messages(self, messages: list["Message"]):
+        _replace_records(self, "_messages", messages)
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, summary: str):
+        _set_summary(self, summary, self._messages)
 
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return self._summary_tokens
         else:
-            return sum(msg.get_tokens() for msg in self.messages)
+            return self.messages.tokens
 
     def add_message(
         self, ai: bool, content: MessageContent, tokens: int = 0
@@ -177,13 +257,12 @@ class Topic(Record):
         )
         large_msgs = []
         for m in (m for m in self.messages if not m.summary):
-            # Analyze message size for compression candidates
-            out = m.output()
-            text = output_text(out)
+            # Analyze message size for compression candidates, token counts are
+            # cached so only oversized messages need to be stringified
             tok = m.get_tokens()
-            text_length = len(text)
-
             if tok > msg_max_size:
+                out = m.output()
+                text_length = len(output_text(out))
                 large_msgs.append((m, tok, text_length, out))
         large_msgs.sort(key=lambda x: x[1], reverse=True)
         for msg, tok, text_length, out in large_msgs:
@@ -289,15 +368,33 @@ class Topic(Record):
 
 class Bulk(Record):
     def __init__(self, history: "History"):
+        super().__init__()
         self.history = history
-        self.summary: str = ""
-        self.records: list[Record] = []
+        self._summary: str = ""
+        self._summary_tokens: int = 0
+        self.records = []
+
+    @property
+    def records(self) -> "RecordList":
+        return self._records
+
+    @records.setter
+    def records(self, records: list[Record]):
+        _replace_records(self, "_records", records)
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, summary: str):
+        _set_summary(self, summary, self._records)
 
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return self._summary_tokens
         else:
-            return sum([r.get_tokens() for r in self.records])
+            return self.records.tokens
 
     def output(
         self, human_label: str = "user", ai_label: str = "ai"
@@ -340,11 +437,28 @@ class History(Record):
     def __init__(self, agent):
         from agent import Agent
 
-        self.bulks: list[Bulk] = []
-        self.topics: list[Topic] = []
+        super().__init__()
+        self.bulks = []
+        self.topics = []
         self.current = Topic(history=self)
         self.agent: Agent = agent
 
+    @property
+    def bulks(self) -> "RecordList":
+        return self._bulks
+
+    @bulks.setter
+    def bulks(self, bulks: list[Bulk]):
+        _replace_records(self, "_bulks", bulks)
+
+    @property
+    def topics(self) -> "RecordList":
+        return self._topics
+
+    @topics.setter
+    def topics(self, topics: list[Topic]):
+        _replace_records(self, "_topics", topics)
+
     def get_tokens(self) -> int:
         return (
             self.get_bulks_tokens()
@@ -358,10 +472,10 @@ class History(Record):
         return total > limit
 
     def get_bulks_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.bulks)
+        return self.bulks.tokens
 
     def get_topics_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.topics)
+        return self.topics.tokens
 
     def get_current_topic_tokens(self) -> int:
         return self.current.get_tokens()
@@ -486,6 +600,105 @@ class History(Record):
         return bulk
 
 
+class RecordList(list):
+    """List of history records keeping a running total of their tokens.
+
+    Records report token changes to every list they are in, so totals of
+    topics, bulks and the whole history are available in O(1) instead of
+    re-counting all records on every check.
+    """
+
+    def __init__(self, owner: Record, records=()):
+        super().__init__()
+        self.owner = owner
+        self.tokens = 0
+        self.extend(records)
+
+    def _child_tokens_changed(self, delta: int):
+        self.tokens += delta
+        self.owner._list_tokens_changed(self, delta)
+
+    def _adopt(self, records):
+        delta = 0
+        for record in records:
+            delta += record.get_tokens()
+            record._containers.append(self)
+        if delta:
+            self._child_tokens_changed(delta)
+
+    def _release(self, records):
+        delta = 0
+        for record in records:
+            record._containers.remove(self)
+            delta -= record.get_tokens()
+        if delta:
+            self._child_tokens_changed(delta)
+
+    def append(self, record):
+        super().append(record)
+        self._adopt([record])
+
+    def extend(self, records):
+        records = list(records)
+        super().extend(records)
+        self._adopt(records)
+
+    def __iadd__(self, records):
+        self.extend(records)
+        return self
+
+    def insert(self, index, record):
+        super().insert(index, record)
+        self._adopt([record])
+
+    def remove(self, record):
+        super().remove(record)
+        self._release([record])
+
+    def pop(self, index=-1):
+        record = super().pop(index)
+        self._release([record])
+        return record
+
+    def clear(self):
+        records = list(self)
+        super().clear()
+        self._release(records)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            old, new = self[index], list(value)
+            super().__setitem__(index, new)
+        else:
+            old, new = [self[index]], [value]
+            super().__setitem__(index, value)
+        self._release(old)
+        self._adopt(new)
+
+    def __delitem__(self, index):
+        old = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        self._release(old)
+
+
+def _replace_records(owner: Record, attr: str, records: list):
+    # swap a record list of the owner, keeping the running totals consistent
+    old: RecordList | None = getattr(owner, attr, None)
+    new = RecordList(owner)
+    setattr(owner, attr, new)
+    new.extend(records)
+    if old is not None:
+        old.clear()
+
+
+def _set_summary(record: "Topic | Bulk", summary: str, children: RecordList):
+    before = record.get_tokens()
+    record._summary = summary
+    record._summary_tokens = tokens.approximate_tokens(summary) if summary else 0
+    after = record._summary_tokens if summary else children.tokens
+    record._propagate_tokens(after - before)
+
+
 def deserialize_history(json_data: str, agent) -> History:
     history = History(agent=agent)
     if json_data:
@@ -536,7 +749,11 @@ def _output_content_langchain(content: MessageContent):
     if isinstance(content, str):
         return content
     if _is_raw_message(content):
-        return content["raw_content"]  # type: ignore
+        # images are kept in the blob store until they are sent to the model
+        try:
+            return blobs.materialize(content["raw_content"])  # type: ignore
+        except OSError:
+            return content.get("preview") or "Content lost"  # type: ignore
     try:
         return _json_dumps(content)
     except Exception as e:
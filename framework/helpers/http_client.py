@@ -0,0 +1,248 @@
+"""Shared async HTTP client with connection pooling and a response cache.
+
+Every event loop gets one aiohttp session whose connector keeps connections
+alive and limits concurrent connections per host. Code that runs a
+short-lived loop, like the per-request loops of the API handlers, closes the
+loop's session with close_session() before the loop ends; the sessions of
+loops closed without it are dropped. Proxy settings are taken from the
+environment.
+
+Successful GET responses are cached for the max-age the server sent, and
+once they are stale they are revalidated with a conditional request
+(If-None-Match / If-Modified-Since) when the server sent an ETag or
+Last-Modified header. Responses without either are not cached. Entries are
+kept per URL and request headers, a response is only reused for requests
+that sent the same headers.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+from multidict import CIMultiDict
+
+MAX_CONNECTIONS = 100  # per event loop
+MAX_CONNECTIONS_PER_HOST = 8
+DEFAULT_TIMEOUT = 30.0  # seconds
+MAX_CACHE_TTL = 3600.0  # cap for max-age sent by servers
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+CACHE_MAX_ITEM_BYTES = 4 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    headers: Mapping[str, str]  # case-insensitive
+    content: bytes
+    from_cache: bool = False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise HTTPError(self.status, self.url)
+
+    @property
+    def charset(self) -> str:
+        match = re.search(r"charset=([\w-]+)", self.headers.get("Content-Type", ""))
+        return match.group(1) if match else "utf-8"
+
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.charset, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+@dataclass
+class _CacheEntry:
+    result: FetchResult
+    expires: float
+    validators: dict[str, str] = field(default_factory=dict)
+
+
+_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+_CacheKey = tuple[str, tuple[tuple[str, str], ...]]
+_cache: OrderedDict[_CacheKey, _CacheEntry] = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "revalidated": 0}
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Pooled session of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        with _lock:
+            # loops closed without close_session()
+            for old in [old for old in _sessions if old.is_closed()]:
+                del _sessions[old]
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=MAX_CONNECTIONS,
+                limit_per_host=MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=300,
+            ),
+            trust_env=True,
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_session():
+    """Close the session of the running event loop.
+
+    Call it before a loop that used the client is closed or dropped.
+    """
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+async def fetch(
+    url: str,
+    method: str = "GET",
+    *,
+    data: Any = None,
+    headers: dict[str, str] | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    cache: bool = True,
+) -> FetchResult:
+    """Request url and read the whole response body.
+
+    Only GET requests are cached, pass cache=False for responses that must
+    always be fresh. Raises aiohttp.ClientError or TimeoutError when
+    the request fails, HTTP error statuses are returned, see raise_for_status.
+    """
+    cache = cache and method == "GET" and data is None
+    request_headers = dict(headers or {})
+    key = _cache_key(url, request_headers)
+
+    entry = _get_cached(key) if cache else None
+    if entry is not None:
+        if entry.expires > time.monotonic():
+            _count("hits")
+            return _copy(entry.result, from_cache=True)
+        request_headers.update(entry.validators)
+
+    session = get_session()
+    async with session.request(
+        method,
+        url,
+        data=data,
+        headers=request_headers,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    ) as response:
+        if entry is not None and response.status == 304:
+            _count("revalidated")
+            entry.expires = time.monotonic() + _get_ttl(response.headers)
+            return _copy(entry.result, from_cache=True)
+
+        result = FetchResult(
+            url=str(response.url),
+            status=response.status,
+            headers=CIMultiDict(response.headers),
+            content=await response.read(),
+        )
+
+    if cache:
+        _count("misses")
+        if result.status == 200:
+            _store(key, result)
+    return result
+
+
+def get_stats() -> dict[str, Any]:
+    with _lock:
+        requests = _stats["hits"] + _stats["misses"] + _stats["revalidated"]
+        return {
+            **_stats,
+            "hit_rate": (
+                (_stats["hits"] + _stats["revalidated"]) / requests if requests else 0.0
+            ),
+            "size": len(_cache),
+            "bytes": _cache_bytes,
+        }
+
+
+def clear_cache():
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
+        for key in _stats:
+            _stats[key] = 0
+
+
+def _cache_key(url: str, headers: Mapping[str, str]) -> _CacheKey:
+    # Accept, Authorization... can change the response
+    return url, tuple(sorted((name.lower(), value) for name, value in headers.items()))
+
+
+def _get_cached(key: _CacheKey) -> _CacheEntry | None:
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def _store(key: _CacheKey, result: FetchResult):
+    global _cache_bytes
+    cache_control = result.headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control or len(result.content) > CACHE_MAX_ITEM_BYTES:
+        return
+
+    validators = {}
+    if etag := result.headers.get("ETag"):
+        validators["If-None-Match"] = etag
+    if last_modified := result.headers.get("Last-Modified"):
+        validators["If-Modified-Since"] = last_modified
+    ttl = 0.0 if "no-cache" in cache_control else _get_ttl(result.headers)
+    if not ttl and not validators:
+        return
+
+    with _lock:
+        old = _cache.pop(key, None)
+        if old is not None:
+            _cache_bytes -= len(old.result.content)
+        _cache[key] = _CacheEntry(result, time.monotonic() + ttl, validators)
+        _cache_bytes += len(result.content)
+        while _cache_bytes > CACHE_MAX_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted.result.content)
+
+
+def _get_ttl(headers) -> float:
+    match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+    if match:
+        return min(float(match.group(1)), MAX_CACHE_TTL)
+    return 0.0  # revalidated on every use if there are validators
+
+
+def _copy(result: FetchResult, from_cache: bool) -> FetchResult:
+    return FetchResult(
+        url=result.url,
+        status=result.status,
+        headers=CIMultiDict(result.headers),
+        content=result.content,
+        from_cache=from_cache,
+    )
+
+
+def _count(stat: str):
+    with _lock:
+        _stats[stat] += 1
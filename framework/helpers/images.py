@@ -1,8 +1,27 @@
+import asyncio
+import base64
+import hashlib
 import io
 import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from PIL import Image
 
+from framework.helpers import files
+
+CACHE_FOLDER = "tmp/cache/images"
+CACHE_SIZE = 32  # compressed images kept in memory
+DISK_CACHE_SIZE = 500  # compressed images kept in CACHE_FOLDER
+MAX_WORKERS = min(4, os.cpu_count() or 1)  # concurrent compressions
+
+# PIL releases the GIL while decoding, resizing and encoding, threads suffice
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="Images")
+_cache: OrderedDict[tuple, bytes] = OrderedDict()
+_cache_lock = threading.Lock()
+
 
 def compress_image(
     image_data: bytes, *, max_pixels: int = 256_000, quality: int = 50
@@ -36,3 +55,80 @@ def compress_image(
     output = io.BytesIO()
     img.save(output, format="JPEG", quality=quality, optimize=True)
     return output.getvalue()
+
+
+def compress_image_file(
+    path: str, *, max_pixels: int = 256_000, quality: int = 50
+) -> bytes:
+    """compress_image of a file, cached in memory and on disk.
+
+    The cache key is (path, mtime, size, max_pixels, quality), so a changed
+    file or different settings compress the image again.
+    """
+    abs_path = files.get_abs_path(path)
+    stat = os.stat(abs_path)
+    key = (abs_path, stat.st_mtime_ns, stat.st_size, max_pixels, quality)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    cache_path = _get_cache_path(key)
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        os.utime(cache_path)  # mark as recently used
+    except FileNotFoundError:
+        with open(abs_path, "rb") as f:
+            data = compress_image(f.read(), max_pixels=max_pixels, quality=quality)
+        _write_cache_file(cache_path, data)
+
+    with _cache_lock:
+        _cache[key] = data
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return data
+
+
+def compress_image_file_base64(
+    path: str, *, max_pixels: int = 256_000, quality: int = 50
+) -> str:
+    """compress_image_file for RFC calls, which can only transfer text."""
+    data = compress_image_file(path, max_pixels=max_pixels, quality=quality)
+    return base64.b64encode(data).decode("utf-8")
+
+
+async def compress_image_file_async(
+    path: str, *, max_pixels: int = 256_000, quality: int = 50
+) -> bytes:
+    """compress_image_file on the worker pool, keeps the event loop free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor,
+        lambda: compress_image_file(path, max_pixels=max_pixels, quality=quality),
+    )
+
+
+def _get_cache_path(key: tuple) -> str:
+    digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+    return files.get_abs_path(CACHE_FOLDER, digest + ".jpg")
+
+
+def _write_cache_file(path: str, data: bytes):
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+    # drop the least recently used entries beyond DISK_CACHE_SIZE
+    entries = [e for e in os.scandir(folder) if e.name.endswith(".jpg")]
+    if len(entries) > DISK_CACHE_SIZE:
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[: len(entries) - DISK_CACHE_SIZE]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
@@ -1,7 +1,21 @@
+"""Import of knowledge files into the memory databases.
+
+Files whose modification time and size match the import index are taken as
+unchanged without being read; others are hashed in chunks and only parsed
+when the checksum differs. Changed files are parsed and split in a process
+pool, at most MAX_PENDING_FILES at a time, so parsing never runs far ahead
+of the embedding of its results.
+"""
+
+import asyncio
 import glob
 import hashlib
+import multiprocessing
 import os
-from typing import Any, Literal, TypedDict
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Literal, NamedTuple, NotRequired, TypedDict
 
 from langchain_community.document_loaders import (
     CSVLoader,
@@ -9,66 +23,78 @@ from langchain_community.document_loaders import (
     TextLoader,
     UnstructuredHTMLLoader,
 )
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from framework.helpers.log import LogItem
 from framework.helpers.print_style import PrintStyle
 
 text_loader_kwargs = {"autodetect_encoding": True}
 
+# Mapping file extensions to corresponding loader classes
+file_types_loaders = {
+    "txt": TextLoader,
+    "pdf": PyPDFLoader,
+    "csv": CSVLoader,
+    "html": UnstructuredHTMLLoader,
+    # "json": JSONLoader,
+    "json": TextLoader,
+    # "md": UnstructuredMarkdownLoader,
+    "md": TextLoader,
+}
+
+CHECKSUM_CHUNK = 1024 * 1024  # bytes read at a time when hashing
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+MAX_PENDING_FILES = PARSE_WORKERS * 2  # parsed or parsing, not yet consumed
+
 
 class KnowledgeImport(TypedDict):
     file: str
     checksum: str
+    mtime: NotRequired[float]
+    size: NotRequired[int]
     ids: list[str]
     state: Literal["changed", "original", "removed"]
     documents: list[Any]
 
 
+class KnowledgeFile(NamedTuple):
+    """A changed file waiting to be parsed."""
+
+    path: str
+    metadata: dict[str, Any]
+
+
 def calculate_checksum(file_path: str) -> str:
     # Use SHA256 instead of MD5 for better security
     hasher = hashlib.sha256()
     with open(file_path, "rb") as f:
-        buf = f.read()
-        hasher.update(buf)
+        while chunk := f.read(CHECKSUM_CHUNK):
+            hasher.update(chunk)
     return hasher.hexdigest()
 
 
-def load_knowledge(
+def scan_knowledge(
     log_item: LogItem | None,
     knowledge_dir: str,
     index: dict[str, KnowledgeImport],
     metadata: dict[str, Any] = None,
     filename_pattern: str = "**/*",
-) -> dict[str, KnowledgeImport]:
-    # from framework.helpers.memory import Memory
+) -> list[KnowledgeFile]:
+    """Mark the files of knowledge_dir in index as original or changed.
 
-    # Mapping file extensions to corresponding loader classes
+    Returns the changed files, which still have to be parsed.
+    """
     if metadata is None:
         metadata = {}
-    file_types_loaders = {
-        "txt": TextLoader,
-        "pdf": PyPDFLoader,
-        "csv": CSVLoader,
-        "html": UnstructuredHTMLLoader,
-        # "json": JSONLoader,
-        "json": TextLoader,
-        # "md": UnstructuredMarkdownLoader,
-        "md": TextLoader,
-    }
-
-    cnt_files = 0
-    cnt_docs = 0
-
-    # for area in Memory.Area:
-    #     subdir = files.get_abs_path(knowledge_dir, area.value)
-
-    # if not os.path.exists(knowledge_dir):
-    #     os.makedirs(knowledge_dir)
-    #     continue
 
     # Fetch all files in the directory with specified extensions
     kn_files = glob.glob(knowledge_dir + "/" + filename_pattern, recursive=True)
-    kn_files = [f for f in kn_files if os.path.isfile(f)]
+    kn_files = [
+        f
+        for f in kn_files
+        if f.split(".")[-1].lower() in file_types_loaders and os.path.isfile(f)
+    ]
 
     if kn_files:
         PrintStyle.standard(
@@ -79,49 +105,150 @@ def load_knowledge(
                 progress=f"\nFound {len(kn_files)} knowledge files in {knowledge_dir}, processing...",
             )
 
+    changed: list[KnowledgeFile] = []
     for file_path in kn_files:
-        ext = file_path.split(".")[-1].lower()
-        if ext in file_types_loaders:
+        file_key = file_path  # os.path.relpath(file_path, knowledge_dir)
+        stat = os.stat(file_path)
+
+        # Load existing data from the index or create a new entry
+        file_data = index.get(file_key, {})
+
+        if (
+            file_data.get("checksum")
+            and file_data.get("mtime") == stat.st_mtime
+            and file_data.get("size") == stat.st_size
+        ):
+            file_data["state"] = "original"  # not even read
+        else:
             checksum = calculate_checksum(file_path)
-            file_key = file_path  # os.path.relpath(file_path, knowledge_dir)
-
-            # Load existing data from the index or create a new entry
-            file_data = index.get(file_key, {})
-
             if file_data.get("checksum") == checksum:
                 file_data["state"] = "original"
             else:
                 file_data["state"] = "changed"
-
-            if file_data["state"] == "changed":
                 file_data["checksum"] = checksum
-                loader_cls = file_types_loaders[ext]
-                loader = loader_cls(
-                    file_path,
-                    **(
-                        text_loader_kwargs
-                        if ext in ["txt", "csv", "html", "md"]
-                        else {}
-                    ),
-                )
-                file_data["documents"] = loader.load_and_split()
-                for doc in file_data["documents"]:
-                    doc.metadata = {**doc.metadata, **metadata}
-                cnt_files += 1
-                cnt_docs += len(file_data["documents"])
-                # PrintStyle.standard(f"Imported {len(file_data['documents'])} documents from {file_path}")
-
-            # Update the index
-            index[file_key] = file_data  # type: ignore
-
-    # loop index where state is not set and mark it as removed
-    for file_key, file_data in index.items():
+                changed.append(KnowledgeFile(file_path, metadata))
+            file_data["mtime"] = stat.st_mtime
+            file_data["size"] = stat.st_size
+
+        # Update the index
+        index[file_key] = file_data  # type: ignore
+
+    return changed
+
+
+def mark_removed(index: dict[str, KnowledgeImport]):
+    """Mark index entries that no scan has seen as removed."""
+    for file_data in index.values():
         if not file_data.get("state", ""):
-            index[file_key]["state"] = "removed"
+            file_data["state"] = "removed"
+
+
+def load_file(file_path: str, metadata: dict[str, Any]) -> list[Document]:
+    """Parse and split one knowledge file, runs in the parse workers."""
+    ext = file_path.split(".")[-1].lower()
+    loader = file_types_loaders[ext](
+        file_path,
+        **(text_loader_kwargs if ext in ["txt", "csv", "html", "md"] else {}),
+    )
+    # pages are split as they are loaded instead of loading the whole file first
+    splitter = RecursiveCharacterTextSplitter()
+    documents = []
+    for page in loader.lazy_load():
+        documents.extend(splitter.split_documents([page]))
+    for doc in documents:
+        doc.metadata = {**doc.metadata, **metadata}
+    return documents
+
+
+async def parse_files(
+    kn_files: list[KnowledgeFile],
+) -> AsyncIterator[tuple[KnowledgeFile, list[Document] | None]]:
+    """Yield (file, documents) for kn_files as their parsing completes.
+
+    New files are only submitted while the consumer keeps up, so at most
+    MAX_PENDING_FILES files are parsed ahead of it. Files that fail to parse
+    are logged and yielded with None.
+    """
+    if not kn_files:
+        return
+    loop = asyncio.get_running_loop()
+    executor = _new_executor(use_processes=len(kn_files) > 1)
+    queue = iter(kn_files)
+    pending: dict[asyncio.Future, KnowledgeFile] = {}
+
+    def fill():
+        nonlocal executor
+        while len(pending) < MAX_PENDING_FILES:
+            kn_file = next(queue, None)
+            if kn_file is None:
+                return
+            try:
+                future = loop.run_in_executor(executor, load_file, *kn_file)
+            except (OSError, BrokenProcessPool):
+                # worker processes cannot be started here, parse in threads
+                executor.shutdown(wait=False)
+                executor = _new_executor(use_processes=False)
+                future = loop.run_in_executor(executor, load_file, *kn_file)
+            pending[future] = kn_file
+
+    try:
+        fill()
+        while pending:
+            done, _ = await asyncio.wait(
+                pending.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                kn_file = pending.pop(future)
+                try:
+                    documents = future.result()
+                except Exception as e:
+                    PrintStyle.error(
+                        f"Error loading knowledge file {kn_file.path}: {e}"
+                    )
+                    documents = None
+                yield kn_file, documents
+            fill()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _new_executor(use_processes: bool) -> Executor:
+    if use_processes:
+        try:
+            # forking the multi-threaded server could copy locks held by
+            # other threads into the workers
+            methods = multiprocessing.get_all_start_methods()
+            method = "forkserver" if "forkserver" in methods else "spawn"
+            return ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context(method),
+            )
+        except (OSError, NotImplementedError, ValueError):
+            pass  # no multiprocessing support on this platform
+    return ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+
+
+def load_knowledge(
+    log_item: LogItem | None,
+    knowledge_dir: str,
+    index: dict[str, KnowledgeImport],
+    metadata: dict[str, Any] = None,
+    filename_pattern: str = "**/*",
+) -> dict[str, KnowledgeImport]:
+    """Scan knowledge_dir and parse its changed files serially into index."""
+    changed = scan_knowledge(log_item, knowledge_dir, index, metadata, filename_pattern)
+
+    cnt_docs = 0
+    for kn_file in changed:
+        documents = load_file(*kn_file)
+        index[kn_file.path]["documents"] = documents
+        cnt_docs += len(documents)
+
+    mark_removed(index)
 
-    PrintStyle.standard(f"Processed {cnt_docs} documents from {cnt_files} files.")
+    PrintStyle.standard(f"Processed {cnt_docs} documents from {len(changed)} files.")
     if log_item:
         log_item.stream(
-            progress=f"\nProcessed {cnt_docs} documents from {cnt_files} files."
+            progress=f"\nProcessed {cnt_docs} documents from {len(changed)} files."
         )
     return index
@@ -1,3 +1,4 @@
+import threading
 import uuid
 from collections import OrderedDict  # Import OrderedDict
 from dataclasses import dataclass
@@ -90,7 +91,10 @@ class LogItem:
 class Log:
     def __init__(self):
         self.guid: str = str(uuid.uuid4())
-        self.updates: list[int] = []
+        self.version: int = 0  # incremented on every change
+        # item no -> version of its last change, kept ordered by version
+        self._item_versions: dict[int, int] = {}
+        self._lock = threading.Lock()
         self.logs: list[LogItem] = []
         self.set_initial_progress()
 
@@ -122,7 +126,7 @@ class Log:
             id=id,  # Pass id to LogItem
         )
         self.logs.append(item)
-        self.updates += [item.no]
+        self.mark_updated(item.no)
         self._update_progress_from_item(item)
         return item
 
@@ -158,7 +162,7 @@ class Log:
             for k, v in kwargs.items():
                 item.kvps[k] = v
 
-        self.updates += [item.no]
+        self.mark_updated(item.no)
         self._update_progress_from_item(item)
 
     def set_progress(self, progress: str, no: int = 0, active: bool = True):
@@ -171,27 +175,36 @@ class Log:
     def set_initial_progress(self):
         self.set_progress("Waiting for input", 0, False)
 
-    def output(self, start=None, end=None):
-        if start is None:
-            start = 0
-        if end is None:
-            end = len(self.updates)
-
-        out = []
-        seen = set()
-        for update in self.updates[start:end]:
-            if update not in seen:
-                out.append(self.logs[update].output())
-                seen.add(update)
-
-        return out
+    def output(self, since_version: int | None = None):
+        """Items changed after since_version, in log order."""
+        if not since_version or since_version < 0:
+            since_version = 0
+
+        changed = []
+        with self._lock:
+            # newest changes are at the end, stop at the first older one
+            for no in reversed(self._item_versions):
+                if self._item_versions[no] <= since_version:
+                    break
+                changed.append(no)
+            changed.sort()
+            return [self.logs[no].output() for no in changed]
 
     def reset(self):
-        self.guid = str(uuid.uuid4())
-        self.updates = []
-        self.logs = []
+        with self._lock:
+            self.guid = str(uuid.uuid4())
+            self.version = 0
+            self._item_versions = {}
+            self.logs = []
         self.set_initial_progress()
 
+    def mark_updated(self, no: int):
+        """Record a change of item no, for output(since_version)."""
+        with self._lock:
+            self.version += 1
+            self._item_versions.pop(no, None)
+            self._item_versions[no] = self.version
+
     def _update_progress_from_item(self, item: LogItem):
         if (
             item.heading
@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
 import json
+import operator
 import os
+import pickle
+import threading
 import uuid
 from collections.abc import Sequence
 from datetime import datetime
@@ -8,8 +13,6 @@ from typing import Any
 
 import faiss
 import numpy as np
-from langchain.embeddings import CacheBackedEmbeddings
-from langchain.storage import InMemoryByteStore, LocalFileStore
 from langchain_community.docstore.in_memory import InMemoryDocstore
 
 # from langchain_chroma import Chroma
@@ -43,8 +46,15 @@ except ImportError as e:
 # 2. Building from source with proper ARM64 support  
 # 3. Using alternative vector stores (ChromaDB, Weaviate, etc.)
 # This replaces the previous TODO and provides runtime compatibility checking
-from framework.helpers import knowledge_import
+from framework.helpers import embedding_service, knowledge_import
 from framework.helpers.log import LogItem
+from framework.helpers.memory_filter import MemoryFilter, compile_filter
+from framework.helpers.memory_index import AnnIndex, IndexConfig
+from framework.helpers.memory_persistence import (
+    ANN_FILE_NAME,
+    flush_all,
+    get_persistence,
+)
 from framework.helpers.print_style import PrintStyle
 
 from . import files
@@ -59,6 +69,8 @@ except ImportError:
     GRAPH_AVAILABLE = False
     MemoryGraph = None
 
+KNOWLEDGE_BATCH_SIZE = 64  # knowledge documents embedded per request
+
 
 class MyFaiss(FAISS):
     """Enhanced FAISS wrapper with ARM64 Python 3.13+ compatibility."""
@@ -73,7 +85,145 @@ class MyFaiss(FAISS):
                 "3. Use alternative vector stores like ChromaDB"
             )
         super().__init__(*args, **kwargs)
-    
+        # index positions of documents per area, for prefiltered search
+        self._area_lock = threading.Lock()
+        self._area_positions: dict[str, list[int]] | None = None
+        self._area_covered = 0  # positions included in _area_positions
+        self._area_selectors: dict[frozenset, tuple[np.ndarray, Any, int]] = {}
+        self._ann: AnnIndex | None = None  # approximate index, see memory_index
+
+    def configure_index(self, config: IndexConfig, lock: Any):
+        """Search an approximate index once the database is large enough.
+
+        lock has to be held by everything that adds or deletes documents.
+        """
+        self._ann = AnnIndex(self.index, config, lock)
+
+    def serialize_ann(self) -> bytes | None:
+        """Approximate index with the document ids it was built for."""
+        if self._ann is None:
+            return None
+        state = self._ann.dump()
+        if state is None:
+            return None
+        return pickle.dumps((self._ids_digest(), state))
+
+    def load_ann(self, data: bytes):
+        """Use an index written by serialize_ann if it still matches the docs."""
+        if self._ann is None:
+            return
+        digest, state = pickle.loads(data)
+        if digest == self._ids_digest():
+            self._ann.load(state)
+
+    def _ids_digest(self) -> str:
+        ids = (id for _, id in sorted(self.index_to_docstore_id.items()))
+        return hashlib.sha256("\n".join(ids).encode()).hexdigest()
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        """Area filters select candidates inside the FAISS search.
+
+        Other filters, and other conditions next to an area, are applied to
+        the fetch_k nearest documents (within the areas) as usual.
+        Large databases are searched through the approximate index.
+        """
+        areas = filter.areas if isinstance(filter, MemoryFilter) else None
+        if areas is None and self._ann is None:
+            return super().similarity_search_with_score_by_vector(
+                embedding, k=k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        bitmap, selector, selected = None, None, self.index.ntotal
+        if areas is not None:
+            bitmap, selector, selected = self._get_area_selector(areas)
+        area_only = isinstance(filter, MemoryFilter) and filter.area_only
+        count = k if filter is None or area_only else fetch_k
+
+        result = None
+        if self._ann is not None:
+            result = self._ann.search(vector, count, bitmap, selected)
+        if result is None:
+            params = None
+            if selector is not None:
+                params = faiss.SearchParameters(sel=selector)
+            result = self.index.search(vector, count, params=params)
+        scores, indices = result
+
+        filter_func = None
+        if filter is not None:
+            filter_func = self._create_filter_func(filter)
+        docs = []
+        for score, i in zip(scores[0], indices[0], strict=False):
+            if i == -1:
+                continue  # fewer matching documents than k
+            doc = self.docstore.search(self.index_to_docstore_id[i])
+            if isinstance(doc, Document) and (
+                filter_func is None or filter_func(doc.metadata)
+            ):
+                docs.append((doc, score))
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            cmp = (
+                operator.ge
+                if self.distance_strategy
+                in (DistanceStrategy.MAX_INNER_PRODUCT, DistanceStrategy.JACCARD)
+                else operator.le
+            )
+            docs = [(doc, score) for doc, score in docs if cmp(score, score_threshold)]
+        return docs[:k]
+
+    def delete(self, ids: list[str] | None = None, **kwargs):
+        positions = {id: i for i, id in self.index_to_docstore_id.items()}
+        result = super().delete(ids, **kwargs)
+        with self._area_lock:
+            self._area_positions = None  # positions were renumbered
+        if self._ann is not None:
+            self._ann.remove([positions[id] for id in ids or () if id in positions])
+        return result
+
+    def _get_area_selector(self, areas: frozenset) -> tuple[np.ndarray, Any, int]:
+        """Bitmap and selector of the positions in areas, and their number."""
+        with self._area_lock:
+            ntotal = self.index.ntotal
+            if self._area_positions is None or self._area_covered > ntotal:
+                self._area_positions, self._area_covered = {}, 0
+                self._area_selectors.clear()
+            if self._area_covered < ntotal:
+                # new documents are appended, only those need to be looked up
+                for i in range(self._area_covered, ntotal):
+                    doc = self.docstore.search(self.index_to_docstore_id[i])
+                    if isinstance(doc, Document):
+                        area = doc.metadata.get("area")
+                        self._area_positions.setdefault(area, []).append(i)
+                self._area_covered = ntotal
+                self._area_selectors.clear()
+
+            cached = self._area_selectors.get(areas)
+            if cached is None:
+                mask = np.zeros(ntotal, dtype=bool)
+                for area in areas:
+                    mask[self._area_positions.get(area, [])] = True
+                bitmap = np.packbits(mask, bitorder="little")
+                # the selector reads the bitmap in place, keep both
+                selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+                cached = self._area_selectors[areas] = (
+                    bitmap,
+                    selector,
+                    int(mask.sum()),
+                )
+            return cached
+
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
         # return all self.docstore._dict[id] in ids
@@ -133,6 +283,7 @@ class Memory:
     async def reload(agent: Agent):
         memory_subdir = agent.config.memory_subdir or "default"
         if Memory.index.get(memory_subdir):
+            get_persistence(Memory._abs_db_dir(memory_subdir)).flush()
             del Memory.index[memory_subdir]
         return await Memory.get(agent)
 
@@ -156,11 +307,8 @@ class Memory:
         # make sure embeddings and database directories exist
         os.makedirs(db_dir, exist_ok=True)
 
-        if in_memory:
-            store = InMemoryByteStore()
-        else:
+        if not in_memory:
             os.makedirs(em_dir, exist_ok=True)
-            store = LocalFileStore(em_dir)
 
         embeddings_model = models.get_model(
             models.ModelType.EMBEDDING,
@@ -172,9 +320,9 @@ class Memory:
             model_config.provider.name + "_" + model_config.name
         )
 
-        # here we setup the embeddings model with the chosen cache storage
-        embedder = CacheBackedEmbeddings.from_bytes_store(
-            embeddings_model, store, namespace=embeddings_model_id
+        # here we setup the embeddings model with the shared batching cache
+        embedder = embedding_service.get_service(
+            embeddings_model, embeddings_model_id, None if in_memory else em_dir
         )
 
         # initial DB and docs variables
@@ -206,10 +354,19 @@ class Memory:
                     # model matches
                     emb_ok = True
 
-            # re-index -  create new DB and insert existing docs
-            if db and not emb_ok:
-                docs = db.get_all_docs()
+            # changes made after the last flush
+            persistence = get_persistence(db_dir)
+
+            # re-index -  create new DB and insert existing docs, also when the
+            # index was written but the docstore not (or the other way around);
+            # the changes go to the docs instead of the stale index
+            if not emb_ok or db.index.ntotal != len(db.index_to_docstore_id):
+                docs = dict(db.get_all_docs())
+                persistence.replay_docs(docs)
                 db = None
+            else:
+                Memory._configure_index(db, db_dir)
+                persistence.replay(db)
 
         # DB not loaded, create one
         if not db:
@@ -233,7 +390,8 @@ class Memory:
                 db.add_documents(documents=list(docs.values()), ids=list(docs.keys()))
 
             # save DB
-            Memory._save_db_file(db, memory_subdir)
+            Memory._configure_index(db, db_dir)
+            get_persistence(db_dir).save(db)
             # save meta file
             meta_file_path = files.get_abs_path(db_dir, "embedding.json")
             files.write_file(
@@ -281,8 +439,9 @@ class Memory:
             with open(index_path) as f:
                 index = json.load(f)
 
-        # preload knowledge folders
-        index = self._preload_knowledge_folders(log_item, kn_dirs, index)
+        # find changed and removed files, unchanged files are not even read
+        changed = self._scan_knowledge_folders(log_item, kn_dirs, index)
+        knowledge_import.mark_removed(index)
 
         for file in index:
             if index[file]["state"] in ["changed", "removed"] and index[file].get(
@@ -291,10 +450,28 @@ class Memory:
                 await self.delete_documents_by_ids(
                     index[file]["ids"]
                 )  # remove original version
-            if index[file]["state"] == "changed":
-                index[file]["ids"] = await self.insert_documents(
-                    index[file]["documents"]
-                )  # insert new version
+                index[file]["ids"] = []
+
+        # changed files are parsed in worker processes and embedded as they come
+        cnt_files = cnt_docs = 0
+        async for kn_file, documents in knowledge_import.parse_files(changed):
+            file_data = index[kn_file.path]
+            if documents is None:
+                file_data["checksum"] = ""  # not imported, retried on next start
+            else:
+                file_data["ids"] = await self._insert_knowledge(documents)
+                cnt_docs += len(documents)
+            cnt_files += 1
+            if log_item:
+                log_item.update(
+                    heading=f"Preloading knowledge... {cnt_files}/{len(changed)} files"
+                )
+
+        PrintStyle.standard(f"Processed {cnt_docs} documents from {cnt_files} files.")
+        if log_item:
+            log_item.stream(
+                progress=f"\nProcessed {cnt_docs} documents from {cnt_files} files."
+            )
 
         # remove index where state="removed"
         index = {k: v for k, v in index.items() if v["state"] != "removed"}
@@ -308,24 +485,32 @@ class Memory:
         with open(index_path, "w") as f:
             json.dump(index, f)
 
-    def _preload_knowledge_folders(
+    async def _insert_knowledge(self, docs: list[Document]) -> list[str]:
+        # bounded batches keep embedding requests and their memory small
+        ids = []
+        for i in range(0, len(docs), KNOWLEDGE_BATCH_SIZE):
+            ids += await self.insert_documents(docs[i : i + KNOWLEDGE_BATCH_SIZE])
+        return ids
+
+    def _scan_knowledge_folders(
         self,
         log_item: LogItem | None,
         kn_dirs: list[str],
         index: dict[str, knowledge_import.KnowledgeImport],
-    ):
-        # load knowledge folders, subfolders by area
+    ) -> list[knowledge_import.KnowledgeFile]:
+        changed = []
+        # scan knowledge folders, subfolders by area
         for kn_dir in kn_dirs:
             for area in Memory.Area:
-                index = knowledge_import.load_knowledge(
+                changed += knowledge_import.scan_knowledge(
                     log_item,
                     files.get_abs_path("knowledge", kn_dir, area.value),
                     index,
                     {"area": area.value},
                 )
 
-        # load instruments descriptions
-        index = knowledge_import.load_knowledge(
+        # scan instruments descriptions
+        changed += knowledge_import.scan_knowledge(
             log_item,
             files.get_abs_path("instruments"),
             index,
@@ -333,7 +518,7 @@ class Memory:
             filename_pattern="**/*.md",
         )
 
-        return index
+        return changed
 
     async def search_similarity_threshold(
         self, query: str, limit: int, threshold: float, filter: str = ""
@@ -376,7 +561,7 @@ class Memory:
                 # fnd = self.db.get(where={"id": {"$in": document_ids}})
                 # if fnd["ids"]: self.db.delete(ids=fnd["ids"])
                 # tot += len(fnd["ids"])
-                await self.db.adelete(ids=document_ids)
+                await self._delete_ids(document_ids)
                 tot += len(document_ids)
 
             # If fewer than K document IDs, break the loop
@@ -394,7 +579,7 @@ class Memory:
         )  # existing docs to remove (prevents error)
         if rem_docs:
             rem_ids = [doc.metadata["id"] for doc in rem_docs]  # ids to remove
-            await self.db.adelete(ids=rem_ids)
+            await self._delete_ids(rem_ids)
 
         if rem_docs:
             self._save_db()  # persist
@@ -424,28 +609,55 @@ class Memory:
                 model_config=self.agent.config.embeddings_model, input=docs_txt
             )
 
-            await self.db.aadd_documents(documents=docs, ids=ids)
+            # embed outside the lock, the index is only locked for the insert
+            texts = [doc.page_content for doc in docs]
+            embeddings = await self.db.embedding_function.aembed_documents(texts)
+            persistence = self._get_persistence()
+
+            def add():
+                with persistence.lock:
+                    self.db.add_embeddings(
+                        zip(texts, embeddings, strict=False),
+                        metadatas=[doc.metadata for doc in docs],
+                        ids=ids,
+                    )
+                    persistence.log_add(docs, ids)
+
+            await asyncio.to_thread(add)
             self._save_db()  # persist
         return ids
 
-    def _save_db(self):
-        Memory._save_db_file(self.db, self.memory_subdir)
+    async def _delete_ids(self, ids: list[str]):
+        persistence = self._get_persistence()
 
-    @staticmethod
-    def _save_db_file(db: MyFaiss, memory_subdir: str):
-        abs_dir = Memory._abs_db_dir(memory_subdir)
-        db.save_local(folder_path=abs_dir)
+        def delete():
+            with persistence.lock:
+                self.db.delete(ids=ids)
+                persistence.log_delete(ids)
+
+        await asyncio.to_thread(delete)
+
+    def _save_db(self):
+        # changes are in the WAL already, the files are written in the background
+        self._get_persistence().mark_dirty(self.db)
 
     @staticmethod
-    def _get_comparator(condition: str):
-        def comparator(data: dict[str, Any]):
+    def _configure_index(db: MyFaiss, db_dir: str):
+        db.configure_index(IndexConfig.from_env(), get_persistence(db_dir).lock)
+        ann_file = files.get_abs_path(db_dir, ANN_FILE_NAME)
+        if files.exists(ann_file):
             try:
-                return eval(condition, {}, data)
-            except Exception:
-                # PrintStyle.error(f"Error evaluating condition: {e}")
-                return False
+                with open(ann_file, "rb") as f:
+                    db.load_ann(f.read())
+            except Exception as e:  # rebuilt in the background when needed
+                PrintStyle.error(f"Error loading memory index {ann_file}: {e}")
 
-        return comparator
+    def _get_persistence(self):
+        return get_persistence(Memory._abs_db_dir(self.memory_subdir))
+
+    @staticmethod
+    def _get_comparator(condition: str) -> MemoryFilter:
+        return compile_filter(condition)
 
     @staticmethod
     def _score_normalizer(val: float) -> float:
@@ -550,4 +762,5 @@ def get_custom_knowledge_subdir_abs(agent: Agent) -> str:
 
 def reload():
     # clear the memory index, this will force all DBs to reload
+    flush_all()
     Memory.index = {}
@@ -0,0 +1,238 @@
+"""Compiled metadata filters for memory search.
+
+Filters are python expressions over document metadata, e.g.
+``area == 'main' or area == 'fragments'``. They are parsed once into a
+predicate instead of being evaluated with eval() for every candidate
+document, and the areas an expression is limited to are extracted so the
+vector search can skip all other documents up front.
+"""
+
+import ast
+import builtins
+import operator
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+Predicate = Callable[[dict[str, Any]], Any]
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+# builtins python filters may call, nothing that imports or touches files
+_FILTER_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs",
+        "all",
+        "any",
+        "bool",
+        "dict",
+        "float",
+        "int",
+        "isinstance",
+        "len",
+        "list",
+        "max",
+        "min",
+        "round",
+        "set",
+        "sorted",
+        "str",
+        "sum",
+        "tuple",
+    )
+}
+
+
+class MemoryFilter:
+    """Callable filter, returns True for metadata matching the condition.
+
+    ``areas`` is the set of areas matching documents can be in, or None when
+    the condition does not restrict the area. ``area_only`` is True when the
+    condition matches exactly the documents in those areas.
+    """
+
+    def __init__(
+        self,
+        condition: str,
+        predicate: Predicate,
+        areas: frozenset | None,
+        area_only: bool = False,
+    ):
+        self.condition = condition
+        self.areas = areas
+        self.area_only = area_only and areas is not None
+        self._predicate = predicate
+
+    def __call__(self, metadata: dict[str, Any]) -> bool:
+        try:
+            return bool(self._predicate(metadata))
+        except Exception:
+            # missing fields or mismatched types never match
+            return False
+
+    def __repr__(self):
+        return f"MemoryFilter({self.condition!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_filter(condition: str) -> MemoryFilter:
+    """Parse condition once, results are cached per condition string."""
+    try:
+        tree = ast.parse(condition.strip(), mode="eval").body
+    except SyntaxError:
+        return MemoryFilter(condition, lambda data: False, None)
+    try:
+        predicate = _compile(tree)
+    except _UnsupportedError:
+        predicate = _compile_python(condition)
+    return MemoryFilter(condition, predicate, _get_areas(tree), _is_area_only(tree))
+
+
+class _UnsupportedError(Exception):
+    pass
+
+
+def _compile(node: ast.AST) -> Predicate:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda data: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda data: data[name]  # KeyError like eval's NameError
+
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        make = {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)]
+        if all(isinstance(item, ast.Constant) for item in node.elts):
+            value = make(item.value for item in node.elts)  # type: ignore
+            return lambda data: value
+        items = [_compile(item) for item in node.elts]
+        return lambda data: make(item(data) for item in items)
+
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+
+            def all_of(data):
+                result = True
+                for operand in operands:
+                    result = operand(data)
+                    if not result:
+                        return result
+                return result
+
+            return all_of
+
+        def any_of(data):
+            result = False
+            for operand in operands:
+                result = operand(data)
+                if result:
+                    return result
+            return result
+
+        return any_of
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile(node.operand)
+        return lambda data: not operand(data)
+
+    if isinstance(node, ast.Compare):
+        left = _compile(node.left)
+        steps = [
+            (_COMPARE_OPS[type(op)], _compile_operand(op, right))
+            for op, right in zip(node.ops, node.comparators, strict=True)
+            if type(op) in _COMPARE_OPS
+        ]
+        if len(steps) != len(node.ops):
+            raise _UnsupportedError()
+
+        def compare(data):
+            a = left(data)
+            for op, right in steps:
+                b = right(data)
+                if not op(a, b):
+                    return False
+                a = b
+            return True
+
+        return compare
+
+    raise _UnsupportedError()
+
+
+def _compile_operand(op: ast.cmpop, node: ast.AST) -> Predicate:
+    # membership in a literal collection is a set lookup
+    if (
+        isinstance(op, (ast.In, ast.NotIn))
+        and isinstance(node, (ast.List, ast.Tuple, ast.Set))
+        and all(_is_str(item) for item in node.elts)
+    ):
+        values = frozenset(item.value for item in node.elts)  # type: ignore
+        return lambda data: values
+    return _compile(node)
+
+
+def _compile_python(condition: str) -> Predicate:
+    # other expressions (method calls, arithmetic...) keep their python
+    # semantics, but are compiled once and only see the safe builtins
+    code = compile(condition.strip(), "<memory filter>", "eval")
+    scope = {"__builtins__": _FILTER_BUILTINS}
+    return lambda data: eval(code, scope, data)
+
+
+def _get_areas(node: ast.AST) -> frozenset | None:
+    """Areas the expression can match, None if it is not limited to areas."""
+    if isinstance(node, ast.Compare) and len(node.ops) == 1:
+        left, op, right = node.left, node.ops[0], node.comparators[0]
+        if isinstance(op, ast.Eq):
+            if _is_area(left) and _is_str(right):
+                return frozenset([right.value])  # type: ignore
+            if _is_area(right) and _is_str(left):
+                return frozenset([left.value])  # type: ignore
+        if (
+            isinstance(op, ast.In)
+            and _is_area(left)
+            and isinstance(right, (ast.List, ast.Tuple, ast.Set))
+            and all(_is_str(item) for item in right.elts)
+        ):
+            return frozenset(item.value for item in right.elts)  # type: ignore
+        return None
+
+    if isinstance(node, ast.BoolOp):
+        areas = [_get_areas(value) for value in node.values]
+        if isinstance(node.op, ast.Or):
+            if any(a is None for a in areas):
+                return None
+            return frozenset().union(*areas)  # type: ignore
+        limited = [a for a in areas if a is not None]
+        return frozenset.intersection(*limited) if limited else None
+
+    return None
+
+
+def _is_area_only(node: ast.AST) -> bool:
+    """True if the expression tests nothing but the area."""
+    if isinstance(node, ast.BoolOp):
+        return all(_is_area_only(value) for value in node.values)
+    return isinstance(node, ast.Compare) and _get_areas(node) is not None
+
+
+def _is_area(node: ast.AST) -> bool:
+    return isinstance(node, ast.Name) and node.id == "area"
+
+
+def _is_str(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and isinstance(node.value, str)
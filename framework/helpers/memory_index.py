@@ -0,0 +1,340 @@
+"""Approximate nearest neighbour indexes for the memory databases.
+
+The flat index stays the stored source of truth: it holds the exact vectors
+and langchain's delete renumbers its positions. Once a database holds
+``promote_at`` vectors, an HNSW, IVF-Flat or IVF-PQ index of them is built in
+a background thread and searched instead; until it is ready, searches scan
+the flat index as before. Vectors added later are appended to the
+approximate index on the next search. Deleted vectors stay in it as
+tombstones that searches skip, and a table maps its positions to the
+renumbered flat positions. The index is rebuilt in the background once
+``rebuild_deleted`` of it is deleted, or for IVF, once the corpus has
+doubled since the centroids were trained.
+"""
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import faiss
+import numpy as np
+
+from framework.helpers.dotenv import get_dotenv_value
+from framework.helpers.print_style import PrintStyle
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+BUILD_CHUNK = 10_000  # vectors copied from the flat index per lock
+TRAIN_POINTS_PER_LIST = 50
+
+
+@dataclass
+class IndexConfig:
+    type: str = "hnsw"  # one of INDEX_TYPES, flat never promotes
+    promote_at: int = 50_000  # vectors before the approximate index is used
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 80
+    hnsw_ef_search: int = 64
+    ivf_nprobe: int = 16
+    pq_m: int = 0  # bytes per PQ code, 0 = about one per 8 dimensions
+    pq_refine: int = 8  # PQ candidates per result re-ranked with exact vectors
+    min_selected: float = 0.1  # sparser area filters scan the flat index
+    rebuild_deleted: float = 0.2  # deleted fraction of the index before a rebuild
+
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        """Configuration from MEMORY_INDEX_* variables in .env."""
+        config = cls()
+        for field, key in (
+            ("type", "MEMORY_INDEX_TYPE"),
+            ("promote_at", "MEMORY_INDEX_PROMOTE_AT"),
+            ("hnsw_m", "MEMORY_INDEX_HNSW_M"),
+            ("hnsw_ef_search", "MEMORY_INDEX_HNSW_EF_SEARCH"),
+            ("ivf_nprobe", "MEMORY_INDEX_IVF_NPROBE"),
+            ("pq_m", "MEMORY_INDEX_PQ_M"),
+        ):
+            value = get_dotenv_value(key)
+            if value in (None, ""):
+                continue
+            try:
+                setattr(config, field, type(getattr(config, field))(value))
+            except ValueError:
+                PrintStyle.error(f"Invalid {key}: {value}")
+        if config.type not in INDEX_TYPES:
+            PrintStyle.error(f"Unknown MEMORY_INDEX_TYPE {config.type}, using flat")
+            config.type = "flat"
+        return config
+
+
+@dataclass
+class _Positions:
+    """Flat position of every vector in an approximate index.
+
+    table is None while both are the same, deleted vectors are -1 in it.
+    """
+
+    covered: int = 0  # flat positions below this are in the index
+    table: np.ndarray | None = None
+    deleted: int = 0
+
+    def append(self, end: int):
+        if self.table is not None:
+            added = np.arange(self.covered, end, dtype=np.int64)
+            self.table = np.concatenate([self.table, added])
+        self.covered = end
+
+    def remove(self, positions: np.ndarray):
+        """Sorted flat positions were deleted, the later ones renumbered."""
+        positions = positions[positions < self.covered]
+        if not len(positions):
+            return
+        table = self.table
+        if table is None:
+            table = np.arange(self.covered, dtype=np.int64)
+        shift = np.searchsorted(positions, table)
+        self.table = np.where(np.isin(table, positions), -1, table - shift)
+        self.covered -= len(positions)
+        self.deleted += len(positions)
+
+    def to_flat(self, positions: np.ndarray) -> np.ndarray:
+        if self.table is None:
+            return positions
+        return np.where(positions >= 0, self.table[positions], -1)
+
+
+class AnnIndex:
+    """Approximate index over the positions of a flat index.
+
+    ``lock`` must be held by everything that mutates the flat index; builds
+    only hold it while copying vectors and for the final swap.
+    """
+
+    def __init__(self, flat: Any, config: IndexConfig, lock: Any = None):
+        self.flat = flat
+        self.config = config
+        self.lock = lock or threading.RLock()
+        self._index: Any = None
+        self._positions = _Positions()
+        self._pending: _Positions | None = None  # of the index being built
+        self._trained_at = 0  # vectors in the flat index when trained
+        self._builder: threading.Thread | None = None
+        # area bitmap id -> (areas, bitmap, selector) without the tombstones
+        self._selectors: dict[int | None, tuple[Any, np.ndarray, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        """Whether searches currently use the approximate index."""
+        return self._index is not None
+
+    def remove(self, positions: Any):
+        """Flat positions were deleted and the later ones renumbered.
+
+        Call with lock held, together with the delete from the flat index.
+        """
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        with self.lock:
+            self._positions.remove(positions)
+            if self._pending is not None:
+                self._pending.remove(positions)
+            self._selectors.clear()
+
+    def search(
+        self,
+        vector: np.ndarray,
+        k: int,
+        areas: np.ndarray | None = None,
+        selected: int = 0,
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """(scores, flat positions) like faiss, None when the flat index has to be used.
+
+        areas is a little-endian bitmap of the flat positions to search.
+        """
+        with self.lock:
+            ntotal = self.flat.ntotal
+            self._maybe_build(ntotal)
+            if not self.ready:
+                return None
+            if areas is not None and selected < self.config.min_selected * ntotal:
+                return None  # graph and list scans degrade with few members
+            self._catch_up()
+
+            count = k * self.config.pq_refine if self._is_pq() else k
+            selector = self._selector(areas)  # referenced by params only in C++
+            params = self._search_params(selector, count)
+            scores, positions = self._index.search(vector, count, params=params)
+            positions = self._positions.to_flat(positions)
+            if self._is_pq():
+                scores, positions = self._rerank(vector, positions, k)
+            return scores, positions
+
+    def dump(self) -> tuple[bytes, np.ndarray | None, int] | None:
+        """Index and its positions if it covers the flat index, call with lock held."""
+        if not self.ready or self._positions.covered != self.flat.ntotal:
+            return None
+        data = faiss.serialize_index(self._index).tobytes()
+        return data, self._positions.table, self._positions.covered
+
+    def load(self, state: tuple[bytes, np.ndarray | None, int]):
+        """Use an index written by dump."""
+        data, table, covered = state
+        index = faiss.deserialize_index(np.frombuffer(data, dtype=np.uint8))
+        with self.lock:
+            if _index_type(index) != self.config.type:
+                return  # configured type changed
+            if covered > self.flat.ntotal:
+                return
+            positions = _Positions(covered, table)
+            if table is not None:
+                positions.deleted = int((table < 0).sum())
+            self._index, self._positions = index, positions
+            self._trained_at = index.ntotal
+            self._selectors.clear()
+
+    def _maybe_build(self, ntotal: int):
+        if self.config.type == "flat" or ntotal < self.config.promote_at:
+            return
+        if self._builder and self._builder.is_alive():
+            return
+        if self.ready and not (
+            (self.config.type != "hnsw" and ntotal >= 2 * self._trained_at)
+            or self._positions.deleted
+            > self.config.rebuild_deleted * self._index.ntotal
+        ):
+            return
+        self._builder = threading.Thread(
+            target=self._build_safe, daemon=True, name="MemoryIndexBuild"
+        )
+        self._builder.start()
+
+    def _build_safe(self):
+        try:
+            self._build()
+        except Exception as e:
+            PrintStyle.error(f"Error building memory index: {e}")
+        finally:
+            with self.lock:
+                self._pending = None
+
+    def _build(self):
+        # the current index, if any, keeps answering until this one is swapped in
+        with self.lock:
+            ntotal = self.flat.ntotal
+            sample = self._training_sample(ntotal)
+            pending = self._pending = _Positions()
+        index = self._new_index(ntotal)
+        if sample is not None:
+            index.train(sample)
+
+        # copy chunks under the lock, add them outside of it
+        while True:
+            with self.lock:
+                start, end = pending.covered, self.flat.ntotal
+                if start >= end:
+                    self._index, self._positions = index, pending
+                    self._trained_at = ntotal
+                    self._selectors.clear()
+                    return
+                end = min(end, start + BUILD_CHUNK)
+                chunk = self.flat.reconstruct_n(start, end - start)
+                pending.append(end)
+            index.add(chunk)
+
+    def _new_index(self, ntotal: int) -> Any:
+        d, metric = self.flat.d, self.flat.metric_type
+        config = self.config
+        if config.type == "hnsw":
+            index = faiss.IndexHNSWFlat(d, config.hnsw_m, metric)
+            index.hnsw.efConstruction = config.hnsw_ef_construction
+            return index
+
+        quantizer = faiss.IndexFlat(d, metric)
+        nlist = self._nlist(ntotal)
+        if config.type == "ivf_flat":
+            return faiss.IndexIVFFlat(quantizer, d, nlist, metric)
+        # fewer bits per sub-quantizer when there is not enough training data
+        nbits = 8 if min(ntotal, self._train_size(ntotal)) >= 256 * 39 else 4
+        return faiss.IndexIVFPQ(quantizer, d, nlist, self._pq_m(d), nbits, metric)
+
+    def _training_sample(self, ntotal: int) -> np.ndarray | None:
+        if self.config.type == "hnsw":
+            return None
+        size = min(ntotal, self._train_size(ntotal))
+        positions = np.random.default_rng(0).choice(ntotal, size, replace=False)
+        return self.flat.reconstruct_batch(np.sort(positions).astype(np.int64))
+
+    def _train_size(self, ntotal: int) -> int:
+        return max(self._nlist(ntotal) * TRAIN_POINTS_PER_LIST, 256 * 39)
+
+    def _nlist(self, ntotal: int) -> int:
+        # about 4 * sqrt(n) lists, with enough points to train each centroid
+        return max(1, min(int(4 * math.sqrt(ntotal)), ntotal // 39, 65536))
+
+    def _pq_m(self, d: int) -> int:
+        target = self.config.pq_m or max(1, d // 8)
+        return max(m for m in range(1, target + 1) if d % m == 0)
+
+    def _is_pq(self) -> bool:
+        return self.config.type == "ivf_pq"
+
+    def _catch_up(self):
+        # documents added since the last search, positions only ever append
+        start, end = self._positions.covered, self.flat.ntotal
+        if start < end:
+            self._index.add(self.flat.reconstruct_n(start, end - start))
+            self._positions.append(end)
+            self._selectors.clear()
+
+    def _selector(self, areas: np.ndarray | None) -> Any:
+        table = self._positions.table
+        if table is None:
+            if areas is None:
+                return None
+            # index positions are flat positions
+            return faiss.IDSelectorBitmap(len(areas), faiss.swig_ptr(areas))
+
+        key = None if areas is None else id(areas)
+        cached = self._selectors.get(key)
+        if cached is None:
+            mask = table >= 0
+            if areas is not None:
+                members = np.zeros(max(8 * len(areas), self._positions.covered), bool)
+                members[: 8 * len(areas)] = np.unpackbits(areas, bitorder="little")
+                mask &= members[table]
+            bitmap = np.packbits(mask, bitorder="little")
+            selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            # areas is kept so its id is not reused while cached
+            cached = self._selectors[key] = (areas, bitmap, selector)
+        return cached[2]
+
+    def _search_params(self, selector: Any, k: int) -> Any:
+        if self.config.type == "hnsw":
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = max(self.config.hnsw_ef_search, k)
+        else:
+            params = faiss.SearchParametersIVF()
+            params.nprobe = self.config.ivf_nprobe
+        if selector is not None:
+            params.sel = selector
+        return params
+
+    def _rerank(
+        self, vector: np.ndarray, positions: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # PQ distances are approximate, score the candidates with exact vectors
+        candidates = positions[0][positions[0] >= 0]
+        vectors = self.flat.reconstruct_batch(candidates)
+        if self.flat.metric_type == faiss.METRIC_INNER_PRODUCT:
+            scores = vectors @ vector[0]
+            order = np.argsort(-scores)[:k]
+        else:
+            scores = ((vectors - vector[0]) ** 2).sum(axis=1)
+            order = np.argsort(scores)[:k]
+        return scores[order][None, :], candidates[order][None, :]
+
+
+def _index_type(index: Any) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    return "ivf_flat"
@@ -0,0 +1,283 @@
+"""Write-behind persistence for the FAISS memory databases.
+
+Writing index.faiss and the pickled docstore after every insert or delete
+costs as much as the whole database. Instead, every mutation is appended to
+a small write-ahead log (wal.jsonl) and the database is marked dirty; a
+worker thread writes it once changes have settled for FLUSH_DELAY seconds,
+at the latest MAX_FLUSH_DELAY seconds after the first unsaved change, and
+at interpreter exit. Files are written to temporary names and renamed into
+place. The WAL is truncated after a flush and replayed when a database is
+loaded, so a crash between flushes loses nothing.
+"""
+
+import atexit
+import json
+import os
+import pickle
+import threading
+import time
+from typing import Any
+
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+
+from framework.helpers.print_style import PrintStyle
+
+FLUSH_DELAY = 2.0  # seconds without changes before writing
+MAX_FLUSH_DELAY = 10.0  # seconds a change may stay unwritten under constant writes
+WAL_FILE_NAME = "wal.jsonl"
+INDEX_NAME = "index"
+ANN_FILE_NAME = f"{INDEX_NAME}.ann"  # approximate index, see memory_index
+
+
+class MemoryPersistence:
+    """Persistence of one memory database folder.
+
+    Mutations of the database and the snapshot taken for a flush both hold
+    ``lock``, so the files always match a state between two mutations.
+    """
+
+    def __init__(self, db_dir: str):
+        self.db_dir = db_dir
+        self.lock = threading.RLock()
+        self._flush_lock = threading.Lock()  # one write of the files at a time
+        self._db: Any = None
+        self._wal_entries = 0
+        self._dirty_since: float | None = None
+        self._changed_at = 0.0
+
+    def log_add(self, docs: list[Document], ids: list[str]):
+        """Record inserted documents, call with lock held."""
+        self._append(
+            {
+                "op": "add",
+                "docs": [
+                    {"id": id, "page_content": d.page_content, "metadata": d.metadata}
+                    for d, id in zip(docs, ids, strict=False)
+                ],
+            }
+        )
+
+    def log_delete(self, ids: list[str]):
+        """Record deleted document ids, call with lock held."""
+        self._append({"op": "delete", "ids": list(ids)})
+
+    def mark_dirty(self, db: Any):
+        """Schedule a flush of db."""
+        with self.lock:
+            self._db = db
+            now = time.monotonic()
+            self._changed_at = now
+            if self._dirty_since is None:
+                self._dirty_since = now
+        _worker.wake()
+
+    def is_due(self, now: float) -> bool:
+        if self._dirty_since is None:
+            return False
+        return (
+            now - self._changed_at >= FLUSH_DELAY
+            or now - self._dirty_since >= MAX_FLUSH_DELAY
+        )
+
+    def flush(self):
+        """Write the database now if it has unsaved changes."""
+        with self._flush_lock:
+            with self.lock:
+                if self._db is None or self._dirty_since is None:
+                    return
+                snapshot, wal_entries = self._snapshot(self._db)
+                self._dirty_since = None
+
+            try:
+                self._write(*snapshot)
+            except Exception:
+                with self.lock:  # try again later, the WAL still has everything
+                    if self._dirty_since is None:
+                        self._dirty_since = time.monotonic()
+                raise
+
+            with self.lock:
+                self._truncate_wal(wal_entries)
+
+    def save(self, db: Any):
+        """Write db right away, e.g. after creating or re-indexing it."""
+        with self._flush_lock, self.lock:
+            self._db = db
+            snapshot, wal_entries = self._snapshot(db)
+            self._dirty_since = None
+            self._write(*snapshot)
+            self._truncate_wal(wal_entries)
+
+    def replay(self, db: Any) -> int:
+        """Apply WAL entries written after the last flush, returns their number."""
+        entries, lines = self._read_wal()
+        with self.lock:
+            docstore = db.docstore._dict
+            for entry in entries:
+                if entry["op"] == "add":
+                    new = [d for d in entry["docs"] if d["id"] not in docstore]
+                    if new:
+                        db.add_documents(
+                            [
+                                Document(d["page_content"], metadata=d["metadata"])
+                                for d in new
+                            ],
+                            ids=[d["id"] for d in new],
+                        )
+                elif entry["op"] == "delete":
+                    ids = [id for id in entry["ids"] if id in docstore]
+                    if ids:
+                        db.delete(ids)
+            self._wal_entries = lines  # a torn last line is dropped as well
+        if lines:
+            self.save(db)
+        return len(entries)
+
+    def replay_docs(self, docs: dict[str, Document]) -> int:
+        """Apply WAL entries to docs of a database about to be re-indexed.
+
+        Nothing is embedded here; the entries are removed from the WAL by the
+        save() of the re-indexed database. Returns their number.
+        """
+        entries, lines = self._read_wal()
+        with self.lock:
+            for entry in entries:
+                if entry["op"] == "add":
+                    for d in entry["docs"]:
+                        docs.setdefault(
+                            d["id"], Document(d["page_content"], metadata=d["metadata"])
+                        )
+                elif entry["op"] == "delete":
+                    for id in entry["ids"]:
+                        docs.pop(id, None)
+            self._wal_entries = lines
+        return len(entries)
+
+    def _snapshot(self, db: Any) -> tuple[tuple, int]:
+        # copies are cheap compared to writing, the files are written unlocked
+        index = faiss.serialize_index(db.index)
+        data = pickle.dumps(
+            (
+                InMemoryDocstore(dict(db.docstore._dict)),
+                dict(db.index_to_docstore_id),
+            )
+        )
+        return (index, data, db.serialize_ann()), self._wal_entries
+
+    def _write(self, index: Any, data: bytes, ann: bytes | None = None):
+        os.makedirs(self.db_dir, exist_ok=True)
+        index_path = os.path.join(self.db_dir, f"{INDEX_NAME}.faiss")
+        data_path = os.path.join(self.db_dir, f"{INDEX_NAME}.pkl")
+        ann_path = os.path.join(self.db_dir, ANN_FILE_NAME)
+        # the approximate index carries a digest of the ids it was built for
+        if ann is not None:
+            _write_atomic(ann_path + ".tmp", ann_path, ann)
+        elif os.path.exists(ann_path):
+            os.remove(ann_path)
+        # docstore first: if only it gets replaced, the index is rebuilt from it
+        _write_atomic(data_path + ".tmp", data_path, data)
+        _write_atomic(index_path + ".tmp", index_path, index.tobytes())
+
+    def _append(self, entry: dict):
+        os.makedirs(self.db_dir, exist_ok=True)
+        with open(self._wal_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._wal_entries += 1
+
+    def _truncate_wal(self, flushed: int):
+        # entries appended while the files were written stay in the WAL
+        path = self._wal_path()
+        if not os.path.exists(path):
+            self._wal_entries = 0
+            return
+        with open(path, encoding="utf-8") as f:
+            remaining = f.readlines()[flushed:]
+        if remaining:
+            _write_atomic(path + ".tmp", path, "".join(remaining).encode("utf-8"))
+        else:
+            os.remove(path)
+        self._wal_entries = len(remaining)
+
+    def _read_wal(self) -> tuple[list[dict], int]:
+        """(entries, number of lines in the file)."""
+        path = self._wal_path()
+        if not os.path.exists(path):
+            return [], 0
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break  # torn write of the last entry
+        return entries, len(lines)
+
+    def _wal_path(self) -> str:
+        return os.path.join(self.db_dir, WAL_FILE_NAME)
+
+
+class _FlushWorker:
+    def __init__(self):
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def wake(self):
+        with self._start_lock:
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="MemoryFlush"
+                )
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=FLUSH_DELAY / 2)
+            self._wake.clear()
+            now = time.monotonic()
+            for persistence in list(_persistences.values()):
+                if persistence.is_due(now):
+                    _flush_safe(persistence)
+
+
+_persistences: dict[str, MemoryPersistence] = {}
+_persistences_lock = threading.Lock()
+_worker = _FlushWorker()
+
+
+def get_persistence(db_dir: str) -> MemoryPersistence:
+    with _persistences_lock:
+        persistence = _persistences.get(db_dir)
+        if persistence is None:
+            persistence = _persistences[db_dir] = MemoryPersistence(db_dir)
+        return persistence
+
+
+def flush_all():
+    """Write all databases with unsaved changes."""
+    for persistence in list(_persistences.values()):
+        _flush_safe(persistence)
+
+
+def _flush_safe(persistence: MemoryPersistence):
+    try:
+        persistence.flush()
+    except Exception as e:
+        PrintStyle.error(f"Error saving memory database {persistence.db_dir}: {e}")
+
+
+def _write_atomic(tmp: str, path: str, data: bytes):
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+atexit.register(flush_all)
@@ -75,3 +75,58 @@ def truncate_dict_by_ratio(
             return item
 
     return process_item(data)
+
+
+class TruncatedOutput:
+    """Incremental truncate_text for output that keeps growing.
+
+    Only the first and the last `threshold` characters are kept, so appending
+    a chunk costs O(len(chunk) + threshold) no matter how much was printed
+    before, and text() gives the same result as truncate_text on the whole
+    output.
+    """
+
+    def __init__(self, agent, threshold: int = 1000, lines_window: int = 4096):
+        self.agent = agent
+        self.threshold = int(threshold)
+        self.lines_window = lines_window
+        self.length = 0
+        self.head = ""
+        self.tail = ""
+        self._text: str | None = None
+
+    def append(self, text: str):
+        if not text:
+            return
+        self.length += len(text)
+        self._text = None
+        if not self.threshold:
+            self.head += text  # no truncation
+            return
+        if len(self.head) < self.threshold:
+            self.head += text[: self.threshold - len(self.head)]
+        self.tail = (self.tail + text)[-self.threshold :]
+
+    def is_truncated(self) -> bool:
+        return bool(self.threshold) and self.length > self.threshold
+
+    def text(self) -> str:
+        if not self.is_truncated():
+            return self.head
+        if self._text is None:
+            placeholder = self.agent.read_prompt(
+                "fw.msg_truncated.md", length=(self.length - self.threshold)
+            )
+            start_len = (self.threshold - len(placeholder)) // 2
+            end_len = self.threshold - len(placeholder) - start_len
+            self._text = (
+                self.head[:start_len]
+                + placeholder
+                + (self.tail[-end_len:] if end_len > 0 else "")
+            )
+        return self._text
+
+    def last_lines(self, count: int) -> list[str]:
+        """Last lines of the output, looked up in the tail window only."""
+        source = self.tail if self.threshold else self.head
+        return source[-self.lines_window :].splitlines()[-count:]
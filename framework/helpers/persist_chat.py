@@ -1,6 +1,11 @@
 # Standard library imports
 # Standard library imports
+import atexit
+import copy
 import json
+import os
+import queue
+import threading
 import uuid
 from collections import OrderedDict
 from datetime import datetime
@@ -8,8 +13,9 @@ from typing import TYPE_CHECKING, Any
 
 # Local application imports
 from agent import Agent, AgentConfig, AgentContext, AgentContextType
-from framework.helpers import files, history
+from framework.helpers import blobs, files, history
 from framework.helpers.log import Log, LogItem
+from framework.helpers.strings import sanitize_string
 
 if TYPE_CHECKING:
     # Import for type checking only to avoid circular imports
@@ -18,6 +24,9 @@ if TYPE_CHECKING:
 CHATS_FOLDER = "tmp/chats"
 LOG_SIZE = 1000
 CHAT_FILE_NAME = "chat.json"
+JOURNAL_FILE_NAME = "journal.jsonl"
+COMPACT_ENTRIES = 200  # journal entries before it is folded into chat.json
+COMPACT_MIN_BYTES = 1_000_000  # journal may grow to max(this, snapshot size)
 
 
 def get_chat_folder_path(ctxid: str):
@@ -34,34 +43,60 @@ def get_chat_folder_path(ctxid: str):
 
 
 def save_tmp_chat(context: AgentContext):
-    """Save context to the chats folder"""
-    path = _get_chat_file_path(context.id)
-    files.make_dirs(path)
-    data = _serialize_context(context)
-    js = _safe_json_serialize(data, ensure_ascii=False)
-    files.write_file(path, js)
+    """Save context to the chats folder.
+
+    Only what changed since the previous save is captured here, the encoding
+    and file writes happen on a background writer thread which appends it to
+    the chat's journal and compacts the journal into chat.json now and then.
+    """
+    _writer.save(context.id, _capture_context(context))
+
+
+def flush_chats(timeout: float | None = None) -> bool:
+    """Wait until all pending chat saves are written to disk."""
+    return _writer.flush(timeout)
 
 
 def load_tmp_chats():
     """Load all contexts from the chats folder"""
     _convert_v080_chats()
     folders = files.list_files(CHATS_FOLDER, "*")
-    json_files = []
-    for folder_name in folders:
-        json_files.append(_get_chat_file_path(folder_name))
 
     ctxids = []
-    for file in json_files:
+    blob_refs: set[str] | None = set()
+    for folder_name in folders:
+        file = _get_chat_file_path(folder_name)
         try:
             js = files.read_file(file)
             data = json.loads(js)
+            _replay_journal(data, _get_journal_file_path(folder_name))
             ctx = _deserialize_context(data)
             ctxids.append(ctx.id)
+            if blob_refs is not None:
+                blob_refs |= _find_blob_refs(data)
         except Exception as e:
             print(f"Error loading chat {file}: {e}")
+            blob_refs = None  # its blobs are unknown, keep them all
+
+    # blobs of removed chats and of compressed history
+    if blob_refs is not None:
+        try:
+            blobs.sweep(blob_refs)
+        except OSError as e:
+            print(f"Error removing unused blobs: {e}")
     return ctxids
 
 
+def _find_blob_refs(data: dict) -> set[str]:
+    refs = set()
+    for agent in data.get("agents", []):
+        history = agent.get("history")
+        if isinstance(history, str):
+            history = json.loads(history) if history else None
+        refs |= blobs.find_refs(history)
+    return refs
+
+
 def _get_chat_file_path(ctxid: str):
     return files.get_abs_path(CHATS_FOLDER, ctxid, CHAT_FILE_NAME)
 
@@ -90,24 +125,36 @@ def load_json_chats(jsons: list[str]):
 def export_json_chat(context: AgentContext):
     """Export context as JSON string"""
     data = _serialize_context(context)
+    # exported chats must not depend on this instance's blob store
+    for agent in data["agents"]:
+        agent["history"] = history._json_dumps(
+            blobs.materialize(json.loads(agent["history"]))
+        )
     js = _safe_json_serialize(data, ensure_ascii=False)
     return js
 
 
 def remove_chat(ctxid):
-    """Remove a chat or task context"""
-    path = get_chat_folder_path(ctxid)
-    files.delete_dir(path)
+    """Remove a chat or task context, flush_chats waits for the deletion."""
+    # deleted by the writer so a pending save cannot recreate the folder
+    _writer.remove(ctxid)
 
 
 def _serialize_context(context: AgentContext):
     # serialize agents
-    agents = []
-    agent = context.agent0
-    while agent:
-        agents.append(_serialize_agent(agent))
-        agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+    agents = [
+        {**_serialize_agent(agent), "superior": superior, "fanout": fanout}
+        for agent, superior, fanout in _agent_tree(context)
+    ]
 
+    return {
+        **_serialize_context_header(context),
+        "agents": agents,
+        "log": _serialize_log(context.log),
+    }
+
+
+def _serialize_context_header(context: AgentContext):
     return {
         "id": context.id,
         "name": context.name,
@@ -122,14 +169,47 @@ def _serialize_context(context: AgentContext):
             if context.last_message
             else datetime.fromtimestamp(0).isoformat()
         ),
-        "agents": agents,
         "streaming_agent": (
-            context.streaming_agent.number if context.streaming_agent else 0
+            _chain_agent(context.streaming_agent).number
+            if context.streaming_agent
+            else 0
         ),
-        "log": _serialize_log(context.log),
     }
 
 
+def _agent_tree(context: AgentContext) -> list[tuple[Any, int | None, bool]]:
+    """All agents of the context, superiors first.
+
+    Each agent comes with the list index of its superior and whether it is a
+    fan-out subordinate (one of several running at once) rather than the
+    subordinate of a chain. A plain chain keeps the order agent0, agent1...
+    """
+    tree = []
+    stack: list[tuple[Any, int | None, bool]] = [(context.agent0, None, False)]
+    while stack:
+        agent, superior, fanout = stack.pop()
+        index = len(tree)
+        tree.append((agent, superior, fanout))
+        children = [
+            (sub, index, True)
+            for sub in agent.data.get(Agent.DATA_NAME_SUBORDINATES, None) or ()
+        ]
+        sub = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+        if sub is not None:
+            children.append((sub, index, False))
+        stack.extend(reversed(children))
+    return tree
+
+
+def _chain_agent(agent):
+    """The agent itself, or the superior that fanned out to it."""
+    while True:
+        superior = agent.data.get(Agent.DATA_NAME_SUPERIOR, None)
+        if superior is None or superior.data.get(Agent.DATA_NAME_SUBORDINATE) is agent:
+            return agent
+        agent = superior
+
+
 def _serialize_agent(agent: Agent):
     data = {k: v for k, v in agent.data.items() if not k.startswith("_")}
 
@@ -153,6 +233,328 @@ def _serialize_log(log: Log):
     }
 
 
+def _capture_context(context: AgentContext) -> dict:
+    """Collect context state for the writer, log items only since the last capture.
+
+    The writer encodes it on its own thread while the agents keep running, so
+    nothing in it may be shared with the live context.
+    """
+    header = _serialize_context_header(context)
+    agents = [
+        {
+            "number": agent.number,
+            "data": json.loads(
+                _safe_json_serialize(
+                    {k: v for k, v in agent.data.items() if not k.startswith("_")}
+                )
+            ),
+            "history": copy.deepcopy(agent.history.to_dict()),
+            "superior": superior,
+            "fanout": fanout,
+        }
+        for agent, superior, fanout in _agent_tree(context)
+    ]
+
+    log = context.log
+    with _captured_lock:
+        guid, since = _captured_logs.get(context.id, (None, 0))
+        # read the version first, a concurrent change is then saved twice, never lost
+        version = log.version
+        reset = guid != log.guid
+        if reset:
+            logs = [item.output() for item in log.logs[-LOG_SIZE:]]
+        else:
+            logs = log.output(since_version=since)
+        _captured_logs[context.id] = (log.guid, version)
+    logs = json.loads(_safe_json_serialize(logs))  # kvps are updated in place
+
+    return {
+        **header,
+        "agents": agents,
+        "log": {
+            "guid": log.guid,
+            "reset": reset,
+            "logs": logs,
+            "progress": log.progress,
+            "progress_no": log.progress_no,
+        },
+    }
+
+
+def _forget_captured(ctxid: str):
+    # the next capture of this context will be a full one
+    with _captured_lock:
+        _captured_logs.pop(ctxid, None)
+
+
+def _diff_records(old: list, new: list) -> list | None:
+    """[kept prefix length, records after it], None if the lists are equal."""
+    keep = 0
+    limit = min(len(old), len(new))
+    while keep < limit and old[keep] == new[keep]:
+        keep += 1
+    if keep == len(old) == len(new):
+        return None
+    return [keep, new[keep:]]
+
+
+def _apply_records(old: list, delta: list) -> list:
+    keep, added = delta
+    return old[:keep] + added
+
+
+def _diff_history(old: dict | None, new: dict) -> dict | None:
+    """Delta of a History.to_dict() against the previously saved one.
+
+    Bulks and topics only grow at the end until compression rewrites them,
+    so keeping the unchanged prefix makes most deltas a few messages.
+    """
+    old = old or _empty_history()
+    delta = {}
+    for key in ("bulks", "topics"):
+        records = _diff_records(old[key], new[key])
+        if records is not None:
+            delta[key] = records
+
+    old_current, current = old["current"], new["current"]
+    if old_current is None or old_current.get("summary") != current["summary"]:
+        delta["current"] = current
+    else:
+        messages = _diff_records(old_current["messages"], current["messages"])
+        if messages is not None:
+            delta["current_messages"] = messages
+    return delta or None
+
+
+def _apply_history(old: dict | str | None, delta: dict) -> dict:
+    if isinstance(old, str):
+        old = json.loads(old) if old else None
+    history = dict(old or _empty_history())
+    for key in ("bulks", "topics"):
+        if key in delta:
+            history[key] = _apply_records(history[key], delta[key])
+    if "current" in delta:
+        history["current"] = delta["current"]
+    elif "current_messages" in delta:
+        current = dict(history["current"])
+        current["messages"] = _apply_records(
+            current["messages"], delta["current_messages"]
+        )
+        history["current"] = current
+    return history
+
+
+def _empty_history() -> dict:
+    return {"_cls": "History", "bulks": [], "topics": [], "current": None}
+
+
+def _diff_context(state: dict | None, capture: dict) -> dict:
+    """Journal entry turning the saved state into the captured one."""
+    entry = {k: v for k, v in capture.items() if k not in ("agents", "log")}
+    old_agents = state["agents"] if state else []
+
+    agents = []
+    for i, agent in enumerate(capture["agents"]):
+        old = old_agents[i] if i < len(old_agents) else None
+        if old is None or old["number"] != agent["number"]:
+            old = {"number": agent["number"], "data": None, "history": None}
+        diff: dict[str, Any] = {
+            "number": agent["number"],
+            "superior": agent["superior"],
+            "fanout": agent["fanout"],
+        }
+        if agent["data"] != old["data"]:
+            diff["data"] = agent["data"]
+        history_delta = _diff_history(old["history"], agent["history"])
+        if history_delta is not None:
+            diff["history"] = history_delta
+        agents.append(diff)
+    entry["agents"] = agents
+
+    entry["log"] = capture["log"]
+    return entry
+
+
+def _apply_journal_entry(data: dict, entry: dict):
+    """Apply one journal entry to serialized context data, in place."""
+    old_agents = data.get("agents", [])
+    agents = []
+    for i, diff in enumerate(entry["agents"]):
+        old = old_agents[i] if i < len(old_agents) else None
+        if old is None or old["number"] != diff["number"]:
+            old = {"number": diff["number"], "data": {}, "history": ""}
+        agent = {**old, "number": diff["number"]}
+        # journals written before agent trees only have chains
+        agent["superior"] = diff.get("superior", i - 1 if i else None)
+        agent["fanout"] = diff.get("fanout", False)
+        if "data" in diff:
+            agent["data"] = diff["data"]
+        if "history" in diff:
+            agent["history"] = _apply_history(old["history"], diff["history"])
+        agents.append(agent)
+
+    data.update({k: v for k, v in entry.items() if k not in ("agents", "log")})
+    data["agents"] = agents
+
+    log_delta = entry["log"]
+    log = data.get("log") or {}
+    if log_delta["reset"] or log.get("guid") != log_delta["guid"]:
+        items = {}
+    else:
+        items = {item["no"]: item for item in log.get("logs", [])}
+    items.update((item["no"], item) for item in log_delta["logs"])
+    data["log"] = {
+        "guid": log_delta["guid"],
+        "logs": [items[no] for no in sorted(items)[-LOG_SIZE:]],
+        "progress": log_delta["progress"],
+        "progress_no": log_delta["progress_no"],
+    }
+
+
+def _replay_journal(data: dict, journal_path: str):
+    """Apply the journal written after the snapshot, if it belongs to it."""
+    if not data.get("journal_id") or not os.path.exists(journal_path):
+        return
+    with open(journal_path, encoding="utf-8") as f:
+        lines = iter(f)
+        try:
+            header = json.loads(next(lines))
+        except (StopIteration, json.JSONDecodeError):
+            return
+        if header.get("journal_id") != data["journal_id"]:
+            return  # stale journal, already contained in the snapshot
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # torn write of the last entry
+            _apply_journal_entry(data, entry)
+
+    for agent in data.get("agents", []):
+        if isinstance(agent.get("history"), dict):
+            agent["history"] = history._json_dumps(agent["history"])
+
+
+class _ChatWriter:
+    """Background thread appending context changes to per chat journals.
+
+    The thread keeps the last saved state of every context so it can compute
+    the journal entries and write a fresh snapshot on compaction without
+    touching the live agents.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._states: dict[str, dict] = {}
+
+    def save(self, ctxid: str, capture: dict):
+        self._put(("save", ctxid, capture))
+
+    def remove(self, ctxid: str):
+        self._put(("remove", ctxid, None))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        with self._start_lock:
+            running = self._thread is not None and self._thread.is_alive()
+        # also called at exit, when no thread can be started anymore
+        if not running or not self._queue.unfinished_tasks:
+            return not self._queue.unfinished_tasks
+        done = threading.Event()
+        self._queue.put(("flush", None, done))
+        return done.wait(timeout)
+
+    def _put(self, job: tuple):
+        with self._start_lock:
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="ChatWriter"
+                )
+                self._thread.start()
+        self._queue.put(job)
+
+    def _run(self):
+        while True:
+            action, ctxid, arg = self._queue.get()
+            try:
+                if action == "save":
+                    self._save(ctxid, arg)
+                elif action == "remove":
+                    self._states.pop(ctxid, None)
+                    _forget_captured(ctxid)
+                    files.delete_dir(get_chat_folder_path(ctxid))
+            except Exception as e:
+                # start over with a full snapshot of this context
+                self._states.pop(ctxid, None)
+                _forget_captured(ctxid)
+                print(f"Error saving chat {ctxid}: {e}")
+            finally:
+                if action == "flush":
+                    arg.set()
+                self._queue.task_done()
+
+    def _save(self, ctxid: str, capture: dict):
+        state = self._states.get(ctxid)
+        if state is None and not capture["log"]["reset"]:
+            return  # delta queued before a failure, wait for the full capture
+
+        entry = _diff_context(state["data"] if state else None, capture)
+        data = state["data"] if state else {}
+        _apply_journal_entry(data, entry)
+
+        if state is None:
+            state = self._states[ctxid] = {"data": data}
+            self._compact(ctxid, state)
+            return
+
+        line = sanitize_string(_safe_json_serialize(entry, ensure_ascii=False)) + "\n"
+        with open(_get_journal_file_path(ctxid), "a", encoding="utf-8") as f:
+            f.write(line)
+        state["entries"] += 1
+        state["journal_bytes"] += len(line)
+        if state["entries"] >= COMPACT_ENTRIES or state["journal_bytes"] > max(
+            COMPACT_MIN_BYTES, state["snapshot_bytes"]
+        ):
+            self._compact(ctxid, state)
+
+    def _compact(self, ctxid: str, state: dict):
+        """Write the state as chat.json and start an empty journal for it."""
+        journal_id = str(uuid.uuid4())
+        snapshot = {**state["data"], "journal_id": journal_id}
+        snapshot["agents"] = [
+            {**agent, "history": history._json_dumps(agent["history"])}
+            for agent in snapshot["agents"]
+        ]
+        js = sanitize_string(_safe_json_serialize(snapshot, ensure_ascii=False))
+
+        path = _get_chat_file_path(ctxid)
+        files.make_dirs(path)
+        # chat.json first: a journal with another id is ignored on load
+        _write_atomic(path, js)
+        header = json.dumps({"journal_id": journal_id}) + "\n"
+        _write_atomic(_get_journal_file_path(ctxid), header)
+
+        state.update(entries=0, journal_bytes=0, snapshot_bytes=len(js))
+
+
+def _get_journal_file_path(ctxid: str):
+    return files.get_abs_path(CHATS_FOLDER, ctxid, JOURNAL_FILE_NAME)
+
+
+def _write_atomic(path: str, content: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+_writer = _ChatWriter()
+_captured_logs: dict[str, tuple[str, int]] = {}  # ctxid -> (log guid, version)
+_captured_lock = threading.Lock()
+atexit.register(flush_chats, 10)
+
+
 def _deserialize_context(data):
     config = initialize_agent()
     log = _deserialize_log(data.get("log", None))
@@ -183,7 +585,10 @@ def _deserialize_context(data):
     agent0 = _deserialize_agents(agents, config, context)
     streaming_agent = agent0
     while streaming_agent.number != data.get("streaming_agent", 0):
-        streaming_agent = streaming_agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+        sub = streaming_agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+        if sub is None:
+            break
+        streaming_agent = sub
 
     context.agent0 = agent0
     context.streaming_agent = streaming_agent
@@ -197,17 +602,16 @@ def _deserialize_agents(
     """Deserialize a list of agents.
 
     Args:
-        agents: List of serialized agents
+        agents: List of serialized agents, superiors first
         config: Agent configuration
         context: Agent context
 
     Returns:
-        The first agent in the chain, or a new agent if the list is empty
+        The first agent in the list, or a new agent if the list is empty
     """
-    prev: Agent | None = None
-    zero: Agent | None = None
+    created: list[Agent] = []
 
-    for agent_data in agents:
+    for i, agent_data in enumerate(agents):
         current = Agent(
             number=agent_data["number"],
             config=config,
@@ -217,15 +621,21 @@ def _deserialize_agents(
         current.history = history.deserialize_history(
             agent_data.get("history", ""), agent=current
         )
-        if not zero:
-            zero = current
 
-        if prev:
-            prev.set_data(Agent.DATA_NAME_SUBORDINATE, current)
-            current.set_data(Agent.DATA_NAME_SUPERIOR, prev)
-        prev = current
+        # chats saved before agent trees only have chains
+        superior_index = agent_data.get("superior", i - 1 if i else None)
+        if superior_index is not None and 0 <= superior_index < i:
+            superior = created[superior_index]
+            current.set_data(Agent.DATA_NAME_SUPERIOR, superior)
+            if agent_data.get("fanout"):
+                fanout = superior.data.setdefault(Agent.DATA_NAME_SUBORDINATES, [])
+                fanout.append(current)
+                current.agent_name = f"Agent {current.number}.{len(fanout)}"
+            else:
+                superior.set_data(Agent.DATA_NAME_SUBORDINATE, current)
+        created.append(current)
 
-    return zero or Agent(0, config, context)
+    return created[0] if created else Agent(0, config, context)
 
 
 # def _deserialize_history(history: list[dict[str, Any]]):
@@ -260,7 +670,7 @@ def _deserialize_log(data: dict[str, Any]) -> "Log":
                 temp=item_data.get("temp", False),
             )
         )
-        log.updates.append(i)
+        log.mark_updated(i)
         i += 1
 
     return log
@@ -560,6 +560,7 @@ class EvaluationLoop:
         subtask: Subtask,
         output: str,
         criteria: EvaluationCriteria | None = None,
+        adjust: bool = True,
     ) -> bool:
         """Process the completion of a subtask with evaluation and potential adjustment.
 
@@ -568,6 +569,8 @@ class EvaluationLoop:
             subtask: The completed subtask
             output: The output from the subtask
             criteria: Optional evaluation criteria
+            adjust: Adjust the plan after a failed evaluation, instead of
+                marking the subtask failed
 
         Returns:
             True if subtask was successful, False if plan was adjusted
@@ -588,7 +591,7 @@ class EvaluationLoop:
 
             if evaluation.requires_retry:
                 # Try to adjust the plan
-                adjusted = self.adjuster.adjust_plan_after_failure(
+                adjusted = adjust and self.adjuster.adjust_plan_after_failure(
                     plan, subtask, evaluation
                 )
                 if adjusted:
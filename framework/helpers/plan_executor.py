@@ -0,0 +1,229 @@
+"""Dependency-aware execution of hierarchical plans.
+
+PlanExecutor starts every subtask of a HierarchicalPlan as soon as all of
+its dependencies have completed, up to max_parallel_subtasks at a time.
+It keeps the number of unfinished dependencies of each waiting subtask and
+the subtasks waiting on each subtask, so a completion releases its
+dependents without scanning the plan. Outputs are evaluated through
+EvaluationLoop; when the evaluation adjusts the plan (a retry, split or
+preparation subtask), the index is rebuilt and execution continues.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+
+from framework.helpers.hierarchical_planner import (
+    HierarchicalPlan,
+    PlanningConfig,
+    PlanStatus,
+    Subtask,
+    SubtaskStatus,
+)
+from framework.helpers.plan_evaluation import EvaluationCriteria, EvaluationLoop
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3  # evaluations of a subtask and its replacements before it fails
+
+RunSubtask = Callable[[HierarchicalPlan, Subtask], Awaitable[str]]
+
+
+class DependencyIndex:
+    """In-degree index of the pending subtasks of a plan."""
+
+    def __init__(self, plan: HierarchicalPlan):
+        self.plan = plan
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Index the plan again, after subtasks were added or rewired."""
+        subtasks = {subtask.id: subtask for subtask in self.plan.subtasks}
+        self.known = set(subtasks)
+        self._waiting: dict[str, int] = {}  # subtask id -> unfinished dependencies
+        self._dependents: dict[str, list[str]] = defaultdict(list)
+        self._ready: deque[str] = deque()
+        for subtask in self.plan.subtasks:
+            if subtask.status != SubtaskStatus.PENDING:
+                continue
+            waiting = 0
+            for dep_id in subtask.dependencies:
+                dep = subtasks.get(dep_id)
+                if dep is None or dep.status != SubtaskStatus.COMPLETED:
+                    waiting += 1
+                    self._dependents[dep_id].append(subtask.id)
+            if waiting:
+                self._waiting[subtask.id] = waiting
+            else:
+                self._ready.append(subtask.id)
+
+    def pop_ready(self) -> Subtask | None:
+        """Next subtask whose dependencies have all completed."""
+        while self._ready:
+            subtask = self.plan.get_subtask_by_id(self._ready.popleft())
+            if subtask is not None and subtask.status == SubtaskStatus.PENDING:
+                return subtask
+        return None
+
+    def release(self, subtask_id: str) -> None:
+        """Count a completed subtask off its dependents."""
+        for dependent_id in self._dependents.pop(subtask_id, ()):
+            if dependent_id not in self._waiting:
+                continue
+            self._waiting[dependent_id] -= 1
+            if not self._waiting[dependent_id]:
+                del self._waiting[dependent_id]
+                self._ready.append(dependent_id)
+
+    def block(self, subtask_id: str) -> list[Subtask]:
+        """Remove and return the subtasks that can no longer run after a failure."""
+        blocked = []
+        queue = deque([subtask_id])
+        while queue:
+            for dependent_id in self._dependents.pop(queue.popleft(), ()):
+                if self._waiting.pop(dependent_id, None) is None:
+                    continue
+                subtask = self.plan.get_subtask_by_id(dependent_id)
+                if subtask is not None:
+                    blocked.append(subtask)
+                queue.append(dependent_id)
+        return blocked
+
+    def stalled(self) -> list[Subtask]:
+        """Subtasks still waiting, on dependencies that will never complete."""
+        stalled = [self.plan.get_subtask_by_id(sid) for sid in self._waiting]
+        self._waiting.clear()
+        return [subtask for subtask in stalled if subtask is not None]
+
+
+class PlanExecutor:
+    """Executes the subtasks of a plan concurrently, in dependency order."""
+
+    def __init__(
+        self,
+        config: PlanningConfig | None = None,
+        evaluation_loop: EvaluationLoop | None = None,
+    ):
+        """Initialize the plan executor.
+
+        Args:
+            config: Planning configuration, for the parallelism and whether
+                outputs are verified and failed subtasks retried
+            evaluation_loop: Evaluation loop to verify outputs with
+        """
+        self.config = config or PlanningConfig.get_default()
+        self.evaluation_loop = evaluation_loop or EvaluationLoop()
+
+    async def execute(
+        self,
+        plan: HierarchicalPlan,
+        run_subtask: RunSubtask,
+        criteria: EvaluationCriteria | None = None,
+    ) -> PlanStatus:
+        """Execute the plan until no subtask can run anymore.
+
+        Args:
+            plan: The plan to execute
+            run_subtask: Coroutine function running one subtask, returning its
+                output
+            criteria: Optional evaluation criteria for every output
+
+        Returns:
+            The final status of the plan
+        """
+        width = max(1, self.config.max_parallel_subtasks)
+        index = DependencyIndex(plan)
+        running: dict[asyncio.Task, Subtask] = {}
+        attempts: dict[str, int] = {}
+        unfinished = False
+
+        plan.status = PlanStatus.IN_PROGRESS
+        plan.updated_at = datetime.now(UTC)
+        try:
+            while True:
+                while len(running) < width and (subtask := index.pop_ready()):
+                    subtask.mark_started()
+                    task = asyncio.create_task(run_subtask(plan, subtask))
+                    running[task] = subtask
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    subtask = running.pop(task)
+                    attempts[subtask.id] = attempts.get(subtask.id, 0) + 1
+                    self._finish(plan, index, subtask, task, attempts, criteria)
+                    if subtask.status == SubtaskStatus.FAILED:
+                        unfinished = True
+                        for blocked in index.block(subtask.id):
+                            self._skip(blocked, f"Dependency '{subtask.name}' failed")
+        except asyncio.CancelledError:
+            for task in running:
+                task.cancel()
+            plan.status = PlanStatus.CANCELLED
+            plan.updated_at = datetime.now(UTC)
+            raise
+
+        for subtask in index.stalled():
+            unfinished = True
+            self._skip(subtask, "Dependencies were never completed")
+
+        plan.status = PlanStatus.FAILED if unfinished else PlanStatus.COMPLETED
+        plan.updated_at = datetime.now(UTC)
+        logger.info(f"Plan {plan.id} finished with status {plan.status.value}")
+        return plan.status
+
+    def _finish(
+        self,
+        plan: HierarchicalPlan,
+        index: DependencyIndex,
+        subtask: Subtask,
+        task: asyncio.Task,
+        attempts: dict[str, int],
+        criteria: EvaluationCriteria | None,
+    ) -> None:
+        error = None
+        try:
+            output = task.result()
+        except Exception as e:
+            logger.warning(f"Subtask '{subtask.name}' raised: {e}")
+            output, error = "", str(e)
+
+        if self.config.verification_enabled:
+            self.evaluation_loop.process_subtask_completion(
+                plan,
+                subtask,
+                output,
+                criteria,
+                adjust=(
+                    self.config.retry_failed_subtasks
+                    and attempts[subtask.id] < MAX_ATTEMPTS
+                ),
+            )
+        elif error is None:
+            subtask.mark_completed(output)
+        else:
+            subtask.mark_failed(error)
+
+        if subtask.status == SubtaskStatus.COMPLETED:
+            index.release(subtask.id)
+        elif subtask.status == SubtaskStatus.FAILED:
+            if error is not None:
+                subtask.error = error
+        else:
+            # the plan was adjusted, replacements share the attempts
+            for new in plan.subtasks:
+                if new.id not in index.known:
+                    attempts[new.id] = attempts[subtask.id]
+            index.rebuild()
+        plan.updated_at = datetime.now(UTC)
+
+    @staticmethod
+    def _skip(subtask: Subtask, reason: str) -> None:
+        subtask.status = SubtaskStatus.SKIPPED
+        subtask.error = reason
+        subtask.completed_at = datetime.now(UTC)
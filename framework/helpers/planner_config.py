@@ -74,6 +74,7 @@ class PlannerSettings:
             "retry_failed_subtasks": cls._get_bool_setting(
                 "PLANNER_RETRY_FAILED", True
             ),
+            "max_parallel_subtasks": cls._get_int_setting("PLANNER_MAX_PARALLEL", 4),
         }
 
         return PlanningConfig(**config_dict)
@@ -153,6 +154,7 @@ class PlannerSettings:
             "max_subtasks": config.max_subtasks,
             "verification_enabled": config.verification_enabled,
             "retry_failed_subtasks": config.retry_failed_subtasks,
+            "max_parallel_subtasks": config.max_parallel_subtasks,
         }
 
     @classmethod
@@ -181,6 +183,13 @@ class PlannerSettings:
             ):
                 errors["max_subtasks"] = "Must be a positive integer"
 
+        if "max_parallel_subtasks" in config_dict:
+            if (
+                not isinstance(config_dict["max_parallel_subtasks"], int)
+                or config_dict["max_parallel_subtasks"] < 1
+            ):
+                errors["max_parallel_subtasks"] = "Must be a positive integer"
+
         if "model_name" in config_dict:
             if (
                 not isinstance(config_dict["model_name"], str)
@@ -0,0 +1,161 @@
+"""Compiled prompt templates.
+
+Agent.read_prompt / parse_prompt used to go through files.read_file on every
+call: locate the file in the prompt dirs, read it, resolve includes
+recursively and run one str.replace per placeholder. Prompts only change when
+someone edits them, so they are compiled once per (prompt dirs, file) into a
+list of literal and placeholder segments with includes and code fences already
+resolved. Rendering is then a single join. A compiled prompt is reused while
+the mtimes of the file and all of its includes are unchanged and no override
+has appeared in a prompt dir searched before the one a file was found in.
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from framework.helpers import files
+
+INCLUDE_PATTERN = re.compile(r"{{\s*include\s*['\"](.*?)['\"]\s*}}")
+PLACEHOLDER_PATTERN = re.compile(r"{{(\w+)}}")
+
+
+@dataclass
+class CompiledPrompt:
+    path: str
+    # even indexes are literal text, odd indexes are placeholder names
+    segments: list[str]
+    is_json: bool
+    dependencies: tuple[tuple[str, int], ...]  # (absolute path, mtime_ns)
+    # paths searched before a dependency was found, an override if they appear
+    overrides: tuple[str, ...] = ()
+
+    def render(self, **kwargs) -> str:
+        """Same result as files.read_file: placeholders filled with str()."""
+        return self._fill(str, kwargs)
+
+    def parse(self, **kwargs):
+        """Same result as files.parse_file: a dict for JSON templates, else text."""
+        if self.is_json:
+            return json.loads(self._fill(json.dumps, kwargs))
+        return self.render(**kwargs)
+
+    def _fill(self, dump, kwargs: dict[str, Any]) -> str:
+        """Fill placeholders; unknown placeholders are kept as they are."""
+        segments = self.segments
+        if len(segments) == 1:
+            return segments[0]
+        parts = []
+        for i, segment in enumerate(segments):
+            if i % 2 == 0:
+                parts.append(segment)
+            elif segment in kwargs:
+                parts.append(dump(kwargs[segment]))
+            else:
+                parts.append("{{" + segment + "}}")
+        return "".join(parts)
+
+    def is_current(self) -> bool:
+        try:
+            unchanged = all(
+                os.stat(path).st_mtime_ns == mtime for path, mtime in self.dependencies
+            )
+        except OSError:
+            return False
+        return unchanged and not any(os.path.isfile(path) for path in self.overrides)
+
+
+_lock = threading.Lock()
+_cache: dict[tuple, CompiledPrompt] = {}
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_prompt(
+    file: str, prompt_dir: str, backup_dirs: list[str] | None = None
+) -> CompiledPrompt:
+    """Compiled prompt for file, looked up in prompt_dir and then backup_dirs."""
+    backup_dirs = backup_dirs or []
+    key = (prompt_dir, tuple(backup_dirs), file)
+    with _lock:
+        compiled = _cache.get(key)
+    if compiled is not None and compiled.is_current():
+        with _lock:
+            _stats["hits"] += 1
+        return compiled
+
+    compiled = compile_prompt(files.get_abs_path(prompt_dir, file), backup_dirs)
+    with _lock:
+        _cache[key] = compiled
+        _stats["misses"] += 1
+    return compiled
+
+
+def compile_prompt(path: str, backup_dirs: list[str] | None = None) -> CompiledPrompt:
+    backup_dirs = backup_dirs or []
+    dependencies: dict[str, int] = {}
+    overrides: dict[str, None] = {}
+    absolute_path = _find_file(path, backup_dirs, overrides)
+    content = _read_with_includes(path, backup_dirs, dependencies, overrides)
+    is_json = files.is_full_json_template(content)
+    content = files.remove_code_fences(content)
+    return CompiledPrompt(
+        path=absolute_path,
+        segments=PLACEHOLDER_PATTERN.split(content),
+        is_json=is_json,
+        dependencies=tuple(dependencies.items()),
+        overrides=tuple(overrides),
+    )
+
+
+def get_stats() -> dict[str, Any]:
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / total, 4) if total else 0,
+            "size": len(_cache),
+        }
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+        _stats["hits"] = _stats["misses"] = 0
+
+
+def _find_file(path: str, backup_dirs: list[str], overrides: dict[str, None]) -> str:
+    """files.find_file_in_dirs, noting the paths searched before the match."""
+    candidates = [files.get_abs_path(path)] + [
+        files.get_abs_path(os.path.join(backup_dir, os.path.basename(path)))
+        for backup_dir in backup_dirs
+    ]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+        overrides[candidate] = None
+    return files.find_file_in_dirs(path, backup_dirs)  # raises FileNotFoundError
+
+
+def _read_with_includes(
+    path: str,
+    backup_dirs: list[str],
+    dependencies: dict[str, int],
+    overrides: dict[str, None],
+) -> str:
+    absolute_path = _find_file(path, backup_dirs, overrides)
+    dependencies[absolute_path] = os.stat(absolute_path).st_mtime_ns
+    with open(absolute_path, encoding="utf-8") as f:
+        content = f.read()
+
+    base_path = os.path.dirname(path)
+
+    def replace_include(match):
+        include_path = _find_file(
+            os.path.join(base_path, match.group(1)), backup_dirs, overrides
+        )
+        return _read_with_includes(include_path, backup_dirs, dependencies, overrides)
+
+    return INCLUDE_PATTERN.sub(replace_include, content)
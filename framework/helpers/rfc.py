@@ -1,15 +1,33 @@
+import asyncio
+import bisect
 import importlib
 import inspect
 import json
+import threading
+import time
 from typing import Any, TypedDict
 
-import aiohttp
+from framework.helpers import crypto, dotenv, http_client
 
-from framework.helpers import crypto
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 # Remote Function Call library
 # Call function via http request
 # Secured by pre-shared key
+#
+# Calls go through the pooled keep-alive session of http_client. Calls made
+# in the same event loop iteration (e.g. from asyncio.gather) are sent to the
+# server together as one batch request, once the server has announced that it
+# accepts batches with the BATCH_HEADER response header.
+
+MAX_BATCH = 32  # calls per request
+MSGPACK_MIME = "application/msgpack"
+BATCH_HEADER = "X-RFC-Batch"  # sent by servers that accept batch requests
+KEY_RFC_MSGPACK = "RFC_MSGPACK"  # set to true to frame requests with msgpack
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
 
 
 class RFCInput(TypedDict):
@@ -24,6 +42,50 @@ class RFCCall(TypedDict):
     hash: str
 
 
+class RFCBatch(TypedDict):
+    batch: list[RFCCall]
+
+
+class RFCStatusError(Exception):
+    """The RFC server answered with an HTTP error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyHistogram:
+    """Call latencies counted in LATENCY_BUCKETS_MS buckets."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + ["+inf"]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "buckets": dict(zip(labels, self.counts, strict=True)),
+        }
+
+
+_pending: dict[tuple[asyncio.AbstractEventLoop, str], list] = {}
+_batched_urls: set[str] = set()  # servers that announced batch support
+_json_urls: set[str] = set()  # servers without msgpack
+_latency: dict[str, LatencyHistogram] = {}
+_latency_lock = threading.Lock()
+
+
 async def call_rfc(
     url: str, password: str, module: str, function_name: str, args: list, kwargs: dict
 ):
@@ -36,20 +98,50 @@ async def call_rfc(
     call = RFCCall(
         rfc_input=json.dumps(input), hash=crypto.hash_data(json.dumps(input), password)
     )
-    result = await _send_json_data(url, call)
-    return result
+    start = time.perf_counter()
+    try:
+        return await _enqueue_call(url, call)
+    finally:
+        _record_latency(
+            f"{module}.{function_name}", (time.perf_counter() - start) * 1000
+        )
 
 
-async def handle_rfc(rfc_call: RFCCall, password: str):
-    if not crypto.verify_data(rfc_call["rfc_input"], rfc_call["hash"], password):
+async def handle_rfc(rfc_call: RFCCall | RFCBatch, password: str):
+    if "batch" in rfc_call:
+        # errors are returned per call, the batch itself always succeeds
+        results = await asyncio.gather(
+            *(handle_rfc(call, password) for call in rfc_call["batch"]),  # type: ignore
+            return_exceptions=True,
+        )
+        return {
+            "batch": [
+                {"error": str(r)} if isinstance(r, BaseException) else {"result": r}
+                for r in results
+            ]
+        }
+
+    call: RFCCall = rfc_call  # type: ignore
+    if not crypto.verify_data(call["rfc_input"], call["hash"], password):
         raise Exception("Invalid RFC hash")
 
-    input: RFCInput = json.loads(rfc_call["rfc_input"])
+    input: RFCInput = json.loads(call["rfc_input"])
     return await _call_function(
         input["module"], input["function_name"], *input["args"], **input["kwargs"]
     )
 
 
+def get_latency_stats() -> dict[str, dict[str, Any]]:
+    """Latency histogram of every called module.function_name."""
+    with _latency_lock:
+        return {name: h.to_dict() for name, h in sorted(_latency.items())}
+
+
+def reset_latency_stats():
+    with _latency_lock:
+        _latency.clear()
+
+
 async def _call_function(module: str, function_name: str, *args, **kwargs):
     func = _get_function(module, function_name)
     if inspect.iscoroutinefunction(func):
@@ -66,17 +158,109 @@ def _get_function(module: str, function_name: str):
     return func
 
 
+async def _enqueue_call(url: str, call: RFCCall):
+    loop = asyncio.get_running_loop()
+    key = (loop, url)
+    future = loop.create_future()
+    if key not in _pending:
+        _pending[key] = []
+        # runs after the other tasks ready in this iteration had their turn
+        loop.call_soon(_flush_pending, key)
+    _pending[key].append((call, future))
+    return await future
+
+
+def _flush_pending(key: tuple[asyncio.AbstractEventLoop, str]):
+    loop, url = key
+    pending = _pending.pop(key, [])
+    for i in range(0, len(pending), MAX_BATCH):
+        loop.create_task(_send_calls(url, pending[i : i + MAX_BATCH]))
+
+
+async def _send_calls(url: str, items: list[tuple[RFCCall, asyncio.Future]]):
+    if len(items) == 1 or url not in _batched_urls:
+        await asyncio.gather(*(_send_call(url, call, future) for call, future in items))
+        return
+
+    try:
+        response = await _send_json_data(url, RFCBatch(batch=[c for c, _ in items]))
+    except RFCStatusError as e:
+        if e.status in (400, 404):
+            # batch rejected unread, e.g. the server was replaced by an older
+            # one, so the calls are safe to send one by one
+            _batched_urls.discard(url)
+            await _send_calls(url, items)
+            return
+        # calls may have run, never send them again
+        for _, future in items:
+            _set_future(future, error=e)
+        return
+    except Exception as e:
+        for _, future in items:
+            _set_future(future, error=e)
+        return
+
+    for (_, future), result in zip(items, response["batch"], strict=False):
+        if "error" in result:
+            _set_future(future, error=Exception(result["error"]))
+        else:
+            _set_future(future, result=result["result"])
+
+
+async def _send_call(url: str, call: RFCCall, future: asyncio.Future):
+    try:
+        _set_future(future, result=await _send_json_data(url, call))
+    except Exception as e:
+        _set_future(future, error=e)
+
+
+def _set_future(
+    future: asyncio.Future, result: Any = None, error: Exception | None = None
+):
+    if future.done():  # caller was cancelled
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
 async def _send_json_data(url: str, data):
-    async with (
-        aiohttp.ClientSession() as session,
-        session.post(
-            url,
-            json=data,
-        ) as response,
-    ):
+    session = http_client.get_session()
+    use_msgpack = _use_msgpack(url)
+    if use_msgpack:
+        request = {
+            "data": msgpack.packb(data),  # type: ignore
+            "headers": {"Content-Type": MSGPACK_MIME, "Accept": MSGPACK_MIME},
+        }
+    else:
+        request = {"json": data}
+
+    async with session.post(url, **request) as response:
         if response.status == 200:
-            result = await response.json()
-            return result
+            if response.headers.get(BATCH_HEADER):
+                _batched_urls.add(url)
+            if response.content_type == MSGPACK_MIME:
+                return msgpack.unpackb(await response.read())  # type: ignore
+            return await response.json()
+        elif use_msgpack and response.status == 415:
+            # server without msgpack, nothing was called
+            _json_urls.add(url)
+            return await _send_json_data(url, data)
         else:
             error = await response.text()
-            raise Exception(error)
+            raise RFCStatusError(response.status, error)
+
+
+def _use_msgpack(url: str) -> bool:
+    if msgpack is None or url in _json_urls:
+        return False
+    return str(dotenv.get_dotenv_value(KEY_RFC_MSGPACK, "")).lower() in ("1", "true")
+
+
+def _record_latency(name: str, ms: float):
+    with _latency_lock:
+        histogram = _latency.get(name)
+        if histogram is None:
+            histogram = _latency[name] = LatencyHistogram()
+        histogram.observe(ms)
@@ -14,7 +14,7 @@ from dataclasses import dataclass, field
 from typing import Any, TypeVar, cast, overload
 
 # Local application imports
-from . import dotenv, rfc, settings
+from . import dotenv, http_client, rfc, settings
 
 T = TypeVar("T")
 R = TypeVar("R")
@@ -241,8 +241,15 @@ def call_development_function_sync(
     """Synchronously call a function that might be async."""
     result_queue: queue.Queue[T] = queue.Queue()
 
+    async def call() -> T:
+        try:
+            return await call_development_function(func, *args, **kwargs)
+        finally:
+            # the loop of this thread is not used again
+            await http_client.close_session()
+
     def run_in_thread() -> None:
-        result = asyncio.run(call_development_function(func, *args, **kwargs))
+        result = asyncio.run(call())
         result_queue.put(result)
 
     thread = threading.Thread(target=run_in_thread)
@@ -0,0 +1,115 @@
+"""Min-heap of the next run times of scheduler tasks.
+
+ScheduleQueue keeps the next run time of every task in a heap, so the job
+loop sleeps exactly until the earliest one instead of checking every task's
+schedule on a fixed interval. Pushing a new run time wakes the sleeping loop
+from any thread; entries replaced by a newer push are dropped lazily when
+they reach the top of the heap.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+
+
+class ScheduleQueue:
+    """Next run times of tasks by UUID, earliest first."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, str]] = []
+        self._times: dict[str, float] = {}  # task uuid -> time of its live entry
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._waiter: tuple[asyncio.AbstractEventLoop, asyncio.Event] | None = None
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def push(self, task_uuid: str, run_at: datetime | None) -> None:
+        """Set the next run time of a task, None to unschedule it."""
+        with self._lock:
+            if run_at is None:
+                if self._times.pop(task_uuid, None) is None:
+                    return
+            else:
+                timestamp = run_at.timestamp()
+                if self._times.get(task_uuid) == timestamp:
+                    return
+                self._times[task_uuid] = timestamp
+                heapq.heappush(self._heap, (timestamp, next(self._order), task_uuid))
+                if len(self._heap) > 2 * len(self._times) + 64:
+                    self._compact()
+        self.wake()
+
+    def remove(self, task_uuid: str) -> None:
+        """Unschedule a task."""
+        self.push(task_uuid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self._times.clear()
+        self.wake()
+
+    def next_time(self) -> float | None:
+        """Timestamp of the earliest run, None if nothing is scheduled."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float | None = None) -> list[str]:
+        """Unschedule and return the tasks whose run time has come."""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    return due
+                _, _, task_uuid = heapq.heappop(self._heap)
+                del self._times[task_uuid]
+                due.append(task_uuid)
+
+    def wake(self) -> None:
+        """Wake the loop sleeping in wait(), from any thread."""
+        waiter = self._waiter
+        if waiter is not None:
+            loop, event = waiter
+            with contextlib.suppress(RuntimeError):  # loop already closed
+                loop.call_soon_threadsafe(event.set)
+
+    async def wait(self, max_sleep: float) -> None:
+        """Sleep until the earliest run is due or the queue changes.
+
+        Sleeps at most max_sleep seconds, and yields to the event loop at
+        least once even when a run is already due.
+        """
+        event = asyncio.Event()
+        self._waiter = (asyncio.get_running_loop(), event)
+        try:
+            next_time = self.next_time()
+            delay = max_sleep
+            if next_time is not None:
+                delay = min(delay, max(0.0, next_time - time.time()))
+            if delay <= 0:
+                await asyncio.sleep(0)
+                return
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(event.wait(), delay)
+        finally:
+            self._waiter = None
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and self._times.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def _compact(self) -> None:
+        self._heap = [
+            entry for entry in self._heap if self._times.get(entry[2]) == entry[0]
+        ]
+        heapq.heapify(self._heap)
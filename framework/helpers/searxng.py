@@ -1,8 +1,7 @@
+import json
 import os
 
-import aiohttp
-
-from framework.helpers import runtime
+from framework.helpers import http_client, runtime
 
 # Use Railway's internal service URL for SearXNG, fallback to localhost for development
 SEARXNG_URL = os.getenv("SEARXNG_URL", "http://localhost:55510")
@@ -15,14 +14,14 @@ async def search(query: str):
 
 async def _search(query: str):
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                URL, data={"q": query, "format": "json"}
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"SearXNG returned status {response.status}")
+        # pooled connection, search results are never served from cache
+        response = await http_client.fetch(
+            URL, "POST", data={"q": query, "format": "json"}, cache=False
+        )
+        if response.status == 200:
+            return json.loads(response.content)
+        else:
+            raise Exception(f"SearXNG returned status {response.status}")
     except Exception as e:
         # Return error in the expected format for fallback handling
         return {"results": [], "error": f"SearXNG connection failed: {str(e)}"}
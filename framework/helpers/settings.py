@@ -1535,7 +1535,7 @@ def _get_api_key_field(settings: Settings, provider: str, title: str) -> Setting
 
 
 def convert_in(settings: dict) -> Settings:
-    current = get_settings()
+    current = get_settings().copy()
     # Ensure api_keys exists
     if "api_keys" not in current:
         current["api_keys"] = {}
@@ -20,6 +20,7 @@ from .api import (  # noqa: F401
     get_settings,
     set_settings,
     set_settings_delta,
+    subscribe,
 )
 from .types import Settings  # noqa: F401
 
@@ -28,6 +29,7 @@ __all__ = [
     "get_settings",
     "set_settings",
     "set_settings_delta",
+    "subscribe",
     "convert_in",
     "convert_out",
     "PASSWORD_PLACEHOLDER",
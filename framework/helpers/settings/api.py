@@ -9,6 +9,7 @@ from __future__ import annotations
 import json
 import os
 import re
+from collections.abc import Callable
 from typing import Any, cast
 
 from framework.helpers import files
@@ -17,6 +18,7 @@ from framework.helpers.settings.types import (
     Settings,
     SettingsOutput,
 )
+from framework.helpers.settings_manager import SettingsListener, SettingsSnapshot
 
 # Constants
 SETTINGS_FILE = files.get_abs_path("tmp/settings.json")
@@ -28,6 +30,11 @@ PASSWORD_PLACEHOLDER = (
     "****PSWD****"  # nosec B105 - This is a placeholder, not a real password
 )
 
+# current settings snapshot and the settings file mtime it was read at
+_snapshot: SettingsSnapshot | None = None
+_snapshot_mtime: int | None = None
+_listeners: list[SettingsListener] = []
+
 
 def _dict_to_env(data_dict):
     """Convert a dictionary to environment variable format.
@@ -73,8 +80,54 @@ def get_settings() -> Settings:
     """Get the current settings.
 
     Returns:
-        The current settings, loaded from file or default if not set.
+        The current settings, loaded from file or default if not set. The
+        result is a read-only snapshot shared by all readers until the
+        settings file changes; use .copy() for a mutable copy.
+    """
+    global _snapshot, _snapshot_mtime
+    mtime = _get_settings_mtime()
+    if _snapshot is not None and mtime == _snapshot_mtime:
+        return cast(Settings, _snapshot)
+
+    settings_data = _read_settings()
+    mtime = _get_settings_mtime()  # migration may have rewritten the file
+
+    previous = _snapshot
+    version = previous.version + 1 if previous is not None else 1
+    _snapshot = SettingsSnapshot.freeze(cast(dict, settings_data), version)
+    _snapshot_mtime = mtime
+    if previous is not None and previous != _snapshot:
+        for listener in list(_listeners):
+            try:
+                listener(_snapshot, previous)
+            except Exception as e:
+                print(f"Warning: Settings listener failed: {e}")
+    return cast(Settings, _snapshot)
+
+
+def subscribe(listener: SettingsListener) -> Callable[[], None]:
+    """Call listener(snapshot, previous) whenever the settings change.
+
+    Returns:
+        A function removing the subscription.
     """
+    _listeners.append(listener)
+
+    def unsubscribe():
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+    return unsubscribe
+
+
+def _get_settings_mtime() -> int | None:
+    try:
+        return os.stat(SETTINGS_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_settings() -> Settings:
     if not os.path.exists(SETTINGS_FILE):
         return DEFAULT_SETTINGS.copy()
 
@@ -103,12 +156,16 @@ def set_settings(settings: Settings, apply: bool = True) -> None:
         settings: The new settings to apply
         apply: If True, apply the settings immediately
     """
+    global _snapshot_mtime
+
     # Ensure the directory exists
     os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
 
     # Write settings to file
     with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
         json.dump(settings, f, indent=2)
+    _snapshot_mtime = None  # refresh the snapshot and notify subscribers
+    get_settings()
 
     if apply:
         _apply_settings(settings)
@@ -170,7 +227,7 @@ def convert_in(settings_data: dict[str, Any]) -> Settings:
     Returns:
         Settings object ready for use by the application
     """
-    current = get_settings()
+    current = get_settings().copy()
 
     # Ensure api_keys exists
     if "api_keys" not in current:
@@ -188,7 +245,7 @@ def convert_in(settings_data: dict[str, Any]) -> Settings:
                     if field_value != PASSWORD_PLACEHOLDER and field_id:
                         if field_id.endswith("_kwargs"):
                             # Convert environment-style string to dictionary
-                            setattr(current, field_id, _env_to_dict(field_value))
+                            cast(dict[str, Any], current)[field_id] = _env_to_dict(field_value)
                         elif field_id.startswith("api_key_"):
                             # Handle API keys specially - store in api_keys dict
                             provider = field_id.replace("api_key_", "")
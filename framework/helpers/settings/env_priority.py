@@ -51,6 +51,35 @@ ENV_VAR_MAPPINGS = {
     "railway_service_name": "RAILWAY_SERVICE_NAME",
 }
 
+# Map of API key provider names to env var patterns, first found value wins
+API_KEY_PROVIDERS = {
+    "OPENAI": ["OPENAI_API_KEY", "VITE_OPENAI_API_KEY"],
+    "ANTHROPIC": ["ANTHROPIC_API_KEY", "VITE_ANTHROPIC_API_KEY"],
+    "GOOGLE": [
+        "GOOGLE_API_KEY",
+        "VITE_GOOGLE_API_KEY",
+        "GEMINI_API_KEY",
+        "VITE_GEMINI_API_KEY",
+    ],
+    "GROQ": ["GROQ_API_KEY", "VITE_GROQ_API_KEY"],
+    "PERPLEXITY": ["PERPLEXITY_API_KEY", "VITE_PERPLEXITY_API_KEY"],
+    "XAI": ["XAI_API_KEY", "VITE_XAI_API_KEY"],
+    "HUGGINGFACE": ["HUGGINGFACE_TOKEN", "VITE_HUGGINGFACE_TOKEN"],
+}
+
+# Every environment variable that can influence apply_env_var_overrides
+OVERRIDE_ENV_VARS = tuple(
+    dict.fromkeys(
+        [*ENV_VAR_MAPPINGS.values()]
+        + [env_var for env_vars in API_KEY_PROVIDERS.values() for env_var in env_vars]
+    )
+)
+
+
+def get_env_signature() -> tuple:
+    """Current values of all override variables, changes when any of them does."""
+    return tuple(os.environ.get(env_var) for env_var in OVERRIDE_ENV_VARS)
+
 
 def get_env_value_with_type(env_var: str, default: Any = None) -> Any:
     """Get environment variable value with type conversion based on default type."""
@@ -101,25 +130,9 @@ def apply_env_var_overrides(settings: dict[str, Any]) -> dict[str, Any]:
                 result[setting_key] = env_value
 
     # Special handling for API keys - populate api_keys dict from environment
-    api_keys = result.get("api_keys", {}).copy()
+    api_keys = dict(result.get("api_keys", {}))
 
-    # Map of provider names to env var patterns
-    api_key_providers = {
-        "OPENAI": ["OPENAI_API_KEY", "VITE_OPENAI_API_KEY"],
-        "ANTHROPIC": ["ANTHROPIC_API_KEY", "VITE_ANTHROPIC_API_KEY"],
-        "GOOGLE": [
-            "GOOGLE_API_KEY",
-            "VITE_GOOGLE_API_KEY",
-            "GEMINI_API_KEY",
-            "VITE_GEMINI_API_KEY",
-        ],
-        "GROQ": ["GROQ_API_KEY", "VITE_GROQ_API_KEY"],
-        "PERPLEXITY": ["PERPLEXITY_API_KEY", "VITE_PERPLEXITY_API_KEY"],
-        "XAI": ["XAI_API_KEY", "VITE_XAI_API_KEY"],
-        "HUGGINGFACE": ["HUGGINGFACE_TOKEN", "VITE_HUGGINGFACE_TOKEN"],
-    }
-
-    for provider, env_vars in api_key_providers.items():
+    for provider, env_vars in API_KEY_PROVIDERS.items():
         # Check each possible environment variable for this provider
         for env_var in env_vars:
             env_value = os.getenv(env_var)
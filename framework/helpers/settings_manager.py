@@ -2,14 +2,25 @@
 
 This module provides a thread-safe way to manage application settings
 without using global variables.
+
+Readers get an immutable, versioned snapshot of the effective settings
+(stored settings with environment variable overrides applied). The snapshot
+is only rebuilt when settings are set, or when the settings file or one of
+the override environment variables changes (checked at most every
+CHECK_INTERVAL seconds). Dependents can subscribe to changes instead of
+re-reading the settings.
 """
 
 from __future__ import annotations
 
+import copy
 import json
 import os
 import shutil
-from typing import TYPE_CHECKING
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
 
 from . import files
 
@@ -22,6 +33,57 @@ else:
     normalize_settings = None  # type: ignore
     Settings = dict  # type: ignore
 
+CHECK_INTERVAL = 1.0  # seconds between env/file change checks
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(
+        "Settings snapshots are read-only, use get_settings().copy() to modify"
+    )
+
+
+class SettingsSnapshot(dict):
+    """Read-only settings dict shared by all readers of one settings version.
+
+    copy() returns a deep, mutable copy as a plain dict.
+    """
+
+    version: int = 0
+
+    __setitem__ = __delitem__ = _read_only  # type: ignore[assignment]
+    update = pop = popitem = clear = setdefault = _read_only  # type: ignore[assignment]
+    __ior__ = _read_only  # type: ignore[assignment]
+
+    @classmethod
+    def freeze(cls, settings: dict[str, Any], version: int = 0) -> SettingsSnapshot:
+        snapshot = cls(
+            (key, cls.freeze(value) if isinstance(value, dict) else value)
+            for key, value in settings.items()
+        )
+        snapshot.version = version
+        return snapshot
+
+    def copy(self) -> dict[str, Any]:  # type: ignore[override]
+        return _thaw(self)
+
+    def __copy__(self) -> dict[str, Any]:
+        return _thaw(self)
+
+    def __deepcopy__(self, memo) -> dict[str, Any]:
+        return _thaw(self)
+
+    def __reduce__(self):
+        return (dict, (_thaw(self),))
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    return copy.deepcopy(value)
+
+
+SettingsListener = Callable[[SettingsSnapshot, "SettingsSnapshot | None"], None]
+
 
 class SettingsManager:
     """Manages application settings in a thread-safe manner.
@@ -32,6 +94,7 @@ class SettingsManager:
 
     _instance: SettingsManager | None = None
     _settings: Settings | None = None
+    _snapshot: SettingsSnapshot | None = None
 
     @property
     def _settings_file(self) -> str:
@@ -43,6 +106,13 @@ class SettingsManager:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._settings = None
+            cls._instance._snapshot = None
+            cls._instance._version = 0
+            cls._instance._checked_at = 0.0
+            cls._instance._env_signature = None
+            cls._instance._file_mtime = None
+            cls._instance._listeners = []
+            cls._instance._lock = threading.RLock()
         return cls._instance
 
     @classmethod
@@ -56,47 +126,113 @@ class SettingsManager:
         """Get the current settings.
 
         Returns:
-            The current settings, loaded from file or default if not set,
-            with environment variable overrides applied.
+            The current settings snapshot, loaded from file or default if not
+            set, with environment variable overrides applied. The snapshot is
+            read-only; use .copy() for a mutable copy.
         """
-        if self._settings is None:
-            # Import from the settings.py file directly using importlib
-            import importlib.util
-            import os
-
-            settings_file_path = os.path.join(os.path.dirname(__file__), "settings.py")
-            spec = importlib.util.spec_from_file_location(
-                "settings", settings_file_path
-            )
-            if spec and spec.loader:
-                settings_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(settings_module)
-                get_default_settings = settings_module.get_default_settings
-                normalize_settings = settings_module.normalize_settings
-            else:
-                raise ImportError("Could not import settings module")
-
-            default_settings = get_default_settings()
-            loaded_settings = self._read_settings_file()
-            self._settings = (
-                normalize_settings(loaded_settings)
-                if loaded_settings
-                else default_settings
-            )
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < CHECK_INTERVAL:
+            return snapshot  # type: ignore[return-value]
+
+        with self._lock:
+            if self._settings is None:
+                self._settings = self._load_settings()
+                self._file_mtime = self._get_file_mtime()
+            elif self._get_file_mtime() != self._file_mtime:
+                # settings file changed outside of this manager
+                self._file_mtime = self._get_file_mtime()
+                self._settings = self._load_settings()
+                self._snapshot = None
+
+            env_signature = self._get_env_signature()
+            if self._snapshot is None or env_signature != self._env_signature:
+                self._rebuild_snapshot(env_signature)
+            self._checked_at = time.monotonic()
+            return self._snapshot  # type: ignore[return-value]
+
+    @property
+    def version(self) -> int:
+        """Version of the current settings snapshot, increases on every change."""
+        return self._version
 
-        # Always apply environment variable overrides on access
-        # This ensures environment variables always take priority
+    def subscribe(self, listener: SettingsListener) -> Callable[[], None]:
+        """Call listener(snapshot, previous) whenever the settings change.
+
+        Returns:
+            A function removing the subscription.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+        def unsubscribe():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def _load_settings(self) -> Settings:
+        # Import from the settings.py file directly using importlib
+        import importlib.util
+
+        settings_file_path = os.path.join(os.path.dirname(__file__), "settings.py")
+        spec = importlib.util.spec_from_file_location("settings", settings_file_path)
+        if spec and spec.loader:
+            settings_module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(settings_module)
+            get_default_settings = settings_module.get_default_settings
+            normalize_settings = settings_module.normalize_settings
+        else:
+            raise ImportError("Could not import settings module")
+
+        default_settings = get_default_settings()
+        loaded_settings = self._read_settings_file()
+        return (
+            normalize_settings(loaded_settings) if loaded_settings else default_settings
+        )
+
+    def _rebuild_snapshot(self, env_signature: tuple | None = None) -> None:
+        """Recompute the effective settings and notify listeners."""
+        # Environment variables always take priority over stored settings
         try:
             from framework.helpers.settings.env_priority import apply_env_var_overrides
 
-            result = apply_env_var_overrides(self._settings)
-            return result  # type: ignore[return-value]
+            effective = apply_env_var_overrides(self._settings)  # type: ignore[arg-type]
         except ImportError as e:
             print(
                 f"Warning: Failed to import env_priority, using stored settings only: {e}"
             )
             # Fallback to original behavior if import fails
-            return self._settings  # type: ignore[return-value]
+            effective = self._settings
+
+        previous = self._snapshot
+        self._version += 1
+        self._snapshot = SettingsSnapshot.freeze(effective, self._version)  # type: ignore[arg-type]
+        self._env_signature = (
+            env_signature if env_signature is not None else self._get_env_signature()
+        )
+        self._checked_at = time.monotonic()
+
+        if previous is not None and previous != self._snapshot:
+            for listener in list(self._listeners):
+                try:
+                    listener(self._snapshot, previous)
+                except Exception as e:
+                    print(f"Warning: Settings listener failed: {e}")
+
+    def _get_env_signature(self) -> tuple | None:
+        try:
+            from framework.helpers.settings.env_priority import get_env_signature
+
+            return get_env_signature()
+        except ImportError:
+            return None
+
+    def _get_file_mtime(self) -> int | None:
+        try:
+            return os.stat(self._settings_file).st_mtime_ns
+        except OSError:
+            return None
 
     def set_settings(self, settings: Settings, apply: bool = True) -> None:
         """Update the current settings and optionally apply them.
@@ -118,9 +254,12 @@ class SettingsManager:
         else:
             raise ImportError("Could not import settings module")
 
-        previous = self._settings
-        self._settings = normalize_settings(settings)  # type: ignore[assignment]
-        self._write_settings_file(self._settings)
+        with self._lock:
+            previous = self._settings
+            self._settings = normalize_settings(settings)  # type: ignore[assignment]
+            self._write_settings_file(self._settings)
+            self._file_mtime = self._get_file_mtime()
+            self._rebuild_snapshot()
 
         if apply and previous is not None:
             from .settings import _apply_settings  # type: ignore
@@ -182,8 +321,11 @@ class SettingsManager:
         """Reset settings to their default values."""
         from .settings import get_default_settings  # type: ignore
 
-        self._settings = get_default_settings()  # type: ignore[assignment]
-        self._write_settings_file(self._settings)
+        with self._lock:
+            self._settings = get_default_settings()  # type: ignore[assignment]
+            self._write_settings_file(self._settings)
+            self._file_mtime = self._get_file_mtime()
+            self._rebuild_snapshot()
 
 
 # Global instance for backward compatibility
@@ -1,74 +1,134 @@
-import select
-import subprocess
+import asyncio
+import codecs
+import contextlib
 import sys
-import time
+from collections import deque
 
 
 class LocalInteractiveSession:
-    def __init__(self):
-        self.process = None
+    """Local shell driven through asyncio pipes.
+
+    A reader task moves everything the shell prints into a bounded buffer, so
+    read_output never blocks the event loop and wakes up as soon as data
+    arrives instead of polling. stderr is merged into stdout.
+    """
+
+    def __init__(self, max_buffer: int = 1_000_000):
+        self.process: asyncio.subprocess.Process | None = None
         self.full_output = ""
+        self.max_buffer = max_buffer  # chars kept while nobody reads
+        self.dropped = 0  # chars discarded because the buffer was full
+        self._buffer: deque[str] = deque()
+        self._buffered = 0
+        self._data: asyncio.Event | None = None
+        self._reader: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._eof = False
 
     async def connect(self):
         # Start a new subprocess with the appropriate shell for the OS
         if sys.platform.startswith("win"):
-            # Windows
-            self.process = subprocess.Popen(
-                ["cmd.exe"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-            )
+            shell = ["cmd.exe"]  # Windows
         else:
-            # macOS and Linux
-            self.process = subprocess.Popen(
-                ["/bin/bash"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-            )
+            shell = ["/bin/bash"]  # macOS and Linux
+
+        self._loop = asyncio.get_running_loop()
+        self._data = asyncio.Event()
+        self._eof = False
+        self.process = await asyncio.create_subprocess_exec(
+            *shell,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        self._reader = self._loop.create_task(self._read_stdout(self.process))
 
     def close(self):
-        if self.process:
-            self.process.terminate()
-            self.process.wait()
+        if self.process and self.process.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                self.process.terminate()  # reader task ends on EOF
 
     def send_command(self, command: str):
-        if not self.process:
+        if not self.process or not self.process.stdin:
             raise Exception("Shell not connected")
         self.full_output = ""
-        self.process.stdin.write(command + "\n")  # type: ignore
-        self.process.stdin.flush()  # type: ignore
+        self._call_in_loop(self.process.stdin.write, (command + "\n").encode())
 
     async def read_output(
         self, timeout: float = 0, reset_full_output: bool = False
     ) -> tuple[str, str | None]:
+        """Wait up to timeout seconds for output, return (full, new) output."""
         if not self.process:
             raise Exception("Shell not connected")
 
+        if not self._in_session_loop():
+            # the pipes belong to the loop that connected, read there
+            if not self._loop or self._loop.is_closed() or not self._loop.is_running():
+                raise ConnectionError("Shell session event loop is no longer running")
+            future = asyncio.run_coroutine_threadsafe(
+                self.read_output(timeout, reset_full_output), self._loop
+            )
+            return await asyncio.wrap_future(future)
+
         if reset_full_output:
             self.full_output = ""
-        partial_output = ""
-        start_time = time.time()
-
-        while timeout <= 0 or time.time() - start_time < timeout:
-            rlist, _, _ = select.select([self.process.stdout], [], [], 0.1)
-            if rlist:
-                line = self.process.stdout.readline()  # type: ignore
-                if line:
-                    partial_output += line
-                    self.full_output += line
-                    time.sleep(0.1)
-                else:
-                    break  # No more output
-            else:
-                break  # No data available
+
+        if not self._buffer and not self._eof and timeout > 0:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._data.wait(), timeout=timeout)  # type: ignore
+
+        partial_output = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        if not self._eof:
+            self._data.clear()  # type: ignore
 
         if not partial_output:
             return self.full_output, None
 
+        self.full_output += partial_output
         return self.full_output, partial_output
+
+    async def _read_stdout(self, process: asyncio.subprocess.Process):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            while True:
+                chunk = await process.stdout.read(65536)  # type: ignore
+                if not chunk:
+                    break
+                self._append(decoder.decode(chunk))
+            self._append(decoder.decode(b"", final=True))
+        finally:
+            self._eof = True
+            self._data.set()  # type: ignore
+
+    def _append(self, text: str):
+        if not text:
+            return
+        self._buffer.append(text)
+        self._buffered += len(text)
+        # ring buffer: drop the oldest unread output beyond max_buffer
+        while self._buffered > self.max_buffer:
+            excess = self._buffered - self.max_buffer
+            oldest = self._buffer[0]
+            if len(oldest) <= excess:
+                self._buffer.popleft()
+                self._buffered -= len(oldest)
+                self.dropped += len(oldest)
+            else:
+                self._buffer[0] = oldest[excess:]
+                self._buffered -= excess
+                self.dropped += excess
+        self._data.set()  # type: ignore
+
+    def _in_session_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _call_in_loop(self, func, *args):
+        if self._in_session_loop() or not self._loop or not self._loop.is_running():
+            func(*args)
+        else:
+            self._loop.call_soon_threadsafe(func, *args)
@@ -4,8 +4,12 @@
 import asyncio
 import contextlib
 import json
+import os
 import threading
+import time
+from collections import defaultdict
 from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any, ClassVar, Optional
 
@@ -13,11 +17,12 @@ from typing import Any, ClassVar, Optional
 from pydantic import BaseModel, Field, PrivateAttr
 
 # Local imports
-from agent import AgentContext, UserMessage
+from agent import AgentContext, AgentContextType, UserMessage
 from framework.helpers.defer import DeferredTask
-from framework.helpers.files import get_abs_path, make_dirs, read_file, write_file
+from framework.helpers.files import get_abs_path, read_file
 from framework.helpers.persist_chat import save_tmp_chat
 from framework.helpers.print_style import PrintStyle
+from framework.helpers.schedule_queue import ScheduleQueue
 from framework.helpers.task_models import (
     AdHocTask,
     PlannedTask,
@@ -25,9 +30,58 @@ from framework.helpers.task_models import (
     Task,
     TaskState,
 )
-from framework.helpers.task_serialization import deserialize_task, serialize_tasks
+from framework.helpers.task_serialization import (
+    deserialize_task,
+    serialize_task,
+    serialize_tasks,
+)
+from framework.helpers.task_store import TaskStore, TaskVersionConflictError
 
 SCHEDULER_FOLDER = "tmp/scheduler"
+MAX_UPDATE_ATTEMPTS = 3  # tries of an update that conflicts with other writers
+
+
+def _next_run(
+    task: ScheduledTask | AdHocTask | PlannedTask, after: datetime | None = None
+) -> datetime | None:
+    """When the task is due next, None if it is not scheduled."""
+    # a planned task is queued again when its current run finishes
+    if isinstance(task, PlannedTask) and (
+        task.state == TaskState.RUNNING or task.plan.in_progress is not None
+    ):
+        return None
+    return task.get_next_run(after)
+
+
+def _timestamp(run_at: datetime | None) -> float | None:
+    return run_at.timestamp() if run_at else None
+
+
+def _migrate_json(store: TaskStore) -> None:
+    """Move the tasks of tasks.json, used before the store, into an empty store."""
+    tasks_file = get_abs_path(f"{SCHEDULER_FOLDER}/tasks.json")
+    if not os.path.exists(tasks_file) or store.count():
+        return
+
+    tasks = []
+    for task_data in json.loads(read_file(tasks_file) or "[]"):
+        # Skip entries that aren't valid task data
+        if not isinstance(task_data, dict):
+            continue
+        try:
+            tasks.append(deserialize_task(task_data))
+        except Exception as e:
+            PrintStyle(font_color="red", padding=True).print(
+                f"Error loading task {task_data.get('uuid', 'unknown')}: {str(e)}"
+            )
+    store.upsert_many(
+        (serialize_task(task), _timestamp(_next_run(task))) for task in tasks
+    )
+    # keep the file as a backup, it is not read again
+    os.replace(tasks_file, f"{tasks_file}.migrated")
+    PrintStyle(font_color="green", padding=True).print(
+        f"Moved {len(tasks)} scheduler tasks from tasks.json to tasks.db"
+    )
 
 
 class SchedulerTaskList(BaseModel):
@@ -39,6 +93,12 @@ class SchedulerTaskList(BaseModel):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._lock = threading.RLock()
+        self._queue = ScheduleQueue()
+        self._by_uuid: dict[str, ScheduledTask | AdHocTask | PlannedTask] = {}
+        self._by_context: dict[str | None, dict[str, Any]] = defaultdict(dict)
+        self._indexed: tuple[int, int] | None = None
+        self._store: TaskStore | None = None
+        self._versions: dict[str, int] = {}  # stored version of each task
 
     @classmethod
     def get(cls) -> "SchedulerTaskList":
@@ -49,69 +109,68 @@ class SchedulerTaskList(BaseModel):
         return cls.__instance
 
     def reload(self) -> None:
-        """Reload tasks from disk."""
+        """Reload the tasks changed in the store since they were loaded."""
         with self._lock:
-            tasks_file = get_abs_path(f"{SCHEDULER_FOLDER}/tasks.json")
-
             try:
-                file_content = read_file(tasks_file)
-                if not file_content:
-                    self.tasks = []
-                    self.save()
-                    return
-
-                tasks_data = json.loads(file_content)
-                self.tasks = []
-
-                for task_data in tasks_data:
+                store = self._get_store()
+                versions = store.versions()
+                index = self._index()
+
+                for task_uuid in [uuid for uuid in index if uuid not in versions]:
+                    task = index[task_uuid]
+                    self.tasks.remove(task)
+                    self._unindex(task)
+                    self._versions.pop(task_uuid, None)
+
+                changed = [
+                    uuid
+                    for uuid, version in versions.items()
+                    if self._versions.get(uuid) != version
+                ]
+                for task_uuid, version, task_data in store.load(changed):
+                    self._versions[task_uuid] = version
                     try:
-                        # Handle both string and dict task_data
-                        if isinstance(task_data, str):
-                            # Skip string entries that aren't valid task data
-                            continue
-                        elif isinstance(task_data, dict):
-                            task = deserialize_task(task_data)
-                            self.tasks.append(task)
-                        else:
-                            # Skip unknown data types
-                            continue
+                        task = deserialize_task(task_data)
                     except Exception as e:
-                        # Get UUID safely for error reporting
-                        task_uuid = "unknown"
-                        if isinstance(task_data, dict):
-                            task_uuid = task_data.get("uuid", "unknown")
-
                         PrintStyle(font_color="red", padding=True).print(
                             f"Error loading task {task_uuid}: {str(e)}"
                         )
+                        continue
+                    existing = index.get(task_uuid)
+                    if existing is not None:
+                        self.tasks[self.tasks.index(existing)] = task
+                        self._unindex(existing)
+                    else:
+                        self.tasks.append(task)
+                    self._index_task(task)
 
-            except FileNotFoundError:
-                # File doesn't exist yet, initialize with empty task list
-                self.tasks = []
-                self.save()
             except Exception as e:
                 PrintStyle(font_color="red", padding=True).print(
                     f"Error loading tasks: {str(e)}"
                 )
-                self.tasks = []
 
     def add_task(self, task: ScheduledTask | AdHocTask | PlannedTask) -> None:
         """Add a task to the list."""
         with self._lock:
             # Remove existing task with same UUID if exists
-            self.tasks = [t for t in self.tasks if t.uuid != task.uuid]
+            existing = self._index().get(task.uuid)
+            if existing is not None:
+                self.tasks.remove(existing)
+                self._unindex(existing)
             self.tasks.append(task)
-            self.save()
+            self._index_task(task)
+            self._save_task(task, checked=False)
 
     def save(self) -> None:
-        """Save tasks to disk."""
+        """Save all tasks to the store, in one transaction."""
         with self._lock:
-            make_dirs(SCHEDULER_FOLDER)
-            tasks_file = get_abs_path(f"{SCHEDULER_FOLDER}/tasks.json")
-
             try:
-                serialized_tasks = serialize_tasks(self.tasks)
-                write_file(tasks_file, json.dumps(serialized_tasks, indent=2))
+                self._versions.update(
+                    self._get_store().upsert_many(
+                        (serialize_task(task), _timestamp(_next_run(task)))
+                        for task in self.tasks
+                    )
+                )
             except Exception as e:
                 PrintStyle(font_color="red", padding=True).print(
                     f"Error saving tasks: {str(e)}"
@@ -135,12 +194,25 @@ class SchedulerTaskList(BaseModel):
         Returns the updated task or None if not found.
         """
         with self._lock:
-            for task in self.tasks:
-                if task.uuid == task_uuid and verify_func(task):
-                    updater_func(task)
-                    self.save()
+            for _ in range(MAX_UPDATE_ATTEMPTS):
+                task = self._index().get(task_uuid)
+                if task is None or not verify_func(task):
+                    return None
+                context_id = task.context_id
+                updater_func(task)
+                if task.context_id != context_id:
+                    self._by_context[context_id].pop(task.uuid, None)
+                    self._by_context[task.context_id][task.uuid] = task
+                self._queue.push(task.uuid, _next_run(task))
+                if self._save_task(task):
                     return task
-            return None
+                # changed by another writer, update its current version again
+                self.reload()
+
+            PrintStyle(font_color="red", padding=True).print(
+                f"Error saving task {task_uuid}: it keeps being changed concurrently"
+            )
+            return task
 
     def get_tasks(self) -> list[ScheduledTask | AdHocTask | PlannedTask]:
         """Get all tasks."""
@@ -152,12 +224,12 @@ class SchedulerTaskList(BaseModel):
     ) -> list[ScheduledTask | AdHocTask | PlannedTask]:
         """Get tasks by context ID."""
         with self._lock:
-            result = []
-            for task in self.tasks:
-                if task.context_id == context_id:
-                    if not only_running or task.state == TaskState.RUNNING:
-                        result.append(task)
-            return result
+            self._index()
+            return [
+                task
+                for task in self._by_context.get(context_id, {}).values()
+                if not only_running or task.state == TaskState.RUNNING
+            ]
 
     def get_due_tasks(self) -> list[ScheduledTask | AdHocTask | PlannedTask]:
         """Get tasks that are due to run."""
@@ -168,15 +240,52 @@ class SchedulerTaskList(BaseModel):
                     due_tasks.append(task)
             return due_tasks
 
+    def pop_due_tasks(self) -> list[ScheduledTask | AdHocTask | PlannedTask]:
+        """Take the tasks that are due from the schedule queue.
+
+        A scheduled task is queued again for its next cron time; a planned
+        task when its run finishes, see reschedule().
+        """
+        with self._lock:
+            index = self._index()
+            now = time.time()
+            due_tasks = []
+            for task_uuid in self._queue.pop_due(now):
+                task = index.get(task_uuid)
+                if task is None:
+                    continue
+                if task.state != TaskState.RUNNING and not (
+                    isinstance(task, PlannedTask) and task.plan.in_progress
+                ):
+                    due_tasks.append(task)
+                if not isinstance(task, PlannedTask):
+                    after = datetime.fromtimestamp(now, UTC)
+                    self._queue.push(task_uuid, _next_run(task, after))
+            return due_tasks
+
+    def reschedule(self, task_uuid: str) -> None:
+        """Queue the next run of a task again, after it ran."""
+        with self._lock:
+            task = self._index().get(task_uuid)
+            if task is None:
+                return
+            self._queue.push(task_uuid, _next_run(task))
+            # the run may have changed the task after its last update
+            if not self._save_task(task):
+                self.reload()
+
+    async def wait_until_due(self, max_sleep: float) -> None:
+        """Sleep until the next task is due or the schedule changes."""
+        with self._lock:
+            self._index()
+        await self._queue.wait(max_sleep)
+
     def get_task_by_uuid(
         self, task_uuid: str
     ) -> ScheduledTask | AdHocTask | PlannedTask | None:
         """Get a task by UUID."""
         with self._lock:
-            for task in self.tasks:
-                if task.uuid == task_uuid:
-                    return task
-            return None
+            return self._index().get(task_uuid)
 
     def get_task_by_name(
         self, name: str
@@ -198,24 +307,99 @@ class SchedulerTaskList(BaseModel):
     def remove_task_by_uuid(self, task_uuid: str) -> bool:
         """Remove a task by UUID."""
         with self._lock:
-            original_count = len(self.tasks)
-            self.tasks = [task for task in self.tasks if task.uuid != task_uuid]
-
-            if len(self.tasks) < original_count:
-                self.save()
-                return True
-            return False
+            task = self._index().get(task_uuid)
+            if task is None:
+                return False
+            self.tasks.remove(task)
+            self._unindex(task)
+            self._delete_tasks([task_uuid])
+            return True
 
     def remove_task_by_name(self, name: str) -> bool:
         """Remove all tasks with the given name."""
         with self._lock:
-            original_count = len(self.tasks)
-            self.tasks = [task for task in self.tasks if task.name != name]
-
-            if len(self.tasks) < original_count:
-                self.save()
-                return True
+            removed = [task for task in self.tasks if task.name == name]
+            if not removed:
+                return False
+            self._index()
+            self.tasks[:] = [task for task in self.tasks if task.name != name]
+            for task in removed:
+                self._unindex(task)
+            self._delete_tasks([task.uuid for task in removed])
+            return True
+
+    def _get_store(self) -> TaskStore:
+        if self._store is None:
+            store = TaskStore(get_abs_path(f"{SCHEDULER_FOLDER}/tasks.db"))
+            _migrate_json(store)
+            self._store = store
+        return self._store
+
+    def _save_task(
+        self, task: ScheduledTask | AdHocTask | PlannedTask, checked: bool = True
+    ) -> bool:
+        """Write one task to the store.
+
+        Returns False if checked and the stored task was changed by another
+        writer since it was loaded; other errors are only reported.
+        """
+        try:
+            self._versions[task.uuid] = self._get_store().upsert(
+                serialize_task(task),
+                self._versions.get(task.uuid) if checked else None,
+                _timestamp(_next_run(task)),
+            )
+        except TaskVersionConflictError:
             return False
+        except Exception as e:
+            PrintStyle(font_color="red", padding=True).print(
+                f"Error saving task {task.uuid}: {str(e)}"
+            )
+        return True
+
+    def _delete_tasks(self, task_uuids: list[str]) -> None:
+        for task_uuid in task_uuids:
+            self._versions.pop(task_uuid, None)
+        try:
+            self._get_store().delete(task_uuids)
+        except Exception as e:
+            PrintStyle(font_color="red", padding=True).print(
+                f"Error deleting tasks: {str(e)}"
+            )
+
+    def _index(self) -> dict[str, ScheduledTask | AdHocTask | PlannedTask]:
+        """Tasks by UUID, indexed and queued again if the list was replaced."""
+        key = (id(self.tasks), len(self.tasks))
+        if self._indexed != key:
+            self._by_uuid = {}
+            self._by_context = defaultdict(dict)
+            self._queue.clear()
+            for task in self.tasks:
+                self._by_uuid[task.uuid] = task
+                self._by_context[task.context_id][task.uuid] = task
+                self._queue.push(task.uuid, _next_run(task))
+            self._indexed = key
+        return self._by_uuid
+
+    def _index_task(self, task: ScheduledTask | AdHocTask | PlannedTask) -> None:
+        self._by_uuid[task.uuid] = task
+        self._by_context[task.context_id][task.uuid] = task
+        self._queue.push(task.uuid, _next_run(task))
+        self._indexed = (id(self.tasks), len(self.tasks))
+
+    def _unindex(self, task: ScheduledTask | AdHocTask | PlannedTask) -> None:
+        self._by_uuid.pop(task.uuid, None)
+        self._by_context[task.context_id].pop(task.uuid, None)
+        self._queue.remove(task.uuid)
+        self._indexed = (id(self.tasks), len(self.tasks))
+
+
+@dataclass
+class TaskRun:
+    """Outcome of one run of a task."""
+
+    result: str
+    error: str | None = None
 
 
 class TaskScheduler:
@@ -228,6 +412,7 @@ class TaskScheduler:
         if not hasattr(self, "_initialized"):
             self._tasks = SchedulerTaskList.get()
             self._printer = PrintStyle(italic=True, font_color="green", padding=False)
+            self._running: set[asyncio.Task] = set()
             self._initialized = True
 
     @classmethod
@@ -282,18 +467,18 @@ class TaskScheduler:
         return self._tasks.find_task_by_name(name)
 
     async def tick(self) -> None:
-        """Check for and run due tasks."""
-        due_tasks = self._tasks.get_due_tasks()
-
-        for task in due_tasks:
+        """Start the due tasks in the current event loop."""
+        for task in self._tasks.pop_due_tasks():
             self._printer.print(f"Running scheduled task: {task.name}")
 
-            # Run task in background
-            DeferredTask.create(
-                self._run_task_wrapper,
-                task.uuid,
-                None,  # task_context
-            )
+            # Run task in background, a long task does not delay the others
+            run = asyncio.create_task(self._run_task(task))
+            self._running.add(run)
+            run.add_done_callback(self._running.discard)
+
+    async def wait_for_due(self, max_sleep: float) -> None:
+        """Sleep until the next task is due or tasks are added or updated."""
+        await self._tasks.wait_until_due(max_sleep)
 
     def run_task_by_uuid(self, task_uuid: str, task_context: str | None = None) -> bool:
         """Run a task by UUID."""
@@ -319,6 +504,20 @@ class TaskScheduler:
 
         return self.run_task_by_uuid(task.uuid, task_context)
 
+    async def run_task_async(
+        self, task_uuid: str, task_context: str | None = None
+    ) -> TaskRun | None:
+        """Run a task in the current event loop, None if it does not exist.
+
+        A failed run is returned with its error set, see TaskRun.
+        """
+        task = self.get_task_by_uuid(task_uuid)
+        if not task:
+            return None
+
+        self._printer.print(f"Running task: {task.name}")
+        return await self._run_task(task, task_context)
+
     def save(self) -> None:
         """Save all tasks to storage."""
         self._tasks.save()
@@ -355,46 +554,26 @@ class TaskScheduler:
         """Create a new agent context for task execution."""
         from initialize import initialize_agent
 
-        agent = initialize_agent()
-
-        context = AgentContext(
-            agent=agent,
-            context_id=task.context_id,
-            system_prompt=task.system_prompt,
+        return AgentContext(
+            initialize_agent(),
+            id=task.context_id,
+            name=task.name,
+            type=AgentContextType.TASK,
         )
 
-        return context
-
     def _get_chat_context(
         self, task: ScheduledTask | AdHocTask | PlannedTask
     ) -> AgentContext:
-        """Get or create chat context for the task."""
-        try:
-            from initialize import initialize_agent
-
-            agent = initialize_agent()
-            context = agent.load_context(task.context_id)
-
-            if context is None:
-                context = self.__new_context(task)
-
-            return context
-
-        except Exception as e:
-            self._printer.print(f"Error loading context, creating new one: {str(e)}")
-            return self.__new_context(task)
+        """Get the chat context of the task, created on its first run."""
+        context = AgentContext.get(task.context_id) if task.context_id else None
+        return context or self.__new_context(task)
 
     def _persist_chat(
         self, task: ScheduledTask | AdHocTask | PlannedTask, context: AgentContext
     ) -> None:
         """Persist chat context after task execution."""
         try:
-            # Save context
-            context.agent.save_context(context)
-
-            # Save temporary chat
-            save_tmp_chat(context.context_id, context.chat_history)
-
+            save_tmp_chat(context)
         except Exception as e:
             self._printer.print(f"Error persisting chat: {str(e)}")
 
@@ -402,7 +581,7 @@ class TaskScheduler:
         self,
         task: ScheduledTask | AdHocTask | PlannedTask,
         task_context: str | None = None,
-    ) -> None:
+    ) -> TaskRun:
         """Execute a task asynchronously."""
         try:
             # Update task state to running
@@ -421,28 +600,37 @@ class TaskScheduler:
             if task_context:
                 message_content = f"{task_context}\n\n{message_content}"
 
-            user_message = UserMessage(
-                content=message_content, attachments=task.attachments
+            context.log.log(
+                type="user", heading="User message", content=message_content
+            )
+            agent = context.streaming_agent or context.agent0
+            agent.hist_add_user_message(
+                UserMessage(
+                    message=message_content,
+                    attachments=task.attachments,
+                    system_message=[task.system_prompt] if task.system_prompt else [],
+                )
             )
 
             # Execute task
-            response = await context.agent.message_loop_async(user_message, context)
+            result = await agent.monologue() or "No response"
 
             # Update task with result
             self.update_task(
                 task.uuid,
                 state=TaskState.FINISHED,
-                last_result=response.content if response else "No response",
+                last_result=result,
             )
 
             # Call success hook
-            await task.on_success(response.content if response else "No response")
+            await task.on_success(result)
 
             # Persist chat context
             self._persist_chat(task, context)
+            run = TaskRun(result)
 
         except Exception as e:
-            error_msg = str(e)
+            error_msg = str(e) or type(e).__name__
             self._printer.print(f"Error running task {task.name}: {error_msg}")
 
             # Update task with error
@@ -454,10 +642,14 @@ class TaskScheduler:
 
             # Call error hook
             await task.on_error(error_msg)
+            run = TaskRun(f"Error: {error_msg}", error=error_msg)
 
         finally:
             # Call finish hook
             await task.on_finish()
+            self._tasks.reschedule(task.uuid)
+
+        return run
 
     def _run_task_wrapper(
         self, task_uuid: str, task_context: str | None = None
@@ -193,8 +193,8 @@ class BaseTask(BaseModel):
         """Check if task should run based on schedule. Override in subclasses."""
         return False
 
-    def get_next_run(self) -> datetime | None:
-        """Get next scheduled run time. Override in subclasses."""
+    def get_next_run(self, after: datetime | None = None) -> datetime | None:
+        """Get next scheduled run time after now or after. Override in subclasses."""
         return None
 
     def get_next_run_minutes(self) -> int | None:
@@ -355,12 +355,12 @@ class ScheduledTask(BaseTask):
             )
             return False
 
-    def get_next_run(self) -> datetime | None:
+    def get_next_run(self, after: datetime | None = None) -> datetime | None:
         """Get next scheduled run time."""
         try:
             cron = CronTab(self.schedule.to_crontab())
             tz = pytz.timezone(self.schedule.timezone)
-            now = datetime.now(tz)
+            now = after.astimezone(tz) if after else datetime.now(tz)
 
             # Get next run time and convert to UTC
             next_run_local = cron.next(now=now, default_utc=False, return_datetime=True)
@@ -428,7 +428,7 @@ class PlannedTask(BaseTask):
         """Check if task should run based on plan."""
         return self.plan.should_launch()
 
-    def get_next_run(self) -> datetime | None:
+    def get_next_run(self, after: datetime | None = None) -> datetime | None:
         """Get next planned run time."""
         return self.plan.get_next_launch_time()
 
@@ -27,9 +27,7 @@ def serialize_datetime(dt: datetime | None) -> str | None:
     if dt is None:
         return None
 
-    localization = Localization.get()
-    local_dt = localization.to_user_timezone(dt)
-    return local_dt.isoformat()
+    return Localization.get().serialize_datetime(dt)
 
 
 def parse_datetime(dt_str: str | None) -> datetime | None:
@@ -50,8 +48,7 @@ def parse_datetime(dt_str: str | None) -> datetime | None:
 
         # If it's naive, assume it's in user's timezone and convert to UTC
         if dt.tzinfo is None:
-            localization = Localization.get()
-            dt = localization.from_user_timezone(dt)
+            return Localization.get().localtime_str_to_utc_dt(dt_str)
 
         return dt.astimezone(UTC)
     except (ValueError, TypeError):
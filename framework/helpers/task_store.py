@@ -0,0 +1,240 @@
+"""SQLite store of the scheduler tasks.
+
+Each task is one row holding its serialized form, with the columns the
+scheduler looks tasks up by (state, context and next run time) indexed.
+Writes touch only the changed task, and every write increments the row's
+version: an update made with an outdated version raises
+TaskVersionConflictError instead of overwriting a change made by another
+writer.
+"""
+
+import json
+import os
+import sqlite3
+from collections.abc import Iterable
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import Any
+
+CHUNK_SIZE = 500  # uuids per IN (...) query, below SQLite's variable limit
+
+
+class TaskVersionConflictError(Exception):
+    """The task was changed by another writer since it was read."""
+
+
+class TaskStore:
+    """Per-task, versioned storage of serialized scheduler tasks."""
+
+    def __init__(self, db_path: str):
+        """Initialize the task store.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the database tables."""
+        with self._get_connection() as conn:
+            # readers do not block the writer, and the other way round
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    uuid TEXT PRIMARY KEY,
+                    type TEXT,
+                    name TEXT,
+                    state TEXT,
+                    context_id TEXT,
+                    next_run REAL,  -- unix timestamp, NULL if not scheduled
+                    version INTEGER NOT NULL,
+                    updated_at TEXT,
+                    data TEXT NOT NULL  -- serialized task
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (state)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tasks_next_run ON tasks (next_run)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tasks_context ON tasks (context_id)"
+            )
+            conn.commit()
+
+    @contextmanager
+    def _get_connection(self):
+        """Get a database connection with proper error handling."""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        """Number of stored tasks."""
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def versions(self) -> dict[str, int]:
+        """Current version of every stored task, by UUID."""
+        with self._get_connection() as conn:
+            return dict(conn.execute("SELECT uuid, version FROM tasks"))
+
+    def load(
+        self, uuids: Iterable[str] | None = None
+    ) -> list[tuple[str, int, dict[str, Any]]]:
+        """Load (uuid, version, serialized task) of the given or of all tasks."""
+        query = "SELECT uuid, version, data FROM tasks"
+        with self._get_connection() as conn:
+            if uuids is None:
+                rows = conn.execute(query).fetchall()
+            else:
+                uuids = list(uuids)
+                rows = []
+                for i in range(0, len(uuids), CHUNK_SIZE):
+                    chunk = uuids[i : i + CHUNK_SIZE]
+                    rows += conn.execute(
+                        f"{query} WHERE uuid IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+        return [(uuid, version, json.loads(data)) for uuid, version, data in rows]
+
+    def get(self, uuid: str) -> tuple[int, dict[str, Any]] | None:
+        """Load (version, serialized task) of a task, None if not stored."""
+        rows = self.load([uuid])
+        return (rows[0][1], rows[0][2]) if rows else None
+
+    def find(
+        self, state: str | None = None, due_before: float | None = None
+    ) -> list[str]:
+        """UUIDs of the tasks in a state and/or due before a timestamp.
+
+        Tasks due before a timestamp come earliest first.
+        """
+        conditions, params = [], []
+        if state is not None:
+            conditions.append("state = ?")
+            params.append(state)
+        if due_before is not None:
+            conditions.append("next_run <= ?")
+            params.append(due_before)
+        query = "SELECT uuid FROM tasks"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if due_before is not None:
+            query += " ORDER BY next_run"
+        with self._get_connection() as conn:
+            return [row[0] for row in conn.execute(query, params)]
+
+    def upsert(
+        self,
+        data: dict[str, Any],
+        version: int | None = None,
+        next_run: float | None = None,
+    ) -> int:
+        """Store a serialized task and return its new version.
+
+        Args:
+            data: The serialized task
+            version: The version the task was read at; the write fails with
+                TaskVersionConflictError if the stored task has another
+                version or was deleted. None stores the task unconditionally.
+            next_run: Timestamp of the next run, for due lookups
+
+        Returns:
+            The version of the stored task
+        """
+        with self._get_connection() as conn:
+            new_version = self._upsert(conn, data, version, next_run)
+            conn.commit()
+            return new_version
+
+    def upsert_many(
+        self, items: Iterable[tuple[dict[str, Any], float | None]]
+    ) -> dict[str, int]:
+        """Store serialized tasks unconditionally, in one transaction.
+
+        Returns:
+            The new version of every stored task, by UUID
+        """
+        with self._get_connection() as conn:
+            versions = {
+                data["uuid"]: self._upsert(conn, data, None, next_run)
+                for data, next_run in items
+            }
+            conn.commit()
+            return versions
+
+    def delete(self, uuids: Iterable[str]) -> int:
+        """Delete tasks by UUID, returning how many were stored."""
+        uuids = list(uuids)
+        deleted = 0
+        with self._get_connection() as conn:
+            for i in range(0, len(uuids), CHUNK_SIZE):
+                chunk = uuids[i : i + CHUNK_SIZE]
+                deleted += conn.execute(
+                    f"DELETE FROM tasks WHERE uuid IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).rowcount
+            conn.commit()
+        return deleted
+
+    @staticmethod
+    def _upsert(
+        conn: sqlite3.Connection,
+        data: dict[str, Any],
+        version: int | None,
+        next_run: float | None,
+    ) -> int:
+        values = (
+            data.get("type"),
+            data.get("name"),
+            data.get("state"),
+            data.get("context_id"),
+            next_run,
+            datetime.now(UTC).isoformat(),
+            json.dumps(data),
+        )
+        if version is None:
+            row = conn.execute(
+                """
+                INSERT INTO tasks (
+                    type, name, state, context_id, next_run, updated_at, data,
+                    uuid, version
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT (uuid) DO UPDATE SET
+                    type = excluded.type,
+                    name = excluded.name,
+                    state = excluded.state,
+                    context_id = excluded.context_id,
+                    next_run = excluded.next_run,
+                    updated_at = excluded.updated_at,
+                    data = excluded.data,
+                    version = tasks.version + 1
+                RETURNING version
+            """,
+                (*values, data["uuid"]),
+            ).fetchone()
+            return row[0]
+
+        updated = conn.execute(
+            """
+            UPDATE tasks SET
+                type = ?, name = ?, state = ?, context_id = ?, next_run = ?,
+                updated_at = ?, data = ?, version = version + 1
+            WHERE uuid = ? AND version = ?
+        """,
+            (*values, data["uuid"], version),
+        ).rowcount
+        if not updated:
+            raise TaskVersionConflictError(
+                f"Task {data['uuid']} was changed since version {version}"
+            )
+        return version + 1
@@ -1,3 +1,4 @@
+from functools import cache
 from typing import Literal
 
 import tiktoken
@@ -6,15 +7,22 @@ APPROX_BUFFER = 1.1
 TRIM_BUFFER = 0.8
 
 
+@cache
+def get_encoding(encoding_name="cl100k_base") -> tiktoken.Encoding:
+    # encoders are immutable and thread-safe, one per process is enough
+    return tiktoken.get_encoding(encoding_name)
+
+
 def count_tokens(text: str, encoding_name="cl100k_base") -> int:
     if not text:
         return 0
 
-    # Get the encoding
-    encoding = tiktoken.get_encoding(encoding_name)
+    # Get the (cached) encoding
+    encoding = get_encoding(encoding_name)
 
-    # Encode the text and count the tokens
-    tokens = encoding.encode(text)
+    # Encode the text and count the tokens, special tokens are counted as plain
+    # text (skips the special token scan and never raises on "<|endoftext|>")
+    tokens = encoding.encode_ordinary(text)
     token_count = len(tokens)
 
     return token_count
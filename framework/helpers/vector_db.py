@@ -32,8 +32,6 @@ except ImportError as e:
 # 2. Building from source with proper ARM64 support
 # 3. Using alternative vector stores (ChromaDB, Weaviate, etc.)
 # This replaces the previous TODO and provides runtime compatibility checking
-from langchain.embeddings import CacheBackedEmbeddings
-from langchain.storage import InMemoryByteStore
 from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_community.vectorstores.utils import (
@@ -42,6 +40,7 @@ from langchain_community.vectorstores.utils import (
 from langchain_core.documents import Document
 
 from agent import Agent
+from framework.helpers import embedding_service
 
 
 class MyFaiss(FAISS):
@@ -74,17 +73,16 @@ class MyFaiss(FAISS):
 class VectorDB:
     def __init__(self, agent: Agent):
         self.agent = agent
-        self.store = InMemoryByteStore()
         self.model = agent.get_embedding_model()
 
-        self.embedder = CacheBackedEmbeddings.from_bytes_store(
+        self.embedder = embedding_service.get_service(
             self.model,
-            self.store,
-            namespace=getattr(
+            getattr(
                 self.model,
                 "model",
                 getattr(self.model, "model_name", "default"),
             ),
+            None,
         )
 
         self.index = faiss.IndexFlatIP(len(self.embedder.embed_query("example")))
@@ -1,9 +1,27 @@
-from agent import Agent, UserMessage
+import asyncio
+import json
+import os
+import time
+import weakref
+
+from agent import Agent, AgentContext, UserMessage
+from framework.helpers.print_style import PrintStyle
 from framework.helpers.tool import Response, Tool
 
+# subordinates of one chat running at the same time, over all fan-outs
+MAX_PARALLEL_SUBORDINATES = int(os.getenv("SUBORDINATE_CONCURRENCY", "3"))
+DATA_NAME_SLOT = "_fanout_slot"  # the agent holds a concurrency slot
+
+_limits: "weakref.WeakKeyDictionary[AgentContext, tuple]" = weakref.WeakKeyDictionary()
+
 
 class Delegation(Tool):
-    async def execute(self, message="", reset="", **kwargs):
+    async def execute(
+        self, message="", reset="", messages=None, quorum=None, timeout=None, **kwargs
+    ):
+        if messages:
+            return await self.fan_out(_as_list(messages), quorum, timeout)
+
         # create subordinate agent using the data object on this agent and set superior agent to his data object
         if (
             self.agent.get_data(Agent.DATA_NAME_SUBORDINATE) is None
@@ -20,3 +38,160 @@ class Delegation(Tool):
         result = await subordinate.monologue()
         # result
         return Response(message=result, break_loop=False)
+
+    async def fan_out(self, messages: list[str], quorum=None, timeout=None) -> Response:
+        """Run one new subordinate per message concurrently and collect results.
+
+        Returns when all subordinates finished, when quorum of them succeeded,
+        or after timeout seconds; unfinished subordinates are cancelled.
+        """
+        try:
+            quorum, timeout = _parse_limits(quorum, timeout)
+        except ValueError as e:
+            return Response(message=f"Error: {e}", break_loop=False)
+
+        subordinates = []
+        for i, message in enumerate(messages):
+            sub = Agent(self.agent.number + 1, self.agent.config, self.agent.context)
+            sub.agent_name = f"Agent {sub.number}.{i + 1}"
+            sub.set_data(Agent.DATA_NAME_SUPERIOR, self.agent)
+            sub.hist_add_user_message(UserMessage(message=message, attachments=[]))
+            subordinates.append(sub)
+        self.agent.set_data(Agent.DATA_NAME_SUBORDINATES, subordinates)
+
+        needed = min(quorum, len(subordinates)) if quorum else len(subordinates)
+        deadline = time.monotonic() + timeout if timeout else None
+        limit = _get_limit(self.agent.context)
+        running = list(subordinates)
+        tasks = {
+            asyncio.create_task(self._run(sub, limit, running)): i
+            for i, sub in enumerate(subordinates)
+        }
+        results: dict[int, str] = {}
+        succeeded = 0
+
+        # a slot of this agent would be held while its own subordinates wait
+        holds_slot = self.agent.get_data(DATA_NAME_SLOT)
+        if holds_slot:
+            self.agent.set_data(DATA_NAME_SLOT, False)
+            limit.release()
+        pending = set(tasks)
+        try:
+            while pending and succeeded < needed:
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    i = tasks[task]
+                    try:
+                        results[i] = task.result()
+                        succeeded += 1
+                    except Exception as e:
+                        results[i] = f"Error: {e}"
+                    self._report(subordinates[i], results[i], len(results), tasks)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+            if holds_slot:
+                await limit.acquire()
+                self.agent.set_data(DATA_NAME_SLOT, True)
+
+        reason = (
+            "cancelled after enough results" if succeeded >= needed else "timed out"
+        )
+        parts = []
+        for i, sub in enumerate(subordinates):
+            if i in results:
+                parts.append(
+                    self.agent.read_prompt(
+                        "fw.msg_from_subordinate.md",
+                        name=sub.agent_name,
+                        message=results[i],
+                    )
+                )
+            else:
+                parts.append(
+                    self.agent.read_prompt(
+                        "fw.msg_subordinate_unfinished.md",
+                        name=sub.agent_name,
+                        reason=reason,
+                    )
+                )
+        return Response(message="\n\n".join(parts), break_loop=False)
+
+    async def _run(
+        self, sub: Agent, limit: asyncio.Semaphore, running: list[Agent]
+    ) -> str:
+        try:
+            await limit.acquire()
+            sub.set_data(DATA_NAME_SLOT, True)
+            return await sub.monologue()
+        finally:
+            # not held while the subordinate waited for a fan-out of its own
+            if sub.get_data(DATA_NAME_SLOT):
+                limit.release()
+            sub.set_data(DATA_NAME_SLOT, False)
+            running.remove(sub)
+            # a finished monologue unsets the streaming agent, siblings still run
+            context = self.agent.context
+            if context.streaming_agent in (None, sub):
+                context.streaming_agent = running[-1] if running else self.agent
+
+    def _report(self, sub: Agent, result: str, finished: int, tasks: dict):
+        # partial results reach the UI while the others still run
+        progress = f"{finished}/{len(tasks)} subordinates finished"
+        PrintStyle(font_color="#85C1E9", padding=True).print(
+            f"{sub.agent_name} finished ({progress})"
+        )
+        self.log.update(progress=progress)
+        self.log.stream(content=f"{sub.agent_name}: {result}\n\n")
+        self.agent.context.log.set_progress(progress)
+
+
+def _get_limit(context: AgentContext) -> asyncio.Semaphore:
+    """Concurrency limit of the context's subordinates in the running loop."""
+    loop = asyncio.get_running_loop()
+    entry = _limits.get(context)
+    if entry is None or entry[0] is not loop:
+        entry = _limits[context] = (loop, asyncio.Semaphore(MAX_PARALLEL_SUBORDINATES))
+    return entry[1]
+
+
+def _parse_limits(quorum, timeout) -> tuple[int | None, float | None]:
+    """Quorum and timeout as given by the model, None when not set.
+
+    Raises ValueError with a message for the model if one is invalid.
+    """
+    try:
+        quorum = int(quorum) if quorum else None
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"quorum must be a number of subordinates, got {quorum!r}"
+        ) from None
+    try:
+        timeout = float(timeout) if timeout else None
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"timeout must be a number of seconds, got {timeout!r}"
+        ) from None
+    if quorum is not None and quorum < 0:
+        raise ValueError(f"quorum must not be negative, got {quorum}")
+    if timeout is not None and not timeout >= 0:  # also nan
+        raise ValueError(f"timeout must not be negative, got {timeout}")
+    return quorum or None, timeout or None
+
+
+def _as_list(messages) -> list[str]:
+    if isinstance(messages, str):
+        try:
+            messages = json.loads(messages)
+        except json.JSONDecodeError:
+            return [messages]
+    if isinstance(messages, list):
+        return [str(message) for message in messages if str(message).strip()]
+    return [str(messages)]
@@ -10,7 +10,7 @@ from framework.helpers.execution_mode import (
     get_execution_info,
     should_use_ssh_execution,
 )
-from framework.helpers.messages import truncate_text
+from framework.helpers.messages import TruncatedOutput
 from framework.helpers.print_style import PrintStyle
 from framework.helpers.shell_local import LocalInteractiveSession
 from framework.helpers.shell_ssh import SSHInteractiveSession
@@ -100,10 +100,11 @@ class CodeExecution(Tool):
     async def prepare_state(self, reset=False, session=None):
         self.state = self.agent.get_data("_cet_state")
         if not self.state or reset:
-            # Initialize secure execution manager if available
-            secure_manager = None
+            # Initialize secure execution manager if available, once per
+            # agent: a reset closes the sessions of this agent through it
+            secure_manager = self.state.secure_manager if self.state else None
             secure_sessions = {}
-            if SECURE_EXECUTION_AVAILABLE:
+            if not self.state and SECURE_EXECUTION_AVAILABLE:
                 try:
                     secure_manager = SecureCodeExecutionManager()
                     PrintStyle(font_color="#85C1E9").print(
@@ -214,6 +215,11 @@ class CodeExecution(Tool):
         if self.state.secure_manager:
             if self.state.secure_manager.is_secure_execution_available():
                 return await self._execute_secure_python(session, code, reset)
+            elif (
+                self.state.secure_manager.is_kernel_available()
+                and self._is_local_session(session)
+            ):
+                return await self._execute_kernel_python(session, code, reset)
             else:
                 PrintStyle.warning(
                     "🔄 Secure execution not available, falling back to terminal execution"
@@ -302,6 +308,85 @@ class CodeExecution(Tool):
             PrintStyle.error(error_msg)
             return error_msg
 
+    async def _execute_kernel_python(
+        self,
+        session: int,
+        code: str,
+        reset: bool = False,
+        max_exec_timeout=180,  # hard cap on total runtime
+        log_interval=0.5,  # min seconds between log updates of truncated output
+    ):
+        """Execute Python code in the session's persistent local kernel."""
+        manager = self.state.secure_manager
+        kernel_session_id = await self._get_or_create_secure_session(session, reset)
+
+        PrintStyle(background_color="white", font_color="#1B4F72", bold=True).print(
+            f"{self.agent.agent_name} code execution output"
+        )
+
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue[str] = asyncio.Queue()
+        # the kernel interrupts the snippet at the timeout and is killed
+        # when it does not stop, so the run always ends
+        run = asyncio.ensure_future(
+            asyncio.to_thread(
+                manager.execute_code,
+                kernel_session_id,
+                code,
+                "python",
+                on_output=lambda text: loop.call_soon_threadsafe(
+                    chunks.put_nowait, text
+                ),
+                timeout=max_exec_timeout,
+            )
+        )
+
+        output = TruncatedOutput(self.agent, threshold=10000)
+        start_time = time.time()
+        last_log_time = 0.0
+        try:
+            while not (run.done() and chunks.empty()):
+                try:
+                    text = await asyncio.wait_for(chunks.get(), timeout=0.5)
+                except TimeoutError:
+                    text = ""
+                if text:
+                    PrintStyle(font_color="#85C1E9").stream(text)
+                    output.append(text)
+                    now = time.time()
+                    if not output.is_truncated():
+                        self.log.stream(content=text)
+                    elif now - last_log_time > log_interval:
+                        self.log.update(content=output.text())
+                        last_log_time = now
+                await self.agent.handle_intervention()
+        except BaseException:
+            # intervention or cancellation, do not leave the snippet running
+            manager.interrupt(kernel_session_id)
+            raise
+        result = await run
+
+        response = output.text()
+        if time.time() - start_time >= max_exec_timeout:
+            sysinfo = self.agent.read_prompt(
+                "fw.code.max_time.md", timeout=max_exec_timeout
+            )
+            error = result.get("error")
+            if not result["success"] and error and error not in response:
+                sysinfo += f"\n{error}"  # the kernel was killed
+            PrintStyle.warning(sysinfo)
+            response += "\n\n" + self.agent.read_prompt("fw.code.info.md", info=sysinfo)
+        elif not result["success"] and not response:
+            response = f"❌ Execution failed: {result.get('error', 'Unknown error')}"
+            PrintStyle.error(response)
+        self.log.update(content=response)
+        return response
+
+    def _is_local_session(self, session: int) -> bool:
+        # kernels run on this host, sessions over SSH run Python remotely
+        shell = self.state.shells.get(session, self.state.shells.get(0))
+        return not isinstance(shell, SSHInteractiveSession)
+
     async def _execute_secure_nodejs(
         self, session: int, code: str, reset: bool = False
     ):
@@ -558,6 +643,7 @@ class CodeExecution(Tool):
         between_output_timeout=15,  # Wait up to x seconds between outputs
         max_exec_timeout=180,  # hard cap on total runtime
         sleep_time=0.1,
+        log_interval=0.5,  # min seconds between log updates of truncated output
     ):
         # Common shell prompt regex patterns (add more as needed)
         prompt_patterns = [
@@ -568,8 +654,8 @@ class CodeExecution(Tool):
 
         start_time = time.time()
         last_output_time = start_time
-        full_output = ""
-        truncated_output = ""
+        last_log_time = 0.0
+        output = TruncatedOutput(self.agent, threshold=10000)
         got_output = False
 
         # Ensure the requested session exists
@@ -580,7 +666,7 @@ class CodeExecution(Tool):
 
         while True:
             await asyncio.sleep(sleep_time)
-            full_output, partial_output = await shell.read_output(
+            _, partial_output = await shell.read_output(
                 timeout=3, reset_full_output=reset_full_output
             )
             reset_full_output = False  # only reset once
@@ -590,25 +676,26 @@ class CodeExecution(Tool):
             now = time.time()
             if partial_output:
                 PrintStyle(font_color="#85C1E9").stream(partial_output)
-                # full_output += partial_output # Append new output
-                truncated_output = truncate_text(
-                    agent=self.agent, output=full_output, threshold=10000
-                )
-                self.log.update(content=truncated_output)
+                output.append(partial_output)
+                if got_output and not output.is_truncated():
+                    # short output, the log only needs the new text
+                    self.log.stream(content=partial_output)
+                elif not got_output or now - last_log_time > log_interval:
+                    self.log.update(content=output.text())
+                    last_log_time = now
                 last_output_time = now
                 got_output = True
 
                 # Check for shell prompt at the end of output
-                last_lines = (
-                    truncated_output.splitlines()[-3:] if truncated_output else []
-                )
-                for line in last_lines:
+                for line in output.last_lines(3):
                     for pat in prompt_patterns:
                         if pat.search(line.strip()):
                             PrintStyle.info(
                                 "Detected shell prompt, returning output early."
                             )
-                            return truncated_output
+                            if output.is_truncated():
+                                self.log.update(content=output.text())
+                            return output.text()
 
             # Check for max execution time
             if now - start_time > max_exec_timeout:
@@ -616,8 +703,8 @@ class CodeExecution(Tool):
                     "fw.code.max_time.md", timeout=max_exec_timeout
                 )
                 response = self.agent.read_prompt("fw.code.info.md", info=sysinfo)
-                if truncated_output:
-                    response = truncated_output + "\n\n" + response
+                if output.length:
+                    response = output.text() + "\n\n" + response
                 PrintStyle.warning(sysinfo)
                 self.log.update(content=response)
                 return response
@@ -639,8 +726,8 @@ class CodeExecution(Tool):
                         "fw.code.pause_time.md", timeout=between_output_timeout
                     )
                     response = self.agent.read_prompt("fw.code.info.md", info=sysinfo)
-                    if truncated_output:
-                        response = truncated_output + "\n\n" + response
+                    if output.length:
+                        response = output.text() + "\n\n" + response
                     PrintStyle.warning(sysinfo)
                     self.log.update(content=response)
                     return response
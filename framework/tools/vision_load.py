@@ -1,7 +1,8 @@
+import asyncio
 import base64
 from mimetypes import guess_type
 
-from framework.helpers import files, history, images, runtime
+from framework.helpers import blobs, files, history, images, runtime
 from framework.helpers.print_style import PrintStyle
 from framework.helpers.tool import Response, Tool
 
@@ -9,6 +10,7 @@ from framework.helpers.tool import Response, Tool
 MAX_PIXELS = 768_000
 QUALITY = 75
 TOKENS_ESTIMATE = 1500
+MAX_CONCURRENCY = 4  # images loaded at the same time
 
 
 class VisionLoad(Tool):
@@ -17,42 +19,58 @@ class VisionLoad(Tool):
             paths = []
         self.images_dict = {}
 
-        for path in paths:
-            if not await runtime.call_development_function(files.exists, str(path)):
-                continue
+        # images are loaded concurrently, compression runs on a worker pool
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
 
-            if path not in self.images_dict:
-                mime_type, _ = guess_type(str(path))
-                if mime_type and mime_type.startswith("image/"):
-                    try:
-                        # Read binary file
-                        file_content = await runtime.call_development_function(
-                            files.read_file_base64, str(path)
-                        )
-                        file_content = base64.b64decode(file_content)
-                        # Compress and convert to JPEG
-                        compressed = images.compress_image(
-                            file_content, max_pixels=MAX_PIXELS, quality=QUALITY
-                        )
-                        # Encode as base64
-                        file_content_b64 = base64.b64encode(compressed).decode("utf-8")
+        async def load(path: str):
+            async with semaphore:
+                return await self._load_image(path)
 
-                        # DEBUG: Save compressed image
-                        # await runtime.call_development_function(
-                        #     files.write_file_base64, str(path), file_content_b64
-                        # )
-
-                        # Construct the data URL (always JPEG after compression)
-                        self.images_dict[path] = file_content_b64
-                    except Exception as e:
-                        self.images_dict[path] = None
-                        PrintStyle().error(f"Error processing image {path}: {e}")
-                        self.agent.context.log.log(
-                            "warning", f"Error processing image {path}: {e}"
-                        )
+        unique = list(dict.fromkeys(paths))
+        results = await asyncio.gather(*(load(path) for path in unique))
+        for path, (loaded, image) in zip(unique, results, strict=True):
+            if loaded:
+                self.images_dict[path] = image
 
         return Response(message="dummy", break_loop=False)
 
+    async def _load_image(self, path: str) -> tuple[bool, dict | None]:
+        """(is image, blob reference or None on error) for one path."""
+        mime_type, _ = guess_type(str(path))
+        if not mime_type or not mime_type.startswith("image/"):
+            return False, None
+        if not await runtime.call_development_function(files.exists, str(path)):
+            return False, None
+
+        try:
+            # Compress and convert to JPEG where the file lives, cached by
+            # path, mtime, size and settings
+            if runtime.is_development():
+                # RFC transfers text, but only the compressed image
+                compressed = base64.b64decode(
+                    await runtime.call_development_function(
+                        images.compress_image_file_base64,
+                        str(path),
+                        max_pixels=MAX_PIXELS,
+                        quality=QUALITY,
+                    )
+                )
+            else:
+                compressed = await images.compress_image_file_async(
+                    str(path), max_pixels=MAX_PIXELS, quality=QUALITY
+                )
+            # Store once, history keeps only the reference
+            # (always JPEG after compression)
+            return True, await asyncio.to_thread(
+                blobs.put, compressed, mime_type="image/jpeg"
+            )
+        except Exception as e:
+            PrintStyle().error(f"Error processing image {path}: {e}")
+            self.agent.context.log.log(
+                "warning", f"Error processing image {path}: {e}"
+            )
+            return True, None
+
     async def after_execution(self, response: Response, **kwargs):
         # build image data messages for LLMs, or error message
         content = []
@@ -62,7 +80,8 @@ class VisionLoad(Tool):
                     content.append(
                         {
                             "type": "image_url",
-                            "image_url": {"url": f"data:image/jpeg;base64,{image}"},
+                            # materialized to a data URL in history.output_langchain
+                            "image_url": {"url": image},
                         }
                     )
                 else:
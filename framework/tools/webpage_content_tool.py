@@ -1,9 +1,11 @@
+import asyncio
 from urllib.parse import urlparse
 
-import requests
+import aiohttp
 from bs4 import BeautifulSoup
 from newspaper import Article
 
+from framework.helpers import http_client
 from framework.helpers.errors import handle_error
 from framework.helpers.tool import Response, Tool
 
@@ -19,30 +21,36 @@ class WebpageContentTool(Tool):
             if not all([parsed_url.scheme, parsed_url.netloc]):
                 return Response(message="Error: Invalid URL format.", break_loop=False)
 
-            # Fetch webpage content
-            response = requests.get(url, timeout=10)
+            # Fetch webpage content once, through the shared pooled client
+            response = await http_client.fetch(url, timeout=10)
             response.raise_for_status()
 
-            # Use newspaper3k for article extraction
-            article = Article(url)
-            article.download()
-            article.parse()
-
-            # If it's not an article, fall back to BeautifulSoup
-            if not article.text:
-                soup = BeautifulSoup(response.content, "html.parser")
-                text_content = " ".join(soup.stripped_strings)
-            else:
-                text_content = article.text
+            # Parsing is CPU bound, keep it off the event loop
+            text_content = await asyncio.to_thread(
+                extract_text, url, response.text(), response.content
+            )
 
             return Response(
                 message=f"Webpage content:\n\n{text_content}", break_loop=False
             )
 
-        except requests.RequestException as e:
+        except (aiohttp.ClientError, TimeoutError, http_client.HTTPError) as e:
             return Response(
                 message=f"Error fetching webpage: {str(e)}", break_loop=False
             )
         except Exception as e:
             handle_error(e)
             return Response(message=f"An error occurred: {str(e)}", break_loop=False)
+
+
+def extract_text(url: str, html: str, content: bytes) -> str:
+    # Use newspaper3k for article extraction, on the already downloaded page
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+
+    # If it's not an article, fall back to BeautifulSoup
+    if not article.text:
+        soup = BeautifulSoup(content, "html.parser")
+        return " ".join(soup.stripped_strings)
+    return article.text
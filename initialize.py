@@ -21,7 +21,7 @@ logger = logging.getLogger(__name__)
 
 
 def initialize_agent():
-    current_settings = get_settings()
+    current_settings = get_settings().copy()
 
     # Merge with defaults to ensure all required keys exist
     for key, value in DEFAULT_SETTINGS.items():
@@ -137,7 +137,7 @@ def initialize_mcp() -> DeferredTask:
     """Initialize MCP servers in a deferred task."""
 
     async def deferred_initialize_mcp_async():
-        current_settings = get_settings()
+        current_settings = get_settings().copy()
 
         # Merge with defaults to ensure all required keys exist
         for key, value in DEFAULT_SETTINGS.items():
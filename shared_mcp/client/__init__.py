@@ -40,7 +40,7 @@ from mcp.shared.message import SessionMessage
 from mcp.types import CallToolResult, ListToolsResult
 from pydantic import BaseModel, Discriminator, Field, PrivateAttr, Tag
 
-from ..types import MCPServerRemoteConfig, MCPServerLocalConfig
+from .session_pool import MCPSessionPool
 
 
 def normalize_name(name: str) -> str:
@@ -96,7 +96,7 @@ class MCPServerRemote(BaseModel):
     """Remote SSE MCP Server"""
 
     name: str = Field(default_factory=str)
-    description: Optional[str] = Field(default="Remote SSE Server")
+    description: str | None = Field(default="Remote SSE Server")
     url: str = Field(default_factory=str)
     headers: dict[str, Any] | None = Field(default_factory=dict[str, Any])
     init_timeout: int = Field(default=0)
@@ -129,12 +129,24 @@ class MCPServerRemote(BaseModel):
         with self.__lock:
             return self.__client.has_tool(tool_name)  # type: ignore
 
+    def get_pool_stats(self) -> dict[str, Any]:
+        """Get statistics of the persistent session pool"""
+        with self.__lock:
+            return self.__client.pool.get_stats()  # type: ignore
+
+    def close(self):
+        """Close all pooled sessions of this server"""
+        with self.__lock:
+            self.__client.pool.close()  # type: ignore
+
     async def call_tool(
         self, tool_name: str, input_data: dict[str, Any]
     ) -> CallToolResult:
         """Call a tool with the given input data"""
+        # do not hold the lock across the await, pooled sessions multiplex calls
         with self.__lock:
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        return await client.call_tool(tool_name, input_data)  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerRemote":
         with self.__lock:
@@ -154,6 +166,8 @@ class MCPServerRemote(BaseModel):
                     if key == "serverUrl":
                         key = "url"  # remap serverUrl to url
                     setattr(self, key, value)
+            # settings changed, sessions opened with the old ones are stale
+            self.__client.pool.close()  # type: ignore
             return asyncio.run(self.__on_update())
 
     async def __on_update(self) -> "MCPServerRemote":
@@ -165,7 +179,7 @@ class MCPServerLocal(BaseModel):
     """Local StdIO MCP Server"""
 
     name: str = Field(default_factory=str)
-    description: Optional[str] = Field(default="Local StdIO Server")
+    description: str | None = Field(default="Local StdIO Server")
     command: str = Field(default_factory=str)
     args: list[str] = Field(default_factory=list)
     env: dict[str, str] | None = Field(default_factory=dict[str, str])
@@ -203,12 +217,24 @@ class MCPServerLocal(BaseModel):
         with self.__lock:
             return self.__client.has_tool(tool_name)  # type: ignore
 
+    def get_pool_stats(self) -> dict[str, Any]:
+        """Get statistics of the persistent session pool"""
+        with self.__lock:
+            return self.__client.pool.get_stats()  # type: ignore
+
+    def close(self):
+        """Close all pooled sessions of this server"""
+        with self.__lock:
+            self.__client.pool.close()  # type: ignore
+
     async def call_tool(
         self, tool_name: str, input_data: dict[str, Any]
     ) -> CallToolResult:
         """Call a tool with the given input data"""
+        # do not hold the lock across the await, pooled sessions multiplex calls
         with self.__lock:
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        return await client.call_tool(tool_name, input_data)  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerLocal":
         with self.__lock:
@@ -228,6 +254,8 @@ class MCPServerLocal(BaseModel):
                     if key == "name":
                         value = normalize_name(value)
                     setattr(self, key, value)
+            # settings changed, sessions opened with the old ones are stale
+            self.__client.pool.close()  # type: ignore
             return asyncio.run(self.__on_update())
 
     async def __on_update(self) -> "MCPServerLocal":
@@ -265,6 +293,8 @@ class MCPConfig(BaseModel):
     async def update_from_configs(self, configs: list[dict[str, Any]]):
         """Update configuration from a list of server configs"""
         with self.__lock:
+            for server in self.servers:
+                server.close()
             self.servers = []
             self.disconnected_servers = []
 
@@ -302,6 +332,7 @@ class MCPConfig(BaseModel):
                 connected = True
                 error = server.get_error()
                 has_log = server.get_log() != ""
+                pool = server.get_pool_stats()
 
                 result.append(
                     {
@@ -310,6 +341,7 @@ class MCPConfig(BaseModel):
                         "error": error,
                         "tool_count": tool_count,
                         "has_log": has_log,
+                        "pool": pool,
                     }
                 )
 
@@ -322,6 +354,7 @@ class MCPConfig(BaseModel):
                         "error": disconnected["error"],
                         "tool_count": 0,
                         "has_log": False,
+                        "pool": None,
                     }
                 )
 
@@ -400,10 +433,14 @@ class MCPConfig(BaseModel):
             raise ValueError(f"Tool {tool_name} not found")
         server_name_part, tool_name_part = tool_name.split(".", 1)
         with self.__lock:
+            target = None
             for server in self.servers:
                 if server.name == server_name_part and server.has_tool(tool_name_part):
-                    return await server.call_tool(tool_name_part, input_data)
+                    target = server
+                    break
+        if target is None:
             raise ValueError(f"Tool {tool_name} not found")
+        return await target.call_tool(tool_name_part, input_data)
 
 
 class MCPClientBase(ABC):
@@ -416,7 +453,8 @@ class MCPClientBase(ABC):
         self.tools: list[dict[str, Any]] = []
         self.error: str = ""
         self.log: list[str] = []
-        self.log_file: Optional[TextIO] = None
+        self.log_file: TextIO | None = None
+        self.pool = MCPSessionPool(self)
 
     @abstractmethod
     async def _create_stdio_transport(
@@ -432,21 +470,19 @@ class MCPClientBase(ABC):
         self,
         coro_func: Callable[[ClientSession], Awaitable[T]],
         read_timeout_seconds=60,
+        retry: bool = False,
     ) -> T:
-        """Manages the lifecycle of an MCP session for a single operation."""
+        """Run an operation on a persistent session from the server's pool.
+
+        Set retry only for read-only operations, see MCPSessionPool.execute.
+        """
         try:
-            async with AsyncExitStack() as temp_stack:
-                stdio, write = await self._create_stdio_transport(temp_stack)
-                session = await temp_stack.enter_async_context(
-                    ClientSession(
-                        stdio,  # type: ignore
-                        write,  # type: ignore
-                        read_timeout_seconds=timedelta(seconds=read_timeout_seconds),
-                    )
-                )
-                await session.initialize()
-                result = await coro_func(session)
-                return result
+            return await self.pool.execute(
+                coro_func,
+                read_timeout_seconds=read_timeout_seconds,
+                init_timeout=self.server.init_timeout or 30,
+                retry=retry,
+            )
         except Exception as e:
             raise e from None
 
@@ -466,7 +502,9 @@ class MCPClientBase(ABC):
                 ]
 
         try:
-            await self._execute_with_session(list_tools_op, read_timeout_seconds=30)
+            await self._execute_with_session(
+                list_tools_op, read_timeout_seconds=30, retry=True
+            )
         except Exception as e:
             with self.__lock:
                 self.tools = []
@@ -0,0 +1,390 @@
+"""
+MCP Session Pool
+================
+
+Long-lived, bounded pools of initialized MCP client sessions.
+
+Opening a stdio transport spawns the server process and runs the MCP
+handshake, so doing it per tool call is expensive. A pool keeps a small
+number of sessions open per server and multiplexes concurrent requests over
+them (MCP is JSON-RPC, so a single session can carry many in-flight requests).
+
+The pool size bounds the sessions of all event loops together; sessions are
+still bound to the event loop that created them. The anyio transports
+used by ``mcp`` must be entered and exited from the same task, so every
+session is owned by a dedicated task which opens the transport, waits until
+it is asked to close and then tears everything down in order.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import anyio
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+
+if TYPE_CHECKING:
+    from . import MCPClientBase
+
+
+T = TypeVar("T")
+
+# errors that mean the transport underneath a session is gone
+TRANSPORT_ERRORS: tuple[type[BaseException], ...] = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+    BrokenPipeError,
+    EOFError,
+)
+
+
+class PooledSession:
+    """A single initialized MCP session owned by a background task"""
+
+    def __init__(self, client: "MCPClientBase", read_timeout_seconds: int):
+        self.client = client
+        self.read_timeout_seconds = read_timeout_seconds
+        self.session: ClientSession | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.error: BaseException | None = None
+        self.in_flight = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        self._ready: asyncio.Event | None = None
+        self._closing: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def alive(self) -> bool:
+        """Whether the session is open and its transport task still running"""
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+            and self.loop is not None
+            and not self.loop.is_closed()
+        )
+
+    def belongs_to_current_loop(self) -> bool:
+        try:
+            return self.loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    async def open(self, timeout: float) -> "PooledSession":
+        """Start the owner task and wait for the handshake to finish"""
+        self.loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout or None)
+        except TimeoutError:
+            self.close()
+            raise TimeoutError(f"MCP session initialization timed out after {timeout}s") from None
+        if self.error is not None:
+            raise self.error
+        return self
+
+    async def _run(self):
+        try:
+            async with AsyncExitStack() as stack:
+                read, write = await self.client._create_stdio_transport(stack)
+                session = await stack.enter_async_context(
+                    ClientSession(
+                        read,  # type: ignore
+                        write,  # type: ignore
+                        read_timeout_seconds=timedelta(seconds=self.read_timeout_seconds),
+                    )
+                )
+                await session.initialize()
+                self.session = session
+                self._ready.set()  # type: ignore
+                await self._closing.wait()  # type: ignore
+        except asyncio.CancelledError:
+            pass
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()  # type: ignore
+
+    async def ping(self, timeout: float) -> bool:
+        """Cheap liveness probe for sessions that have been idle for a while"""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)  # type: ignore
+            self.last_checked = time.monotonic()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        """Ask the owner task to shut the transport down (thread-safe)"""
+        if self._closing is None or self.loop is None or self.loop.is_closed():
+            return
+        if self.belongs_to_current_loop():
+            self._closing.set()
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self._closing.set)
+            except RuntimeError:
+                pass  # loop closed in the meantime
+
+
+class MCPSessionPool:
+    """Bounded pool of persistent sessions for one MCP server"""
+
+    def __init__(
+        self,
+        client: "MCPClientBase",
+        max_size: int = 2,
+        max_concurrent_per_session: int = 8,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+    ):
+        self.client = client
+        self.max_size = max(1, max_size)
+        self.max_concurrent_per_session = max(1, max_concurrent_per_session)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._sessions: list[PooledSession] = []
+        self._opening = 0  # sessions being opened, counted against max_size
+        self._lock = threading.Lock()
+        self._open_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._reapers: dict[int, asyncio.Task] = {}
+        self._stats = {
+            "requests": 0,
+            "failures": 0,
+            "created": 0,
+            "reconnects": 0,
+            "evicted": 0,
+        }
+
+    async def execute(
+        self,
+        coro_func: Callable[[ClientSession], Awaitable[T]],
+        read_timeout_seconds: int = 60,
+        init_timeout: float = 30,
+        retry: bool = False,
+    ) -> T:
+        """Run an operation on a pooled session
+
+        A session whose transport dies is discarded. The operation only runs
+        again on a new session with retry set, for read-only operations like
+        list_tools: once the request went out the server may have acted on it,
+        and a tool call must not run twice. A transport that fails while the
+        session is opened is retried either way, nothing was sent yet.
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+        for attempt in range(2):
+            try:
+                pooled = await self._acquire(read_timeout_seconds, init_timeout)
+            except TRANSPORT_ERRORS:
+                with self._lock:
+                    self._stats["reconnects" if attempt == 0 else "failures"] += 1
+                if attempt == 0:
+                    continue
+                raise
+            try:
+                return await coro_func(pooled.session)  # type: ignore
+            except McpError:
+                # protocol level error reported by the server, session is usually fine
+                if not pooled.alive:
+                    self._discard(pooled)
+                with self._lock:
+                    self._stats["failures"] += 1
+                raise
+            except Exception as e:
+                transport_dead = isinstance(e, TRANSPORT_ERRORS) or not pooled.alive
+                if transport_dead:
+                    self._discard(pooled)
+                if transport_dead and retry and attempt == 0:
+                    with self._lock:
+                        self._stats["reconnects"] += 1
+                    continue
+                with self._lock:
+                    self._stats["failures"] += 1
+                raise
+            finally:
+                self._release(pooled)
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    async def _acquire(self, read_timeout_seconds: int, init_timeout: float) -> PooledSession:
+        self._evict()
+        pooled = self._pick()
+        if pooled is not None and not await self._healthy(pooled):
+            self._discard(pooled)
+            with self._lock:
+                self._stats["reconnects"] += 1
+            pooled = None
+
+        if pooled is None or pooled.in_flight >= self.max_concurrent_per_session:
+            # serialize spawning per loop so a burst of calls does not fork N servers
+            async with self._open_lock():
+                pooled = await self._pick_or_open(read_timeout_seconds, init_timeout)
+
+        pooled.in_flight += 1
+        pooled.last_used = time.monotonic()
+        return pooled
+
+    async def _pick_or_open(self, read_timeout_seconds: int, init_timeout: float) -> PooledSession:
+        """Least loaded session of the running loop, or a new one if room is left
+
+        max_size bounds the sessions of all loops together. Without room, a
+        saturated session takes more requests, and a loop without a session
+        waits until another loop's session is idle or gone.
+        """
+        deadline = time.monotonic() + init_timeout if init_timeout else None
+        while True:
+            candidate = self._pick()
+            if candidate is not None and candidate.in_flight < self.max_concurrent_per_session:
+                return candidate
+            if self._reserve():
+                break
+            if candidate is not None:
+                return candidate
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"No MCP session available, all {self.max_size} are in use")
+            await asyncio.sleep(0.05)
+
+        try:
+            pooled = await PooledSession(self.client, read_timeout_seconds).open(init_timeout)
+        finally:
+            with self._lock:
+                self._opening -= 1
+        with self._lock:
+            self._sessions.append(pooled)
+            self._stats["created"] += 1
+        self._ensure_reaper()
+        return pooled
+
+    def _reserve(self) -> bool:
+        """Reserve room for a new session, closing an idle one of another loop"""
+        with self._lock:
+            live = [s for s in self._sessions if s.alive]
+            if len(live) + self._opening >= self.max_size:
+                idle = [s for s in live if s.in_flight == 0 and not s.belongs_to_current_loop()]
+                if not idle:
+                    return False
+                victim = min(idle, key=lambda s: s.last_used)
+                self._sessions.remove(victim)
+                self._stats["evicted"] += 1
+            else:
+                victim = None
+            self._opening += 1
+        if victim is not None:
+            victim.close()
+        return True
+
+    def _release(self, pooled: PooledSession):
+        pooled.in_flight = max(0, pooled.in_flight - 1)
+        pooled.last_used = time.monotonic()
+
+    def _pick(self) -> PooledSession | None:
+        """Least loaded live session of the running loop"""
+        with self._lock:
+            candidates = [s for s in self._sessions if s.alive and s.belongs_to_current_loop()]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda s: s.in_flight)
+
+    def _count_current_loop(self) -> int:
+        with self._lock:
+            return sum(1 for s in self._sessions if s.alive and s.belongs_to_current_loop())
+
+    async def _healthy(self, pooled: PooledSession) -> bool:
+        if not pooled.alive:
+            return False
+        if pooled.in_flight > 0:
+            return True  # busy sessions prove themselves
+        if time.monotonic() - pooled.last_checked < self.health_check_interval:
+            return True
+        return await pooled.ping(timeout=5)
+
+    def _discard(self, pooled: PooledSession):
+        with self._lock:
+            if pooled in self._sessions:
+                self._sessions.remove(pooled)
+        pooled.close()
+
+    def _evict(self):
+        """Drop dead sessions and close sessions idle longer than idle_timeout"""
+        now = time.monotonic()
+        with self._lock:
+            keep, drop = [], []
+            for s in self._sessions:
+                idle = s.in_flight == 0 and now - s.last_used > self.idle_timeout
+                dead = s._task is not None and s._task.done()
+                if idle or dead or s.loop is None or s.loop.is_closed():
+                    drop.append(s)
+                else:
+                    keep.append(s)
+            self._sessions = keep
+            self._stats["evicted"] += len(drop)
+        for s in drop:
+            s.close()
+
+    def _open_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._open_locks.get(loop)
+            if lock is None:
+                lock = self._open_locks[loop] = asyncio.Lock()
+            return lock
+
+    def _ensure_reaper(self):
+        """Background task per loop closing idle sessions while nobody calls us"""
+        if not self.idle_timeout:
+            return
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._reapers.get(id(loop))
+            if task is not None and not task.done():
+                return
+            self._reapers = {k: t for k, t in self._reapers.items() if not t.done()}
+            self._reapers[id(loop)] = loop.create_task(self._reap())
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 2))
+            self._evict()
+            if self._count_current_loop() == 0:
+                return
+
+    def close(self):
+        """Close all sessions in all loops"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            reapers, self._reapers = self._reapers, {}
+        for s in sessions:
+            s.close()
+        for task in reapers.values():
+            loop = task.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(task.cancel)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Pool statistics for status reporting"""
+        with self._lock:
+            live = [s for s in self._sessions if s.alive]
+            return {
+                "size": len(live),
+                "max_size": self.max_size,
+                "in_flight": sum(s.in_flight for s in live),
+                "idle_timeout": self.idle_timeout,
+                **self._stats,
+            }
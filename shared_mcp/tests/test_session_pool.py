@@ -0,0 +1,205 @@
+"""
+Tests for the persistent MCP session pool
+========================================
+
+Sessions are served by an in-memory low level MCP server, so no process is spawned.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+try:
+    import anyio
+    from mcp import types
+    from mcp.server.lowlevel import Server
+    from mcp.shared.memory import create_client_server_memory_streams
+
+    from shared_mcp.client.session_pool import MCPSessionPool
+
+    IMPORTS_OK = True
+except ImportError as e:
+    IMPORTS_OK = False
+    IMPORT_ERROR = str(e)
+
+
+class InMemoryClient:
+    """Stands in for MCPClientBase, serving every transport from an in-memory server"""
+
+    def __init__(self):
+        self.transports_opened = 0
+        self.server = Server("pool-test")
+
+        @self.server.list_tools()
+        async def list_tools():
+            return [
+                types.Tool(
+                    name="echo", description="echo", inputSchema={"type": "object"}
+                )
+            ]
+
+        @self.server.call_tool()
+        async def call_tool(name, arguments):
+            await asyncio.sleep(arguments.get("delay", 0))
+            return [types.TextContent(type="text", text=arguments["text"])]
+
+    async def _create_stdio_transport(self, stack):
+        self.transports_opened += 1
+        client_streams, server_streams = await stack.enter_async_context(
+            create_client_server_memory_streams()
+        )
+        task_group = await stack.enter_async_context(anyio.create_task_group())
+        task_group.start_soon(
+            self.server.run,
+            server_streams[0],
+            server_streams[1],
+            self.server.create_initialization_options(),
+        )
+        stack.callback(task_group.cancel_scope.cancel)
+        return client_streams
+
+
+def echo(text: str, delay: float = 0):
+    async def op(session):
+        result = await session.call_tool("echo", {"text": text, "delay": delay})
+        return result.content[0].text
+
+    return op
+
+
+@pytest.mark.skipif(
+    not IMPORTS_OK, reason=f"Import failed: {IMPORT_ERROR if not IMPORTS_OK else ''}"
+)
+class TestMCPSessionPool:
+    """Test suite for MCPSessionPool"""
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_reused(self):
+        client = InMemoryClient()
+        pool = MCPSessionPool(client)  # type: ignore
+        for i in range(5):
+            assert await pool.execute(echo(str(i))) == str(i)
+
+        assert client.transports_opened == 1
+        stats = pool.get_stats()
+        assert stats["requests"] == 5
+        assert stats["created"] == 1
+        assert stats["size"] == 1
+        pool.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_are_multiplexed(self):
+        client = InMemoryClient()
+        pool = MCPSessionPool(client, max_size=2, max_concurrent_per_session=4)  # type: ignore
+        results = await asyncio.gather(
+            *[pool.execute(echo(str(i), delay=0.05)) for i in range(16)]
+        )
+
+        assert results == [str(i) for i in range(16)]
+        assert client.transports_opened <= 2
+        assert pool.get_stats()["in_flight"] == 0
+        pool.close()
+
+    @pytest.mark.asyncio
+    async def test_reconnects_after_transport_death(self):
+        client = InMemoryClient()
+        pool = MCPSessionPool(client)  # type: ignore
+        assert await pool.execute(echo("a")) == "a"
+
+        # kill the transport underneath the pooled session
+        for session in list(pool._sessions):
+            session.close()
+        await asyncio.sleep(0.05)
+
+        assert await pool.execute(echo("b")) == "b"
+        assert client.transports_opened == 2
+        pool.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_are_evicted(self):
+        client = InMemoryClient()
+        pool = MCPSessionPool(client, idle_timeout=0.01)  # type: ignore
+        await pool.execute(echo("a"))
+        await asyncio.sleep(0.05)
+
+        pool._evict()
+        stats = pool.get_stats()
+        assert stats["size"] == 0
+        assert stats["evicted"] == 1
+        pool.close()
+
+    @pytest.mark.asyncio
+    async def test_size_is_bounded_across_event_loops(self):
+        client = InMemoryClient()
+        pool = MCPSessionPool(client, max_size=1)  # type: ignore
+        other = asyncio.new_event_loop()
+        threading.Thread(target=other.run_forever, daemon=True).start()
+
+        def in_other_loop(op):
+            future = asyncio.run_coroutine_threadsafe(pool.execute(op), other)
+            return asyncio.wrap_future(future)
+
+        try:
+            assert await in_other_loop(echo("a")) == "a"
+            # the idle session of the other loop makes room
+            assert await pool.execute(echo("b")) == "b"
+            assert pool.get_stats()["size"] == 1
+            assert pool.get_stats()["evicted"] == 1
+
+            busy = in_other_loop(echo("c", delay=0.3))
+            await asyncio.sleep(0.1)
+            start = time.monotonic()
+            # waits until the other loop's session is idle again
+            assert await pool.execute(echo("d")) == "d"
+            assert time.monotonic() - start > 0.15
+            assert await busy == "c"
+            assert pool.get_stats()["size"] == 1
+            assert client.transports_opened == 4
+        finally:
+            pool.close()
+            other.call_soon_threadsafe(other.stop)
+
+    @pytest.mark.asyncio
+    async def test_operations_are_rerun_only_when_retry_is_set(self):
+        client = InMemoryClient()
+        pool = MCPSessionPool(client)  # type: ignore
+        calls = []
+
+        async def dies_once(session):
+            calls.append(session)
+            if len(calls) == 1:
+                raise anyio.BrokenResourceError()
+            return "ok"
+
+        # the request may have reached the server, a tool call is not repeated
+        with pytest.raises(anyio.BrokenResourceError):
+            await pool.execute(dies_once)
+        assert len(calls) == 1
+        assert pool.get_stats()["size"] == 0
+
+        calls.clear()
+        assert await pool.execute(dies_once, retry=True) == "ok"
+        assert len(calls) == 2
+        assert calls[0] is not calls[1]
+        pool.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_session_opening_is_retried(self):
+        client = InMemoryClient()
+        create = client._create_stdio_transport
+
+        async def fails_once(stack):
+            if client.transports_opened == 0:
+                client.transports_opened += 1
+                raise ConnectionError("server not ready")
+            return await create(stack)
+
+        client._create_stdio_transport = fails_once
+        pool = MCPSessionPool(client)  # type: ignore
+
+        assert await pool.execute(echo("a")) == "a"
+        assert client.transports_opened == 2
+        assert pool.get_stats()["reconnects"] == 1
+        pool.close()
@@ -49,6 +49,17 @@ except ImportError:
             return mock_result
 
 
+@pytest.fixture(scope="session", autouse=True)
+def print_style_log(tmp_path_factory):
+    """Write the PrintStyle HTML log under tmp_path instead of logs/."""
+    from framework.helpers.print_style import PrintStyle
+
+    previous = PrintStyle.log_file_path
+    PrintStyle.log_file_path = str(tmp_path_factory.mktemp("logs") / "log.html")
+    yield
+    PrintStyle.log_file_path = previous
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     loop = asyncio.new_event_loop()
@@ -0,0 +1,95 @@
+"""
+Benchmark for fetching web pages in WebpageContentTool.
+
+A local threaded HTTP server with a fixed delay stands in for remote sites.
+The old path downloads every URL twice with blocking requests (requests.get
+plus newspaper's own download), one after another; the new one downloads
+each URL once through the pooled async client, concurrently.
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from framework.helpers import http_client
+
+DELAY = 0.02  # seconds of simulated server latency
+PAGES = 20
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(DELAY)
+        body = f"<html><body><p>page {self.path}</p></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "max-age=60")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PageServer(ThreadingHTTPServer):
+    # the default backlog of 5 drops concurrent connects, which are then
+    # retried after a second
+    request_queue_size = 64
+
+
+@pytest.fixture
+def base_url():
+    server = PageServer(("127.0.0.1", 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def fetch_blocking_twice(urls: list[str]) -> list[bytes]:
+    pages = []
+    for url in urls:
+        pages.append(requests.get(url, timeout=10).content)
+        requests.get(url, timeout=10)  # second download by newspaper
+    return pages
+
+
+async def fetch_pooled(urls: list[str]) -> list[bytes]:
+    results = await asyncio.gather(*(http_client.fetch(url) for url in urls))
+    await http_client.close_session()
+    return [result.content for result in results]
+
+
+@pytest.mark.performance
+class TestHttpFetchBenchmark:
+    """Web page fetching benchmarks."""
+
+    def test_twenty_pages(self, base_url):
+        urls = [f"{base_url}/{i}" for i in range(PAGES)]
+        http_client.clear_cache()
+
+        start = time.perf_counter()
+        expected = fetch_blocking_twice(urls)
+        blocking_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = asyncio.run(fetch_pooled(urls))
+        pooled_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached = asyncio.run(fetch_pooled(urls))
+        cached_time = time.perf_counter() - start
+        http_client.clear_cache()
+
+        print(
+            f"\n{PAGES} pages: blocking twice {blocking_time * 1000:.1f} ms, "
+            f"pooled {pooled_time * 1000:.1f} ms, cached {cached_time * 1000:.1f} ms"
+        )
+        assert result == cached == expected
+        assert pooled_time < blocking_time
+        assert cached_time < pooled_time
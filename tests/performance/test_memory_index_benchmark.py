@@ -0,0 +1,87 @@
+"""
+Benchmark of approximate memory indexes against the flat index.
+
+Clustered random vectors stand in for document embeddings. Every index type
+answers the same single-vector queries the way memory recall does; recall@k
+is measured against the exact results of the flat inner product index.
+"""
+
+import time
+
+import faiss
+import numpy as np
+import pytest
+
+from framework.helpers.memory_index import AnnIndex, IndexConfig
+
+DIM = 128
+COUNT = 50_000
+CLUSTERS = 200
+QUERIES = 200
+K = 10
+
+
+def clustered_vectors(n: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.normal(size=(CLUSTERS, DIM))
+    x = centers[rng.integers(0, CLUSTERS, n)] + rng.normal(scale=0.6, size=(n, DIM))
+    x = x.astype(np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def search_all(search, queries: np.ndarray) -> tuple[np.ndarray, float]:
+    positions = []
+    start = time.perf_counter()
+    for query in queries:
+        positions.append(search(query[None, :])[1][0])
+    elapsed = time.perf_counter() - start
+    return np.array(positions), elapsed / len(queries) * 1000
+
+
+def recall(found: np.ndarray, exact: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, exact, strict=False))
+    return hits / exact.size
+
+
+@pytest.mark.performance
+class TestMemoryIndexBenchmark:
+    """Recall and latency of approximate memory indexes."""
+
+    @pytest.fixture(scope="class")
+    def data(self):
+        rng = np.random.default_rng(42)
+        vectors = clustered_vectors(COUNT + QUERIES, rng)
+        flat = faiss.IndexFlatIP(DIM)
+        flat.add(vectors[:COUNT])
+        return flat, vectors[COUNT:]
+
+    @pytest.mark.parametrize(
+        "index_type, min_recall", [("hnsw", 0.9), ("ivf_flat", 0.9), ("ivf_pq", 0.8)]
+    )
+    def test_recall_and_latency(self, data, index_type, min_recall):
+        flat, queries = data
+        threads = faiss.omp_get_max_threads()
+        faiss.omp_set_num_threads(1)  # one query at a time, like memory recall
+        try:
+            exact, flat_ms = search_all(lambda q: flat.search(q, K), queries)
+
+            ann = AnnIndex(flat, IndexConfig(type=index_type, promote_at=0))
+            start = time.perf_counter()
+            faiss.omp_set_num_threads(threads)
+            while ann.search(queries[:1], K) is None:
+                time.sleep(0.05)  # built in the background
+            build_s = time.perf_counter() - start
+            faiss.omp_set_num_threads(1)
+
+            found, ann_ms = search_all(lambda q: ann.search(q, K), queries)
+        finally:
+            faiss.omp_set_num_threads(threads)
+
+        result = recall(found, exact)
+        print(f"\n{index_type} over {COUNT} x {DIM} vectors:")
+        print(f"  flat:   {flat_ms:.3f} ms/query")
+        print(f"  {index_type}: {ann_ms:.3f} ms/query, recall@{K} {result:.3f}")
+        print(f"  build:  {build_s:.1f} s in the background")
+
+        assert result >= min_recall
+        assert ann_ms < flat_ms
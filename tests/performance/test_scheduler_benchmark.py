@@ -0,0 +1,126 @@
+"""
+Benchmark of the event-driven scheduler with 10k tasks.
+
+Most tasks are planned for the next hours, some run on cron schedules. The
+schedule queue is compared with the full scan of get_due_tasks() that a
+polling loop pays on every tick, and task lookups by UUID with the linear
+search they replace.
+"""
+
+import asyncio
+import random
+import time
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import task_management
+from framework.helpers.task_management import SchedulerTaskList
+from framework.helpers.task_models import (
+    PlannedTask,
+    ScheduledTask,
+    TaskPlan,
+    TaskSchedule,
+)
+
+COUNT = 10_000
+SCHEDULED = 500  # cron tasks, evaluating a cron expression is the slow part
+LOOKUPS = 10_000
+
+
+def make_tasks(rng: random.Random) -> list:
+    now = datetime.now(UTC)
+    tasks = []
+    for i in range(COUNT - SCHEDULED):
+        launch = now + timedelta(seconds=rng.uniform(60, 6 * 3600))
+        tasks.append(
+            PlannedTask.create(
+                name=f"planned {i}",
+                system_prompt="",
+                prompt="run",
+                plan=TaskPlan.create(todo=[launch]),
+                context_id=f"chat {i % 100}",
+            )
+        )
+    for i in range(SCHEDULED):
+        tasks.append(
+            ScheduledTask.create(
+                name=f"scheduled {i}",
+                system_prompt="",
+                prompt="run",
+                schedule=TaskSchedule(minute=str(i % 60), hour="*/2", timezone="UTC"),
+            )
+        )
+    rng.shuffle(tasks)
+    return tasks
+
+
+def timed(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+@pytest.mark.performance
+class TestSchedulerBenchmark:
+    """Tick, lookup and wake-up latency of the scheduler with 10k tasks."""
+
+    @pytest.fixture(scope="class")
+    def task_list(self, tmp_path_factory):
+        folder = str(tmp_path_factory.mktemp("scheduler"))
+        with patch.object(task_management, "SCHEDULER_FOLDER", folder):
+            task_list = SchedulerTaskList(tasks=make_tasks(random.Random(42)))
+            start = time.perf_counter()
+            task_list.get_task_by_uuid("")  # builds the index and the queue
+            print(f"\nindexed {COUNT} tasks in {time.perf_counter() - start:.2f}s")
+            yield task_list
+
+    def test_tick_does_not_scan_the_tasks(self, task_list):
+        scan_ms = timed(task_list.get_due_tasks)
+        tick_ms = timed(task_list.pop_due_tasks, repeat=100)
+        print(f"\nscan of due tasks {scan_ms:.1f}ms, queue tick {tick_ms:.4f}ms")
+        assert task_list.pop_due_tasks() == []
+        assert tick_ms * 100 < scan_ms
+
+    def test_lookup_by_uuid(self, task_list):
+        uuids = [task.uuid for task in task_list.tasks]
+        targets = random.Random(1).choices(uuids, k=LOOKUPS)
+
+        def scan():
+            for uuid in targets[:100]:
+                next(task for task in task_list.tasks if task.uuid == uuid)
+
+        def indexed():
+            for uuid in targets:
+                task_list.get_task_by_uuid(uuid)
+
+        scan_us = timed(scan) * 10
+        indexed_us = timed(indexed) * 1000 / LOOKUPS
+        print(f"\nlookup by scan {scan_us:.1f}us, indexed {indexed_us:.2f}us")
+        assert indexed_us * 20 < scan_us
+
+    def test_new_task_fires_on_time(self, task_list):
+        async def run() -> float:
+            task = PlannedTask.create(
+                name="soon",
+                system_prompt="",
+                prompt="run",
+                plan=TaskPlan.create(),
+            )
+            due_at = time.time() + 0.2
+            loop = asyncio.get_running_loop()
+            # added from another thread while the loop sleeps
+            task.plan.add_todo(datetime.fromtimestamp(due_at, UTC))
+            loop.call_later(
+                0.05, lambda: loop.run_in_executor(None, task_list.add_task, task)
+            )
+            while not (due := task_list.pop_due_tasks()):
+                await task_list.wait_until_due(30)
+            assert due == [task]
+            return time.time() - due_at
+
+        late = asyncio.run(run())
+        print(f"\nnew task fired {late * 1000:.1f}ms after its time")
+        assert 0 <= late < 0.1
@@ -0,0 +1,67 @@
+"""
+Benchmark for logging streamed agent responses.
+
+Streams a ~100 KB tool-call response in small chunks and compares the
+resumable parser against re-parsing the accumulated text on every chunk.
+"""
+
+import json
+import time
+
+import pytest
+
+from framework.helpers.dirty_json import DirtyJson, DirtyJsonStream
+
+CHUNK_SIZE = 16
+
+
+def make_tool_call(size: int = 100_000) -> str:
+    lines = []
+    i = 0
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(f"print('line {i}', {{'k': [{i}, \"v\"]}})")
+        i += 1
+    return json.dumps(
+        {
+            "thoughts": ["write a long script"],
+            "tool_name": "code_execution_tool",
+            "tool_args": {"runtime": "python", "code": "\n".join(lines)},
+        }
+    )
+
+
+@pytest.mark.performance
+class TestStreamParsingBenchmark:
+    """Streaming parser benchmarks."""
+
+    def test_incremental_parse_100kb(self):
+        text = make_tool_call()
+        chunks = [text[i : i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+
+        start = time.perf_counter()
+        parser = DirtyJsonStream()
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+        incremental = time.perf_counter() - start
+
+        assert parser.result == json.loads(text)
+
+        # re-parsing the accumulated text is quadratic, so only sample a prefix
+        # of the stream and extrapolate
+        sample = len(chunks) // 20
+        start = time.perf_counter()
+        full = ""
+        for chunk in chunks[:sample]:
+            full += chunk
+            DirtyJson.parse_string(full)
+        reparse_prefix = time.perf_counter() - start
+        reparse_estimate = reparse_prefix * (len(chunks) / sample) ** 2
+
+        print(
+            f"\n{len(text)} bytes in {len(chunks)} chunks: incremental "
+            f"{incremental * 1000:.1f} ms, full re-parse ~{reparse_estimate:.1f} s "
+            f"(measured {reparse_prefix * 1000:.1f} ms for the first {sample} chunks)"
+        )
+        assert incremental < reparse_prefix
+        assert incremental < 2.0
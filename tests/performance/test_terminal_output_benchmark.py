@@ -0,0 +1,75 @@
+"""
+Benchmark for collecting long terminal output in CodeExecution.
+
+Feeds the output of `yes | head -n 1000000` in read-sized chunks and compares
+re-truncating the accumulated output on every poll with the incremental
+TruncatedOutput window.
+"""
+
+import time
+
+import pytest
+
+from framework.helpers.log import Log
+from framework.helpers.messages import TruncatedOutput, truncate_text
+
+CHUNK_SIZE = 4096
+THRESHOLD = 10000
+
+
+class PromptAgent:
+    def read_prompt(self, file: str, **kwargs) -> str:
+        return f"<< {kwargs['length']} CHARACTERS REMOVED TO SAVE SPACE >>"
+
+
+def make_chunks(lines: int = 1_000_000) -> list[str]:
+    text = "y\n" * lines
+    return [text[i : i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+
+
+def full_retruncation(agent, chunks: list[str]) -> str:
+    log_item = Log().log(type="code_exe", content="")
+    full_output = ""
+    truncated = ""
+    for chunk in chunks:
+        full_output += chunk
+        truncated = truncate_text(agent, full_output, threshold=THRESHOLD)
+        log_item.update(content=truncated)
+        truncated.splitlines()[-3:]
+    return truncated
+
+
+def incremental(agent, chunks: list[str]) -> str:
+    log_item = Log().log(type="code_exe", content="")
+    output = TruncatedOutput(agent, threshold=THRESHOLD)
+    for chunk in chunks:
+        output.append(chunk)
+        if not output.is_truncated():
+            log_item.stream(content=chunk)
+        output.last_lines(3)
+    log_item.update(content=output.text())
+    return output.text()
+
+
+@pytest.mark.performance
+class TestTerminalOutputBenchmark:
+    """Terminal output collection benchmarks."""
+
+    def test_yes_one_million_lines(self):
+        agent = PromptAgent()
+        chunks = make_chunks()
+
+        start = time.perf_counter()
+        expected = full_retruncation(agent, chunks)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = incremental(agent, chunks)
+        incremental_time = time.perf_counter() - start
+
+        print(
+            f"\n{len(chunks)} chunks: full re-truncation {full_time * 1000:.1f} ms, "
+            f"incremental {incremental_time * 1000:.1f} ms"
+        )
+        assert result == expected
+        assert incremental_time < full_time
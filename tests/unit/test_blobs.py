@@ -0,0 +1,97 @@
+"""Unit tests for the content-addressed blob store and its use in history."""
+
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import blobs, history
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path):
+    blobs._load.cache_clear()
+    with (
+        patch.object(blobs, "BLOBS_FOLDER", str(tmp_path)),
+        patch("framework.helpers.tokens.approximate_tokens", return_value=1),
+    ):
+        yield tmp_path
+    blobs._load.cache_clear()
+
+
+def make_history() -> history.History:
+    return history.History(agent=SimpleNamespace())
+
+
+def test_identical_data_is_stored_once(store):
+    first = blobs.put(b"\xff\xd8 image", mime_type="image/jpeg")
+    second = blobs.put(b"\xff\xd8 image", mime_type="image/jpeg")
+
+    assert first == second
+    assert sum(len(names) for _, _, names in os.walk(store)) == 1
+    assert blobs.get(first) == b"\xff\xd8 image"
+    assert blobs.materialize({"url": first}) == {
+        "url": "data:image/jpeg;base64,/9ggaW1hZ2U="
+    }
+
+
+def test_materialize_returns_objects_without_refs_unchanged():
+    content = [{"type": "text", "text": "hi"}]
+    assert blobs.materialize(content) is content
+
+
+def test_images_are_materialized_only_for_langchain(store):
+    hist = make_history()
+    ref = blobs.put(b"jpeg bytes", mime_type="image/jpeg")
+    raw = history.RawMessage(
+        raw_content=[{"type": "image_url", "image_url": {"url": ref}}],
+        preview="<image>",
+    )
+    hist.add_message(False, content=raw)
+
+    assert "base64" not in hist.serialize()
+    (message,) = hist.output_langchain()
+    assert message.content[0]["image_url"]["url"].startswith("data:image/jpeg;base64,")
+
+    os.remove(blobs._get_blob_path(ref["_blob"]))
+    blobs._load.cache_clear()
+    (message,) = hist.output_langchain()
+    assert message.content == "<image>"
+
+
+def test_long_text_is_serialized_as_reference(store):
+    hist = make_history()
+    text = "x" * (history.BLOB_MIN_CHARS + 1)
+    hist.add_message(False, content=text)
+
+    data = json.loads(hist.serialize())
+    ref = data["current"]["messages"][0]["content"]
+    assert blobs.is_ref(ref)
+
+    restored = history.deserialize_history(hist.serialize(), agent=SimpleNamespace())
+    assert restored.current.messages[0].content == text
+    assert json.loads(restored.serialize()) == data
+
+
+def test_sweep_removes_old_unreferenced_blobs(store):
+    hist = make_history()
+    hist.add_message(False, content="x" * (history.BLOB_MIN_CHARS + 1))
+    used = blobs.find_refs(json.loads(hist.serialize()))
+    unused = blobs.put("removed chat")["_blob"]
+    assert len(used) == 1
+
+    assert blobs.sweep(used) == 0  # too young, may not be saved yet
+    old = 0
+    for digest in (*used, unused):
+        os.utime(blobs._get_blob_path(digest), (old, old))
+    assert blobs.sweep(used) == 1
+    assert not os.path.exists(blobs._get_blob_path(unused))
+    assert os.path.exists(blobs._get_blob_path(next(iter(used))))
+
+    # storing it again makes it young again
+    os.utime(blobs._get_blob_path(next(iter(used))), (old, old))
+    hist.add_message(False, content="x" * (history.BLOB_MIN_CHARS + 1))
+    hist.serialize()
+    assert blobs.sweep(set()) == 0
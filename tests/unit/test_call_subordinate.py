@@ -0,0 +1,131 @@
+"""Unit tests for fan-out delegation to concurrent subordinates."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agent import Agent
+from framework.helpers.log import Log
+from framework.tools import call_subordinate
+from framework.tools.call_subordinate import Delegation
+
+
+class Context:
+    def __init__(self):
+        self.id = "ctx"
+        self.log = Log()
+        self.streaming_agent = None
+
+
+@pytest.fixture
+def superior(monkeypatch):
+    """Agent whose subordinates answer "<message> done" after a delay."""
+    running = {"now": 0, "max": 0}
+
+    def hist_add_user_message(self, message, intervention=False):
+        self.data["task"] = message.message
+
+    async def monologue(self):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        self.context.streaming_agent = self
+        try:
+            delay, _, text = self.data["task"].partition(":")
+            await asyncio.sleep(float(delay))
+            if text == "fail":
+                raise RuntimeError("broken tool")
+            return f"{text} done"
+        finally:
+            running["now"] -= 1
+            self.context.streaming_agent = None  # like Agent.monologue
+
+    monkeypatch.setattr(Agent, "hist_add_user_message", hist_add_user_message)
+    monkeypatch.setattr(Agent, "monologue", monologue)
+    monkeypatch.setattr(
+        Agent, "read_prompt", lambda self, file, **kw: f"{file}: {kw}".strip()
+    )
+    agent = Agent(0, SimpleNamespace(), Context())  # type: ignore
+    agent.running = running
+    return agent
+
+
+def make_tool(agent) -> Delegation:
+    tool = Delegation(agent, "call_subordinate", None, {}, "")
+    tool.log = agent.context.log.log(type="tool", heading="call_subordinate")
+    return tool
+
+
+@pytest.mark.asyncio
+async def test_subordinates_run_concurrently_with_isolated_histories(superior):
+    response = await make_tool(superior).execute(
+        messages=["0.05:a", "0.05:b", "0.05:c"]
+    )
+    subordinates = superior.get_data(Agent.DATA_NAME_SUBORDINATES)
+    assert [sub.agent_name for sub in subordinates] == [
+        "Agent 1.1",
+        "Agent 1.2",
+        "Agent 1.3",
+    ]
+    assert len({id(sub.history) for sub in subordinates}) == 3
+    assert all(
+        sub.get_data(Agent.DATA_NAME_SUPERIOR) is superior for sub in subordinates
+    )
+    assert superior.running["max"] == 3
+    for text in ("a done", "b done", "c done"):
+        assert text in response.message
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_per_context(superior, monkeypatch):
+    monkeypatch.setattr(call_subordinate, "MAX_PARALLEL_SUBORDINATES", 2)
+    monkeypatch.setattr(call_subordinate, "_limits", call_subordinate._limits.copy())
+    call_subordinate._limits.clear()
+    await make_tool(superior).execute(messages=[f"0.02:{i}" for i in range(5)])
+    assert superior.running["max"] == 2
+
+
+@pytest.mark.asyncio
+async def test_quorum_returns_early_and_cancels_the_rest(superior):
+    response = await make_tool(superior).execute(
+        messages=["0.01:fast", "0:fail", "5:slow"], quorum=1
+    )
+    assert "fast done" in response.message
+    assert "broken tool" in response.message
+    assert "fw.msg_subordinate_unfinished.md" in response.message
+    assert superior.running["now"] == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_partial_results(superior):
+    response = await make_tool(superior).execute(
+        messages='["0.01:fast", "5:slow"]', timeout="0.2"
+    )
+    assert "fast done" in response.message
+    assert "timed out" in response.message
+    assert "fast done" in superior.context.log.logs[0].content
+
+
+@pytest.mark.asyncio
+async def test_streaming_agent_stays_on_a_running_subordinate(superior):
+    superior.context.streaming_agent = superior
+    task = asyncio.create_task(
+        make_tool(superior).execute(messages=["0.01:fast", "0.2:slow"])
+    )
+    await asyncio.sleep(0.1)
+    slow = superior.get_data(Agent.DATA_NAME_SUBORDINATES)[1]
+    assert superior.context.streaming_agent is slow
+    await task
+    assert superior.context.streaming_agent is superior
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("quorum", "timeout"), [("all", None), (None, "10s"), ("-1", None)]
+)
+async def test_invalid_quorum_or_timeout_is_reported(superior, quorum, timeout):
+    response = await make_tool(superior).execute(
+        messages=["0:a"], quorum=quorum, timeout=timeout
+    )
+    assert response.message.startswith("Error: ")
+    assert superior.running["max"] == 0
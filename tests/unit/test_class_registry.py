@@ -0,0 +1,80 @@
+"""Unit tests for the cached extension/tool class registry."""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import class_registry, files
+from framework.helpers.extension import Extension
+
+FOLDER = "tmp/tests/registry_extensions"
+
+EXTENSION_SOURCE = """
+from framework.helpers.extension import Extension
+
+
+class {name}(Extension):
+    async def execute(self, **kwargs):
+        return "{value}"
+"""
+
+
+@pytest.fixture
+def ext_folder():
+    abs_folder = files.get_abs_path(FOLDER)
+    os.makedirs(abs_folder, exist_ok=True)
+    write_extension("_10_first", "First", "one")
+    write_extension("_20_second", "Second", "two")
+    class_registry.reload(FOLDER)
+    yield FOLDER
+    files.delete_dir(FOLDER)
+    for name in list(sys.modules):
+        if name.startswith(FOLDER.replace("/", ".")):
+            del sys.modules[name]
+
+
+def write_extension(module: str, name: str, value: str, mtime_offset: int = 0):
+    path = files.get_abs_path(FOLDER, module + ".py")
+    with open(path, "w") as f:
+        f.write(EXTENSION_SOURCE.format(name=name, value=value))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+
+def test_classes_are_loaded_once(ext_folder):
+    with patch(
+        "framework.helpers.class_registry.load_classes_from_folder",
+        wraps=class_registry.load_classes_from_folder,
+    ) as loader:
+        first = class_registry.get_classes(ext_folder, "*", Extension)
+        for _ in range(50):
+            assert class_registry.get_classes(ext_folder, "*", Extension) == first
+    assert [c.__name__ for c in first] == ["First", "Second"]
+    assert loader.call_count == 1
+
+
+def test_changed_files_are_reloaded(ext_folder):
+    classes = class_registry.get_classes(ext_folder, "*", Extension)
+    assert [c.__name__ for c in classes] == ["First", "Second"]
+
+    write_extension("_10_first", "Renamed", "uno", mtime_offset=10**9)
+    write_extension("_15_middle", "Middle", "mid")
+    with patch.object(class_registry, "CHECK_INTERVAL", 0):
+        classes = class_registry.get_classes(ext_folder, "*", Extension)
+    assert [c.__name__ for c in classes] == ["Renamed", "Middle", "Second"]
+
+
+def test_timings_are_recorded():
+    class_registry.reset_timings()
+    class_registry.record_timing("hook/_10_fast", 0.001)
+    class_registry.record_timing("hook/_20_slow", 2.0)
+    class_registry.record_timing("hook/_20_slow", 0.5, error=True)
+
+    timings = class_registry.get_timings()
+    assert list(timings) == ["hook/_20_slow", "hook/_10_fast"]
+    assert timings["hook/_20_slow"]["calls"] == 2
+    assert timings["hook/_20_slow"]["slow"] == 1
+    assert timings["hook/_20_slow"]["errors"] == 1
+    assert timings["hook/_20_slow"]["max_ms"] == 2000.0
@@ -0,0 +1,92 @@
+"""Unit tests for the resumable streaming dirty JSON parser."""
+
+import json
+import random
+
+import pytest
+
+from framework.helpers.dirty_json import DirtyJson, DirtyJsonStream
+
+RESPONSE = (
+    'Planning first.\n{"thoughts": ["check files", "say \\"hi\\" \\u00e9"], '
+    '"tool_name": "code_execution_tool", "tool_args": {"runtime": "python", '
+    '"code": "print(1)\\nx = {\\"a\\": [1, 2]}", "n": -1.5e3, "flag": true, '
+    '"missing": null}}'
+)
+
+
+def stream(text: str, chunk_sizes: list[int]) -> tuple[DirtyJsonStream, list[dict]]:
+    parser = DirtyJsonStream()
+    deltas = []
+    pos = 0
+    for size in chunk_sizes:
+        deltas.append(parser.feed(text[pos : pos + size]))
+        pos += size
+    deltas.append(parser.feed(text[pos:]))
+    parser.close()
+    return parser, deltas
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_chunking_does_not_change_result(seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 7) for _ in range(len(RESPONSE))]
+    parser, _ = stream(RESPONSE, sizes)
+    assert parser.result == DirtyJson.parse_string(RESPONSE)
+    assert parser.done
+
+
+def test_dirty_syntax():
+    text = (
+        '{thoughts: [one, two], tool_name: \'x\', "a": """ multi\nline """, '
+        '// comment\n "b": 1 /* block */, c: [1, [2, {"d": 3}], ], }'
+    )
+    parser, _ = stream(text, [1] * len(text))
+    assert parser.result == {
+        "thoughts": ["one", "two"],
+        "tool_name": "x",
+        "a": "multi\nline",
+        "b": 1,
+        "c": [1, [2, {"d": 3}]],
+    }
+
+
+def test_partial_values_and_deltas():
+    parser = DirtyJsonStream()
+    assert parser.feed('{"tool_name": "resp') == {"tool_name": "resp"}
+    assert parser.feed('onse", ') == {"tool_name": "response"}
+    assert parser.feed('"tool_args": {"text": "Hel') == {"tool_args": {"text": "Hel"}}
+    delta = parser.feed("lo")
+    # only the key touched by the chunk is reported
+    assert list(delta) == ["tool_args"]
+    assert delta["tool_args"] == {"text": "Hello"}
+
+
+def test_lookahead_split_between_chunks():
+    text = '{"a": "line\\nbreak \\u00e9", "b": tRUE, "c": """x"""}'
+    for split in range(1, len(text)):
+        parser = DirtyJsonStream()
+        parser.feed(text[:split])
+        parser.feed(text[split:])
+        assert parser.close() == {"a": "line\nbreak é", "b": True, "c": "x"}
+
+
+def test_truncated_input_is_resolved_on_close():
+    parser = DirtyJsonStream()
+    parser.feed('{"k": tru')
+    assert parser.close() == {"k": "tru"}
+
+
+def test_text_after_first_value_is_ignored():
+    parser = DirtyJsonStream()
+    parser.feed('{"a": 1} trailing {"b": 2}')
+    assert parser.done
+    assert parser.feed("more") == {}
+    assert parser.result == {"a": 1}
+
+
+def test_legacy_feed_uses_stream_parser():
+    parser = DirtyJson()
+    for i in range(0, len(RESPONSE), 5):
+        result = parser.feed(RESPONSE[i : i + 5])
+    assert result == json.loads(RESPONSE[RESPONSE.index("{") :])
@@ -0,0 +1,110 @@
+"""Unit tests for the batched, cached embedding service."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from framework.helpers import embedding_service
+from framework.helpers.embedding_service import EmbeddingService, VectorStore
+
+DIM = 4
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.batches: list[list[str]] = []
+        self.queries: list[str] = []
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        with self.lock:
+            self.queries.append(text)
+        return [-v for v in self._vector(text)]
+
+    @staticmethod
+    def _vector(text):
+        return [float(len(text) + i) for i in range(DIM)]
+
+
+def test_documents_are_cached_on_disk(tmp_path):
+    model = CountingEmbeddings()
+    service = EmbeddingService(model, "model", str(tmp_path))
+    assert service.embed_documents(["a", "bb", "a"]) == [
+        [1.0, 2.0, 3.0, 4.0],
+        [2.0, 3.0, 4.0, 5.0],
+        [1.0, 2.0, 3.0, 4.0],
+    ]
+    assert model.batches == [["a", "bb"]]
+
+    # a new service (restart) reads the vectors from the files
+    model2 = CountingEmbeddings()
+    service2 = EmbeddingService(model2, "model", str(tmp_path))
+    assert service2.embed_documents(["bb"]) == [[2.0, 3.0, 4.0, 5.0]]
+    assert model2.batches == []
+    assert service2.get_stats()["hit_rate"] == 1.0
+    assert service2.get_stats()["stored"] == 2
+
+
+def test_queries_are_cached_apart_from_documents(tmp_path):
+    model = CountingEmbeddings()
+    service = EmbeddingService(model, "model", str(tmp_path))
+    assert service.embed_documents(["abc"]) == [[3.0, 4.0, 5.0, 6.0]]
+    assert service.embed_query("abc") == [-3.0, -4.0, -5.0, -6.0]
+    assert service.embed_query("abc") == [-3.0, -4.0, -5.0, -6.0]
+    assert model.queries == ["abc"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_batch():
+    model = CountingEmbeddings()
+    service = EmbeddingService(model, "model", None)
+    texts = [f"text {i}" for i in range(50)]
+    results = await asyncio.gather(*(service.aembed_documents([t]) for t in texts))
+    assert results == [[model._vector(t)] for t in texts]
+    assert sum(len(batch) for batch in model.batches) == 50
+    assert len(model.batches) < 50
+    stats = service.get_stats()
+    assert stats["misses"] == 50
+    assert stats["avg_batch"] > 1
+
+
+def test_provider_errors_reach_all_callers():
+    class Failing(CountingEmbeddings):
+        def embed_documents(self, texts):
+            raise RuntimeError("quota")
+
+    service = EmbeddingService(Failing(), "model", None)
+    with pytest.raises(RuntimeError, match="quota"):
+        service.embed_documents(["a", "b"])
+    assert service.get_stats()["stored"] == 0
+
+
+def test_store_recovers_from_torn_append(tmp_path):
+    path = str(tmp_path / "model")
+    store = VectorStore(path)
+    keys = [bytes([i]) * 32 for i in range(3)]
+    store.put(keys, np.arange(3 * DIM, dtype=np.float32).reshape(3, DIM))
+    with open(path + ".f32", "ab") as f:
+        f.write(b"\0" * 6)  # half a vector without its key
+
+    reopened = VectorStore(path)
+    assert len(reopened) == 3
+    assert reopened.get(keys[2]).tolist() == [8.0, 9.0, 10.0, 11.0]
+    reopened.put([b"x" * 32], np.ones((1, DIM), dtype=np.float32))
+    assert reopened.get(b"x" * 32).tolist() == [1.0] * DIM
+
+
+def test_get_service_is_shared(tmp_path):
+    first, second = CountingEmbeddings(), CountingEmbeddings()
+    service = embedding_service.get_service(first, "shared", str(tmp_path))
+    assert embedding_service.get_service(second, "shared", str(tmp_path)) is service
+    assert service.model is second
+    assert "shared" in embedding_service.get_stats()
@@ -0,0 +1,98 @@
+"""Unit tests for cached token accounting in chat history records."""
+
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import history
+
+
+def fake_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+@pytest.fixture
+def counter():
+    calls = []
+
+    def count(text: str) -> int:
+        calls.append(text)
+        return fake_tokens(text)
+
+    with patch("framework.helpers.tokens.approximate_tokens", side_effect=count):
+        yield calls
+
+
+def recount(record) -> int:
+    """Token total computed from scratch, for comparison with running totals."""
+    if isinstance(record, history.Message):
+        return record.tokens
+    if isinstance(record, history.History):
+        return (
+            sum(recount(b) for b in record.bulks)
+            + sum(recount(t) for t in record.topics)
+            + recount(record.current)
+        )
+    if record.summary:
+        return fake_tokens(record.summary)
+    children = record.messages if isinstance(record, history.Topic) else record.records
+    return sum(recount(c) for c in children)
+
+
+def test_totals_are_kept_without_recounting(counter):
+    hist = history.History(agent=None)
+    for i in range(20):
+        hist.add_message(ai=i % 2 == 1, content=f"message number {i} " * 10)
+        if i % 5 == 4:
+            hist.new_topic()
+
+    counted = len(counter)
+    assert counted == 20  # each message is tokenized once
+    for _ in range(100):
+        assert hist.get_tokens() == recount(hist)
+        hist.is_over_limit()
+    assert len(counter) == counted
+
+
+def test_summaries_and_message_changes_update_totals(counter):
+    hist = history.History(agent=None)
+    for _ in range(6):
+        hist.add_message(ai=False, content="x" * 400)
+    hist.new_topic()
+    for _ in range(6):
+        hist.add_message(ai=True, content="y" * 400)
+
+    topic = hist.topics[0]
+    topic.summary = "short summary"
+    assert hist.get_topics_tokens() == fake_tokens("short summary")
+
+    hist.current.messages[0].set_summary("trimmed")
+    hist.current.messages[1:4] = [history.Message(False, "merged")]
+    assert hist.get_tokens() == recount(hist)
+
+    # move the topic into a bulk like History.compress_topics does
+    bulk = history.Bulk(history=hist)
+    bulk.records.append(topic)
+    hist.bulks.append(bulk)
+    hist.topics.remove(topic)
+    assert hist.get_topics_tokens() == 0
+    assert hist.get_bulks_tokens() == fake_tokens("short summary")
+
+    topic.summary = ""
+    assert hist.get_tokens() == recount(hist)
+
+    hist.bulks.pop(0)
+    assert hist.get_tokens() == recount(hist) == hist.get_current_topic_tokens()
+
+
+def test_deserialized_history_uses_stored_counts(counter):
+    hist = history.History(agent=None)
+    hist.add_message(ai=False, content="hello " * 50)
+    hist.new_topic()
+    hist.add_message(ai=True, content="world " * 50)
+    data = hist.serialize()
+
+    counter.clear()
+    restored = history.deserialize_history(data, agent=None)
+    assert counter == []
+    assert restored.get_tokens() == hist.get_tokens()
@@ -0,0 +1,153 @@
+"""Unit tests for the pooled, caching async HTTP client."""
+
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from framework.helpers import http_client
+
+
+@pytest.fixture
+async def server():
+    hits = {"page": 0, "plain": 0, "etag": 0, "304": 0, "search": 0}
+
+    async def page(request):
+        hits["page"] += 1
+        return web.Response(
+            text="<p>page</p>",
+            content_type="text/html",
+            headers={"Cache-Control": "max-age=60"},
+        )
+
+    async def plain(request):
+        hits["plain"] += 1
+        return web.Response(text="no cache headers")
+
+    async def etag(request):
+        hits["etag"] += 1
+        if request.headers.get("If-None-Match") == '"v1"':
+            hits["304"] += 1
+            return web.Response(status=304)
+        return web.Response(
+            text="tagged", headers={"ETag": '"v1"', "Cache-Control": "no-cache"}
+        )
+
+    async def no_store(request):
+        return web.Response(text="secret", headers={"Cache-Control": "no-store"})
+
+    async def search(request):
+        hits["search"] += 1
+        data = await request.post()
+        return web.json_response({"q": data["q"]})
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+    app.router.add_get("/plain", plain)
+    app.router.add_get("/etag", etag)
+    app.router.add_get("/no-store", no_store)
+    app.router.add_get("/missing", lambda request: web.Response(status=404))
+    app.router.add_post("/search", search)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    http_client.clear_cache()
+    yield f"http://127.0.0.1:{port}", hits
+    await http_client.close_session()
+    await runner.cleanup()
+    http_client.clear_cache()
+
+
+async def test_get_is_cached_until_ttl(server):
+    base, hits = server
+    first = await http_client.fetch(f"{base}/page")
+    second = await http_client.fetch(f"{base}/page")
+
+    assert first.text() == second.text() == "<p>page</p>"
+    assert (first.from_cache, second.from_cache) == (False, True)
+    assert hits["page"] == 1
+    assert http_client.get_stats()["hits"] == 1
+
+
+async def test_cache_is_kept_per_request_headers(server):
+    base, hits = server
+    await http_client.fetch(f"{base}/page", headers={"Accept-Language": "en"})
+    other = await http_client.fetch(f"{base}/page", headers={"Accept-Language": "de"})
+    same = await http_client.fetch(f"{base}/page", headers={"accept-language": "en"})
+
+    assert not other.from_cache
+    assert same.from_cache
+    assert hits["page"] == 2
+
+
+async def test_stale_response_is_revalidated_with_etag(server):
+    base, hits = server
+    await http_client.fetch(f"{base}/etag")
+    again = await http_client.fetch(f"{base}/etag")
+
+    assert again.from_cache and again.text() == "tagged"
+    assert hits["etag"] == 2 and hits["304"] == 1
+    assert http_client.get_stats()["revalidated"] == 1
+
+
+async def test_uncacheable_responses_are_fetched_every_time(server):
+    base, hits = server
+    await http_client.fetch(f"{base}/no-store")
+    assert not (await http_client.fetch(f"{base}/no-store")).from_cache
+    await http_client.fetch(f"{base}/plain")
+    assert not (await http_client.fetch(f"{base}/plain")).from_cache
+    assert hits["plain"] == 2
+
+    for _ in range(2):
+        response = await http_client.fetch(f"{base}/search", "POST", data={"q": "x"})
+        assert response.status == 200 and response.content == b'{"q": "x"}'
+    assert hits["search"] == 2
+
+    missing = await http_client.fetch(f"{base}/missing")
+    with pytest.raises(http_client.HTTPError):
+        missing.raise_for_status()
+
+
+async def test_session_is_shared_within_a_loop(server):
+    base, _ = server
+    session = http_client.get_session()
+    await http_client.fetch(f"{base}/page", cache=False)
+    assert http_client.get_session() is session
+
+
+def test_loop_owner_closes_the_session():
+    async def request():
+        try:
+            session = http_client.get_session()
+            assert session.trust_env
+            return session
+        finally:
+            await http_client.close_session()
+
+    session = asyncio.run(request())
+    assert session.closed
+    assert session not in http_client._sessions.values()
+
+
+def test_api_requests_close_the_session_of_their_loop():
+    from flask import Flask, request
+
+    from framework.helpers.api import ApiHandler
+
+    class Handler(ApiHandler):
+        async def process(self, input, request):
+            self.session = http_client.get_session()
+            return {}
+
+    app = Flask(__name__)
+    handler = Handler(app, threading.Lock())
+    with app.test_request_context("/", method="POST", json={}):
+        response = asyncio.run(handler.handle_request(request))
+
+    assert response.status_code == 200
+    assert handler.session.closed
@@ -0,0 +1,80 @@
+"""Unit tests for cached image compression."""
+
+import asyncio
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from framework.helpers import images
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with (
+        patch.object(images, "CACHE_FOLDER", str(tmp_path / "cache")),
+        patch.object(images, "_cache", images.OrderedDict()),
+    ):
+        yield tmp_path / "cache"
+
+
+def write_png(path, size=(400, 300), color=(200, 10, 10)):
+    Image.new("RGB", size, color).save(path, format="PNG")
+    return str(path)
+
+
+def count_compressions():
+    return patch.object(images, "compress_image", wraps=images.compress_image)
+
+
+def test_result_is_cached_in_memory_and_on_disk(tmp_path, cache):
+    path = write_png(tmp_path / "a.png")
+
+    with count_compressions() as compress:
+        first = images.compress_image_file(path, max_pixels=10_000, quality=60)
+        assert images.compress_image_file(path, max_pixels=10_000, quality=60) is first
+
+        images._cache.clear()
+        assert images.compress_image_file(path, max_pixels=10_000, quality=60) == first
+
+    assert compress.call_count == 1
+    assert len(os.listdir(cache)) == 1
+    img = Image.open(io.BytesIO(first))
+    assert img.format == "JPEG" and img.width * img.height <= 10_000
+
+
+def test_changed_file_or_settings_compress_again(tmp_path, cache):
+    path = write_png(tmp_path / "a.png")
+
+    with count_compressions() as compress:
+        first = images.compress_image_file(path, max_pixels=10_000, quality=60)
+        images.compress_image_file(path, max_pixels=10_000, quality=30)
+        write_png(path, size=(50, 50), color=(0, 0, 255))
+        os.utime(path, ns=(1, 1))
+        second = images.compress_image_file(path, max_pixels=10_000, quality=60)
+
+    assert compress.call_count == 3
+    assert second != first
+
+
+def test_memory_and_disk_caches_are_bounded(tmp_path, cache):
+    paths = [write_png(tmp_path / f"{i}.png", size=(20, 20)) for i in range(4)]
+    with (
+        patch.object(images, "CACHE_SIZE", 2),
+        patch.object(images, "DISK_CACHE_SIZE", 3),
+    ):
+        for path in paths:
+            images.compress_image_file(path)
+
+    assert len(images._cache) == 2
+    assert len(os.listdir(cache)) == 3
+
+
+async def test_async_compression_runs_off_the_loop(tmp_path, cache):
+    paths = [write_png(tmp_path / f"{i}.png") for i in range(3)]
+    results = await asyncio.gather(
+        *(images.compress_image_file_async(p, max_pixels=10_000) for p in paths)
+    )
+    assert all(data.startswith(b"\xff\xd8") for data in results)
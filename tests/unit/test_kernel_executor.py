@@ -0,0 +1,163 @@
+"""Unit tests for the persistent local Python kernels."""
+
+import threading
+
+import pytest
+
+from framework.executors import kernel_executor
+from framework.executors.kernel_executor import KernelCodeExecutor, KernelPool
+
+
+@pytest.fixture
+def executor():
+    executor = KernelCodeExecutor()
+    yield executor
+    executor.cleanup_all()
+
+
+def test_state_survives_between_snippets(executor):
+    session = executor.create_session()
+    assert executor.execute_code(session, "x = 41")["success"]
+    result = executor.execute_code(session, "x + 1")
+    assert result["success"]
+    assert result["stdout"] == "42\n"
+
+
+def test_output_is_streamed_in_order(executor):
+    session = executor.create_session()
+    chunks = []
+    result = executor.execute_code(
+        session,
+        "import os, sys\nprint('one')\nos.system('echo two')\nprint('three')",
+        on_output=chunks.append,
+    )
+    assert result["stdout"] == "one\ntwo\nthree\n"
+    assert "".join(chunks) == result["stdout"]
+
+
+def test_short_output_is_streamed_while_running(executor):
+    session = executor.create_session()
+    first_chunk = threading.Event()
+    thread = threading.Thread(
+        target=executor.execute_code,
+        args=(session, "import time\nprint('step 1 done')\ntime.sleep(2)"),
+        kwargs={"on_output": lambda text: first_chunk.set()},
+    )
+    thread.start()
+    try:
+        assert first_chunk.wait(1.5)
+    finally:
+        thread.join()
+
+
+def test_errors_keep_the_kernel(executor):
+    session = executor.create_session()
+    executor.execute_code(session, "x = 1")
+    result = executor.execute_code(session, "1 / 0")
+    assert not result["success"]
+    assert result["error"] == "ZeroDivisionError: division by zero"
+    assert 'File "<kernel-' in result["stderr"]
+    assert "kernel_worker" not in result["stderr"]
+
+    result = executor.execute_code(session, "def f(:")
+    assert result["error"].endswith("SyntaxError: invalid syntax")
+    assert executor.execute_code(session, "x")["stdout"] == "1\n"
+
+
+def test_interrupt(executor):
+    session = executor.create_session()
+    executor.execute_code(session, "import time\nx = 1")
+    threading.Timer(0.3, executor.interrupt, [session]).start()
+    result = executor.execute_code(session, "while True: time.sleep(0.01)")
+    assert result["error"] == "KeyboardInterrupt"
+    assert executor.execute_code(session, "x")["stdout"] == "1\n"
+
+
+def test_timeout_interrupts(executor):
+    session = executor.create_session()
+    result = executor.sessions[session].execute(
+        "import time; time.sleep(5)", timeout=0.2
+    )
+    assert result["error"] == "KeyboardInterrupt"
+
+
+def test_dead_kernel_is_replaced(executor):
+    session = executor.create_session()
+    executor.execute_code(session, "x = 1")
+    result = executor.execute_code(session, "import os; os._exit(1)")
+    assert not result["success"]
+    assert "state was lost" in result["error"]
+    result = executor.execute_code(session, "'x' in dir()")
+    assert result["stdout"] == "False\n"
+
+
+def test_sessions_are_isolated(executor):
+    first, second = executor.create_session(), executor.create_session()
+    executor.execute_code(first, "x = 'first'")
+    assert not executor.execute_code(second, "x")["success"]
+
+
+def test_cleanup_only_closes_own_sessions(executor):
+    session = executor.create_session()
+    other = KernelCodeExecutor()
+    other.create_session()
+    other.cleanup_all()
+    assert executor.sessions[session].alive
+    assert executor.execute_code(session, "1")["success"]
+
+
+def test_kernel_ignoring_the_interrupt_is_killed(executor, monkeypatch):
+    monkeypatch.setattr(kernel_executor, "INTERRUPT_GRACE", 0.2)
+    session = executor.create_session()
+    code = (
+        "import signal, time\n"
+        "signal.signal(signal.SIGINT, signal.SIG_IGN)\n"
+        "time.sleep(30)"
+    )
+    result = executor.execute_code(session, code, timeout=0.2)
+    assert not result["success"]
+    assert result["error"] == "Python kernel stopped responding"
+    assert executor.execute_code(session, "1")["success"]
+
+
+def test_pool_hands_out_spares():
+    pool = KernelPool(spares=1)
+    pool.warm()
+    for _ in range(100):
+        if pool._idle:
+            break
+        threading.Event().wait(0.05)
+    spare = pool._idle[0]
+    kernel = pool.acquire()
+    try:
+        assert kernel is spare
+        assert kernel.alive
+    finally:
+        kernel.kill()
+        pool.shutdown()
+
+
+def test_shell_commands(executor):
+    session = executor.create_session()
+    result = executor.execute_code(session, "echo hi && exit 3", "bash")
+    assert result["stdout"] == "hi\n"
+    assert result["exit_code"] == 3
+
+
+def test_manager_uses_kernel_without_docker(monkeypatch):
+    from framework.executors.secure_manager import SecureCodeExecutionManager
+
+    monkeypatch.delenv("E2B_API_KEY", raising=False)
+    monkeypatch.setattr(SecureCodeExecutionManager, "_try_docker", lambda self: False)
+    manager = SecureCodeExecutionManager()
+    assert manager.is_kernel_available()
+    assert not manager.is_secure_execution_available()
+    session = manager.create_session()
+    chunks = []
+    result = manager.execute_code(session, "print(6 * 7)", on_output=chunks.append)
+    assert result["executor_type"] == "kernel"
+    assert "".join(chunks) == "42\n"
+    result = manager.execute_code(session, "import time; time.sleep(5)", timeout=0.2)
+    assert result["error"] == "KeyboardInterrupt"
+    manager.close_session(session)
+    assert session not in manager.executor.sessions
@@ -0,0 +1,127 @@
+"""Unit tests for the incremental knowledge import."""
+
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import knowledge_import
+from framework.helpers.knowledge_import import KnowledgeFile
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_checksum_matches_whole_file_hash(tmp_path):
+    path = tmp_path / "big.txt"
+    data = os.urandom(3 * knowledge_import.CHECKSUM_CHUNK + 17)
+    path.write_bytes(data)
+    assert knowledge_import.calculate_checksum(str(path)) == (
+        hashlib.sha256(data).hexdigest()
+    )
+
+
+def test_unchanged_files_are_not_hashed(tmp_path):
+    write(tmp_path / "a.md", "alpha")
+    write(tmp_path / "b.txt", "beta")
+    write(tmp_path / "ignored.bin", "x")
+    index = {}
+
+    changed = knowledge_import.scan_knowledge(
+        None, str(tmp_path), index, {"area": "main"}
+    )
+    assert sorted(os.path.basename(f.path) for f in changed) == ["a.md", "b.txt"]
+    assert all(f.metadata == {"area": "main"} for f in changed)
+    assert {v["state"] for v in index.values()} == {"changed"}
+
+    for value in index.values():
+        del value["state"]
+    with patch.object(
+        knowledge_import, "calculate_checksum", side_effect=AssertionError
+    ):
+        assert knowledge_import.scan_knowledge(None, str(tmp_path), index) == []
+    assert {v["state"] for v in index.values()} == {"original"}
+
+
+def test_touched_file_with_same_content_is_original(tmp_path):
+    path = tmp_path / "a.md"
+    write(path, "alpha")
+    index = {}
+    knowledge_import.scan_knowledge(None, str(tmp_path), index)
+    index[str(path)].pop("state")
+
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert knowledge_import.scan_knowledge(None, str(tmp_path), index) == []
+    assert index[str(path)]["state"] == "original"
+    assert index[str(path)]["mtime"] == stat.st_mtime + 10
+
+
+def test_mark_removed(tmp_path):
+    write(tmp_path / "a.md", "alpha")
+    index = {"/gone.md": {"file": "/gone.md", "checksum": "x", "ids": ["1"]}}
+    knowledge_import.scan_knowledge(None, str(tmp_path), index)
+    knowledge_import.mark_removed(index)
+    assert index["/gone.md"]["state"] == "removed"
+    assert index[str(tmp_path / "a.md")]["state"] == "changed"
+
+
+def test_load_file_adds_metadata(tmp_path):
+    path = tmp_path / "a.md"
+    write(path, "alpha " * 2000)
+    docs = knowledge_import.load_file(str(path), {"area": "solutions"})
+    assert len(docs) > 1
+    assert all(d.metadata["area"] == "solutions" for d in docs)
+    assert all(d.metadata["source"] == str(path) for d in docs)
+
+
+def thread_executor(use_processes):
+    return ThreadPoolExecutor(max_workers=2)
+
+
+def fake_load(path, metadata):
+    if path.endswith("bad"):
+        raise ValueError("unparseable")
+    return [path]
+
+
+@pytest.mark.asyncio
+async def test_parse_files_bounds_pending_work():
+    files = [KnowledgeFile(f"f{i}", {}) for i in range(20)]
+    submitted = []
+
+    def load(path, metadata):
+        submitted.append(path)
+        return fake_load(path, metadata)
+
+    with (
+        patch.object(knowledge_import, "load_file", load),
+        patch.object(knowledge_import, "_new_executor", thread_executor),
+    ):
+        results = []
+        async for kn_file, docs in knowledge_import.parse_files(files):
+            # the consumer is slow, parsing must not run ahead of it
+            await asyncio.sleep(0.01)
+            ahead = len(submitted) - len(results) - 1
+            assert ahead <= knowledge_import.MAX_PENDING_FILES
+            results.append((kn_file.path, docs))
+
+    assert sorted(results) == sorted((f.path, [f.path]) for f in files)
+
+
+@pytest.mark.asyncio
+async def test_parse_files_reports_failures_as_none():
+    files = [KnowledgeFile("good", {}), KnowledgeFile("bad", {})]
+    with (
+        patch.object(knowledge_import, "load_file", fake_load),
+        patch.object(knowledge_import, "_new_executor", thread_executor),
+    ):
+        results = {
+            f.path: docs async for f, docs in knowledge_import.parse_files(files)
+        }
+    assert results == {"good": ["good"], "bad": None}
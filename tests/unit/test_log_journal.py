@@ -0,0 +1,47 @@
+"""Unit tests for the compacted Log change journal."""
+
+from framework.helpers.log import Log
+
+
+def headings(items: list[dict]) -> list[str]:
+    return [item["heading"] for item in items]
+
+
+def test_output_since_version_returns_changed_items_in_log_order():
+    log = Log()
+    first = log.log(type="user", heading="first")
+    log.log(type="agent", heading="second")
+    version = log.version
+
+    log.log(type="agent", heading="third")
+    first.update(content="edited")
+
+    assert log.version == version + 2
+    assert headings(log.output(since_version=version)) == ["first", "third"]
+    assert headings(log.output()) == ["first", "second", "third"]
+    assert log.output(since_version=log.version) == []
+
+
+def test_streaming_updates_keep_journal_bounded():
+    log = Log()
+    item = log.log(type="agent", heading="stream")
+    for i in range(1000):
+        item.stream(content=str(i % 10))
+
+    assert log.version == 1001
+    assert len(log._item_versions) == 1
+    assert len(log.output(since_version=500)) == 1
+    assert log.output()[0]["content"].endswith("9")
+
+
+def test_reset_starts_a_new_journal():
+    log = Log()
+    log.log(type="user", heading="old")
+    guid = log.guid
+
+    log.reset()
+    log.log(type="user", heading="new")
+
+    assert log.guid != guid
+    assert log.version == 1
+    assert headings(log.output()) == ["new"]
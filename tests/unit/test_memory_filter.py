@@ -0,0 +1,130 @@
+"""Unit tests for compiled memory filters and area prefiltered search."""
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from framework.helpers.memory import Memory, MyFaiss
+from framework.helpers.memory_filter import compile_filter
+
+DIM = 8
+
+
+@pytest.mark.parametrize(
+    "condition, metadata, expected",
+    [
+        ("area == 'main' or area == 'fragments'", {"area": "fragments"}, True),
+        ("area == 'main' or area == 'fragments'", {"area": "solutions"}, False),
+        ("area in ['a', 'b'] and not temp", {"area": "a", "temp": False}, True),
+        ("1 < score <= 3", {"score": 3}, True),
+        ("timestamp.startswith('2024')", {"timestamp": "2024-05-01"}, True),
+        ("area == 'main'", {}, False),  # missing field
+        ("score > 'x'", {"score": 1}, False),  # type error
+        ("len(tags) > 1", {"tags": ["a", "b"]}, True),
+        ("any(t.startswith('x') for t in tags)", {"tags": ["a", "xb"]}, True),
+        ("str(id).endswith('7')", {"id": 17}, True),
+        ("__import__('os')", {}, False),  # only safe builtins
+        ("open('/etc/passwd')", {}, False),
+        ("area ==", {"area": "main"}, False),  # syntax error
+    ],
+)
+def test_filters_match_python_semantics(condition, metadata, expected):
+    assert compile_filter(condition)(metadata) is expected
+
+
+def test_areas_are_extracted():
+    assert compile_filter("area == 'main' or 'fragments' == area").areas == {
+        "main",
+        "fragments",
+    }
+    assert compile_filter("area in ('a', 'b') and area == 'a'").areas == {"a"}
+    assert compile_filter("area == 'a' and score > 1").areas == {"a"}
+    assert compile_filter("area == 'a' or score > 1").areas is None
+    assert compile_filter("area != 'a'").areas is None
+    assert compile_filter("area == 'a' or area in ['b']").area_only
+    assert not compile_filter("area == 'a' and score > 1").area_only
+    assert compile_filter("area == 'main'") is compile_filter("area == 'main'")
+
+
+class VectorEmbeddings(Embeddings):
+    """Text is a comma separated vector."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [float(x) for x in text.split(",")]
+
+
+def vector(i: int) -> str:
+    values = np.zeros(DIM)
+    values[0] = 1.0
+    values[1 + i % (DIM - 1)] = i / 100
+    values /= np.linalg.norm(values)
+    return ",".join(str(v) for v in values)
+
+
+@pytest.fixture
+def db():
+    store = MyFaiss(
+        embedding_function=VectorEmbeddings(),
+        index=faiss.IndexFlatIP(DIM),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.COSINE,
+        relevance_score_fn=Memory._cosine_normalizer,
+    )
+    # one rare area among many main documents
+    docs = [
+        Document(
+            vector(i),
+            metadata={"area": "solutions" if i % 50 == 0 else "main", "n": i},
+        )
+        for i in range(500)
+    ]
+    store.add_documents(docs, ids=[str(i) for i in range(500)])
+    return store
+
+
+def search(db, condition, k=5):
+    return db.similarity_search_with_relevance_scores(
+        vector(7), k=k, filter=Memory._get_comparator(condition), score_threshold=0
+    )
+
+
+def test_rare_area_is_found_beyond_fetch_k(db):
+    results = search(db, "area == 'solutions'", k=20)
+    assert len(results) == 10
+    assert all(doc.metadata["area"] == "solutions" for doc, _ in results)
+
+    # the plain post filter only sees the fetch_k nearest documents
+    plain = db.similarity_search_with_relevance_scores(
+        vector(7), k=20, filter=lambda m: m["area"] == "solutions", score_threshold=0
+    )
+    assert len(plain) < len(results)
+
+
+def test_other_conditions_are_applied_to_fetch_k_area_documents(db):
+    nearest = search(db, "area == 'main'")
+    results = search(db, f"area == 'main' and n != {nearest[0][0].metadata['n']}")
+    assert len(results) == 5
+    assert [doc for doc, _ in results[:4]] == [doc for doc, _ in nearest[1:]]
+
+
+def test_prefilter_follows_inserts_and_deletes(db):
+    assert len(search(db, "area == 'instruments'")) == 0
+
+    db.add_documents(
+        [Document(vector(7), metadata={"area": "instruments"})], ids=["new"]
+    )
+    assert [doc.page_content for doc, _ in search(db, "area == 'instruments'")] == [
+        vector(7)
+    ]
+
+    db.delete(["0", "50", "new"])
+    assert len(search(db, "area == 'instruments'")) == 0
+    assert len(search(db, "area == 'solutions'", k=20)) == 8
@@ -0,0 +1,197 @@
+"""Unit tests for approximate memory indexes built in the background."""
+
+import threading
+import time
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from framework.helpers.memory import Memory, MyFaiss
+from framework.helpers.memory_index import IndexConfig
+
+DIM = 16
+COUNT = 2000
+
+
+def vectors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n, DIM)).astype(np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def new_db(index_type, promote_at=1000):
+    db = MyFaiss(
+        embedding_function=None,
+        index=faiss.IndexFlatIP(DIM),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.COSINE,
+        relevance_score_fn=Memory._cosine_normalizer,
+    )
+    config = IndexConfig(type=index_type, promote_at=promote_at, ivf_nprobe=64, pq_m=8)
+    db.configure_index(config, threading.RLock())
+    return db
+
+
+def add(db, x, start=0):
+    ids = [str(start + i) for i in range(len(x))]
+    areas = ["solutions" if (start + i) % 2 else "main" for i in range(len(x))]
+    db.add_embeddings(
+        [(id, list(map(float, v))) for id, v in zip(ids, x, strict=False)],
+        metadatas=[{"area": area} for area in areas],
+        ids=ids,
+    )
+
+
+def wait_ready(db, query):
+    deadline = time.monotonic() + 30
+    while not db._ann.ready and time.monotonic() < deadline:
+        db.similarity_search_with_score_by_vector(query, k=1)
+        time.sleep(0.02)
+    assert db._ann.ready
+
+
+def ids(results):
+    return [doc.page_content for doc, _ in results]
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf_flat", "ivf_pq"])
+def test_promotes_past_threshold(index_type):
+    db = new_db(index_type)
+    x = vectors(COUNT)
+    add(db, x[:500])
+    db.similarity_search_with_score_by_vector(list(x[0]), k=5)
+    assert db._ann._builder is None  # below promote_at
+
+    add(db, x[500:], start=500)
+    wait_ready(db, list(x[0]))
+
+    # nearest neighbour of a stored vector is the vector itself
+    for i in (0, 700, 1999):
+        assert ids(db.similarity_search_with_score_by_vector(list(x[i]), k=3))[0] == (
+            str(i)
+        )
+
+
+def test_new_vectors_are_searchable_right_away():
+    db = new_db("hnsw")
+    x = vectors(COUNT + 1)
+    add(db, x[:COUNT])
+    wait_ready(db, list(x[0]))
+
+    add(db, x[COUNT:], start=COUNT)
+    assert ids(db.similarity_search_with_score_by_vector(list(x[COUNT]), k=1)) == [
+        str(COUNT)
+    ]
+    assert db._ann._index.ntotal == COUNT + 1
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf_pq"])
+def test_deleted_vectors_are_skipped_without_rebuild(index_type):
+    db = new_db(index_type)
+    x = vectors(COUNT)
+    add(db, x)
+    wait_ready(db, list(x[0]))
+    index = db._ann._index
+
+    db.delete(["5", "500"])
+    assert db._ann.ready
+    assert ids(db.similarity_search_with_score_by_vector(list(x[6]), k=1)) == ["6"]
+    assert ids(db.similarity_search_with_score_by_vector(list(x[1999]), k=1)) == [
+        "1999"
+    ]
+    for i in (5, 500):
+        results = db.similarity_search_with_score_by_vector(list(x[i]), k=5)
+        assert len(results) == 5
+        assert str(i) not in ids(results)
+    results = db.similarity_search_with_score_by_vector(
+        list(x[7]), k=10, filter=Memory._get_comparator("area == 'solutions'")
+    )
+    assert ids(results)[0] == "7"
+    assert all(doc.metadata["area"] == "solutions" for doc, _ in results)
+    assert not db._ann._builder.is_alive()
+    assert db._ann._index is index
+
+
+def test_index_is_rebuilt_after_many_deletes():
+    db = new_db("hnsw")
+    x = vectors(COUNT)
+    add(db, x)
+    wait_ready(db, list(x[0]))
+    index = db._ann._index
+
+    db.delete([str(i) for i in range(0, COUNT, 4)])
+    db.similarity_search_with_score_by_vector(list(x[1]), k=1)
+    db.delete([str(i) for i in range(2, COUNT, 4)])
+    # the old index answers while the new one is built
+    assert ids(db.similarity_search_with_score_by_vector(list(x[1]), k=1)) == ["1"]
+    deadline = time.monotonic() + 30
+    while db._ann._index is index and time.monotonic() < deadline:
+        db.similarity_search_with_score_by_vector(list(x[1]), k=1)
+        time.sleep(0.02)
+    assert db._ann._index.ntotal == COUNT // 2
+    assert ids(db.similarity_search_with_score_by_vector(list(x[3]), k=1)) == ["3"]
+
+
+def test_area_filters_use_index_selector():
+    db = new_db("hnsw")
+    x = vectors(COUNT)
+    add(db, x)
+    wait_ready(db, list(x[0]))
+
+    results = db.similarity_search_with_score_by_vector(
+        list(x[0]), k=10, filter=Memory._get_comparator("area == 'solutions'")
+    )
+    assert len(results) == 10
+    assert all(doc.metadata["area"] == "solutions" for doc, _ in results)
+
+
+def test_serialized_index_is_reused_only_for_same_documents():
+    db = new_db("ivf_pq")
+    x = vectors(COUNT)
+    add(db, x)
+    wait_ready(db, list(x[0]))
+    data = db.serialize_ann()
+    assert data is not None
+
+    same = new_db("ivf_pq")
+    add(same, x)
+    same.load_ann(data)
+    assert same._ann.ready
+
+    # deleted vectors are kept with the index
+    db.delete(["3"])
+    same.delete(["3"])
+    same.load_ann(db.serialize_ann())
+    assert same._ann._positions.deleted == 1
+    assert "3" not in ids(same.similarity_search_with_score_by_vector(list(x[3]), k=5))
+
+    other = new_db("ivf_pq")
+    add(other, x[1:], start=1)
+    other.load_ann(data)
+    assert not other._ann.ready
+
+    flat = new_db("hnsw")
+    add(flat, x)
+    flat.load_ann(data)  # configured type changed
+    assert not flat._ann.ready
+
+
+def test_ivf_is_retrained_in_background_after_doubling():
+    db = new_db("ivf_flat")
+    x = vectors(2 * COUNT)
+    add(db, x[:COUNT])
+    wait_ready(db, list(x[0]))
+    assert db._ann._trained_at == COUNT
+
+    add(db, x[COUNT:], start=COUNT)
+    deadline = time.monotonic() + 30
+    while db._ann._trained_at < 2 * COUNT and time.monotonic() < deadline:
+        # the old index keeps answering meanwhile
+        assert db._ann.search(x[:1], 1) is not None
+        time.sleep(0.02)
+    assert db._ann._trained_at == 2 * COUNT
@@ -0,0 +1,179 @@
+"""Unit tests for write-behind persistence of the memory databases."""
+
+import os
+import time
+from unittest.mock import patch
+
+import faiss
+import pytest
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from framework.helpers import memory_persistence
+from framework.helpers.memory import Memory, MyFaiss
+from framework.helpers.memory_persistence import MemoryPersistence
+
+DIM = 4
+
+
+class HashEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [float((hash(text) >> (8 * i)) % 97 + 1) for i in range(DIM)]
+
+
+def new_db():
+    return MyFaiss(
+        embedding_function=HashEmbeddings(),
+        index=faiss.IndexFlatIP(DIM),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.COSINE,
+        relevance_score_fn=Memory._cosine_normalizer,
+    )
+
+
+def load_db(db_dir):
+    return MyFaiss.load_local(
+        folder_path=db_dir,
+        embeddings=HashEmbeddings(),
+        allow_dangerous_deserialization=True,
+        distance_strategy=DistanceStrategy.COSINE,
+        relevance_score_fn=Memory._cosine_normalizer,
+    )
+
+
+def add(persistence, db, *ids):
+    docs = [Document(f"text {id}", metadata={"id": id}) for id in ids]
+    with persistence.lock:
+        db.add_documents(docs, ids=list(ids))
+        persistence.log_add(docs, list(ids))
+    persistence.mark_dirty(db)
+
+
+def delete(persistence, db, *ids):
+    with persistence.lock:
+        db.delete(list(ids))
+        persistence.log_delete(list(ids))
+    persistence.mark_dirty(db)
+
+
+@pytest.fixture
+def persistence(tmp_path):
+    persistence = MemoryPersistence(str(tmp_path))
+    with patch.dict(memory_persistence._persistences, {str(tmp_path): persistence}):
+        yield persistence
+
+
+def test_changes_are_written_once_settled(persistence, tmp_path):
+    db = new_db()
+    with (
+        patch.object(memory_persistence, "FLUSH_DELAY", 0.2),
+        patch.object(memory_persistence.MemoryPersistence, "_write") as write,
+    ):
+        for i in range(20):
+            add(persistence, db, str(i))
+        assert not persistence.is_due(time.monotonic())
+
+        deadline = time.monotonic() + 5
+        while write.call_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+
+    assert write.call_count == 1
+    assert not (tmp_path / "wal.jsonl").exists()
+
+
+def test_wal_is_replayed_after_crash(persistence, tmp_path):
+    db = new_db()
+    add(persistence, db, "a", "b")
+    persistence.save(db)
+    assert not (tmp_path / "wal.jsonl").exists()
+
+    # crash before the next flush
+    add(persistence, db, "c")
+    delete(persistence, db, "a")
+    with open(tmp_path / "wal.jsonl", "a") as f:
+        f.write('{"op": "add", "docs": [')  # torn last entry
+
+    loaded = load_db(str(tmp_path))
+    assert sorted(loaded.docstore._dict) == ["a", "b"]
+
+    restarted = MemoryPersistence(str(tmp_path))
+    assert restarted.replay(loaded) == 2
+    assert sorted(loaded.docstore._dict) == ["b", "c"]
+    assert loaded.index.ntotal == 2
+    assert not (tmp_path / "wal.jsonl").exists()
+    assert sorted(load_db(str(tmp_path)).docstore._dict) == ["b", "c"]
+
+    # replaying twice changes nothing
+    add(restarted, loaded, "d")
+    assert restarted.replay(loaded) == 1
+    assert loaded.index.ntotal == 3
+
+
+def test_wal_is_applied_to_docs_when_reindexing(persistence, tmp_path):
+    db = new_db()
+    add(persistence, db, "a", "b")
+    persistence.save(db)
+    add(persistence, db, "c")
+    delete(persistence, db, "a")
+
+    restarted = MemoryPersistence(str(tmp_path))
+    docs = dict(load_db(str(tmp_path)).get_all_docs())
+    with patch.object(HashEmbeddings, "embed_documents") as embed:
+        assert restarted.replay_docs(docs) == 2
+    embed.assert_not_called()
+    assert sorted(docs) == ["b", "c"]
+    assert docs["c"].page_content == "text c"
+
+    reindexed = new_db()
+    reindexed.add_documents(list(docs.values()), ids=list(docs))
+    restarted.save(reindexed)
+    assert not (tmp_path / "wal.jsonl").exists()
+
+
+def test_files_are_replaced_atomically(persistence, tmp_path):
+    db = new_db()
+    add(persistence, db, "a")
+    persistence.flush()
+
+    assert sorted(os.listdir(tmp_path)) == ["index.faiss", "index.pkl"]
+    assert list(load_db(str(tmp_path)).docstore._dict) == ["a"]
+
+    add(persistence, db, "b")
+    with (
+        patch.object(memory_persistence, "_write_atomic", side_effect=OSError),
+        pytest.raises(OSError),
+    ):
+        persistence.flush()
+
+    # the old files are intact and the failed flush is retried
+    assert list(load_db(str(tmp_path)).docstore._dict) == ["a"]
+    assert persistence.is_due(time.monotonic() + memory_persistence.MAX_FLUSH_DELAY)
+    persistence.flush()
+    assert sorted(load_db(str(tmp_path)).docstore._dict) == ["a", "b"]
+
+
+def test_changes_during_flush_stay_in_wal(persistence, tmp_path):
+    db = new_db()
+    add(persistence, db, "a")
+    write = MemoryPersistence._write
+
+    def write_and_add(self, *snapshot):
+        write(self, *snapshot)
+        add(persistence, db, "b")  # lands between snapshot and truncation
+
+    with patch.object(MemoryPersistence, "_write", write_and_add):
+        persistence.flush()
+
+    assert list(load_db(str(tmp_path)).docstore._dict) == ["a"]
+    assert (tmp_path / "wal.jsonl").read_text().count("\n") == 1
+
+    loaded = load_db(str(tmp_path))
+    assert MemoryPersistence(str(tmp_path)).replay(loaded) == 1
+    assert sorted(loaded.docstore._dict) == ["a", "b"]
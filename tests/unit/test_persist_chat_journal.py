@@ -0,0 +1,235 @@
+"""Unit tests for the journaled chat persistence."""
+
+import json
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import blobs, history, persist_chat
+from framework.helpers.log import Log
+
+
+@pytest.fixture
+def chats(tmp_path):
+    with (
+        patch.object(persist_chat, "CHATS_FOLDER", str(tmp_path)),
+        patch.object(persist_chat, "_writer", persist_chat._ChatWriter()),
+        patch.object(persist_chat, "_captured_logs", {}),
+        patch("framework.helpers.tokens.approximate_tokens", return_value=1),
+    ):
+        yield tmp_path
+
+
+def make_context(ctxid="ctx") -> SimpleNamespace:
+    agent = SimpleNamespace(number=0, data={"iteration": 0})
+    agent.history = history.History(agent=agent)
+    return SimpleNamespace(
+        id=ctxid,
+        name="chat",
+        created_at=datetime(2024, 1, 1),
+        last_message=datetime(2024, 1, 2),
+        type=SimpleNamespace(value="user"),
+        agent0=agent,
+        streaming_agent=agent,
+        log=Log(),
+    )
+
+
+def load(ctxid="ctx") -> dict:
+    persist_chat.flush_chats(timeout=5)
+    path = persist_chat._get_chat_file_path(ctxid)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    persist_chat._replay_journal(data, persist_chat._get_journal_file_path(ctxid))
+    return data
+
+
+def expected(context) -> dict:
+    data = persist_chat._serialize_context(context)
+    data["log"]["logs"] = [
+        {**item, "no": no} for no, item in enumerate(data["log"]["logs"])
+    ]
+    return data
+
+
+def normalize(data: dict) -> dict:
+    data = {k: v for k, v in data.items() if k != "journal_id"}
+    data["agents"] = [
+        {**agent, "history": json.loads(agent["history"])} for agent in data["agents"]
+    ]
+    return data
+
+
+def iterate(context, i: int):
+    agent = context.agent0
+    agent.data["iteration"] = i
+    agent.history.add_message(False, content=f"question {i}")
+    agent.history.add_message(True, content=f"answer {i}")
+    item = context.log.log(type="agent", heading=f"step {i}")
+    item.update(content="done")
+    persist_chat.save_tmp_chat(context)
+
+
+def test_replay_of_snapshot_and_journal_matches_full_serialization(chats):
+    context = make_context()
+    for i in range(5):
+        iterate(context, i)
+        if i == 2:
+            context.agent0.history.new_topic()
+
+    data = load()
+    journal = persist_chat._get_journal_file_path("ctx")
+    with open(journal, encoding="utf-8") as f:
+        assert len(f.readlines()) == 5  # header + 4 entries after the first snapshot
+    assert normalize(data) == normalize(expected(context))
+
+
+def test_journal_entries_contain_only_changes(chats):
+    context = make_context()
+    for i in range(3):
+        iterate(context, i)
+    persist_chat.flush_chats(timeout=5)
+
+    with open(persist_chat._get_journal_file_path("ctx"), encoding="utf-8") as f:
+        entry = json.loads(f.readlines()[-1])
+    keep, messages = entry["agents"][0]["history"]["current_messages"]
+    assert keep == 4
+    assert [m["content"] for m in messages] == ["question 2", "answer 2"]
+    assert [item["heading"] for item in entry["log"]["logs"]] == ["step 2"]
+
+
+def test_compaction_folds_journal_into_snapshot(chats):
+    context = make_context()
+    with patch.object(persist_chat, "COMPACT_ENTRIES", 3):
+        for i in range(4):
+            iterate(context, i)
+        data = load()
+
+    with open(persist_chat._get_journal_file_path("ctx"), encoding="utf-8") as f:
+        lines = f.readlines()
+    assert lines == [json.dumps({"journal_id": data["journal_id"]}) + "\n"]
+    assert normalize(data) == normalize(expected(context))
+
+
+def test_torn_entry_and_stale_journal_are_ignored(chats):
+    context = make_context()
+    for i in range(3):
+        iterate(context, i)
+    before = load()
+
+    journal = persist_chat._get_journal_file_path("ctx")
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"agents": [')
+    assert normalize(load()) == normalize(before)
+
+    with open(journal, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"journal_id": "other"}) + "\n" + "not json\n")
+    assert len(load()["agents"][0]["history"]) < len(before["agents"][0]["history"])
+
+
+def test_log_reset_and_remove(chats):
+    context = make_context()
+    iterate(context, 0)
+    context.log.reset()
+    iterate(context, 1)
+    assert [i["heading"] for i in load()["log"]["logs"]] == ["step 1"]
+
+    persist_chat.remove_chat("ctx")
+    assert persist_chat.flush_chats(timeout=5)
+    assert not os.path.exists(persist_chat.get_chat_folder_path("ctx"))
+
+
+def test_capture_is_not_shared_with_the_live_context(chats):
+    context = make_context()
+    context.agent0.data["files"] = ["a"]
+    context.agent0.history.add_message(True, content={"tool": "x", "args": []})
+    item = context.log.log(type="tool", heading="x", kvps={"progress": 1})
+    capture = persist_chat._capture_context(context)
+
+    context.agent0.data["files"].append("b")
+    context.agent0.history.current.messages[0].content["args"].append(1)
+    item.kvps["progress"] = 2
+
+    agent = capture["agents"][0]
+    assert agent["data"]["files"] == ["a"]
+    assert agent["history"]["current"]["messages"][0]["content"]["args"] == []
+    assert capture["log"]["logs"][0]["kvps"] == {"progress": 1}
+
+
+def test_loading_chats_sweeps_unused_blobs(chats, tmp_path_factory):
+    store = tmp_path_factory.mktemp("blobs")
+    with patch.object(blobs, "BLOBS_FOLDER", str(store)):
+        context = make_context()
+        text = "x" * (history.BLOB_MIN_CHARS + 1)
+        context.agent0.history.add_message(True, content=text)
+        iterate(context, 0)
+        persist_chat.flush_chats(timeout=5)
+        (used,) = blobs.find_refs(context.agent0.history.to_dict())
+        unused = blobs.put("text of a removed chat")["_blob"]
+        for digest in (used, unused):
+            os.utime(blobs._get_blob_path(digest), (0, 0))
+
+        with patch.object(
+            persist_chat, "_deserialize_context", lambda data: SimpleNamespace(id="ctx")
+        ):
+            assert persist_chat.load_tmp_chats() == ["ctx"]
+        assert os.path.exists(blobs._get_blob_path(used))
+        assert not os.path.exists(blobs._get_blob_path(unused))
+
+
+def test_flush_does_not_start_the_writer(chats):
+    # flush_chats runs at exit, where starting a thread raises
+    assert persist_chat.flush_chats(timeout=5)
+    assert persist_chat._writer._thread is None
+
+    iterate(make_context(), 0)
+    assert persist_chat.flush_chats(timeout=5)
+    assert persist_chat.flush_chats(timeout=0)  # nothing queued anymore
+
+
+def test_fanout_subordinates_round_trip_as_a_tree(chats):
+    context = make_context()
+    agent0 = context.agent0
+
+    def sub(number, superior):
+        agent = SimpleNamespace(number=number, data={"_superior": superior})
+        agent.history = history.History(agent=agent)
+        agent.history.add_message(True, content=f"agent {number}")
+        return agent
+
+    first, second = sub(1, agent0), sub(1, agent0)
+    nested = sub(2, second)
+    chain = sub(1, agent0)
+    agent0.data["_subordinates"] = [first, second]
+    second.data["_subordinate"] = nested
+    agent0.data["_subordinate"] = chain
+
+    data = persist_chat._serialize_context(context)
+    assert [(a["superior"], a["fanout"]) for a in data["agents"]] == [
+        (None, False),
+        (0, True),
+        (0, True),
+        (2, False),
+        (0, False),
+    ]
+
+    ctx = SimpleNamespace(id="ctx", log=Log())
+    restored = persist_chat._deserialize_agents(data["agents"], SimpleNamespace(), ctx)
+    fanout = restored.get_data("_subordinates")
+    assert [a.agent_name for a in fanout] == ["Agent 1.1", "Agent 1.2"]
+    assert fanout[1].get_data("_subordinate").get_data("_superior") is fanout[1]
+    assert restored.get_data("_subordinate").history.output_text().endswith("agent 1")
+
+
+def test_chats_saved_as_chains_still_load(chats):
+    agents = [
+        {"number": 0, "data": {}, "history": ""},
+        {"number": 1, "data": {}, "history": ""},
+    ]
+    ctx = SimpleNamespace(id="ctx", log=Log())
+    restored = persist_chat._deserialize_agents(agents, SimpleNamespace(), ctx)
+    assert restored.get_data("_subordinate").number == 1
+    assert restored.get_data("_subordinates") is None
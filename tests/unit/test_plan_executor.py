@@ -0,0 +1,211 @@
+"""Unit tests for the dependency-aware plan executor."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from agent import Agent, AgentContext
+from framework.helpers import persist_chat, task_management
+from framework.helpers.hierarchical_planner import (
+    HierarchicalPlan,
+    HierarchicalPlanner,
+    PlanningConfig,
+    PlanStatus,
+    Subtask,
+    SubtaskStatus,
+)
+from framework.helpers.plan_executor import PlanExecutor
+from framework.helpers.task_management import SchedulerTaskList, TaskScheduler
+
+GOOD_OUTPUT = "Output meeting the criteria, " * 10
+
+
+def make_plan(edges: dict[str, list[str]]) -> HierarchicalPlan:
+    return HierarchicalPlan(
+        id="plan",
+        objective="test",
+        subtasks=[
+            Subtask(id=id, name=id, description=f"do {id}", dependencies=deps)
+            for id, deps in edges.items()
+        ],
+    )
+
+
+class Runner:
+    """Runs subtasks with a delay, recording the order and the overlap."""
+
+    def __init__(self, delays=None, outputs=None):
+        self.delays = delays or {}
+        self.outputs = outputs or {}
+        self.started: list[str] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, plan, subtask):
+        self.started.append(subtask.id)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(subtask.id, 0.01))
+            output = self.outputs.get(subtask.id, GOOD_OUTPUT)
+            if isinstance(output, Exception):
+                raise output
+            return output
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_independent_subtasks_run_concurrently():
+    plan = make_plan(
+        {"a": [], "b": ["a"], "c": ["a"], "d": ["a"], "e": ["b", "c", "d"]}
+    )
+    runner = Runner(delays={"b": 0.05, "c": 0.05, "d": 0.05})
+
+    status = await PlanExecutor().execute(plan, runner)
+
+    assert status == PlanStatus.COMPLETED
+    assert runner.started[0] == "a"
+    assert set(runner.started[1:4]) == {"b", "c", "d"}
+    assert runner.started[4] == "e"
+    assert runner.max_running == 3
+    assert plan.is_complete()
+
+
+@pytest.mark.asyncio
+async def test_width_limits_concurrency_and_completions_release_dependents():
+    plan = make_plan({"slow": [], "fast": [], "after_fast": ["fast"], "x": []})
+    runner = Runner(delays={"slow": 0.2})
+
+    await PlanExecutor(PlanningConfig(max_parallel_subtasks=2)).execute(plan, runner)
+
+    assert runner.max_running == 2
+    # released by "fast" without waiting for "slow"
+    assert plan.get_subtask_by_id("slow").completed_at > (
+        plan.get_subtask_by_id("after_fast").completed_at
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_evaluation_is_retried_through_the_plan():
+    plan = make_plan({"a": [], "b": ["a"]})
+    outputs = {"a": ""}
+    runner = Runner(outputs=outputs)
+
+    async def run(plan, subtask):
+        output = await runner(plan, subtask)
+        outputs.pop("a", None)  # succeeds on the second attempt
+        return output
+
+    status = await PlanExecutor().execute(plan, run)
+
+    assert status == PlanStatus.COMPLETED
+    prep = plan.subtasks[0]
+    assert prep.name == "Prepare for: a"
+    assert runner.started == ["a", prep.id, "a", "b"]
+    assert plan.get_subtask_by_id("b").status == SubtaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_failure_skips_dependents_and_retries_are_bounded():
+    plan = make_plan({"a": [], "b": ["a"], "c": []})
+    runner = Runner(outputs={"a": RuntimeError("tool crashed")})
+
+    async def run(plan, subtask):
+        if subtask.name.startswith("Prepare"):
+            return GOOD_OUTPUT
+        return await runner(plan, subtask)
+
+    status = await PlanExecutor().execute(plan, run)
+
+    assert status == PlanStatus.FAILED
+    a = plan.get_subtask_by_id("a")
+    assert a.status == SubtaskStatus.FAILED
+    assert a.error == "tool crashed"
+    assert runner.started.count("a") == 3
+    assert plan.get_subtask_by_id("b").status == SubtaskStatus.SKIPPED
+    assert plan.get_subtask_by_id("c").status == SubtaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_unknown_dependency_never_runs():
+    plan = make_plan({"a": [], "b": ["missing"]})
+    status = await PlanExecutor(PlanningConfig(verification_enabled=False)).execute(
+        plan, Runner()
+    )
+    assert status == PlanStatus.FAILED
+    assert plan.get_subtask_by_id("b").status == SubtaskStatus.SKIPPED
+
+
+def test_subtask_index_follows_plan_changes():
+    plan = make_plan({"a": [], "b": ["a"]})
+    assert plan.get_subtask_by_id("b").id == "b"
+    plan.subtasks.insert(0, Subtask(id="c", name="c", description="c"))
+    assert plan.get_subtask_by_id("c").id == "c"
+    assert [s.id for s in plan.get_ready_subtasks()] == ["c", "a"]
+    plan.get_subtask_by_id("a").mark_completed(GOOD_OUTPUT)
+    assert plan.get_next_subtask().id == "c"
+    assert [s.id for s in plan.get_ready_subtasks()] == ["c", "b"]
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    """TaskScheduler on an empty store whose agents answer "<prompt> done"."""
+
+    def hist_add_user_message(self, message, intervention=False):
+        self.data["task"] = message.message
+
+    async def monologue(self):
+        if "fail" in self.data["task"]:
+            raise RuntimeError("broken tool")
+        return f"{self.data['task'].splitlines()[0]} done"
+
+    monkeypatch.setattr(Agent, "hist_add_user_message", hist_add_user_message)
+    monkeypatch.setattr(Agent, "monologue", monologue)
+    monkeypatch.setattr("initialize.initialize_agent", SimpleNamespace)
+    monkeypatch.setattr(task_management, "save_tmp_chat", lambda context: None)
+    contexts = set(AgentContext._contexts)
+    with patch.object(task_management, "SCHEDULER_FOLDER", str(tmp_path)):
+        task_list = SchedulerTaskList()
+        monkeypatch.setattr(SchedulerTaskList, "get", lambda: task_list)
+        with patch.object(TaskScheduler, "_instance", TaskScheduler()):
+            yield TaskScheduler.get()
+    for id in set(AgentContext._contexts) - contexts:
+        AgentContext.remove(id)
+
+
+@pytest.mark.asyncio
+async def test_subtasks_run_as_scheduler_tasks(scheduler, monkeypatch):
+    removed_chats = []
+    monkeypatch.setattr(persist_chat, "remove_chat", removed_chats.append)
+    contexts = set(AgentContext._contexts)
+    plan = make_plan({"a": [], "b": ["a"]})
+    planner = HierarchicalPlanner(PlanningConfig(verification_enabled=False))
+
+    status = await PlanExecutor(planner.config).execute(plan, planner._run_subtask)
+
+    assert status == PlanStatus.COMPLETED
+    assert plan.get_subtask_by_id("b").result == "Execute this subtask: do b done"
+    # one-off tasks and their chats are removed when they finish
+    assert scheduler.get_tasks() == []
+    assert set(AgentContext._contexts) == contexts
+    assert len(removed_chats) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_subtask_run_fails_the_plan(scheduler):
+    plan = make_plan({"fail": [], "after": ["fail"]})
+    planner = HierarchicalPlanner(
+        PlanningConfig(verification_enabled=False, retry_failed_subtasks=False)
+    )
+
+    status = await PlanExecutor(planner.config).execute(plan, planner._run_subtask)
+
+    assert status == PlanStatus.FAILED
+    failed = plan.get_subtask_by_id("fail")
+    assert failed.status == SubtaskStatus.FAILED
+    assert failed.error == "broken tool"
+    assert plan.get_subtask_by_id("after").status == SubtaskStatus.SKIPPED
+    assert scheduler.get_tasks() == []
@@ -0,0 +1,105 @@
+"""Unit tests for the server-sent log stream."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from framework.api import poll_stream
+from framework.helpers.log import Log
+
+
+def parse(message: str) -> tuple[str, str | None, dict]:
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], fields.get("id"), json.loads(fields["data"])
+
+
+def next_event(stream) -> str:
+    # skip retry / heartbeat lines
+    for message in stream:
+        if message.startswith("event:"):
+            return message
+    raise AssertionError("stream ended")
+
+
+@pytest.fixture
+def context():
+    return SimpleNamespace(id="ctx", log=Log(), paused=False)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with patch.object(poll_stream.time, "sleep"):
+        yield
+
+
+def test_sends_only_log_deltas(context):
+    context.log.log(type="user", heading="hello")
+    stream = poll_stream.stream_events(context, include_contexts=False)
+
+    event, id, data = parse(next_event(stream))
+    assert event == "log"
+    assert data["reset"] is True
+    assert [item["heading"] for item in data["logs"]] == ["hello"]
+    assert id == f"{context.log.guid}:1"
+
+    item = context.log.log(type="agent", heading="thinking")
+    item.update(content="a")
+    item.update(content="ab")
+    event, id, data = parse(next_event(stream))
+    assert data["reset"] is False
+    assert [log["content"] for log in data["logs"]] == ["ab"]
+    assert data["log_version"] == 4
+
+
+def test_resumes_from_version_and_detects_reset(context):
+    context.log.log(type="user", heading="one")
+    context.log.log(type="user", heading="two")
+    stream = poll_stream.stream_events(
+        context, log_guid=context.log.guid, log_version=1, include_contexts=False
+    )
+
+    _, _, data = parse(next_event(stream))
+    assert data["reset"] is False
+    assert [item["heading"] for item in data["logs"]] == ["two"]
+
+    context.log.reset()
+    context.log.log(type="user", heading="fresh")
+    _, _, data = parse(next_event(stream))
+    assert data["reset"] is True
+    assert [item["heading"] for item in data["logs"]] == ["fresh"]
+
+
+@pytest.mark.parametrize(
+    ("params", "last_event_id", "position"),
+    [
+        ({"log_guid": "g", "log_version": "3"}, "", ("g", 3)),
+        ({"log_guid": "g", "log_version": "3"}, "h:5", ("h", 5)),
+        ({}, "", ("", 0)),
+        ({"log_guid": "g", "log_version": "x"}, "", ("", 0)),
+        ({"log_guid": "g", "log_version": "3"}, "abc:xyz", ("", 0)),
+        ({}, "g:-2", ("", 0)),
+    ],
+)
+def test_resume_position_falls_back_to_full_resync(params, last_event_id, position):
+    assert poll_stream.resume_position(params, last_event_id) == position
+
+
+def test_context_list_sent_only_on_change(context):
+    fingerprint = ["a"]
+    with (
+        patch.object(poll_stream, "contexts_fingerprint", lambda: tuple(fingerprint)),
+        patch.object(poll_stream, "list_contexts", return_value=([], [])) as listing,
+    ):
+        stream = poll_stream.stream_events(context)
+        assert parse(next_event(stream))[0] == "log"
+        event, _, data = parse(next_event(stream))
+        assert event == "contexts"
+        assert data["version"] == 1
+
+        fingerprint.append("b")
+        event, _, data = parse(next_event(stream))
+        assert event == "contexts"
+        assert data["version"] == 2
+        assert listing.call_count == 2
@@ -0,0 +1,104 @@
+"""Unit tests for compiled prompt templates."""
+
+import os
+
+import pytest
+
+from framework.helpers import files, prompt_cache
+
+
+@pytest.fixture
+def prompt_dirs(tmp_path):
+    custom = tmp_path / "custom"
+    default = tmp_path / "default"
+    custom.mkdir()
+    default.mkdir()
+    (default / "main.md").write_text(
+        'Hello {{name}}!\n{{ include "./part.md" }}\nBye {{missing}}'
+    )
+    (default / "part.md").write_text("```text\npart for {{name}}\n```")
+    (default / "response.json").write_text('```json\n{"tool": {{tool}}, "n": 1}\n```')
+    (custom / "part.md").write_text("custom part for {{name}}")
+    prompt_cache.clear()
+    yield str(custom), str(default)
+    prompt_cache.clear()
+
+
+def bump_mtime(path: str):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_render_matches_read_file(prompt_dirs):
+    _, default = prompt_dirs
+    expected = files.remove_code_fences(
+        files.read_file(os.path.join(default, "main.md"), name="Ann")
+    )
+    compiled = prompt_cache.get_prompt("main.md", default)
+
+    assert compiled.render(name="Ann") == expected
+    assert "{{missing}}" in compiled.render(name="Ann")
+
+
+@pytest.mark.parametrize(
+    ("file", "kwargs"),
+    [
+        ("fw.memories_not_found.md", {"query": "cats"}),
+        ("fw.code.runtime_wrong.md", {"runtime": "rust"}),
+    ],
+)
+def test_json_prompts_render_like_read_file(file, kwargs):
+    prompt_cache.clear()
+    default = files.get_abs_path("prompts/default")
+    expected = files.remove_code_fences(
+        files.read_file(os.path.join(default, file), **kwargs)
+    )
+    compiled = prompt_cache.get_prompt(file, default)
+
+    assert compiled.is_json
+    assert compiled.render(**kwargs) == expected
+
+
+def test_backup_dirs_and_json_templates(prompt_dirs):
+    custom, default = prompt_dirs
+    compiled = prompt_cache.get_prompt("main.md", custom, [default])
+    assert "custom part for Ann" in compiled.render(name="Ann")
+
+    response = prompt_cache.get_prompt("response.json", default)
+    assert response.is_json
+    assert response.parse(tool="memory_load") == files.parse_file(
+        os.path.join(default, "response.json"), tool="memory_load"
+    )
+
+
+def test_hits_misses_and_invalidation(prompt_dirs):
+    _, default = prompt_dirs
+    for _ in range(3):
+        prompt_cache.get_prompt("main.md", default)
+    stats = prompt_cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+    # editing an included file recompiles the including prompt
+    part = os.path.join(default, "part.md")
+    with open(part, "w") as f:
+        f.write("edited {{name}}")
+    bump_mtime(part)
+    compiled = prompt_cache.get_prompt("main.md", default)
+
+    assert "edited Ann" in compiled.render(name="Ann")
+    assert prompt_cache.get_stats()["misses"] == 2
+
+
+def test_override_added_later_is_picked_up(prompt_dirs):
+    custom, default = prompt_dirs
+    compiled = prompt_cache.get_prompt("main.md", custom, [default])
+    assert compiled.render(name="Ann").startswith("Hello Ann!")
+
+    with open(os.path.join(custom, "main.md"), "w") as f:
+        f.write("Hi {{name}}")
+    assert not compiled.is_current()
+    assert (
+        prompt_cache.get_prompt("main.md", custom, [default]).render(name="Ann")
+        == "Hi Ann"
+    )
@@ -0,0 +1,133 @@
+"""Unit tests for the pooled, batching RFC client."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+
+from framework.helpers import http_client, rfc
+
+PASSWORD = "secret"
+
+
+def double(x):
+    return x * 2
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+@pytest.fixture
+async def server():
+    bodies = []
+    state = {"batches": True, "batch_status": None}
+
+    async def handle(request):
+        data = await request.json()
+        bodies.append(data)
+        if "batch" in data and state["batch_status"]:
+            return web.Response(status=state["batch_status"], text="rejected")
+        headers = {rfc.BATCH_HEADER: "1"} if state["batches"] else {}
+        try:
+            result = await rfc.handle_rfc(data, PASSWORD)
+            return web.json_response(result, headers=headers)
+        except Exception as e:
+            return web.Response(status=500, text=str(e))
+
+    app = web.Application()
+    app.router.add_post("/rfc", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    rfc.reset_latency_stats()
+    with (
+        patch.object(rfc, "_batched_urls", set()),
+        patch.object(rfc.dotenv, "get_dotenv_value", return_value=""),
+    ):
+        yield f"http://127.0.0.1:{port}/rfc", bodies, state
+    await http_client.close_session()
+    await runner.cleanup()
+
+
+def call(url, function_name, *args, password=PASSWORD):
+    return rfc.call_rfc(url, password, __name__, function_name, list(args), {})
+
+
+async def test_concurrent_calls_share_one_request(server):
+    url, bodies, _ = server
+    assert await call(url, "double", 0) == 0  # the server announces batches
+    results = await asyncio.gather(*(call(url, "double", i) for i in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert len(bodies) == 2 and len(bodies[1]["batch"]) == 5
+
+
+async def test_errors_are_reported_per_call(server):
+    url, _, _ = server
+    await call(url, "double", 0)
+    ok, failed, bad_hash = await asyncio.gather(
+        call(url, "double", 1),
+        call(url, "fail", "boom"),
+        call(url, "double", 1, password="wrong"),
+        return_exceptions=True,
+    )
+
+    assert ok == 2
+    assert str(failed) == "boom"
+    assert str(bad_hash) == "Invalid RFC hash"
+
+
+async def test_single_call_keeps_plain_format(server):
+    url, bodies, _ = server
+    assert await call(url, "double", 21) == 42
+    assert await call(url, "double", 1) == 2
+    assert "rfc_input" in bodies[0] and "rfc_input" in bodies[1]
+
+
+async def test_servers_without_batches_get_single_calls(server):
+    url, bodies, state = server
+    state["batches"] = False
+    await call(url, "double", 0)
+    results = await asyncio.gather(call(url, "double", 1), call(url, "double", 2))
+
+    assert results == [2, 4]
+    assert all("rfc_input" in body for body in bodies)
+
+
+async def test_rejected_batch_is_sent_as_single_calls(server):
+    url, bodies, state = server
+    await call(url, "double", 0)
+    state.update(batches=False, batch_status=404)  # replaced by an older server
+    results = await asyncio.gather(call(url, "double", 1), call(url, "double", 2))
+
+    assert results == [2, 4]
+    assert len(bodies) == 4  # rejected batch, then one request per call
+    assert url not in rfc._batched_urls
+
+
+async def test_failed_batch_is_not_sent_again(server):
+    url, bodies, state = server
+    await call(url, "double", 0)
+    state["batch_status"] = 502
+    results = await asyncio.gather(
+        call(url, "double", 1), call(url, "double", 2), return_exceptions=True
+    )
+
+    assert all(isinstance(r, rfc.RFCStatusError) and r.status == 502 for r in results)
+    assert len(bodies) == 2
+
+
+async def test_latency_is_recorded_per_function(server):
+    url, _, _ = server
+    await asyncio.gather(call(url, "double", 1), call(url, "double", 2))
+    await asyncio.gather(call(url, "fail", "x"), return_exceptions=True)
+
+    stats = rfc.get_latency_stats()
+    assert stats[f"{__name__}.double"]["count"] == 2
+    assert stats[f"{__name__}.fail"]["count"] == 1
+    assert sum(stats[f"{__name__}.double"]["buckets"].values()) == 2
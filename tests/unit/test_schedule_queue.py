@@ -0,0 +1,161 @@
+"""Unit tests for the event-driven scheduler queue and task index."""
+
+import asyncio
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import task_management
+from framework.helpers.print_style import PrintStyle
+from framework.helpers.schedule_queue import ScheduleQueue
+from framework.helpers.task_management import SchedulerTaskList, TaskScheduler
+from framework.helpers.task_models import (
+    PlannedTask,
+    ScheduledTask,
+    TaskPlan,
+    TaskSchedule,
+    TaskState,
+)
+
+
+def at(seconds: float) -> datetime:
+    return datetime.now(UTC) + timedelta(seconds=seconds)
+
+
+def planned(name: str, *launches: datetime, context_id=None) -> PlannedTask:
+    return PlannedTask.create(
+        name=name,
+        system_prompt="",
+        prompt=name,
+        plan=TaskPlan.create(todo=list(launches)),
+        context_id=context_id,
+    )
+
+
+@pytest.fixture
+def task_list(tmp_path):
+    with patch.object(task_management, "SCHEDULER_FOLDER", str(tmp_path)):
+        yield SchedulerTaskList()
+
+
+def test_queue_pops_in_time_order_and_ignores_replaced_entries():
+    queue = ScheduleQueue()
+    now = time.time()
+    queue.push("a", at(-3))
+    queue.push("b", at(-2))
+    queue.push("c", at(60))
+    queue.push("a", at(-1))  # replaces the earlier entry of "a"
+    queue.remove("b")
+
+    assert queue.pop_due(now) == ["a"]
+    assert queue.pop_due(now) == []
+    assert len(queue) == 1
+    assert queue.next_time() == pytest.approx(now + 60, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_wait_sleeps_until_the_next_run():
+    queue = ScheduleQueue()
+    queue.push("a", at(0.05))
+    start = time.monotonic()
+    await queue.wait(5)
+    assert 0.03 < time.monotonic() - start < 1
+    assert queue.pop_due() == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_push_from_another_thread_wakes_the_waiter():
+    queue = ScheduleQueue()
+    queue.push("later", at(60))
+    timer = threading.Timer(0.05, queue.push, ("now", at(0)))
+    start = time.monotonic()
+    timer.start()
+    await queue.wait(5)
+    assert time.monotonic() - start < 1
+    assert queue.pop_due() == ["now"]
+
+
+def test_lookups_use_the_uuid_and_context_index(task_list):
+    first = planned("first", context_id="chat")
+    second = planned("second", context_id="chat")
+    task_list.add_task(first)
+    task_list.add_task(second)
+    assert task_list.get_task_by_uuid(second.uuid) is second
+    assert task_list.get_tasks_by_context_id("chat") == [first, second]
+
+    task_list.update_task_by_uuid(first.uuid, lambda t: t.update(context_id="other"))
+    assert task_list.get_tasks_by_context_id("chat") == [second]
+    assert task_list.get_tasks_by_context_id("other") == [first]
+
+    assert task_list.remove_task_by_uuid(first.uuid)
+    assert task_list.get_task_by_uuid(first.uuid) is None
+    assert task_list.get_tasks_by_context_id("other") == []
+
+    task_list.tasks = [first]  # replaced wholesale
+    assert task_list.get_task_by_uuid(first.uuid) is first
+    assert task_list.get_task_by_uuid(second.uuid) is None
+
+
+def test_planned_task_is_popped_once_and_queued_again_after_its_run(task_list):
+    task = planned("p", at(-1), at(-0.5), at(60))
+    task_list.add_task(task)
+
+    assert task_list.pop_due_tasks() == [task]
+    assert task_list.pop_due_tasks() == []
+
+    task_list.update_task_by_uuid(
+        task.uuid, lambda t: t.update(state=TaskState.RUNNING)
+    )
+    asyncio.run(task.on_run())
+    task_list.update_task_by_uuid(
+        task.uuid, lambda t: t.update(state=TaskState.FINISHED)
+    )
+    assert task_list.pop_due_tasks() == []  # still in progress
+
+    asyncio.run(task.on_finish())
+    task_list.reschedule(task.uuid)
+    assert task_list.pop_due_tasks() == [task]
+
+
+def test_scheduled_task_is_queued_for_its_next_cron_time(task_list):
+    task = ScheduledTask.create(
+        name="s",
+        system_prompt="",
+        prompt="s",
+        schedule=TaskSchedule(timezone="UTC"),
+    )
+    task_list.add_task(task)
+    next_run = task.get_next_run()
+    assert task_list._queue.next_time() == next_run.timestamp()
+
+    with patch("time.time", return_value=next_run.timestamp()):
+        assert task_list.pop_due_tasks() == [task]
+    assert task_list._queue.next_time() > next_run.timestamp()
+
+
+@pytest.mark.asyncio
+async def test_tick_starts_due_tasks_without_waiting_for_them(task_list):
+    scheduler = TaskScheduler.__new__(TaskScheduler)
+    scheduler._tasks = task_list
+    scheduler._printer = PrintStyle()
+    scheduler._running = set()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def run_task(task, task_context=None):
+        started.set()
+        await release.wait()
+
+    scheduler._run_task = run_task
+    task_list.add_task(planned("p", at(-1)))
+
+    await scheduler.tick()
+    await asyncio.wait_for(started.wait(), 1)
+    assert len(scheduler._running) == 1
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert not scheduler._running
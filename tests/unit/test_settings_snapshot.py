@@ -0,0 +1,90 @@
+"""Unit tests for versioned, read-only settings snapshots."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import settings_manager
+from framework.helpers.settings import api
+from framework.helpers.settings_manager import SettingsManager, SettingsSnapshot
+
+
+@pytest.fixture
+def settings_file(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"chat_model_name": "a", "api_keys": {"OPENAI": "k"}}))
+    with (
+        patch.object(api, "SETTINGS_FILE", str(path)),
+        patch.object(api, "_snapshot", None),
+        patch.object(api, "_listeners", []),
+    ):
+        yield path
+
+
+@pytest.fixture
+def manager(tmp_path):
+    SettingsManager._instance = None
+    with (
+        patch.dict(os.environ, {"DATA_DIR": str(tmp_path)}),
+        patch.object(settings_manager, "CHECK_INTERVAL", 0),
+        patch.object(
+            SettingsManager,
+            "_load_settings",
+            return_value={"chat_model_name": "a", "port": 5000},
+        ),
+    ):
+        yield SettingsManager()
+    SettingsManager._instance = None
+
+
+def test_snapshot_is_read_only_and_copy_is_mutable():
+    snapshot = SettingsSnapshot.freeze({"a": 1, "nested": {"b": [1]}}, version=3)
+
+    with pytest.raises(TypeError):
+        snapshot["a"] = 2
+    with pytest.raises(TypeError):
+        snapshot["nested"]["b"] = 2
+
+    copy = snapshot.copy()
+    copy["nested"]["b"].append(2)
+    assert type(copy) is dict and type(copy["nested"]) is dict
+    assert snapshot["nested"]["b"] == [1]
+    assert json.loads(json.dumps(snapshot)) == {"a": 1, "nested": {"b": [1]}}
+
+
+def test_readers_share_one_snapshot_until_settings_change(settings_file):
+    changes = []
+    api.subscribe(lambda new, old: changes.append((old["chat_model_name"], new)))
+
+    first = api.get_settings()
+    assert api.get_settings() is first
+
+    updated = first.copy()
+    updated["chat_model_name"] = "b"
+    api.set_settings(updated, apply=False)
+
+    second = api.get_settings()
+    assert second is not first
+    assert second["chat_model_name"] == "b"
+    assert second.version == first.version + 1
+    assert changes == [("a", second)]
+
+
+def test_manager_rebuilds_only_on_env_change(manager):
+    changes = []
+    unsubscribe = manager.subscribe(lambda new, old: changes.append(new["port"]))
+
+    first = manager.get_settings()
+    assert manager.get_settings() is first
+
+    with patch.dict(os.environ, {"PORT": "6000"}):
+        overridden = manager.get_settings()
+    assert overridden["port"] == 6000
+    assert manager.version == first.version + 1
+    assert changes == [6000]
+
+    unsubscribe()
+    manager.get_settings()
+    assert changes == [6000]
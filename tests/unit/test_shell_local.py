@@ -0,0 +1,75 @@
+"""Unit tests for the asyncio based local shell session."""
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+from framework.helpers.shell_local import LocalInteractiveSession
+
+pytestmark = pytest.mark.skipif(
+    sys.platform.startswith("win"), reason="commands below need bash"
+)
+
+
+@pytest.fixture
+async def shell():
+    session = LocalInteractiveSession()
+    await session.connect()
+    yield session
+    session.close()
+
+
+@pytest.mark.asyncio
+async def test_reads_command_output_and_stderr(shell):
+    shell.send_command("echo hello; echo oops >&2")
+    output = ""
+    while "oops" not in output:
+        output, partial = await shell.read_output(timeout=5)
+        assert partial is not None
+
+    assert "hello\n" in output
+
+
+@pytest.mark.asyncio
+async def test_read_wakes_on_data_without_blocking_loop(shell):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    shell.send_command("sleep 0.3; echo done")
+    start = time.monotonic()
+    output, _ = await shell.read_output(timeout=5)
+    elapsed = time.monotonic() - start
+    task.cancel()
+
+    assert output == "done\n"
+    assert elapsed < 2  # woke on data, not on the timeout
+    assert ticks >= 10  # loop kept running while waiting
+
+
+@pytest.mark.asyncio
+async def test_no_output_returns_none(shell):
+    output, partial = await shell.read_output(timeout=0.05, reset_full_output=True)
+    assert (output, partial) == ("", None)
+
+
+@pytest.mark.asyncio
+async def test_unread_output_is_bounded():
+    shell = LocalInteractiveSession(max_buffer=1000)
+    await shell.connect()
+    shell.send_command("head -c 100000 /dev/zero | tr '\\0' x; echo; echo end")
+    await asyncio.sleep(0.5)
+
+    output, partial = await shell.read_output(timeout=5)
+    shell.close()
+
+    assert partial is not None and len(partial) <= 1000
+    assert output.endswith("end\n")
+    assert shell.dropped > 0
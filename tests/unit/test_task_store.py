@@ -0,0 +1,118 @@
+"""Unit tests for the SQLite scheduler task store."""
+
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from framework.helpers import task_management
+from framework.helpers.task_management import SchedulerTaskList
+from framework.helpers.task_models import AdHocTask, TaskState
+from framework.helpers.task_serialization import serialize_task
+from framework.helpers.task_store import TaskStore, TaskVersionConflictError
+
+
+def adhoc(name: str, context_id=None) -> AdHocTask:
+    return AdHocTask.create(
+        name=name, system_prompt="", prompt=name, token="1", context_id=context_id
+    )
+
+
+@pytest.fixture
+def folder(tmp_path):
+    with patch.object(task_management, "SCHEDULER_FOLDER", str(tmp_path)):
+        yield tmp_path
+
+
+def test_versions_are_checked_on_update(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    data = serialize_task(adhoc("a"))
+
+    assert store.upsert(data) == 1
+    assert store.upsert({**data, "name": "b"}, version=1) == 2
+    with pytest.raises(TaskVersionConflictError):
+        store.upsert({**data, "name": "c"}, version=1)
+    assert store.get(data["uuid"]) == (2, {**data, "name": "b"})
+
+    assert store.delete([data["uuid"]]) == 1
+    with pytest.raises(TaskVersionConflictError):
+        store.upsert(data, version=2)
+    assert store.get(data["uuid"]) is None
+
+
+def test_tasks_are_found_by_state_and_next_run(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.db"))
+    now = time.time()
+    tasks = [adhoc(name) for name in "abc"]
+    store.upsert_many(
+        [
+            (serialize_task(tasks[0]), now + 60),
+            (serialize_task(tasks[1]), now - 10),
+            (serialize_task(tasks[2]), now - 20),
+        ]
+    )
+    tasks[0].state = TaskState.RUNNING
+    store.upsert(serialize_task(tasks[0]), version=1)
+
+    assert store.find(due_before=now) == [tasks[2].uuid, tasks[1].uuid]
+    assert store.find(state="running") == [tasks[0].uuid]
+    assert store.find(state="idle", due_before=now - 15) == [tasks[2].uuid]
+
+
+def test_changes_are_written_per_task_and_reloaded_incrementally(folder):
+    writer, reader = SchedulerTaskList(), SchedulerTaskList()
+    first, second = adhoc("first", "chat"), adhoc("second")
+    writer.add_task(first)
+    writer.add_task(second)
+    reader.reload()
+    unchanged = reader.get_task_by_uuid(second.uuid)
+
+    writer.update_task_by_uuid(first.uuid, lambda t: t.update(name="renamed"))
+    writer.remove_task_by_uuid(second.uuid)
+    with patch.object(
+        task_management,
+        "deserialize_task",
+        side_effect=task_management.deserialize_task,
+    ) as parse:
+        reader.reload()
+        assert parse.call_count == 1  # only the renamed task
+    assert reader.get_task_by_uuid(first.uuid).name == "renamed"
+    assert reader.get_tasks_by_context_id("chat")[0].name == "renamed"
+    assert reader.get_task_by_uuid(second.uuid) is None
+    assert unchanged not in reader.get_tasks()
+
+
+def test_conflicting_update_is_applied_to_the_current_version(folder):
+    first, second = SchedulerTaskList(), SchedulerTaskList()
+    first.add_task(adhoc("task"))
+    second.reload()
+    task_uuid = first.tasks[0].uuid
+
+    first.update_task_by_uuid(task_uuid, lambda t: t.update(prompt="from first"))
+    updated = second.update_task_by_uuid(
+        task_uuid, lambda t: t.update(state=TaskState.RUNNING)
+    )
+
+    assert updated.prompt == "from first"
+    assert updated.state == TaskState.RUNNING
+    first.reload()
+    assert first.get_task_by_uuid(task_uuid).state == TaskState.RUNNING
+
+
+def test_tasks_json_is_migrated_once(folder):
+    tasks = [adhoc("a"), adhoc("b")]
+    with open(folder / "tasks.json", "w") as f:
+        json.dump([serialize_task(task) for task in tasks] + ["not a task"], f)
+
+    task_list = SchedulerTaskList()
+    task_list.reload()
+    assert {task.name for task in task_list.get_tasks()} == {"a", "b"}
+    assert not os.path.exists(folder / "tasks.json")
+    assert os.path.exists(folder / "tasks.json.migrated")
+
+    task_list.remove_task_by_name("a")
+    reloaded = SchedulerTaskList()
+    reloaded.reload()
+    assert [task.name for task in reloaded.get_tasks()] == ["b"]
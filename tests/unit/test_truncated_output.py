@@ -0,0 +1,39 @@
+"""Unit tests for incremental output truncation."""
+
+import random
+
+from framework.helpers.messages import TruncatedOutput, truncate_text
+
+
+class PromptAgent:
+    def read_prompt(self, file: str, **kwargs) -> str:
+        return f"<< {kwargs['length']} CHARACTERS REMOVED TO SAVE SPACE >>"
+
+
+def test_matches_truncate_text_after_every_append():
+    agent = PromptAgent()
+    rng = random.Random(7)
+    output = TruncatedOutput(agent, threshold=500)
+    full = ""
+    for i in range(300):
+        chunk = "".join(f"line {i}-{j}\n" for j in range(rng.randint(0, 12)))
+        output.append(chunk)
+        full += chunk
+        assert output.text() == truncate_text(agent, full, threshold=500)
+        assert output.last_lines(3) == full.splitlines()[-3:]
+    assert output.length == len(full)
+
+
+def test_short_output_is_not_truncated():
+    output = TruncatedOutput(PromptAgent(), threshold=100)
+    output.append("hello\n")
+    output.append("world\n")
+
+    assert not output.is_truncated()
+    assert output.text() == "hello\nworld\n"
+
+
+def test_zero_threshold_keeps_everything():
+    output = TruncatedOutput(PromptAgent(), threshold=0)
+    output.append("x" * 5000)
+    assert output.text() == "x" * 5000
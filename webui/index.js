@@ -27,6 +27,8 @@ let connectionStatus = false;
 let lastLogVersion = 0;
 let lastLogGuid = "";
 let lastSpokenNo = 0;
+let logStream = null;
+let logStreamFailed = false;
 
 // Message containers for tracking
 const messageContainers = new Map();
@@ -353,6 +355,7 @@ function setContext(id) {
     lastLogVersion = 0;
     lastSpokenNo = 0;
     if (chatHistory) chatHistory.innerHTML = "";
+    if (logStream) openLogStream();
 
     if (chatsSection?.__x?.$data) chatsSection.__x.$data.selected = id;
     if (tasksSection?.__x?.$data) tasksSection.__x.$data.selected = id;
@@ -442,23 +445,7 @@ async function poll() {
         if (!context && response.context) setContext(response.context);
         if (response.context !== context) return false;
 
-        if (lastLogGuid !== response.log_guid) {
-            if (chatHistory) chatHistory.innerHTML = "";
-            // Clear local user messages tracking when chat history is cleared
-            localUserMessages.clear();
-            lastLogVersion = 0;
-            lastLogGuid = response.log_guid;
-        }
-
-        if (lastLogVersion !== response.log_version) {
-            response.logs.forEach((log) => {
-                setMessage(log.id || log.no, log.type, log.heading, log.content, log.temp, log.kvps);
-            });
-            afterMessagesUpdate(response.logs);
-            lastLogVersion = response.log_version;
-            updateProgress(response.log_progress, response.log_progress_active);
-            return true;
-        }
+        return applyLogUpdate(response);
     } catch (error) {
         logger.error("Network error during polling:", error);
         setConnectionStatus(false);
@@ -467,6 +454,63 @@ async function poll() {
     return false;
 }
 
+function applyLogUpdate(response) {
+    if (lastLogGuid !== response.log_guid) {
+        if (chatHistory) chatHistory.innerHTML = "";
+        // Clear local user messages tracking when chat history is cleared
+        localUserMessages.clear();
+        lastLogVersion = 0;
+        lastLogGuid = response.log_guid;
+    }
+
+    if (lastLogVersion !== response.log_version) {
+        response.logs.forEach((log) => {
+            setMessage(log.id || log.no, log.type, log.heading, log.content, log.temp, log.kvps);
+        });
+        afterMessagesUpdate(response.logs);
+        lastLogVersion = response.log_version;
+        updateProgress(response.log_progress, response.log_progress_active);
+        return true;
+    }
+    return false;
+}
+
+// Server push of log updates, replaces polling while the stream is open
+function openLogStream() {
+    closeLogStream();
+    if (!window.EventSource || !context || logStreamFailed) return;
+
+    const params = new URLSearchParams({
+        context: context,
+        log_guid: lastLogGuid,
+        log_version: lastLogVersion,
+        timezone: Intl.DateTimeFormat().resolvedOptions().timeZone,
+        contexts: "false",
+    });
+    const source = new EventSource(`/poll_stream?${params}`);
+    source.addEventListener("log", (event) => {
+        setConnectionStatus(true);
+        const response = JSON.parse(event.data);
+        if (response.context !== context) return;
+        applyLogUpdate(response);
+        updateProgress(response.log_progress, response.log_progress_active);
+    });
+    source.onerror = () => {
+        // EventSource reconnects by itself, a closed source means the endpoint is unusable
+        if (source.readyState === EventSource.CLOSED && logStream === source) {
+            logger.warn("Log stream closed, falling back to polling");
+            logStream = null;
+            logStreamFailed = true;
+        }
+    };
+    logStream = source;
+}
+
+function closeLogStream() {
+    if (logStream) logStream.close();
+    logStream = null;
+}
+
 function afterMessagesUpdate(logs) {
     if (localStorage.getItem("speech") === "true") {
         speakMessages(logs);
@@ -1199,8 +1243,13 @@ function initializeApp() {
             let consecutiveErrors = 0;
 
             async function _doPoll() {
+                if (logStream) {
+                    setTimeout(_doPoll, longInterval);
+                    return;
+                }
                 try {
                     const updated = await poll();
+                    if (context && !logStream) openLogStream();
 
                     if (updated) {
                         shortIntervalCount = shortIntervalPeriod;